@@ -376,15 +376,13 @@ async def chart_data(code: str, days: int = 60, period: str = "daily", user_id:
             vol_ratio = None
             try:
                 # Try to get spot data for volume ratio
-                spot_df = await asyncio.wait_for(
-                    asyncio.to_thread(ak.stock_zh_a_spot_em),
-                    timeout=4
-                )
-                if spot_df is not None and not spot_df.empty:
-                    spot_row = spot_df[spot_df['代码'] == code]
-                    if not spot_row.empty:
+                from app.services.spot_snapshot import spot_snapshot
+                snap = await asyncio.wait_for(spot_snapshot.get(), timeout=4)
+                if snap is not None:
+                    spot_row = snap.get(code)
+                    if spot_row is not None:
                         # 量比 column
-                        vr = spot_row.iloc[0].get('量比')
+                        vr = spot_row.get('量比')
                         if vr:
                             vol_ratio = float(vr)
             except:
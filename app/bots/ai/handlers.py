@@ -5,6 +5,7 @@ from app.services.ai import ai_service
 from app.core.config import settings
 from app.core.telegram_utils import chunk_message, markdown_to_telegram_html, strip_html
 from app.core.logger import Logger
+from app.bots.ai.streaming import StreamingReply
 
 logger = Logger("AIBot")
 
@@ -465,22 +466,27 @@ async def handle_chat(message: types.Message):
         active_chat = next((c for c in chats if c.get("is_active")), None)
         chat_title = active_chat.get("title", "Chat")[:15] if active_chat else "Chat"
         
-        result = await ai_service.chat(message.from_user.id, prompt)
-        response = result.get("content", "")
-        response_chunks = chunk_message(response, max_length=3000)
-        response_html_chunks = [markdown_to_telegram_html(chunk) for chunk in response_chunks] if response_chunks else []
-        first_response = response_html_chunks[0] if response_html_chunks else "No response"
-
-        try:
-            await status.edit_text(first_response, parse_mode="HTML")
-        except Exception:
-            await status.edit_text(strip_html(first_response))
-
-        for chunk_html in response_html_chunks[1:]:
+        if settings.AI_STREAMING:
+            reply = StreamingReply(status)
+            result = await ai_service.chat(message.from_user.id, prompt, on_delta=reply.on_delta)
+            await reply.finish(result.get("content", ""))
+        else:
+            result = await ai_service.chat(message.from_user.id, prompt)
+            response = result.get("content", "")
+            response_chunks = chunk_message(response, max_length=3000)
+            response_html_chunks = [markdown_to_telegram_html(chunk) for chunk in response_chunks] if response_chunks else []
+            first_response = response_html_chunks[0] if response_html_chunks else "No response"
+
             try:
-                await message.answer(chunk_html, parse_mode="HTML")
+                await status.edit_text(first_response, parse_mode="HTML")
             except Exception:
-                await message.answer(strip_html(chunk_html))
+                await status.edit_text(strip_html(first_response))
+
+            for chunk_html in response_html_chunks[1:]:
+                try:
+                    await message.answer(chunk_html, parse_mode="HTML")
+                except Exception:
+                    await message.answer(strip_html(chunk_html))
         
         # Quick actions with context info
         builder = InlineKeyboardBuilder()
@@ -12,6 +12,7 @@ from app.services.ai.advanced_storage import advanced_ai_storage
 from app.core.telegram_utils import chunk_message, escape_html, markdown_to_telegram_html, strip_html
 from app.core.config import settings
 from app.core.logger import Logger
+from app.bots.ai.streaming import StreamingReply
 
 router = Router()
 logger = Logger("AdvancedAIBot")
@@ -891,13 +892,16 @@ async def handle_advanced_chat(message: types.Message, prompt: str):
     status = await message.answer(f"🤔 <b>{agent_name}</b> is thinking...", parse_mode="HTML")
     
     try:
+        reply = StreamingReply(status, show_thinking=show_thinking) if settings.AI_STREAMING else None
         result = await advanced_ai_service.chat(
             message=prompt,
             agent_name=agent_name if not auto_route else None,
             history=history,
             model=model_name,
             provider_key=provider_key,
-            auto_route=auto_route
+            auto_route=auto_route,
+            on_delta=reply.on_delta if reply else None,
+            user_id=message.from_user.id
         )
         
         response_parts = []
@@ -918,25 +922,28 @@ async def handle_advanced_chat(message: types.Message, prompt: str):
         
         # Add main content
         content = result.get("content", "")
-        content_chunks = chunk_message(content, max_length=3000)
-        content_html_chunks = [markdown_to_telegram_html(chunk) for chunk in content_chunks] if content_chunks else []
-
         prefix_html = "\n\n".join(response_parts)
-        if content_html_chunks:
-            first_response = prefix_html + ("\n\n" if prefix_html else "") + content_html_chunks[0]
+        if reply:
+            await reply.finish(content, prefix_html=prefix_html)
         else:
-            first_response = prefix_html or "No response"
+            content_chunks = chunk_message(content, max_length=3000)
+            content_html_chunks = [markdown_to_telegram_html(chunk) for chunk in content_chunks] if content_chunks else []
 
-        try:
-            await status.edit_text(first_response, parse_mode="HTML")
-        except Exception:
-            await status.edit_text(strip_html(first_response))
+            if content_html_chunks:
+                first_response = prefix_html + ("\n\n" if prefix_html else "") + content_html_chunks[0]
+            else:
+                first_response = prefix_html or "No response"
 
-        for chunk_html in content_html_chunks[1:]:
             try:
-                await message.answer(chunk_html, parse_mode="HTML")
+                await status.edit_text(first_response, parse_mode="HTML")
             except Exception:
-                await message.answer(strip_html(chunk_html))
+                await status.edit_text(strip_html(first_response))
+
+            for chunk_html in content_html_chunks[1:]:
+                try:
+                    await message.answer(chunk_html, parse_mode="HTML")
+                except Exception:
+                    await message.answer(strip_html(chunk_html))
         
         # Add footer with context
         metadata = result.get("metadata", {}) or {}
@@ -0,0 +1,111 @@
+"""
+Streaming replies - show an AI answer while it is being generated.
+
+StreamingReply takes the deltas of AiService.chat / AdvancedAiService.chat
+(on_delta) and edits the "Thinking..." status message in place:
+
+- edits are throttled to one per AI_STREAM_EDIT_INTERVAL_MS (Telegram
+  rejects rapid edits of one message)
+- once the text passes max_length the finished part stays in the current
+  message and the rest continues in a new one, so no message exceeds 4096
+- before any content arrives, the last thinking text or running tool is shown
+- finish() renders the complete answer (with prefix_html, e.g. the thinking
+  blockquote) without the cursor
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from aiogram import types
+
+from app.core.config import settings
+from app.core.logger import Logger
+from app.core.telegram_utils import chunk_message, escape_html, markdown_to_telegram_html, strip_html
+
+logger = Logger("AIStream")
+
+CURSOR = " ▌"
+
+# Characters of thinking shown while the answer has not started
+THINKING_PREVIEW = 300
+
+
+class StreamingReply:
+    """Progressive edits of one bot reply; see the module docstring."""
+
+    def __init__(self, status: types.Message, max_length: int = 3000,
+                 interval: Optional[float] = None, show_thinking: bool = True):
+        self.messages: List[types.Message] = [status]
+        self.max_length = max_length
+        self.interval = interval if interval is not None else settings.AI_STREAM_EDIT_INTERVAL_MS / 1000
+        self.show_thinking = show_thinking
+        self.content = ""
+        self.thinking = ""
+        self.tool_status = ""
+        self._sealed = 0  # chunks already final in self.messages[:-1]
+        self._last_edit = 0.0
+        self._shown: Dict[int, str] = {}
+
+    async def on_delta(self, delta: Dict[str, str]):
+        kind, text = delta.get("type"), delta.get("text", "")
+        if kind == "content":
+            self.content += text
+        elif kind == "thinking":
+            self.thinking += text
+        elif kind == "status":
+            self.tool_status = text
+        if time.monotonic() - self._last_edit >= self.interval:
+            await self._render(final=False)
+
+    async def finish(self, content: Optional[str] = None, prefix_html: str = ""):
+        """Show the complete answer (`content` replaces what was streamed)."""
+        if content is not None:
+            self.content = content
+        await self._render(final=True, prefix_html=prefix_html)
+
+    async def _render(self, final: bool, prefix_html: str = ""):
+        self._last_edit = time.monotonic()
+        if not self.content:
+            if final:
+                await self._edit(self.messages[-1], prefix_html or "No response")
+            else:
+                await self._edit(self.messages[-1], self._progress_html())
+            return
+
+        chunks = chunk_message(self.content, max_length=self.max_length)
+        # Chunks before the last are complete: seal them and move on to a new message
+        while self._sealed < len(chunks) - 1:
+            await self._edit(self.messages[-1], self._chunk_html(chunks, self._sealed, prefix_html))
+            self._sealed += 1
+            self.messages.append(await self.messages[-1].answer("…"))
+        if final and prefix_html and self._sealed:
+            await self._edit(self.messages[0], self._chunk_html(chunks, 0, prefix_html))
+        body = self._chunk_html(chunks, len(chunks) - 1, prefix_html)
+        await self._edit(self.messages[-1], body if final else body + CURSOR)
+
+    def _chunk_html(self, chunks: List[str], index: int, prefix_html: str) -> str:
+        html = markdown_to_telegram_html(chunks[index])
+        if index == 0 and prefix_html:
+            return f"{prefix_html}\n\n{html}"
+        return html
+
+    def _progress_html(self) -> str:
+        if self.tool_status:
+            return f"🔧 Running <code>{escape_html(self.tool_status)}</code>..."
+        if self.thinking and self.show_thinking:
+            tail = self.thinking[-THINKING_PREVIEW:]
+            return f"<blockquote>🧠 {escape_html(tail)}</blockquote>"
+        return "🤔 Thinking..."
+
+    async def _edit(self, message: types.Message, html: str):
+        if self._shown.get(id(message)) == html:
+            return
+        try:
+            await message.edit_text(html, parse_mode="HTML")
+        except Exception:
+            # Partial Markdown can produce HTML Telegram rejects; fall back to plain text
+            try:
+                await message.edit_text(strip_html(html))
+            except Exception as e:
+                logger.debug(f"Edit skipped: {e}")
+        self._shown[id(message)] = html
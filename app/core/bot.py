@@ -1,8 +1,10 @@
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
+from telethon.tl import types
 from app.core.config import settings
 from app.core.logger import Logger
-from app.core.rate_limiter import rate_limiter
+from app.core.client_pool import client_pool
+from app.core.send_queue import PRIORITY_ALERT, send_queue
 from app.core.telegram_utils import chunk_message
 import asyncio
 import os
@@ -13,7 +15,7 @@ logger = Logger("TelegramService")
 class TelegramService:
     def __init__(self):
         self.clients = [] # List of TelegramClient
-        self.main_client: TelegramClient = None # References the primary client for sending
+        self.main_client: TelegramClient = None # Primary client (fallback sender, reads)
         self.connected = False
         self._event_handlers = []
         # Store handlers to register on new clients
@@ -61,6 +63,127 @@ class TelegramService:
 
         return (self._normalize_peer_id(peer_id), username)
 
+    def _cached_entity(self, client, peer):
+        """peer's entity among client's synced dialogs (None if absent)."""
+        client_cache = self.entity_cache_by_client.get(id(client), {})
+        peer_id, username = self._extract_peer_identity(peer)
+        if peer_id and str(peer_id).isdigit():
+            return client_cache.get(int(peer_id))
+        if username:
+            name = username.lower()
+            return next(
+                (e for e in client_cache.values() if (getattr(e, "username", None) or "").lower() == name),
+                None,
+            )
+        return None
+
+    def _can_see(self, client, peer) -> bool:
+        """Whether peer is among client's synced dialogs."""
+        return self._cached_entity(client, peer) is not None
+
+    def _can_post(self, client, peer) -> bool:
+        """Whether client may send to peer, judged from its dialog entity.
+
+        Broadcast channels need the creator or an admin with post rights;
+        groups reject accounts banned from sending (personally or by default).
+        """
+        entity = self._cached_entity(client, peer)
+        if entity is None or getattr(entity, "left", False) or getattr(entity, "deactivated", False):
+            return False
+        if getattr(entity, "creator", False):
+            return True
+        admin_rights = getattr(entity, "admin_rights", None)
+        if getattr(entity, "broadcast", False):
+            return bool(admin_rights and admin_rights.post_messages)
+        if admin_rights:
+            return True
+        for rights in (getattr(entity, "banned_rights", None), getattr(entity, "default_banned_rights", None)):
+            if rights and rights.send_messages:
+                return False
+        return True
+
+    def _clients_for(self, peer, *sources):
+        """Clients that may post to peer and see every source (the main client if none)."""
+        clients = [
+            c for c in self.clients
+            if self._can_post(c, peer) and all(self._can_see(c, s) for s in sources)
+        ]
+        return clients or [self.main_client]
+
+    async def _resolve_peer(self, client, peer):
+        """Input peer of `peer` for `client` (access hashes differ per account)."""
+        resolved_peer = peer
+        try:
+            # Convert string to int if it's a numeric string
+            peer_id = peer
+            if isinstance(peer, str):
+                peer_str = peer.strip()
+                if peer_str.lstrip('-').isdigit():
+                    peer_id = int(peer_str)
+
+            # First check our entity cache (populated from dialogs)
+            client_cache = self.entity_cache_by_client.get(id(client), {})
+            if not isinstance(peer_id, (int, str)):
+                # Entity object, possibly seen by another client: use this client's copy
+                entity_id, _ = self._extract_peer_identity(peer_id)
+                if entity_id and str(entity_id).isdigit() and int(entity_id) in client_cache:
+                    resolved_peer = client_cache[int(entity_id)]
+                else:
+                    resolved_peer = await client.get_entity(peer)
+            elif isinstance(peer_id, int) and peer_id in client_cache:
+                resolved_peer = client_cache[peer_id]
+                logger.debug(f"Found peer {peer_id} in entity cache")
+            # For channel IDs with -100 prefix, also check without prefix
+            elif isinstance(peer_id, int) and str(peer_id).startswith('-100'):
+                channel_id = int(str(peer_id)[4:])
+                if channel_id in client_cache:
+                    resolved_peer = client_cache[channel_id]
+                    logger.debug(f"Found channel {channel_id} in entity cache")
+                else:
+                    # Try with PeerChannel
+                    from telethon.tl.types import PeerChannel
+                    resolved_peer = await client.get_entity(PeerChannel(channel_id))
+            else:
+                # Fallback to get_entity
+                resolved_peer = await client.get_entity(peer_id)
+
+            # Convert cached entity to proper input type if needed
+            from telethon.utils import get_input_peer
+            resolved_peer = get_input_peer(resolved_peer)
+        except Exception as e:
+            logger.warn(f"Could not resolve peer {peer}: {e}")
+            # Continue with original peer, might still work for some cases
+        return resolved_peer
+
+    async def _submit(self, peer, send, priority, clients=None, prefer=None):
+        """Queue send(client, input_peer) for peer and run it on a pooled client.
+
+        The main client goes first when eligible (messages keep appearing from
+        the same account); other clients take over on FloodWait or missing rights.
+        """
+        clients = clients or self._clients_for(peer)
+        prefer = prefer or self.main_client
+
+        async def attempt(client):
+            return await send(client, await self._resolve_peer(client, peer))
+
+        return await send_queue.submit(
+            self._peer_key(peer), lambda: client_pool.run(attempt, clients, prefer), priority
+        )
+
+    def send_stats(self) -> dict:
+        """Send queue metrics and per-client throughput."""
+        return {"queue": send_queue.stats(), "clients": client_pool.stats()}
+
+    def _peer_key(self, peer) -> str:
+        """Send queue key of a destination (same chat -> same key)."""
+        peer_id, username = self._extract_peer_identity(peer)
+        if peer_id:
+            return str(peer_id)
+        if username:
+            return username.lower()
+        return str(peer)
+
     async def start(self):
         # Collect all session configs from SESSIONS_JSON
         sessions_to_init = []
@@ -103,6 +226,7 @@ class TelegramService:
                 self.own_user_ids.add(me.id)
                 
                 self.clients.append(client)
+                client_pool.add(client, me.username or me.first_name or str(me.id))
                 
                 # First valid client is the main client
                 if not self.main_client:
@@ -123,6 +247,7 @@ class TelegramService:
 
         if self.clients:
             self.connected = True
+            send_queue.set_accounts(len(self.clients))
             logger.info(f"✅ Total {len(self.clients)} clients connected.")
         else:
             logger.error("❌ No clients could be connected.")
@@ -156,10 +281,12 @@ class TelegramService:
             logger.warn(f"[{index}] Failed to sync dialogs: {e}")
 
     async def stop(self):
+        await send_queue.stop()
         for i, client in enumerate(self.clients):
             await client.disconnect()
             logger.info(f"Disconnected client {i}")
         self.clients = []
+        client_pool.clear()
         self.main_client = None
         self.connected = False
         self.entity_cache_by_client.clear()
@@ -198,48 +325,16 @@ class TelegramService:
         fallback_to_text=True,
         media_source=None,
         media_source_client=None,
+        priority=PRIORITY_ALERT,
     ):
-        """Send message using the MAIN client."""
+        """Send message through send_queue under `priority` (PRIORITY_VIP /
+        PRIORITY_ALERT / PRIORITY_REPORT), on the main client or another
+        connected client allowed to post to the peer.
+        """
         if not self.connected or not self.main_client:
             logger.warn("Cannot send message, no main client connected")
             return
-        
-        # Resolve the peer entity
-        resolved_peer = peer
-        try:
-            # Convert string to int if it's a numeric string
-            peer_id = peer
-            if isinstance(peer, str):
-                peer_str = peer.strip()
-                if peer_str.lstrip('-').isdigit():
-                    peer_id = int(peer_str)
-            
-            # First check our entity cache (populated from dialogs)
-            client_cache = self.entity_cache_by_client.get(id(self.main_client), {})
-            if isinstance(peer_id, int) and peer_id in client_cache:
-                resolved_peer = client_cache[peer_id]
-                logger.debug(f"Found peer {peer_id} in entity cache")
-            # For channel IDs with -100 prefix, also check without prefix
-            elif isinstance(peer_id, int) and str(peer_id).startswith('-100'):
-                channel_id = int(str(peer_id)[4:])
-                if channel_id in client_cache:
-                    resolved_peer = client_cache[channel_id]
-                    logger.debug(f"Found channel {channel_id} in entity cache")
-                else:
-                    # Try with PeerChannel
-                    from telethon.tl.types import PeerChannel
-                    resolved_peer = await self.main_client.get_entity(PeerChannel(channel_id))
-            else:
-                # Fallback to get_entity
-                resolved_peer = await self.main_client.get_entity(peer_id if isinstance(peer_id, int) else peer)
-            
-            # Convert cached entity to proper input type if needed
-            from telethon.utils import get_input_peer
-            resolved_peer = get_input_peer(resolved_peer)
-        except Exception as e:
-            logger.warn(f"Could not resolve peer {peer}: {e}")
-            # Continue with original peer, might still work for some cases
-        
+
         # Process media types
         result = {"media_sent": False, "text_sent": False}
         sendable_file = None
@@ -265,8 +360,13 @@ class TelegramService:
         # If sending file, don't chunk
         if sendable_file:
             try:
-                async with rate_limiter:
-                    await self.main_client.send_message(resolved_peer, message, parse_mode=parse_mode, file=sendable_file)
+                # Media objects carry the receiving account's file reference
+                await self._submit(
+                    peer,
+                    lambda client, target: client.send_message(target, message, parse_mode=parse_mode, file=sendable_file),
+                    priority,
+                    prefer=media_source_client,
+                )
                 logger.debug(f"Sent message with media to {peer}")
                 result["media_sent"] = True
                 return result
@@ -284,13 +384,16 @@ class TelegramService:
                     if isinstance(reupload, (bytes, bytearray)):
                         file_to_send = reupload
                     if file_to_send:
-                        async with rate_limiter:
-                            await self.main_client.send_message(
-                                resolved_peer,
+                        await self._submit(
+                            peer,
+                            lambda client, target: client.send_message(
+                                target,
                                 message,
                                 parse_mode=parse_mode,
                                 file=file_to_send
-                            )
+                            ),
+                            priority,
+                        )
                         logger.info(f"Reuploaded media to {peer}")
                         result["media_sent"] = True
                         return result
@@ -312,16 +415,21 @@ class TelegramService:
         
         for chunk in chunks:
             try:
-                async with rate_limiter:
-                    await self.main_client.send_message(resolved_peer, chunk, parse_mode=parse_mode, link_preview=enable_link_preview)
+                await self._submit(
+                    peer,
+                    lambda client, target, chunk=chunk: client.send_message(
+                        target, chunk, parse_mode=parse_mode, link_preview=enable_link_preview
+                    ),
+                    priority,
+                )
                 result["text_sent"] = True
                 logger.debug(f"Sent message to {peer}")
             except Exception as e:
                 logger.error(f"Failed to send message to {peer}: {e}")
         return result
 
-    async def forward_messages(self, peer, messages, from_peer=None):
-        """Forward messages using the MAIN client."""
+    async def forward_messages(self, peer, messages, from_peer=None, priority=PRIORITY_ALERT):
+        """Forward messages through send_queue on a client that may post to peer and sees from_peer."""
         if not self.connected or not self.main_client:
             logger.warn("Cannot forward messages, no main client connected")
             return
@@ -338,9 +446,20 @@ class TelegramService:
                 )
                 return
 
+        # Message ids are shared by all accounts only in channels/supergroups
+        if from_peer is None:
+            clients = self._clients_for(peer)
+        elif isinstance(from_peer, types.Channel) or str(from_peer).startswith("-100"):
+            clients = self._clients_for(peer, from_peer)
+        else:
+            clients = [self.main_client]
+
+        async def forward(client, target):
+            source = await self._resolve_peer(client, from_peer) if from_peer is not None else None
+            return await client.forward_messages(target, messages, from_peer=source)
+
         try:
-            async with rate_limiter:
-                await self.main_client.forward_messages(peer, messages, from_peer=from_peer)
+            await self._submit(peer, forward, priority, clients=clients)
             logger.debug(f"Forwarded message(s) to {peer}")
         except Exception as e:
             logger.error(f"Failed to forward message(s) to {peer}: {e}")
@@ -0,0 +1,180 @@
+"""
+Client Pool - Spread outbound Telegram calls over all connected clients.
+
+TelegramService connects every session in SESSIONS_JSON, but only the
+main client used to send; a FloodWait on that account stalled every
+forward. ClientPool.run() executes one send on the preferred (main) or
+least busy eligible client instead:
+
+- eligible clients are passed in by the caller (the ones allowed to post
+  to the target, see TelegramService._clients_for)
+- clients in a FloodWait are skipped until it expires; a FloodWait or
+  SlowModeWait moves the call to the next eligible client
+- a write-permission error (not admin, banned, writing forbidden) also
+  moves on; it is raised only when no client could send
+- when every eligible client is waiting, the shortest FloodWait is
+  raised so the send queue pauses that peer and retries later
+- per-client sent / failed / flood-wait counters and sends in the last
+  minute are kept for stats()
+
+Usage:
+    result = await client_pool.run(lambda client: client.send_message(peer, text), clients)
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+from telethon.errors import (
+    ChatAdminRequiredError,
+    ChatSendMediaForbiddenError,
+    ChatWriteForbiddenError,
+    FloodWaitError,
+    SlowModeWaitError,
+    UserBannedInChannelError,
+)
+
+from app.core.logger import Logger
+
+logger = Logger("ClientPool")
+
+# Window (seconds) for the per-client throughput in stats()
+THROUGHPUT_WINDOW = 60
+
+# This account may not write to the chat; another account might
+PERMISSION_ERRORS = (
+    ChatWriteForbiddenError,
+    ChatAdminRequiredError,
+    ChatSendMediaForbiddenError,
+    UserBannedInChannelError,
+)
+
+
+@dataclass
+class ClientState:
+    name: str
+    in_flight: int = 0
+    sent: int = 0
+    failed: int = 0
+    flood_waits: int = 0
+    paused_until: float = 0.0
+    recent: Deque[float] = field(default_factory=deque)
+
+    def record_send(self, now: float):
+        self.sent += 1
+        self.recent.append(now)
+        self._trim(now)
+
+    def sends_per_minute(self, now: float) -> int:
+        self._trim(now)
+        return len(self.recent)
+
+    def _trim(self, now: float):
+        while self.recent and now - self.recent[0] > THROUGHPUT_WINDOW:
+            self.recent.popleft()
+
+
+class ClientPool:
+    """Load balancing and FloodWait failover across Telethon clients."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._states: Dict[int, ClientState] = {}
+
+    def add(self, client, name: str):
+        self._states[id(client)] = ClientState(name)
+
+    def clear(self):
+        self._states.clear()
+
+    def state(self, client) -> ClientState:
+        key = id(client)
+        if key not in self._states:
+            self._states[key] = ClientState(f"client-{len(self._states)}")
+        return self._states[key]
+
+    def order(self, clients: Sequence, prefer=None) -> List:
+        """Clients not in a FloodWait, least busy first (`prefer` first if usable)."""
+        now = self.clock()
+        usable = [c for c in clients if self.state(c).paused_until <= now]
+        usable.sort(key=lambda c: (
+            c is not prefer,
+            self.state(c).in_flight,
+            self.state(c).sends_per_minute(now),
+        ))
+        return usable
+
+    async def run(self, func: Callable[[Any], Awaitable[Any]], clients: Sequence, prefer=None) -> Any:
+        """Run func(client) on the best eligible client, failing over on
+        FloodWait, slow mode and write-permission errors.
+
+        Raises:
+            FloodWaitError: every eligible client is waiting (shortest wait)
+            PERMISSION_ERRORS / SlowModeWaitError: no client could send and none is waiting
+            Exception: whatever func raised otherwise
+        """
+        tried = set()
+        skipped = None  # last slow-mode or permission error
+        while True:
+            candidates = [c for c in self.order(clients, prefer) if id(c) not in tried]
+            if not candidates:
+                wait = self._shortest_wait(clients)
+                if wait is None and skipped is not None:
+                    raise skipped
+                raise FloodWaitError(request=None, capture=wait or 1)
+            client = candidates[0]
+            tried.add(id(client))
+            state = self.state(client)
+            state.in_flight += 1
+            try:
+                result = await func(client)
+            except FloodWaitError as e:
+                state.flood_waits += 1
+                state.paused_until = self.clock() + e.seconds
+                logger.warn(f"⏳ {state.name} flood-limited for {e.seconds}s, failing over")
+                continue
+            except SlowModeWaitError as e:
+                # Slow mode is per account in one chat: only this call moves on
+                logger.debug(f"{state.name} in slow mode ({e.seconds}s), trying next client")
+                skipped = e
+                continue
+            except PERMISSION_ERRORS as e:
+                state.failed += 1
+                logger.warn(f"{state.name} may not write here ({type(e).__name__}), trying next client")
+                skipped = e
+                continue
+            except Exception:
+                state.failed += 1
+                raise
+            finally:
+                state.in_flight -= 1
+            state.record_send(self.clock())
+            return result
+
+    def _shortest_wait(self, clients: Sequence) -> Optional[int]:
+        """Whole seconds until the first paused client is usable (None if none is paused)."""
+        now = self.clock()
+        waits = [self.state(c).paused_until - now for c in clients]
+        waits = [w for w in waits if w > 0]
+        return math.ceil(min(waits)) if waits else None
+
+    def stats(self) -> List[Dict]:
+        """Per-client counters and sends in the last minute."""
+        now = self.clock()
+        return [
+            {
+                "name": s.name,
+                "sent": s.sent,
+                "failed": s.failed,
+                "flood_waits": s.flood_waits,
+                "in_flight": s.in_flight,
+                "sends_last_minute": s.sends_per_minute(now),
+                "paused_for": max(0, round(s.paused_until - now)),
+            }
+            for s in self._states.values()
+        ]
+
+
+client_pool = ClientPool()
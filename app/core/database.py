@@ -1,6 +1,9 @@
 import asyncpg
 import redis.asyncio as redis
 from app.core.config import settings
+from app.core.history_schema import (
+    REDUNDANT_INDEXES, ensure_partitions, migrate_stock_history, relation_kind,
+)
 from app.core.logger import Logger
 
 logger = Logger("Database")
@@ -9,6 +12,8 @@ class Database:
     def __init__(self):
         self.pool: asyncpg.Pool = None
         self.redis: redis.Redis = None
+        # Bytes-mode client for binary payloads (decode_responses=False)
+        self.redis_bytes: redis.Redis = None
 
     async def connect(self):
         # Postgres
@@ -25,6 +30,7 @@ class Database:
             try:
                 self.redis = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
                 await self.redis.ping()
+                self.redis_bytes = redis.from_url(settings.REDIS_URL, decode_responses=False)
                 logger.info("✅ Connected to Redis")
             except Exception as e:
                 logger.error("Failed to connect to Redis", e)
@@ -36,6 +42,8 @@ class Database:
         if self.redis:
             await self.redis.close()
             logger.info("Closed Redis connection")
+        if self.redis_bytes:
+            await self.redis_bytes.close()
 
     async def init_db(self):
         """Initialize database tables if they don't exist."""
@@ -422,23 +430,71 @@ class Database:
             """)
 
             # Stock History Table (A股历史数据 - 5年OHLCV)
+            if settings.STOCK_HISTORY_PARTITIONED:
+                await migrate_stock_history(conn)
+            elif await relation_kind(conn, "stock_history") == "v":
+                # Already migrated: the view over stock_bars keeps serving
+                await ensure_partitions(conn)
+            else:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS stock_history (
+                        id SERIAL PRIMARY KEY,
+                        code TEXT NOT NULL,
+                        date DATE NOT NULL,
+                        open DECIMAL,
+                        high DECIMAL,
+                        low DECIMAL,
+                        close DECIMAL,
+                        volume BIGINT,
+                        turnover DECIMAL,
+                        amplitude DECIMAL,
+                        change_pct DECIMAL,
+                        change_amt DECIMAL,
+                        turnover_rate DECIMAL,
+                        created_at TIMESTAMP DEFAULT NOW(),
+                        UNIQUE(code, date)
+                    );
+                """)
+                await conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_stock_history_date 
+                    ON stock_history(date DESC);
+                """)
+                # (code) and (code, date) duplicate the UNIQUE(code, date) index
+                for index in REDUNDANT_INDEXES:
+                    await conn.execute(f"DROP INDEX IF EXISTS {index}")
+
+            # Stock History data version (bumped by every write, see history_hot)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS stock_history_version (
+                    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                    version BIGINT NOT NULL DEFAULT 0,
+                    max_date DATE,
+                    hot_version BIGINT NOT NULL DEFAULT -1,
+                    hot_depth INT NOT NULL DEFAULT 0,
+                    hot_refreshed_at TIMESTAMPTZ,
+                    updated_at TIMESTAMPTZ DEFAULT NOW()
+                );
+            """)
             await conn.execute("""
-                CREATE TABLE IF NOT EXISTS stock_history (
-                    id SERIAL PRIMARY KEY,
-                    code TEXT NOT NULL,
-                    date DATE NOT NULL,
-                    open DECIMAL,
-                    high DECIMAL,
-                    low DECIMAL,
-                    close DECIMAL,
-                    volume BIGINT,
-                    turnover DECIMAL,
-                    amplitude DECIMAL,
-                    change_pct DECIMAL,
-                    change_amt DECIMAL,
-                    turnover_rate DECIMAL,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    UNIQUE(code, date)
+                INSERT INTO stock_history_version (id, max_date)
+                VALUES (TRUE, (SELECT MAX(date) FROM stock_history))
+                ON CONFLICT (id) DO NOTHING;
+            """)
+
+            # Stock History hot window (latest N bars per code as arrays, oldest first)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS stock_history_hot (
+                    code TEXT PRIMARY KEY,
+                    days INT4[] NOT NULL,
+                    open FLOAT8[],
+                    high FLOAT8[],
+                    low FLOAT8[],
+                    close FLOAT8[],
+                    volume FLOAT8[],
+                    turnover FLOAT8[],
+                    amplitude FLOAT8[],
+                    change_pct FLOAT8[],
+                    turnover_rate FLOAT8[]
                 );
             """)
 
@@ -463,20 +519,6 @@ class Database:
                 ADD COLUMN IF NOT EXISTS concepts TEXT;
             """)
             
-            # Indexes for stock history queries
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_stock_history_code 
-                ON stock_history(code);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_stock_history_date 
-                ON stock_history(date DESC);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_stock_history_code_date 
-                ON stock_history(code, date);
-            """)
-
             # Trading Portfolio Table (模拟交易持仓)
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS trading_portfolio (
@@ -0,0 +1,196 @@
+"""
+History Schema - Partitioned stock_history layout and its migration.
+
+The original stock_history table stores prices as DECIMAL (every read
+decodes Python Decimals), carries a SERIAL id and created_at per bar, and
+has three indexes on top of its UNIQUE(code, date) key, two of which
+duplicate that key.
+
+The partitioned layout:
+
+- stock_bars: RANGE-partitioned by date, one partition per year plus a
+  DEFAULT partition for out-of-range dates
+- DOUBLE PRECISION prices and ratios, BIGINT volume, no id/created_at
+- PRIMARY KEY (code, date) INCLUDE (open, high, low, close, volume,
+  turnover_rate): the (code, date) lookups of the per-stock readers, the
+  scanner loader and the chip window are index-only scans, read
+  backwards for date DESC
+- one (date) index for date-wide queries (latest date, daily counts)
+
+stock_history becomes a plain view over stock_bars. It only renames
+columns, so it is auto-updatable: existing SELECT, DELETE and
+INSERT ... ON CONFLICT (code, date) statements keep working unchanged.
+
+Migration (STOCK_HISTORY_PARTITIONED=true) runs from init_db before any
+service writes: it copies the legacy table year by year, renames it to
+stock_history_legacy and creates the view. The legacy table is kept for
+rollback; drop it once the new layout is verified.
+"""
+
+from datetime import date
+from typing import List, Optional, Tuple
+
+from app.core.logger import Logger
+
+logger = Logger("HistorySchema")
+
+BARS_TABLE = "stock_bars"
+LEGACY_TABLE = "stock_history_legacy"
+VIEW_NAME = "stock_history"
+
+# (column, type) in table order
+BAR_COLUMNS = (
+    ("code", "TEXT NOT NULL"),
+    ("date", "DATE NOT NULL"),
+    ("open", "DOUBLE PRECISION"),
+    ("high", "DOUBLE PRECISION"),
+    ("low", "DOUBLE PRECISION"),
+    ("close", "DOUBLE PRECISION"),
+    ("volume", "BIGINT"),
+    ("turnover", "DOUBLE PRECISION"),
+    ("amplitude", "DOUBLE PRECISION"),
+    ("change_pct", "DOUBLE PRECISION"),
+    ("change_amt", "DOUBLE PRECISION"),
+    ("turnover_rate", "DOUBLE PRECISION"),
+)
+
+# Carried in the primary key index (what the scanner and chip readers load)
+COVERING_COLUMNS = ("open", "high", "low", "close", "volume", "turnover_rate")
+
+# Legacy indexes duplicated by the UNIQUE(code, date) key
+REDUNDANT_INDEXES = ("idx_stock_history_code", "idx_stock_history_code_date")
+
+# Years of history kept (the service backfills 5 years)
+DEFAULT_HISTORY_YEARS = 5
+
+
+def bars_table_ddl() -> str:
+    columns = ",\n            ".join(f"{name} {kind}" for name, kind in BAR_COLUMNS)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {BARS_TABLE} (
+            {columns},
+            PRIMARY KEY (code, date) INCLUDE ({", ".join(COVERING_COLUMNS)})
+        ) PARTITION BY RANGE (date)
+    """
+
+
+def partition_name(year: int) -> str:
+    return f"{BARS_TABLE}_y{year}"
+
+
+def partition_ddl(year: int) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(year)} PARTITION OF {BARS_TABLE} "
+        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    )
+
+
+def view_ddl() -> str:
+    columns = ", ".join(name for name, _ in BAR_COLUMNS)
+    return f"CREATE OR REPLACE VIEW {VIEW_NAME} AS SELECT {columns} FROM {BARS_TABLE}"
+
+
+def copy_year_sql(source: str) -> str:
+    """Copy one year [$1, $2) of the legacy table into stock_bars."""
+    columns = [name for name, _ in BAR_COLUMNS]
+    select = ", ".join(
+        c if c in ("code", "date", "volume") else f"{c}::float8" for c in columns
+    )
+    return f"""
+        INSERT INTO {BARS_TABLE} ({", ".join(columns)})
+        SELECT {select} FROM {source}
+        WHERE date >= $1 AND date < $2
+    """
+
+
+def partition_years(first: Optional[date], last: Optional[date], today: date) -> List[int]:
+    """Yearly partitions to hold [first, last], always covering the last
+    DEFAULT_HISTORY_YEARS years through next year (so new bars never land
+    in the DEFAULT partition)."""
+    start = today.year - DEFAULT_HISTORY_YEARS
+    end = today.year + 1
+    if first:
+        start = min(start, first.year)
+    if last:
+        end = max(end, last.year)
+    return list(range(start, end + 1))
+
+
+def year_bounds(year: int) -> Tuple[date, date]:
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+async def relation_kind(conn, name: str) -> Optional[str]:
+    """pg_class.relkind of a relation: 'r' table, 'p' partitioned, 'v' view."""
+    return await conn.fetchval(
+        "SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", name
+    )
+
+
+async def create_bars_table(conn, years: List[int]):
+    await conn.execute(bars_table_ddl())
+    for year in years:
+        await conn.execute(partition_ddl(year))
+    await conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {BARS_TABLE}_default PARTITION OF {BARS_TABLE} DEFAULT"
+    )
+    await conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{BARS_TABLE}_date ON {BARS_TABLE} (date DESC)"
+    )
+
+
+async def ensure_partitions(conn, today: Optional[date] = None):
+    """Create the yearly partitions through next year."""
+    today = today or date.today()
+    for year in partition_years(None, None, today):
+        try:
+            await conn.execute(partition_ddl(year))
+        except Exception as e:
+            # Fails if the DEFAULT partition already holds rows of that year
+            logger.warn(f"Could not create partition for {year}: {e}")
+
+
+async def migrate_stock_history(conn, today: Optional[date] = None) -> int:
+    """Move stock_history to the partitioned layout (idempotent).
+
+    Returns:
+        Rows copied from the legacy table (0 if nothing to migrate)
+    """
+    today = today or date.today()
+    kind = await relation_kind(conn, VIEW_NAME)
+
+    if kind == "v":
+        await ensure_partitions(conn, today)
+        return 0
+
+    if kind is None:
+        await create_bars_table(conn, partition_years(None, None, today))
+        await conn.execute(view_ddl())
+        logger.info("Created partitioned stock_history")
+        return 0
+
+    first, last = await conn.fetchrow(f"SELECT MIN(date), MAX(date) FROM {VIEW_NAME}")
+    years = partition_years(first, last, today)
+    await create_bars_table(conn, years)
+    # A previous run may have stopped midway; stock_bars has no other writers yet
+    await conn.execute(f"TRUNCATE {BARS_TABLE}")
+
+    copied = 0
+    if first:
+        for year in range(first.year, last.year + 1):
+            async with conn.transaction():
+                status = await conn.execute(copy_year_sql(VIEW_NAME), *year_bounds(year))
+            rows = int(status.split()[-1])
+            copied += rows
+            logger.info(f"stock_history migration: {year} copied {rows} rows")
+
+    async with conn.transaction():
+        await conn.execute(f"ALTER TABLE {VIEW_NAME} RENAME TO {LEGACY_TABLE}")
+        await conn.execute(view_ddl())
+    await conn.execute(f"ANALYZE {BARS_TABLE}")
+
+    logger.info(
+        f"✅ stock_history migrated to {BARS_TABLE} ({copied} rows, {len(years)} yearly partitions); "
+        f"old table kept as {LEGACY_TABLE}"
+    )
+    return copied
@@ -0,0 +1,296 @@
+"""
+Send Queue - Outbound Telegram dispatcher with per-peer token buckets.
+
+Telegram rate-limits sends per chat, with a lower ceiling across all chats
+of an account. A single global lock that spaces every call makes a burst
+to one channel (a scanner report split into ten chunks) delay a VIP
+forward to another.
+
+SendQueue keeps:
+
+- one token bucket per destination peer (TG_SEND_PEER_INTERVAL_MS,
+  TG_SEND_PEER_BURST) and one global bucket (RATE_LIMIT_MS,
+  TG_SEND_GLOBAL_BURST, per sending account)
+- a priority queue per peer: PRIORITY_VIP > PRIORITY_ALERT >
+  PRIORITY_REPORT, FIFO within a priority. The global token always goes
+  to the best-priority send that its peer bucket allows.
+- at most one send in flight per peer (so chunks keep their order) and
+  MAX_IN_FLIGHT overall
+- FloodWait / SlowModeWait handling: only the affected peer is paused for
+  the requested time and the send is retried first; waits longer than
+  MAX_FLOOD_WAIT fail the send
+- queue depth, latency (enqueue to delivery) and error counters, see stats()
+
+Usage:
+    result = await send_queue.submit(peer_key, lambda: client.send_message(peer, text),
+                                     priority=PRIORITY_REPORT)
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from telethon.errors import FloodWaitError, SlowModeWaitError
+
+from app.core.config import settings
+from app.core.logger import Logger
+
+logger = Logger("SendQueue")
+
+# Priority classes (lower is sent first)
+PRIORITY_VIP = 0
+PRIORITY_ALERT = 1
+PRIORITY_REPORT = 2
+PRIORITY_NAMES = {PRIORITY_VIP: "vip", PRIORITY_ALERT: "alert", PRIORITY_REPORT: "report"}
+
+# Sends in flight across all peers
+MAX_IN_FLIGHT = 4
+
+# Longest FloodWait (seconds) that is waited out instead of failing the send
+MAX_FLOOD_WAIT = 600
+
+# Latencies kept for stats()
+LATENCY_SAMPLES = 500
+
+SendFunc = Callable[[], Awaitable[Any]]
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available."""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1.0
+
+
+@dataclass(order=True)
+class _Send:
+    priority: int
+    seq: int
+    func: SendFunc = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class _Peer:
+    bucket: TokenBucket
+    queue: List[_Send] = field(default_factory=list)
+    paused_until: float = 0.0
+    busy: bool = False
+
+    def ready_in(self, now: float) -> float:
+        return max(self.paused_until - now, self.bucket.wait_time(now), 0.0)
+
+
+class SendQueue:
+    """Priority dispatcher for outbound Telegram calls; see the module docstring."""
+
+    def __init__(
+        self,
+        global_interval_ms: int,
+        global_burst: int,
+        peer_interval_ms: int,
+        peer_burst: int,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.peer_rate = 1000.0 / max(1, peer_interval_ms)
+        self.peer_burst = peer_burst
+        self.max_in_flight = max_in_flight
+        self._global_rate = 1000.0 / max(1, global_interval_ms)
+        self._global_burst = global_burst
+        self._global = TokenBucket(self._global_rate, global_burst, clock())
+        self._peers: Dict[str, _Peer] = {}
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+
+    async def submit(self, peer_key: str, func: SendFunc, priority: int = PRIORITY_ALERT) -> Any:
+        """Queue one Telegram call for peer_key and wait for its result.
+
+        Raises whatever the call raised (after FloodWait retries).
+        """
+        self._ensure_running()
+        peer = self._peers.get(peer_key)
+        if peer is None:
+            peer = self._peers[peer_key] = _Peer(TokenBucket(self.peer_rate, self.peer_burst, self.clock()))
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(peer.queue, _Send(priority, next(self._seq), func, future, self.clock()))
+        self._wake.set()
+        return await future
+
+    async def stop(self):
+        """Stop dispatching; queued sends fail with CancelledError."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for peer in self._peers.values():
+            for send in peer.queue:
+                send.future.cancel()
+            peer.queue.clear()
+
+    def set_accounts(self, count: int):
+        """Scale the global bucket to `count` sending accounts (the global
+        limit is per account; sends are spread over them by ClientPool)."""
+        count = max(1, count)
+        self._global.rate = self._global_rate * count
+        self._global.capacity = max(1.0, float(self._global_burst * count))
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch_loop())
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Dispatching
+    # ─────────────────────────────────────────────────────────────────────────
+
+    async def _dispatch_loop(self):
+        while True:
+            # Cleared before dispatching, so a send finishing meanwhile re-wakes the loop
+            self._wake.clear()
+            try:
+                timeout = self._dispatch_ready()
+            except Exception as e:
+                logger.error(f"Send dispatch error: {e}")
+                timeout = 1.0
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_ready(self) -> Optional[float]:
+        """Start every send allowed now; return seconds until the next one
+        could be (None if nothing is waiting on a bucket or a pause)."""
+        now = self.clock()
+        while self._in_flight < self.max_in_flight:
+            best_key = None
+            best = None
+            for key, peer in self._peers.items():
+                self._drop_cancelled(peer)
+                if peer.busy or not peer.queue or peer.ready_in(now) > 0:
+                    continue
+                if best is None or peer.queue[0] < best:
+                    best_key, best = key, peer.queue[0]
+            if best is None:
+                break
+            global_wait = self._global.wait_time(now)
+            if global_wait > 0:
+                return global_wait
+            peer = self._peers[best_key]
+            send = heapq.heappop(peer.queue)
+            self._global.take(now)
+            peer.bucket.take(now)
+            peer.busy = True
+            self._in_flight += 1
+            asyncio.create_task(self._deliver(best_key, peer, send))
+
+        waits = [
+            peer.ready_in(now) for peer in self._peers.values()
+            if peer.queue and not peer.busy
+        ]
+        if not waits or self._in_flight >= self.max_in_flight:
+            return None
+        return max(min(waits), 0.001)
+
+    @staticmethod
+    def _drop_cancelled(peer: _Peer):
+        # Callers that gave up (cancelled submit) leave a done future behind
+        while peer.queue and peer.queue[0].future.done():
+            heapq.heappop(peer.queue)
+
+    async def _deliver(self, key: str, peer: _Peer, send: _Send):
+        try:
+            result = await send.func()
+        except (FloodWaitError, SlowModeWaitError) as e:
+            if e.seconds <= MAX_FLOOD_WAIT:
+                # Pause this peer only; the send keeps its place at the head
+                self.flood_waits += 1
+                peer.paused_until = self.clock() + e.seconds
+                heapq.heappush(peer.queue, send)
+                logger.warn(f"⏳ {type(e).__name__} for {key}: pausing this peer {e.seconds}s")
+            else:
+                self._fail(send, e)
+        except Exception as e:
+            self._fail(send, e)
+        else:
+            self.sent += 1
+            self._latencies.append(self.clock() - send.enqueued_at)
+            if not send.future.done():
+                send.future.set_result(result)
+        finally:
+            peer.busy = False
+            self._in_flight -= 1
+            self._wake.set()
+
+    def _fail(self, send: _Send, error: Exception):
+        self.failed += 1
+        if not send.future.done():
+            send.future.set_exception(error)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Metrics
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict:
+        """Queue depth per priority, paused peers, counters and latency (ms)."""
+        now = self.clock()
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for peer in self._peers.values():
+            for send in peer.queue:
+                queued[PRIORITY_NAMES.get(send.priority, str(send.priority))] += 1
+        latencies = sorted(self._latencies)
+        return {
+            "queued": queued,
+            "in_flight": self._in_flight,
+            "peers": len(self._peers),
+            "paused_peers": sum(1 for p in self._peers.values() if p.paused_until > now),
+            "sent": self.sent,
+            "failed": self.failed,
+            "flood_waits": self.flood_waits,
+            "latency_ms": {
+                "avg": round(1000 * sum(latencies) / len(latencies), 1) if latencies else None,
+                "p95": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+                "max": round(1000 * latencies[-1], 1) if latencies else None,
+            },
+        }
+
+
+send_queue = SendQueue(
+    global_interval_ms=settings.RATE_LIMIT_MS or 1000,
+    global_burst=settings.TG_SEND_GLOBAL_BURST,
+    peer_interval_ms=settings.TG_SEND_PEER_INTERVAL_MS,
+    peer_burst=settings.TG_SEND_PEER_BURST,
+)
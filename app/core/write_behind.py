@@ -0,0 +1,178 @@
+"""
+Write-Behind Buffer - Batched background inserts for append-only tables.
+
+The monitor handler awaited one INSERT into monitor_message_cache and one
+INSERT per allowed user into monitor_history for every message, and the
+history fetch inserted chat_history row by row. A WriteBehindBuffer takes
+rows in memory and writes them in batches:
+
+- add() only appends; a background task flushes when WRITE_BEHIND_BATCH_ROWS
+  rows are pending or WRITE_BEHIND_FLUSH_MS after the last flush
+- batches go out as one binary COPY (copy_records_to_table). Tables with
+  an ON CONFLICT rule COPY into a temporary staging table and merge with
+  one INSERT ... SELECT in the same transaction, like history_ingest.
+- when WRITE_BEHIND_MAX_PENDING rows are waiting, add() blocks until a
+  flush makes room (backpressure instead of unbounded memory)
+- a failed batch is retried row by row, so one bad row only loses itself
+- stop() / leaving the `async with` block flushes what is left
+
+Columns not passed get their defaults, so created_at is the flush time
+(at most one flush interval after the add).
+
+Usage:
+    buffer = WriteBehindBuffer("monitor_history", ("user_id", "source", "source_id", "message"))
+    await buffer.start()
+    await buffer.add(("1", "News", "-100123", "text"))
+    await buffer.stop()
+
+    async with WriteBehindBuffer("chat_history", columns, on_conflict="ON CONFLICT (source_id, message_id) DO NOTHING",
+                                 pool=db.pool) as buffer:
+        await buffer.add(row)
+"""
+
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.logger import Logger
+
+logger = Logger("WriteBehind")
+
+
+class WriteBehindBuffer:
+    """Batches rows for one table; see the module docstring."""
+
+    def __init__(
+        self,
+        table: str,
+        columns: Sequence[str],
+        on_conflict: Optional[str] = None,
+        pool=None,
+        batch_rows: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.table = table
+        self.columns = tuple(columns)
+        self.on_conflict = on_conflict
+        self.pool = pool
+        self.batch_rows = batch_rows or settings.WRITE_BEHIND_BATCH_ROWS
+        self.flush_interval = flush_interval if flush_interval is not None else settings.WRITE_BEHIND_FLUSH_MS / 1000
+        self.max_pending = max(self.batch_rows, max_pending or settings.WRITE_BEHIND_MAX_PENDING)
+        self.written = 0
+        self.dropped = 0
+        self._rows: List[Tuple] = []
+        self._flush_now = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    async def add(self, row: Sequence):
+        """Queue one row (in `columns` order); waits only while the buffer is full."""
+        while len(self._rows) >= self.max_pending:
+            self._space.clear()
+            self._flush_now.set()
+            await self._space.wait()
+        self._rows.append(tuple(row))
+        if len(self._rows) >= self.batch_rows:
+            self._flush_now.set()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write everything still pending."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+        return False
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"{self.table}: flush error: {e}")
+
+    async def flush(self):
+        """Write all pending rows now, in batches of batch_rows."""
+        async with self._lock:
+            while self._rows:
+                batch = self._rows[:self.batch_rows]
+                del self._rows[:len(batch)]
+                self._space.set()
+                await self._write(batch)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Writing
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _insert_sql(self) -> str:
+        placeholders = ", ".join(f"${i}" for i in range(1, len(self.columns) + 1))
+        sql = f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES ({placeholders})"
+        return f"{sql} {self.on_conflict}" if self.on_conflict else sql
+
+    async def _write(self, batch: List[Tuple]):
+        pool = self.pool or db.pool
+        if not pool:
+            self.dropped += len(batch)
+            logger.warn(f"{self.table}: database not connected, dropped {len(batch)} rows")
+            return
+        try:
+            async with pool.acquire() as conn:
+                if self.on_conflict is None:
+                    await conn.copy_records_to_table(self.table, records=batch, columns=self.columns)
+                else:
+                    await self._merge(conn, batch)
+            self.written += len(batch)
+            logger.debug(f"{self.table}: wrote {len(batch)} rows")
+        except Exception as e:
+            logger.warn(f"{self.table}: batch of {len(batch)} rows failed ({e}), writing rows one by one")
+            await self._write_rows(pool, batch)
+
+    async def _merge(self, conn, batch: List[Tuple]):
+        columns = ", ".join(self.columns)
+        stage = f"{self.table}_stage"
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {self.table} WITH NO DATA"
+            )
+            await conn.copy_records_to_table(stage, records=batch, columns=self.columns)
+            await conn.execute(
+                f"INSERT INTO {self.table} ({columns}) SELECT {columns} FROM {stage} {self.on_conflict}"
+            )
+
+    async def _write_rows(self, pool, batch: List[Tuple]):
+        sql = self._insert_sql()
+        for row in batch:
+            try:
+                await pool.execute(sql, *row)
+                self.written += 1
+            except Exception as e:
+                self.dropped += 1
+                logger.warn(f"{self.table}: dropped row: {e}")
@@ -10,6 +10,8 @@ from app.core.config import settings
 from app.core.logger import Logger
 from app.core.database import db
 from app.core.bot import telegram_service
+from app.providers.response_cache import response_cache
+from app.providers.transport import provider_transport
 from app.bots.dispatcher import bot_dispatcher
 from app.services.monitor import monitor_service
 from app.services.rss import rss_service
@@ -122,6 +124,14 @@ async def lifespan(app: FastAPI):
     # Initialize Data Providers
     await data_provider.initialize()
 
+    # Spot Snapshot (shared realtime quotes for all intraday services)
+    from app.services.spot_snapshot import spot_snapshot
+    await spot_snapshot.start()
+
+    # Job Scheduler (timed jobs of all services, on the trading calendar)
+    from app.services.scheduler import job_scheduler
+    await job_scheduler.start()
+
     # Market Report Service (市场分析报告)
     if settings.ENABLE_MARKET_REPORT:
         await market_report_service.initialize()
@@ -398,7 +408,12 @@ async def lifespan(app: FastAPI):
     await burst_monitor_service.stop()
     from app.services.market_ai_analysis import market_ai_analysis_service
     await market_ai_analysis_service.stop()
+    from app.services.scheduler import job_scheduler
+    await job_scheduler.stop()
+    from app.services.spot_snapshot import spot_snapshot
+    await spot_snapshot.stop()
     await data_provider.shutdown()
+    await provider_transport.aclose()
     await watchdog_service.stop()
     await db.disconnect()
 
@@ -440,7 +455,10 @@ async def health_check():
     return {
         "status": "ok", 
         "telegram": telegram_service.connected,
-        "monitor": monitor_service.is_running
+        "monitor": monitor_service.is_running,
+        "telegram_send": telegram_service.send_stats(),
+        "llm_http": provider_transport.stats(),
+        "llm_cache": response_cache.stats(),
     }
 
 @app.post("/webhook/{bot_name}")
@@ -1,9 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional
+import json
+import httpx
 from app.core.config import settings
 from app.core.logger import Logger
+from app.providers.response_cache import response_cache
+from app.providers.transport import provider_transport
+
+# Receives each streamed delta: {"type": "thinking" | "content" | "status", "text": str}
+DeltaCallback = Callable[[Dict[str, str]], Awaitable[None]]
 
 class BaseProvider(ABC):
+    # Sampling temperature sent by call(); None means the API default. Part of the cache key.
+    temperature: Optional[float] = None
+
     def __init__(self, name: str, api_key_env_name: str):
         self.name = name
         self.api_key_env_name = api_key_env_name
@@ -16,6 +26,56 @@ class BaseProvider(ABC):
 
     def is_configured(self) -> bool:
         return bool(self.get_api_key())
+
+    async def _get(self, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """GET on the shared pooled client (see app.providers.transport)."""
+        return await provider_transport.request(self.name, "GET", url, timeout=timeout, **kwargs)
+
+    async def _post(self, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """POST on the shared pooled client (see app.providers.transport)."""
+        return await provider_transport.request(self.name, "POST", url, timeout=timeout, **kwargs)
+
+    async def _stream_sse(self, url: str, timeout: Optional[float] = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """POST and yield each JSON `data:` event of a server-sent event stream."""
+        async with provider_transport.stream(self.name, "POST", url, timeout=timeout, **kwargs) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    yield json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+
+    @staticmethod
+    def _chat_messages(prompt: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> List[Dict[str, str]]:
+        """OpenAI chat format: optional system message, history, then the prompt."""
+        messages = []
+        if context_prefix:
+            messages.append({"role": "system", "content": context_prefix})
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    async def _stream_chat_completions(self, url: str, **kwargs) -> AsyncIterator[Dict[str, str]]:
+        """Deltas of an OpenAI-compatible streamed chat completion.
+
+        Reasoning models send their thinking as delta.reasoning_content
+        (DeepSeek, GLM) or delta.reasoning (OpenRouter).
+        """
+        async for event in self._stream_sse(url, **kwargs):
+            for choice in event.get("choices") or []:
+                delta = choice.get("delta") or {}
+                thinking = delta.get("reasoning_content") or delta.get("reasoning")
+                if thinking:
+                    yield {"type": "thinking", "text": thinking}
+                if delta.get("content"):
+                    yield {"type": "content", "text": delta["content"]}
     
     @property
     def supports_tools(self) -> bool:
@@ -45,10 +105,25 @@ class BaseProvider(ABC):
         prompt: str, 
         model: str, 
         history: List[Dict[str, str]] = None, 
-        context_prefix: str = ""
+        context_prefix: str = "",
+        cache_ttl: int = 0
     ) -> Dict[str, Any]:
-        """Call with automatic tracing. Wraps the actual call method."""
+        """Call with automatic tracing. Wraps the actual call method.
+
+        With cache_ttl > 0 an identical earlier request (same provider, model,
+        system prompt, history, prompt and temperature) is answered from
+        app.providers.response_cache for up to cache_ttl seconds.
+        """
         from app.services.ai.tracer import ai_tracer
+
+        if cache_ttl > 0 and settings.AI_CACHE_ENABLED:
+            key = response_cache.key(
+                self.name, model or getattr(self, 'default_model', None), context_prefix,
+                history, prompt, self.temperature
+            )
+            return await response_cache.get_or_call(
+                key, cache_ttl, lambda: self.call_with_trace(prompt, model, history, context_prefix)
+            )
         
         # Start trace
         ai_tracer.start_trace(
@@ -74,6 +149,63 @@ class BaseProvider(ABC):
             )
             raise
 
+    async def stream_call(
+        self,
+        prompt: str,
+        model: str,
+        history: List[Dict[str, str]] = None,
+        context_prefix: str = ""
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        Stream the response as it is generated.
+        Yields: {"type": "thinking" | "content", "text": str}
+
+        Default: one call() whose result is yielded at once; providers with a
+        streaming API override this.
+        """
+        result = await self.call(prompt, model, history, context_prefix)
+        if result.get("thinking"):
+            yield {"type": "thinking", "text": result["thinking"]}
+        if result.get("content"):
+            yield {"type": "content", "text": result["content"]}
+
+    async def stream_with_trace(
+        self,
+        prompt: str,
+        model: str,
+        history: List[Dict[str, str]] = None,
+        context_prefix: str = ""
+    ) -> AsyncIterator[Dict[str, str]]:
+        """stream_call() with tracing; the trace and token usage cover the whole stream."""
+        from app.services.ai.tracer import ai_tracer
+
+        ai_tracer.start_trace(
+            provider=self.name,
+            model=model or getattr(self, 'default_model', 'unknown'),
+            prompt=prompt,
+            system_prompt=context_prefix,
+            history=history
+        )
+
+        parts = {"thinking": [], "content": []}
+        try:
+            async for delta in self.stream_call(prompt, model, history, context_prefix):
+                parts.setdefault(delta["type"], []).append(delta["text"])
+                yield delta
+        except BaseException as e:
+            ai_tracer.end_trace(
+                response="".join(parts["content"]),
+                thinking="".join(parts["thinking"]),
+                success=False,
+                error=str(e) or type(e).__name__
+            )
+            raise
+        ai_tracer.end_trace(
+            response="".join(parts["content"]),
+            thinking="".join(parts["thinking"]),
+            success=True
+        )
+
     @abstractmethod
     async def call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> Dict[str, Any]:
         """
@@ -1,5 +1,4 @@
-from typing import List, Dict, Any, Optional
-import httpx
+from typing import List, Dict, Any, AsyncIterator, Optional
 import json
 from app.providers.base import BaseProvider
 from app.core.logger import Logger
@@ -47,32 +46,64 @@ class ClaudeProvider(BaseProvider):
         full_prompt = f"{context_prefix}{prompt}" if context_prefix else prompt
         messages.append({"role": "user", "content": full_prompt})
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"model": model or self.default_model, "max_tokens": 4096, "messages": messages},
-                    headers={
-                        "Content-Type": "application/json",
-                        "x-api-key": api_key,
-                        "anthropic-version": "2023-06-01",
-                    },
-                    timeout=90.0
-                )
-                response.raise_for_status()
-                data = response.json()
+        try:
+            response = await self._post(
+                self.base_url,
+                json={"model": model or self.default_model, "max_tokens": 4096, "messages": messages},
+                headers={
+                    "Content-Type": "application/json",
+                    "x-api-key": api_key,
+                    "anthropic-version": "2023-06-01",
+                },
+                timeout=90.0
+            )
+            response.raise_for_status()
+            data = response.json()
 
-                thinking, content = "", ""
-                for block in data.get("content", []):
-                    if block.get("type") == "thinking":
-                        thinking += block.get("thinking", "")
-                    elif block.get("type") == "text":
-                        content += block.get("text", "")
+            thinking, content = "", ""
+            for block in data.get("content", []):
+                if block.get("type") == "thinking":
+                    thinking += block.get("thinking", "")
+                elif block.get("type") == "text":
+                    content += block.get("text", "")
 
-                return {"thinking": thinking, "content": content}
-            except Exception as e:
-                logger.error(f"Claude API call failed: {e}")
-                raise
+            return {"thinking": thinking, "content": content}
+        except Exception as e:
+            logger.error(f"Claude API call failed: {e}")
+            raise
+    
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("CLAUDE_API_KEY is not set")
+
+        messages = [{"role": msg["role"], "content": msg["content"]} for msg in history or []]
+        full_prompt = f"{context_prefix}{prompt}" if context_prefix else prompt
+        messages.append({"role": "user", "content": full_prompt})
+
+        try:
+            async for event in self._stream_sse(
+                self.base_url,
+                json={"model": model or self.default_model, "max_tokens": 4096, "messages": messages, "stream": True},
+                headers={
+                    "Content-Type": "application/json",
+                    "x-api-key": api_key,
+                    "anthropic-version": "2023-06-01",
+                },
+                timeout=90.0
+            ):
+                if event.get("type") == "error":
+                    raise RuntimeError(event.get("error", {}).get("message", "stream error"))
+                if event.get("type") != "content_block_delta":
+                    continue
+                delta = event.get("delta", {})
+                if delta.get("type") == "thinking_delta":
+                    yield {"type": "thinking", "text": delta.get("thinking", "")}
+                elif delta.get("type") == "text_delta":
+                    yield {"type": "content", "text": delta.get("text", "")}
+        except Exception as e:
+            logger.error(f"Claude API stream failed: {e}")
+            raise
     
     async def call_with_tools(
         self,
@@ -159,41 +190,40 @@ class ClaudeProvider(BaseProvider):
                 "budget_tokens": 5000
             }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json=request_body,
-                    headers=headers,
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                thinking = ""
-                content = ""
-                tool_calls = []
-                
-                for block in data.get("content", []):
-                    block_type = block.get("type", "")
-                    
-                    if block_type == "thinking":
-                        thinking += block.get("thinking", "")
-                    elif block_type == "text":
-                        content += block.get("text", "")
-                    elif block_type == "tool_use":
-                        tool_calls.append({
-                            "id": block.get("id", ""),
-                            "name": block.get("name", ""),
-                            "arguments": block.get("input", {})
-                        })
+        try:
+            response = await self._post(
+                self.base_url,
+                json=request_body,
+                headers=headers,
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            thinking = ""
+            content = ""
+            tool_calls = []
+            
+            for block in data.get("content", []):
+                block_type = block.get("type", "")
                 
-                return {
-                    "thinking": thinking,
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                logger.error(f"Claude API call with tools failed: {e}")
-                raise
+                if block_type == "thinking":
+                    thinking += block.get("thinking", "")
+                elif block_type == "text":
+                    content += block.get("text", "")
+                elif block_type == "tool_use":
+                    tool_calls.append({
+                        "id": block.get("id", ""),
+                        "name": block.get("name", ""),
+                        "arguments": block.get("input", {})
+                    })
+            
+            return {
+                "thinking": thinking,
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            logger.error(f"Claude API call with tools failed: {e}")
+            raise
 
@@ -1,5 +1,4 @@
-from typing import List, Dict, Any, Optional
-import httpx
+from typing import List, Dict, Any, AsyncIterator, Optional
 import json
 from app.providers.base import BaseProvider
 from app.core.logger import Logger
@@ -36,66 +35,59 @@ class GeminiProvider(BaseProvider):
             return self.get_fallback_models()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}",
-                    timeout=30.0
-                )
-                if response.status_code != 200:
-                    return self.get_fallback_models()
+            response = await self._get(
+                f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}",
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                return self.get_fallback_models()
 
-                data = response.json()
-                models = []
-                # Priority: gemini-3 > gemini-2.5 > gemini-2.0 > gemini-1.5
-                priority_map = {"3": 0, "2.5": 1, "2.0": 2, "1.5": 3}
+            data = response.json()
+            models = []
+            # Priority: gemini-3 > gemini-2.5 > gemini-2.0 > gemini-1.5
+            priority_map = {"3": 0, "2.5": 1, "2.0": 2, "1.5": 3}
+            
+            for m in data.get("models", []):
+                if not m.get("name") or "generateContent" not in m.get("supportedGenerationMethods", []):
+                    continue
+                
+                model_id = m["name"].replace("models/", "")
+                display_name = m.get("displayName", model_id)
+                
+                # Skip embedding, aqa, tunedModels, image, vision-only, and old 1.0 models
+                if any(x in model_id.lower() for x in ["embedding", "aqa", "tuned", "image", "vision", "gemini-1.0"]):
+                    continue
                 
-                for m in data.get("models", []):
-                    if not m.get("name") or "generateContent" not in m.get("supportedGenerationMethods", []):
-                        continue
-                    
-                    model_id = m["name"].replace("models/", "")
-                    display_name = m.get("displayName", model_id)
-                    
-                    # Skip embedding, aqa, tunedModels, image, vision-only, and old 1.0 models
-                    if any(x in model_id.lower() for x in ["embedding", "aqa", "tuned", "image", "vision", "gemini-1.0"]):
-                        continue
-                    
-                    # Only include gemini models (skip palm, etc)
-                    if not model_id.startswith("gemini"):
-                        continue
-                    
-                    # Calculate priority - prefer newer versions
-                    priority = 99
-                    for ver, p in priority_map.items():
-                        if f"gemini-{ver}" in model_id or f"-{ver}-" in model_id:
-                            priority = p
-                            break
-                    
-                    # Boost flash and pro models
-                    if "pro" in model_id:
-                        priority -= 0.1
-                    elif "flash" in model_id:
-                        priority -= 0.05
-                    
-                    models.append({"id": model_id, "name": display_name, "_priority": priority})
+                # Only include gemini models (skip palm, etc)
+                if not model_id.startswith("gemini"):
+                    continue
                 
-                # Sort by priority, then alphabetically
-                models.sort(key=lambda x: (x["_priority"], x["id"]))
+                # Calculate priority - prefer newer versions
+                priority = 99
+                for ver, p in priority_map.items():
+                    if f"gemini-{ver}" in model_id or f"-{ver}-" in model_id:
+                        priority = p
+                        break
                 
-                # Return top 15 models to avoid overwhelming the user
-                return [{"id": m["id"], "name": m["name"]} for m in models[:15]]
+                # Boost flash and pro models
+                if "pro" in model_id:
+                    priority -= 0.1
+                elif "flash" in model_id:
+                    priority -= 0.05
+                
+                models.append({"id": model_id, "name": display_name, "_priority": priority})
+            
+            # Sort by priority, then alphabetically
+            models.sort(key=lambda x: (x["_priority"], x["id"]))
+            
+            # Return top 15 models to avoid overwhelming the user
+            return [{"id": m["id"], "name": m["name"]} for m in models[:15]]
         except Exception as e:
             logger.warn(f"Failed to fetch models: {e}")
             return self.get_fallback_models()
 
-    async def call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> Dict[str, Any]:
-        api_key = self.get_api_key()
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY is not set")
-
-        if history is None:
-            history = []
-
+    def _prepare_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = ""):
+        """Model to use and Gemini `contents` for a plain (tool-less) call."""
         # Validate model - fallback to default for invalid/specialized models
         use_model = model or self.default_model
         invalid_patterns = ["computer-use", "image", "vision", "embedding", "aqa", "tuned"]
@@ -104,38 +96,67 @@ class GeminiProvider(BaseProvider):
             use_model = self.default_model
 
         contents = []
-        for msg in history:
+        for msg in history or []:
             role = "model" if msg["role"] == "assistant" else "user"
             contents.append({"role": role, "parts": [{"text": msg["content"]}]})
         
         full_prompt = f"{context_prefix}{prompt}" if context_prefix else prompt
         contents.append({"role": "user", "parts": [{"text": full_prompt}]})
+        return use_model, contents
 
+    async def call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> Dict[str, Any]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is not set")
+
+        use_model, contents = self._prepare_call(prompt, model, history, context_prefix)
         url = f"https://generativelanguage.googleapis.com/v1beta/models/{use_model}:generateContent?key={api_key}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json={"contents": contents},
-                    headers={"Content-Type": "application/json"},
-                    timeout=90.0
-                )
-                response.raise_for_status()
-                data = response.json()
+        try:
+            response = await self._post(
+                url,
+                json={"contents": contents},
+                headers={"Content-Type": "application/json"},
+                timeout=90.0
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            thinking, content = "", ""
+            if data.get("candidates") and data["candidates"][0].get("content", {}).get("parts"):
+                for part in data["candidates"][0]["content"]["parts"]:
+                    if part.get("thought"):
+                        thinking += part.get("text", "")
+                    else:
+                        content += part.get("text", "")
 
-                thinking, content = "", ""
-                if data.get("candidates") and data["candidates"][0].get("content", {}).get("parts"):
-                    for part in data["candidates"][0]["content"]["parts"]:
-                        if part.get("thought"):
-                            thinking += part.get("text", "")
-                        else:
-                            content += part.get("text", "")
+            return {"thinking": thinking, "content": content}
+        except Exception as e:
+            logger.error(f"Gemini API call failed: {e}")
+            raise
+    
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is not set")
+
+        use_model, contents = self._prepare_call(prompt, model, history, context_prefix)
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{use_model}:streamGenerateContent?alt=sse&key={api_key}"
 
-                return {"thinking": thinking, "content": content}
-            except Exception as e:
-                logger.error(f"Gemini API call failed: {e}")
-                raise
+        try:
+            async for event in self._stream_sse(
+                url,
+                json={"contents": contents},
+                headers={"Content-Type": "application/json"},
+                timeout=90.0
+            ):
+                candidates = event.get("candidates") or [{}]
+                for part in candidates[0].get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield {"type": "thinking" if part.get("thought") else "content", "text": part["text"]}
+        except Exception as e:
+            logger.error(f"Gemini API stream failed: {e}")
+            raise
     
     async def call_with_tools(
         self,
@@ -209,41 +230,40 @@ class GeminiProvider(BaseProvider):
         
         url = f"https://generativelanguage.googleapis.com/v1beta/models/{model or self.default_model}:generateContent?key={api_key}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json=request_body,
-                    headers={"Content-Type": "application/json"},
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                thinking = ""
-                content = ""
-                tool_calls = []
-                
-                if data.get("candidates") and data["candidates"][0].get("content", {}).get("parts"):
-                    for part in data["candidates"][0]["content"]["parts"]:
-                        if part.get("thought"):
-                            thinking += part.get("text", "")
-                        elif part.get("text"):
-                            content += part.get("text", "")
-                        elif part.get("functionCall"):
-                            fc = part["functionCall"]
-                            tool_calls.append({
-                                "id": fc.get("name", ""),
-                                "name": fc.get("name", ""),
-                                "arguments": fc.get("args", {})
-                            })
-                
-                return {
-                    "thinking": thinking,
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                logger.error(f"Gemini API call with tools failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                url,
+                json=request_body,
+                headers={"Content-Type": "application/json"},
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            thinking = ""
+            content = ""
+            tool_calls = []
+            
+            if data.get("candidates") and data["candidates"][0].get("content", {}).get("parts"):
+                for part in data["candidates"][0]["content"]["parts"]:
+                    if part.get("thought"):
+                        thinking += part.get("text", "")
+                    elif part.get("text"):
+                        content += part.get("text", "")
+                    elif part.get("functionCall"):
+                        fc = part["functionCall"]
+                        tool_calls.append({
+                            "id": fc.get("name", ""),
+                            "name": fc.get("name", ""),
+                            "arguments": fc.get("args", {})
+                        })
+            
+            return {
+                "thinking": thinking,
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            logger.error(f"Gemini API call with tools failed: {e}")
+            raise
 
@@ -1,5 +1,4 @@
-from typing import List, Dict, Any
-import httpx
+from typing import List, Dict, Any, AsyncIterator
 import json
 from app.providers.base import BaseProvider
 from app.core.logger import Logger
@@ -45,21 +44,39 @@ class GLMProvider(BaseProvider):
         messages.extend(history)
         messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"model": model or self.default_model, "messages": messages},
-                    headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                    timeout=90.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
-            except Exception as e:
-                logger.error(f"GLM API call failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=90.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
+        except Exception as e:
+            logger.error(f"GLM API call failed: {e}")
+            raise
     
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("GLM_API_KEY is not set")
+
+        messages = self._chat_messages(prompt, history, context_prefix)
+
+        try:
+            async for delta in self._stream_chat_completions(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages, "stream": True},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=90.0
+            ):
+                yield delta
+        except Exception as e:
+            logger.error(f"GLM API stream failed: {e}")
+            raise
+
     async def call_with_tools(
         self,
         messages: List[Dict[str, Any]],
@@ -113,42 +130,41 @@ class GLMProvider(BaseProvider):
         if tools:
             payload["tools"] = tools
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                choice = data["choices"][0]["message"]
-                content = choice.get("content", "") or ""
-                
-                tool_calls = []
-                if choice.get("tool_calls"):
-                    for tc in choice["tool_calls"]:
-                        func = tc.get("function", {})
-                        args = func.get("arguments", "{}")
-                        if isinstance(args, str):
-                            try:
-                                args = json.loads(args)
-                            except:
-                                args = {}
-                        tool_calls.append({
-                            "id": tc.get("id", ""),
-                            "name": func.get("name", ""),
-                            "arguments": args
-                        })
-                
-                return {
-                    "thinking": "",
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                logger.error(f"GLM API call with tools failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json=payload,
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            choice = data["choices"][0]["message"]
+            content = choice.get("content", "") or ""
+            
+            tool_calls = []
+            if choice.get("tool_calls"):
+                for tc in choice["tool_calls"]:
+                    func = tc.get("function", {})
+                    args = func.get("arguments", "{}")
+                    if isinstance(args, str):
+                        try:
+                            args = json.loads(args)
+                        except:
+                            args = {}
+                    tool_calls.append({
+                        "id": tc.get("id", ""),
+                        "name": func.get("name", ""),
+                        "arguments": args
+                    })
+            
+            return {
+                "thinking": "",
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            logger.error(f"GLM API call with tools failed: {e}")
+            raise
 
@@ -1,5 +1,4 @@
-from typing import List, Dict, Any, Optional
-import httpx
+from typing import List, Dict, Any, AsyncIterator, Optional
 import json
 from app.providers.base import BaseProvider
 from app.core.logger import Logger
@@ -33,38 +32,37 @@ class GroqProvider(BaseProvider):
             return self.get_fallback_models()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.models_url,
-                    headers={"Authorization": f"Bearer {api_key}"},
-                    timeout=30.0
-                )
-                if response.status_code != 200:
-                    return self.get_fallback_models()
+            response = await self._get(
+                self.models_url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                return self.get_fallback_models()
 
-                data = response.json()
-                models = []
-                # Priority order for sorting
-                priority_prefixes = ["llama-3.3", "llama-3.2", "llama-3.1", "deepseek", "qwen", "mixtral", "gemma"]
-                
-                for m in data.get("data", []):
-                    model_id = m.get("id", "")
-                    # Skip non-chat models
-                    if any(x in model_id for x in ["whisper", "distil", "guard", "tool-use"]):
-                        continue
-                    if model_id:
-                        # Calculate priority score
-                        priority = 99
-                        for i, prefix in enumerate(priority_prefixes):
-                            if prefix in model_id.lower():
-                                priority = i
-                                break
-                        models.append({"id": model_id, "name": model_id, "_priority": priority})
-                
-                # Sort by priority then by name (descending for version numbers)
-                models.sort(key=lambda x: (x["_priority"], x["id"]))
-                # Remove priority field before returning
-                return [{"id": m["id"], "name": m["name"]} for m in models]
+            data = response.json()
+            models = []
+            # Priority order for sorting
+            priority_prefixes = ["llama-3.3", "llama-3.2", "llama-3.1", "deepseek", "qwen", "mixtral", "gemma"]
+            
+            for m in data.get("data", []):
+                model_id = m.get("id", "")
+                # Skip non-chat models
+                if any(x in model_id for x in ["whisper", "distil", "guard", "tool-use"]):
+                    continue
+                if model_id:
+                    # Calculate priority score
+                    priority = 99
+                    for i, prefix in enumerate(priority_prefixes):
+                        if prefix in model_id.lower():
+                            priority = i
+                            break
+                    models.append({"id": model_id, "name": model_id, "_priority": priority})
+            
+            # Sort by priority then by name (descending for version numbers)
+            models.sort(key=lambda x: (x["_priority"], x["id"]))
+            # Remove priority field before returning
+            return [{"id": m["id"], "name": m["name"]} for m in models]
         except Exception as e:
             logger.warn(f"Failed to fetch models: {e}")
             return self.get_fallback_models()
@@ -83,21 +81,39 @@ class GroqProvider(BaseProvider):
         messages.extend(history)
         messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"model": model or self.default_model, "messages": messages, "max_tokens": 4096},
-                    headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                    timeout=90.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
-            except Exception as e:
-                logger.error(f"Groq API call failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages, "max_tokens": 4096},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=90.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
+        except Exception as e:
+            logger.error(f"Groq API call failed: {e}")
+            raise
     
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("GROQ_API_KEY is not set")
+
+        messages = self._chat_messages(prompt, history, context_prefix)
+
+        try:
+            async for delta in self._stream_chat_completions(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages, "max_tokens": 4096, "stream": True},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=90.0
+            ):
+                yield delta
+        except Exception as e:
+            logger.error(f"Groq API stream failed: {e}")
+            raise
+
     async def call_with_tools(
         self,
         messages: List[Dict[str, Any]],
@@ -152,42 +168,41 @@ class GroqProvider(BaseProvider):
         if tools:
             payload["tools"] = tools
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                choice = data["choices"][0]["message"]
-                content = choice.get("content", "") or ""
-                
-                tool_calls = []
-                if choice.get("tool_calls"):
-                    for tc in choice["tool_calls"]:
-                        func = tc.get("function", {})
-                        args = func.get("arguments", "{}")
-                        if isinstance(args, str):
-                            try:
-                                args = json.loads(args)
-                            except:
-                                args = {}
-                        tool_calls.append({
-                            "id": tc.get("id", ""),
-                            "name": func.get("name", ""),
-                            "arguments": args
-                        })
-                
-                return {
-                    "thinking": "",
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                logger.error(f"Groq API call with tools failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json=payload,
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            choice = data["choices"][0]["message"]
+            content = choice.get("content", "") or ""
+            
+            tool_calls = []
+            if choice.get("tool_calls"):
+                for tc in choice["tool_calls"]:
+                    func = tc.get("function", {})
+                    args = func.get("arguments", "{}")
+                    if isinstance(args, str):
+                        try:
+                            args = json.loads(args)
+                        except:
+                            args = {}
+                    tool_calls.append({
+                        "id": tc.get("id", ""),
+                        "name": func.get("name", ""),
+                        "arguments": args
+                    })
+            
+            return {
+                "thinking": "",
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            logger.error(f"Groq API call with tools failed: {e}")
+            raise
 
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional
 import httpx
 import json
 from app.providers.base import BaseProvider
@@ -68,21 +68,39 @@ class NvidiaProvider(BaseProvider):
         messages.extend(history)
         messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"model": model or self.default_model, "messages": messages, "max_tokens": 4096},
-                    headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                    timeout=120.0  # 2 minutes for slow models like DeepSeek R1
-                )
-                response.raise_for_status()
-                data = response.json()
-                return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
-            except Exception as e:
-                self._log_api_error(e, model or self.default_model)
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages, "max_tokens": 4096},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=120.0  # 2 minutes for slow models like DeepSeek R1
+            )
+            response.raise_for_status()
+            data = response.json()
+            return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
+        except Exception as e:
+            self._log_api_error(e, model or self.default_model)
+            raise
     
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("NVIDIA_API_KEY is not set")
+
+        messages = self._chat_messages(prompt, history, context_prefix)
+
+        try:
+            async for delta in self._stream_chat_completions(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages, "max_tokens": 4096, "stream": True},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=120.0
+            ):
+                yield delta
+        except Exception as e:
+            self._log_api_error(e, model or self.default_model)
+            raise
+
     async def call_with_tools(
         self,
         messages: List[Dict[str, Any]],
@@ -137,41 +155,40 @@ class NvidiaProvider(BaseProvider):
         if tools:
             payload["tools"] = tools
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json=payload,
-                    headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                choice = data["choices"][0]["message"]
-                content = choice.get("content", "") or ""
-                
-                tool_calls = []
-                if choice.get("tool_calls"):
-                    for tc in choice["tool_calls"]:
-                        func = tc.get("function", {})
-                        args = func.get("arguments", "{}")
-                        if isinstance(args, str):
-                            try:
-                                args = json.loads(args)
-                            except:
-                                args = {}
-                        tool_calls.append({
-                            "id": tc.get("id", ""),
-                            "name": func.get("name", ""),
-                            "arguments": args
-                        })
-                
-                return {
-                    "thinking": "",
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                self._log_api_error(e, model or self.default_model)
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json=payload,
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            choice = data["choices"][0]["message"]
+            content = choice.get("content", "") or ""
+            
+            tool_calls = []
+            if choice.get("tool_calls"):
+                for tc in choice["tool_calls"]:
+                    func = tc.get("function", {})
+                    args = func.get("arguments", "{}")
+                    if isinstance(args, str):
+                        try:
+                            args = json.loads(args)
+                        except:
+                            args = {}
+                    tool_calls.append({
+                        "id": tc.get("id", ""),
+                        "name": func.get("name", ""),
+                        "arguments": args
+                    })
+            
+            return {
+                "thinking": "",
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            self._log_api_error(e, model or self.default_model)
+            raise
@@ -1,5 +1,4 @@
-from typing import List, Dict, Any
-import httpx
+from typing import List, Dict, Any, AsyncIterator
 import json
 from app.providers.base import BaseProvider
 from app.core.logger import Logger
@@ -7,6 +6,8 @@ from app.core.logger import Logger
 logger = Logger("OpenAI")
 
 class OpenAIProvider(BaseProvider):
+    temperature = 0.7
+
     def __init__(self):
         super().__init__("openai", "OPENAI_API_KEY")
         self.default_model = "gpt-4o"
@@ -35,23 +36,22 @@ class OpenAIProvider(BaseProvider):
             return self.get_fallback_models()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.models_url,
-                    headers={"Authorization": f"Bearer {api_key}"},
-                    timeout=30.0
-                )
-                if response.status_code != 200:
-                    return self.get_fallback_models()
-
-                data = response.json()
-                models = []
-                for m in data.get("data", []):
-                    model_id = m.get("id", "")
-                    # Filter to only chat-capable models (gpt-*)
-                    if model_id.startswith("gpt-") and not any(x in model_id for x in ["instruct", "vision", "audio", "realtime"]):
-                        models.append({"id": model_id, "name": model_id})
-                return sorted(models, key=lambda x: x["id"], reverse=True)[:20]  # Limit to top 20
+            response = await self._get(
+                self.models_url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                return self.get_fallback_models()
+
+            data = response.json()
+            models = []
+            for m in data.get("data", []):
+                model_id = m.get("id", "")
+                # Filter to only chat-capable models (gpt-*)
+                if model_id.startswith("gpt-") and not any(x in model_id for x in ["instruct", "vision", "audio", "realtime"]):
+                    models.append({"id": model_id, "name": model_id})
+            return sorted(models, key=lambda x: x["id"], reverse=True)[:20]  # Limit to top 20
         except Exception as e:
             logger.warn(f"Failed to fetch models: {e}")
             return self.get_fallback_models()
@@ -80,23 +80,41 @@ class OpenAIProvider(BaseProvider):
         payload = {
             "model": model or "gpt-3.5-turbo",
             "messages": messages,
-            "temperature": 0.7
+            "temperature": self.temperature
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(self.base_url, json=payload, headers=headers, timeout=60.0)
-                response.raise_for_status()
-                data = response.json()
-                content = data['choices'][0]['message']['content']
-                return {
-                    "thinking": "",
-                    "content": content
-                }
-            except Exception as e:
-                logger.error(f"OpenAI API call failed: {e}")
-                raise e
+        try:
+            response = await self._post(self.base_url, json=payload, headers=headers, timeout=60.0)
+            response.raise_for_status()
+            data = response.json()
+            content = data['choices'][0]['message']['content']
+            return {
+                "thinking": "",
+                "content": content
+            }
+        except Exception as e:
+            logger.error(f"OpenAI API call failed: {e}")
+            raise e
     
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("OpenAI API Key not configured")
+
+        messages = self._chat_messages(prompt, history, context_prefix)
+
+        try:
+            async for delta in self._stream_chat_completions(
+                self.base_url,
+                json={"model": model or "gpt-3.5-turbo", "messages": messages, "temperature": self.temperature, "stream": True},
+                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+                timeout=60.0
+            ):
+                yield delta
+        except Exception as e:
+            logger.error(f"OpenAI API stream failed: {e}")
+            raise
+
     async def call_with_tools(
         self,
         messages: List[Dict[str, Any]],
@@ -156,42 +174,41 @@ class OpenAIProvider(BaseProvider):
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                choice = data["choices"][0]["message"]
-                content = choice.get("content", "") or ""
-                
-                tool_calls = []
-                if choice.get("tool_calls"):
-                    for tc in choice["tool_calls"]:
-                        func = tc.get("function", {})
-                        args = func.get("arguments", "{}")
-                        if isinstance(args, str):
-                            try:
-                                args = json.loads(args)
-                            except:
-                                args = {}
-                        tool_calls.append({
-                            "id": tc.get("id", ""),
-                            "name": func.get("name", ""),
-                            "arguments": args
-                        })
-                
-                return {
-                    "thinking": "",
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                logger.error(f"OpenAI API call with tools failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json=payload,
+                headers=headers,
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            choice = data["choices"][0]["message"]
+            content = choice.get("content", "") or ""
+            
+            tool_calls = []
+            if choice.get("tool_calls"):
+                for tc in choice["tool_calls"]:
+                    func = tc.get("function", {})
+                    args = func.get("arguments", "{}")
+                    if isinstance(args, str):
+                        try:
+                            args = json.loads(args)
+                        except:
+                            args = {}
+                    tool_calls.append({
+                        "id": tc.get("id", ""),
+                        "name": func.get("name", ""),
+                        "arguments": args
+                    })
+            
+            return {
+                "thinking": "",
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            logger.error(f"OpenAI API call with tools failed: {e}")
+            raise
 
@@ -1,5 +1,4 @@
-from typing import List, Dict, Any
-import httpx
+from typing import List, Dict, Any, AsyncIterator
 import json
 from app.providers.base import BaseProvider
 from app.core.logger import Logger
@@ -52,40 +51,39 @@ class OpenRouterProvider(BaseProvider):
             return self.get_fallback_models()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.models_url,
-                    headers={"Authorization": f"Bearer {api_key}"},
-                    timeout=30.0
-                )
-                if response.status_code != 200:
-                    return self.get_fallback_models()
+            response = await self._get(
+                self.models_url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                return self.get_fallback_models()
 
-                data = response.json()
-                models = []
-                # Priority prefixes for sorting
-                priority_prefixes = ["anthropic/claude", "openai/gpt-5", "openai/gpt-4", "google/gemini-3", "google/gemini-2", "deepseek", "meta-llama/llama-4", "qwen", "zhipu", "minimax"]
+            data = response.json()
+            models = []
+            # Priority prefixes for sorting
+            priority_prefixes = ["anthropic/claude", "openai/gpt-5", "openai/gpt-4", "google/gemini-3", "google/gemini-2", "deepseek", "meta-llama/llama-4", "qwen", "zhipu", "minimax"]
+            
+            for m in data.get("data", []):
+                model_id = m.get("id", "")
+                if not model_id:
+                    continue
                 
-                for m in data.get("data", []):
-                    model_id = m.get("id", "")
-                    if not model_id:
-                        continue
-                    
-                    # Calculate priority
-                    priority = 99
-                    for i, prefix in enumerate(priority_prefixes):
-                        if model_id.startswith(prefix):
-                            priority = i
-                            break
-                    
-                    models.append({
-                        "id": model_id,
-                        "name": m.get("name", model_id),
-                        "_priority": priority
-                    })
+                # Calculate priority
+                priority = 99
+                for i, prefix in enumerate(priority_prefixes):
+                    if model_id.startswith(prefix):
+                        priority = i
+                        break
                 
-                models.sort(key=lambda x: (x["_priority"], x["id"]))
-                return [{"id": m["id"], "name": m["name"]} for m in models[:50]]  # Limit to 50
+                models.append({
+                    "id": model_id,
+                    "name": m.get("name", model_id),
+                    "_priority": priority
+                })
+            
+            models.sort(key=lambda x: (x["_priority"], x["id"]))
+            return [{"id": m["id"], "name": m["name"]} for m in models[:50]]  # Limit to 50
         except Exception as e:
             logger.warn(f"Failed to fetch models: {e}")
             return self.get_fallback_models()
@@ -104,25 +102,47 @@ class OpenRouterProvider(BaseProvider):
         messages.extend(history)
         messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json={"model": model or self.default_model, "messages": messages},
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://qubot.app",
-                    },
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
-            except Exception as e:
-                logger.error(f"OpenRouter API call failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages},
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://qubot.app",
+                },
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            return {"thinking": "", "content": data["choices"][0]["message"]["content"]}
+        except Exception as e:
+            logger.error(f"OpenRouter API call failed: {e}")
+            raise
     
+    async def stream_call(self, prompt: str, model: str, history: List[Dict[str, str]] = None, context_prefix: str = "") -> AsyncIterator[Dict[str, str]]:
+        api_key = self.get_api_key()
+        if not api_key:
+            raise ValueError("OPENROUTER_API_KEY is not set")
+
+        messages = self._chat_messages(prompt, history, context_prefix)
+
+        try:
+            async for delta in self._stream_chat_completions(
+                self.base_url,
+                json={"model": model or self.default_model, "messages": messages, "stream": True},
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://qubot.app",
+                },
+                timeout=120.0
+            ):
+                yield delta
+        except Exception as e:
+            logger.error(f"OpenRouter API stream failed: {e}")
+            raise
+
     async def call_with_tools(
         self,
         messages: List[Dict[str, Any]],
@@ -176,46 +196,45 @@ class OpenRouterProvider(BaseProvider):
         if tools:
             payload["tools"] = tools
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.base_url,
-                    json=payload,
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://qubot.app",
-                    },
-                    timeout=120.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                choice = data["choices"][0]["message"]
-                content = choice.get("content", "") or ""
-                
-                tool_calls = []
-                if choice.get("tool_calls"):
-                    for tc in choice["tool_calls"]:
-                        func = tc.get("function", {})
-                        args = func.get("arguments", "{}")
-                        if isinstance(args, str):
-                            try:
-                                args = json.loads(args)
-                            except:
-                                args = {}
-                        tool_calls.append({
-                            "id": tc.get("id", ""),
-                            "name": func.get("name", ""),
-                            "arguments": args
-                        })
-                
-                return {
-                    "thinking": "",
-                    "content": content,
-                    "tool_calls": tool_calls
-                }
-            except Exception as e:
-                logger.error(f"OpenRouter API call with tools failed: {e}")
-                raise
+        try:
+            response = await self._post(
+                self.base_url,
+                json=payload,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://qubot.app",
+                },
+                timeout=120.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            choice = data["choices"][0]["message"]
+            content = choice.get("content", "") or ""
+            
+            tool_calls = []
+            if choice.get("tool_calls"):
+                for tc in choice["tool_calls"]:
+                    func = tc.get("function", {})
+                    args = func.get("arguments", "{}")
+                    if isinstance(args, str):
+                        try:
+                            args = json.loads(args)
+                        except:
+                            args = {}
+                    tool_calls.append({
+                        "id": tc.get("id", ""),
+                        "name": func.get("name", ""),
+                        "arguments": args
+                    })
+            
+            return {
+                "thinking": "",
+                "content": content,
+                "tool_calls": tool_calls
+            }
+        except Exception as e:
+            logger.error(f"OpenRouter API call with tools failed: {e}")
+            raise
 
@@ -0,0 +1,169 @@
+"""
+Response Cache - Content-addressed cache for deterministic LLM calls.
+
+Summaries, translations, categorisation, report analysis and chat-memory
+extraction often send the exact same request twice (a channel batch retried,
+a report regenerated from a button). BaseProvider.call_with_trace looks those
+up here when the caller passes a cache_ttl:
+
+- key: sha256 of provider, model, system prompt, history, prompt and
+  temperature, so any change to the request is a different entry
+- two tiers: an in-process LRU (AI_CACHE_LRU_SIZE entries) in front of Redis
+  (db.redis, shared across restarts); both expire after the caller's TTL
+- single-flight: concurrent identical requests wait for one provider call
+- only successful, non-empty responses are stored
+- hit / miss counts per tier, see stats()
+
+Interactive chat never passes a TTL, and callers needing fresh output pass
+cache_ttl=0 (AiService: options={"cache": False}).
+
+Usage:
+    key = response_cache.key("groq", model, system_prompt, history, prompt, temperature)
+    result = await response_cache.get_or_call(key, ttl=3600, fetch=lambda: provider.call(...))
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import Logger
+
+logger = Logger("ResponseCache")
+
+REDIS_PREFIX = "llm_response:"
+
+
+class ResponseCache:
+    """In-process LRU + Redis cache of provider responses; see the module docstring."""
+
+    def __init__(self, redis=None, max_entries: Optional[int] = None):
+        self._redis = redis
+        self.max_entries = max_entries if max_entries is not None else settings.AI_CACHE_LRU_SIZE
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def redis(self):
+        if self._redis is not None:
+            return self._redis
+        from app.core.database import db
+        return db.redis
+
+    @staticmethod
+    def key(provider: str, model: Optional[str], system_prompt: str, history: Optional[List[Dict[str, str]]],
+            prompt: str, temperature: Optional[float] = None) -> str:
+        """Content address of one request."""
+        material = json.dumps(
+            [provider, model, system_prompt or "", history or [], prompt, temperature],
+            ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get_or_call(self, key: str, ttl: int,
+                          fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """The cached response for key, or fetch() (once for concurrent callers) and store it."""
+        cached = self._memory_get(key)
+        if cached is not None:
+            self.memory_hits += 1
+            return dict(cached)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._load(key, ttl, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shielded so one cancelled caller does not fail the others
+        return dict(await asyncio.shield(task))
+
+    async def _load(self, key: str, ttl: int, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        cached = await self._redis_get(key)
+        if cached is not None:
+            self.redis_hits += 1
+            self._memory_set(key, cached, ttl)
+            return cached
+
+        self.misses += 1
+        result = await fetch()
+        if result.get("content"):
+            self._memory_set(key, result, ttl)
+            await self._redis_set(key, result, ttl)
+        return result
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here; callers still see it via await
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: Dict[str, Any], ttl: int):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (time.monotonic() + ttl, dict(value))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> Optional[Dict[str, Any]]:
+        redis = self.redis
+        if not redis:
+            return None
+        try:
+            data = await redis.get(REDIS_PREFIX + key)
+            return json.loads(data) if data else None
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Redis read failed: {e}")
+            return None
+
+    async def _redis_set(self, key: str, value: Dict[str, Any], ttl: int):
+        redis = self.redis
+        if not redis:
+            return
+        try:
+            await redis.setex(REDIS_PREFIX + key, ttl, json.dumps(value, ensure_ascii=False))
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Redis write failed: {e}")
+
+    def clear(self):
+        """Drop the in-process tier (Redis entries expire on their own)."""
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.redis_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "enabled": settings.AI_CACHE_ENABLED,
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,201 @@
+"""
+Provider Transport - Long-lived pooled HTTP clients for LLM providers.
+
+Every provider call used to open its own httpx.AsyncClient, so each request
+paid a new TCP + TLS handshake (ten times for a ten-step agent loop).
+ProviderTransport keeps one client per API host instead:
+
+- keep-alive connections, bounded by LLM_HTTP_MAX_CONNECTIONS /
+  LLM_HTTP_MAX_KEEPALIVE and closed after LLM_HTTP_KEEPALIVE_EXPIRY idle seconds
+- HTTP/2 when LLM_HTTP2 is on and the h2 package is installed (one connection
+  multiplexes concurrent requests to the same host)
+- per-call read timeouts stay with the provider; connecting is capped by
+  LLM_HTTP_CONNECT_TIMEOUT
+- per-provider metrics from httpcore trace events: pool wait (request start
+  to a connection being ready), TTFB (to response headers) and total
+  latency, see stats()
+
+AiService and AdvancedAiService build their own provider objects; both
+share these clients because the pool is keyed by host, not by provider.
+
+Usage:
+    response = await provider_transport.request("openai", "POST", url, json=payload, timeout=60.0)
+    async with provider_transport.stream("openai", "POST", url, json=payload) as response:
+        async for line in response.aiter_lines(): ...
+    await provider_transport.aclose()  # on shutdown
+"""
+
+import importlib.util
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import Logger
+
+logger = Logger("ProviderTransport")
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Samples kept per provider for stats()
+METRIC_SAMPLES = 200
+
+# httpcore trace events that mean a pooled connection was handed to the request
+_CONNECTION_READY = ("connection.connect_tcp.started", "http11.send_request_headers.started",
+                     "http2.send_request_headers.started")
+_RESPONSE_HEADERS = ("http11.receive_response_headers.complete", "http2.receive_response_headers.complete")
+
+
+@dataclass
+class ProviderMetrics:
+    requests: int = 0
+    errors: int = 0
+    new_connections: int = 0
+    latency: Deque[float] = field(default_factory=lambda: deque(maxlen=METRIC_SAMPLES))
+    ttfb: Deque[float] = field(default_factory=lambda: deque(maxlen=METRIC_SAMPLES))
+    pool_wait: Deque[float] = field(default_factory=lambda: deque(maxlen=METRIC_SAMPLES))
+
+
+def _summary(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"avg": None, "p95": None}
+    return {
+        "avg": round(1000 * sum(ordered) / len(ordered), 1),
+        "p95": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 1),
+    }
+
+
+class ProviderTransport:
+    """Shared httpx clients (one per host) with per-provider metrics."""
+
+    def __init__(self, http2: Optional[bool] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        if http2 is None:
+            http2 = settings.LLM_HTTP2 and HTTP2_AVAILABLE
+        self.http2 = http2
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._metrics: Dict[str, ProviderMetrics] = {}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """The pooled client for url's host (created on first use)."""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(120.0, connect=settings.LLM_HTTP_CONNECT_TIMEOUT),
+                transport=self.transport,
+            )
+            self._clients[host] = client
+        return client
+
+    def metrics(self, provider: str) -> ProviderMetrics:
+        if provider not in self._metrics:
+            self._metrics[provider] = ProviderMetrics()
+        return self._metrics[provider]
+
+    def _tracer(self, metrics: ProviderMetrics, started: float, marks: Dict[str, float]):
+        async def trace(event: str, info: dict):
+            if event in _CONNECTION_READY and "ready" not in marks:
+                marks["ready"] = time.monotonic()
+                if event == "connection.connect_tcp.started":
+                    metrics.new_connections += 1
+            elif event in _RESPONSE_HEADERS:
+                marks["headers"] = time.monotonic()
+        return trace
+
+    @staticmethod
+    def _record(metrics: ProviderMetrics, started: float, marks: Dict[str, float], status_code: int):
+        metrics.latency.append(time.monotonic() - started)
+        if "ready" in marks:
+            metrics.pool_wait.append(marks["ready"] - started)
+        if "headers" in marks:
+            metrics.ttfb.append(marks["headers"] - started)
+        if status_code >= 400:
+            metrics.errors += 1
+
+    def _prepare(self, provider: str, timeout: Optional[float], kwargs: Dict):
+        metrics = self.metrics(provider)
+        metrics.requests += 1
+        started = time.monotonic()
+        marks: Dict[str, float] = {}
+        kwargs["extensions"] = {"trace": self._tracer(metrics, started, marks)}
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=settings.LLM_HTTP_CONNECT_TIMEOUT)
+        return metrics, started, marks
+
+    async def request(self, provider: str, method: str, url: str, timeout: Optional[float] = None,
+                      **kwargs) -> httpx.Response:
+        """Send one request on the shared client and read the body.
+
+        `timeout` is the read timeout in seconds (the provider's per-call
+        value); connecting is always capped by LLM_HTTP_CONNECT_TIMEOUT.
+        """
+        metrics, started, marks = self._prepare(provider, timeout, kwargs)
+        try:
+            response = await self.client_for(url).request(method, url, **kwargs)
+        except Exception:
+            metrics.errors += 1
+            raise
+        self._record(metrics, started, marks, response.status_code)
+        return response
+
+    @asynccontextmanager
+    async def stream(self, provider: str, method: str, url: str, timeout: Optional[float] = None,
+                     **kwargs) -> AsyncIterator[httpx.Response]:
+        """Like request(), but yields the response before the body is read.
+
+        Latency is recorded when the block exits (the whole stream).
+        """
+        metrics, started, marks = self._prepare(provider, timeout, kwargs)
+        status_code = 0
+        try:
+            async with self.client_for(url).stream(method, url, **kwargs) as response:
+                status_code = response.status_code
+                yield response
+        except Exception:
+            metrics.errors += 1
+            raise
+        self._record(metrics, started, marks, status_code)
+
+    async def aclose(self):
+        """Close every pooled connection."""
+        for client in self._clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warn(f"Failed to close HTTP client: {e}")
+        self._clients.clear()
+
+    def stats(self) -> Dict:
+        """Per-provider request counts and latency / TTFB / pool wait (ms)."""
+        return {
+            "http2": self.http2,
+            "hosts": len(self._clients),
+            "providers": {
+                name: {
+                    "requests": m.requests,
+                    "errors": m.errors,
+                    "new_connections": m.new_connections,
+                    "latency_ms": _summary(m.latency),
+                    "ttfb_ms": _summary(m.ttfb),
+                    "pool_wait_ms": _summary(m.pool_wait),
+                }
+                for name, m in self._metrics.items()
+            },
+        }
+
+
+provider_transport = ProviderTransport()
@@ -6,7 +6,7 @@ This is a separate service from the simple AiService.
 from typing import Dict, Any, List, Optional
 from app.core.config import settings
 from app.core.logger import Logger
-from app.providers.base import BaseProvider
+from app.providers.base import BaseProvider, DeltaCallback
 from app.providers.openai import OpenAIProvider
 from app.providers.groq import GroqProvider
 from app.providers.gemini import GeminiProvider
@@ -172,7 +172,9 @@ class AdvancedAiService:
         history: List[Dict[str, str]] = None,
         model: str = None,
         provider_key: str = None,
-        auto_route: bool = False
+        auto_route: bool = False,
+        on_delta: Optional[DeltaCallback] = None,
+        user_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Send a message and get AI response with optional agent and tools.
@@ -183,6 +185,8 @@ class AdvancedAiService:
             history: Conversation history
             model: Model override
             auto_route: Automatically route to best agent based on message
+            on_delta: Receives streamed thinking/content and tool status deltas
+            user_id: Telegram user, for the tool execution log
             
         Returns:
             {
@@ -206,14 +210,18 @@ class AdvancedAiService:
                 response = await orchestrator.run_with_routing(
                     message=message,
                     history=history,
-                    model=model
+                    model=model,
+                    on_delta=on_delta,
+                    user_id=user_id
                 )
             else:
                 response = await orchestrator.run(
                     message=message,
                     agent_name=agent_name,
                     history=history,
-                    model=model
+                    model=model,
+                    on_delta=on_delta,
+                    user_id=user_id
                 )
             
             return {
@@ -2,11 +2,14 @@
 Agent base class for AI agents with tool execution support.
 """
 
+import asyncio
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
 from app.services.ai.tools.base import Tool, ToolResult
 from app.services.ai.tools.registry import tool_registry
+from app.core.config import settings
 from app.core.logger import Logger
 
 
@@ -32,6 +35,9 @@ class AgentResponse:
 class Agent(ABC):
     """Base class for AI agents."""
     
+    # Tool calls of one turn running at once (None: AI_TOOL_CONCURRENCY)
+    max_concurrent_tools: Optional[int] = None
+    
     def __init__(self):
         self.logger = Logger(f"Agent:{self.name}")
         self._tools: List[Tool] = []
@@ -110,6 +116,72 @@ class Agent(ABC):
             self.logger.error(f"Tool {tool_name} failed: {e}")
             return ToolResult(success=False, output=None, error=str(e))
     
+    async def execute_tool_calls(
+        self,
+        calls: List[Dict[str, Any]],
+        user_id: Optional[int] = None
+    ) -> List[ToolResult]:
+        """
+        Execute the tool calls of one model turn.
+        
+        Pure calls run concurrently (up to max_concurrent_tools), each with
+        the tool's timeout. A side-effecting call waits for every call before
+        it and runs alone, so writes keep the order the model asked for.
+        With user_id, each call and its latency go to ai_tool_executions.
+        
+        Args:
+            calls: [{"name": str, "arguments": dict}] in model order
+            
+        Returns:
+            ToolResults in the same order as calls
+        """
+        limit = asyncio.Semaphore(max(1, self.max_concurrent_tools or settings.AI_TOOL_CONCURRENCY))
+        results: List[Optional[ToolResult]] = [None] * len(calls)
+        
+        async def run_one(index: int):
+            async with limit:
+                results[index] = await self._execute_timed(calls[index], user_id)
+        
+        pending = []
+        for index, call in enumerate(calls):
+            tool = self.get_tool(call["name"])
+            if tool and not tool.is_pure(call["arguments"]):
+                await asyncio.gather(*pending)
+                pending = []
+                await run_one(index)
+            else:
+                pending.append(run_one(index))
+        await asyncio.gather(*pending)
+        return results
+    
+    async def _execute_timed(self, call: Dict[str, Any], user_id: Optional[int]) -> ToolResult:
+        name, arguments = call["name"], call["arguments"]
+        tool = self.get_tool(name)
+        timeout = (tool.timeout if tool else None) or settings.AI_TOOL_TIMEOUT
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self.execute_tool(name, **arguments), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.warn(f"Tool {name} timed out after {timeout:.0f}s")
+            result = ToolResult(success=False, output=None, error=f"Tool '{name}' timed out after {timeout:.0f}s")
+        duration_ms = int((time.monotonic() - started) * 1000)
+        result.metadata.setdefault("duration_ms", duration_ms)
+        
+        if user_id is not None:
+            from app.services.ai.advanced_storage import advanced_ai_storage
+            try:
+                await advanced_ai_storage.log_tool_execution(
+                    user_id=user_id,
+                    tool_name=name,
+                    arguments=arguments,
+                    result=result.to_dict(),
+                    success=result.success,
+                    duration_ms=duration_ms
+                )
+            except Exception as e:
+                self.logger.debug(f"Failed to log tool execution: {e}")
+        return result
+    
     @abstractmethod
     async def run(
         self,
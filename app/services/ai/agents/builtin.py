@@ -6,6 +6,7 @@ Enhanced with professional prompts ported from https://github.com/anomalyco/open
 
 import json
 from typing import List, Dict, Any, Optional
+from app.providers.base import DeltaCallback
 from app.services.ai.agents.base import Agent, AgentResponse
 from app.services.ai.agents.registry import register_agent
 from app.services.ai.agents.prompts import (
@@ -33,7 +34,9 @@ class BaseToolAgent(Agent):
         max_tool_calls: int = 10,
         provider=None,
         model: str = None,
-        skill_names: List[str] = None
+        skill_names: List[str] = None,
+        on_delta: Optional[DeltaCallback] = None,
+        user_id: Optional[int] = None
     ) -> AgentResponse:
         """
         Run the agent with tool calling loop.
@@ -45,6 +48,10 @@ class BaseToolAgent(Agent):
             provider: AI provider to use
             model: Model override
             skill_names: Specific skills to activate (optional)
+            on_delta: Streamed deltas. Without tools the answer is streamed
+                token by token; in the tool loop each tool call is reported
+                as a "status" delta and each model turn arrives whole.
+            user_id: Owner of the conversation, for the tool execution log
         """
         if not provider:
             return AgentResponse(
@@ -81,6 +88,19 @@ class BaseToolAgent(Agent):
                         system_prompt=system_prompt,  # Use computed prompt with skills
                         tools=tool_schemas
                     )
+                elif on_delta:
+                    # Fallback to regular call, streamed
+                    prompt = message if not history else messages[-1]["content"]
+                    parts = {"thinking": [], "content": []}
+                    async for delta in provider.stream_call(
+                        prompt=prompt,
+                        model=model or getattr(provider, 'default_model', None),
+                        history=history or [],
+                        context_prefix=system_prompt
+                    ):
+                        parts.setdefault(delta["type"], []).append(delta["text"])
+                        await on_delta(delta)
+                    result = {"thinking": "".join(parts["thinking"]), "content": "".join(parts["content"])}
                 else:
                     # Fallback to regular call
                     prompt = message if not history else messages[-1]["content"]
@@ -101,6 +121,12 @@ class BaseToolAgent(Agent):
                 content = result.get("content", "")
                 tool_calls = result.get("tool_calls", [])
                 
+                if on_delta:
+                    if result.get("thinking"):
+                        await on_delta({"type": "thinking", "text": result["thinking"]})
+                    if content and not tool_calls:
+                        await on_delta({"type": "content", "text": content})
+                
                 # Debug logging - show full response (no truncation)
                 logger.debug(f"📩 RESPONSE (loop {loop_count}):\n{content}")
                 logger.debug(f"🔧 TOOL CALLS:\n{json.dumps(tool_calls, indent=2, ensure_ascii=False)}")
@@ -115,7 +141,8 @@ class BaseToolAgent(Agent):
                         metadata={"provider": provider.name, "model": model, "loops": loop_count}
                     )
                 
-                # Execute tool calls
+                # Execute tool calls (concurrently where the tools allow it)
+                calls = []
                 for tool_call in tool_calls:
                     tool_name = tool_call.get("name", "")
                     tool_args = tool_call.get("arguments", {})
@@ -126,13 +153,16 @@ class BaseToolAgent(Agent):
                         except:
                             tool_args = {}
                     
-                    all_tool_calls.append({"name": tool_name, "arguments": tool_args})
-                    
-                    # Execute the tool
-                    tool_result = await self.execute_tool(tool_name, **tool_args)
-                    all_tool_results.append(tool_result)
-                    
-                    # Add tool result to messages
+                    calls.append({"name": tool_name, "arguments": tool_args})
+                    if on_delta:
+                        await on_delta({"type": "status", "text": tool_name})
+                
+                all_tool_calls.extend(calls)
+                tool_results = await self.execute_tool_calls(calls, user_id=user_id)
+                all_tool_results.extend(tool_results)
+                
+                # Add tool results to messages in the model's tool_call order
+                for tool_call, tool_result in zip(tool_calls, tool_results):
                     messages.append({
                         "role": "assistant",
                         "content": content,
@@ -140,7 +170,7 @@ class BaseToolAgent(Agent):
                     })
                     messages.append({
                         "role": "tool",
-                        "tool_call_id": tool_call.get("id", tool_name),
+                        "tool_call_id": tool_call.get("id", tool_call.get("name", "")),
                         "content": self.format_tool_result(tool_result)
                     })
                 
@@ -3,6 +3,7 @@ Agent orchestrator for managing multi-agent execution and tool loops.
 """
 
 from typing import Dict, Any, List, Optional
+from app.providers.base import DeltaCallback
 from app.services.ai.agents.base import Agent, AgentResponse
 from app.services.ai.agents.registry import agent_registry
 from app.core.logger import Logger
@@ -45,7 +46,9 @@ class AgentOrchestrator:
         agent_name: str = None,
         history: List[Dict[str, str]] = None,
         model: str = None,
-        max_tool_calls: int = 10
+        max_tool_calls: int = 10,
+        on_delta: Optional[DeltaCallback] = None,
+        user_id: Optional[int] = None
     ) -> AgentResponse:
         """
         Run an agent with the given message.
@@ -56,6 +59,8 @@ class AgentOrchestrator:
             history: Conversation history
             model: Model override
             max_tool_calls: Maximum tool call iterations
+            on_delta: Receives streamed deltas (see BaseToolAgent.run)
+            user_id: Owner of the conversation, for the tool execution log
             
         Returns:
             AgentResponse with content and tool execution details
@@ -83,7 +88,9 @@ class AgentOrchestrator:
                 history=history,
                 max_tool_calls=max_tool_calls,
                 provider=self.provider,
-                model=model
+                model=model,
+                on_delta=on_delta,
+                user_id=user_id
             )
             
             # Log execution
@@ -107,7 +114,9 @@ class AgentOrchestrator:
         self,
         message: str,
         history: List[Dict[str, str]] = None,
-        model: str = None
+        model: str = None,
+        on_delta: Optional[DeltaCallback] = None,
+        user_id: Optional[int] = None
     ) -> AgentResponse:
         """
         Automatically route to the best agent based on the message.
@@ -118,7 +127,9 @@ class AgentOrchestrator:
             message=message,
             agent_name=agent_name,
             history=history,
-            model=model
+            model=model,
+            on_delta=on_delta,
+            user_id=user_id
         )
     
     def _route_message(self, message: str) -> str:
@@ -5,6 +5,8 @@ Ported from src/services/ai/PromptCatalog.js
 
 from typing import Dict, Any, Optional, List
 
+from app.core.config import settings
+
 
 def truncate(value: str, max_length: int = None) -> str:
     if not value:
@@ -25,6 +27,7 @@ JOBS = {
     "chat": {
         "id": "chat",
         "description": "General chat assistant for interactive conversations.",
+        "cache_ttl": 0,  # live conversation, never cached
         "system": """You are QuBot's professional assistant.
 Be clear, accurate, and concise by default.
 Ask a clarifying question when the request is ambiguous or missing key details.
@@ -36,6 +39,7 @@ Match the user's tone without being overly casual.""",
     "summarize": {
         "id": "summarize",
         "description": "Summarize text while preserving key facts and tone.",
+        "cache_ttl": 86400,
         "system": """You are a professional summarizer.
 Preserve key facts, names, numbers, and intent.
 Maintain the original tone.
@@ -50,6 +54,7 @@ Be concise and capture the key points.
     "translate": {
         "id": "translate",
         "description": "Translate text between languages.",
+        "cache_ttl": 7 * 86400,
         "system": """You are a professional translator.
 Preserve meaning, tone, and formatting.
 Keep proper nouns and product names unchanged unless commonly translated.
@@ -64,6 +69,7 @@ Text:
     "categorize": {
         "id": "categorize",
         "description": "Categorize text into predefined categories.",
+        "cache_ttl": 86400,
         "system": """You are a classification assistant.
 Choose exactly one category from the provided list.
 Return JSON only in the specified format.
@@ -81,6 +87,7 @@ Return JSON only:
     "sentiment": {
         "id": "sentiment",
         "description": "Sentiment analysis with score.",
+        "cache_ttl": 86400,
         "system": """You analyze sentiment.
 Use sentiment labels: positive, negative, neutral.
 Score ranges from -1 to 1 (negative to positive).
@@ -97,6 +104,7 @@ Return JSON only:
     "chat_summary": {
         "id": "chat_summary",
         "description": "Short chat summary for context.",
+        "cache_ttl": 3600,
         "system": """You summarize conversation context for future messages.
 Keep it to 2-3 sentences.
 Mention key topics, decisions, and open issues.
@@ -109,6 +117,7 @@ Do not include extra commentary.""",
     "chat_notes": {
         "id": "chat_notes",
         "description": "Structured knowledge summary for exported chats.",
+        "cache_ttl": 86400,
         "system": """You extract all valuable knowledge from a conversation.
 Do not omit important details, decisions, or action items.
 Preserve names, numbers, commands, and URLs exactly.
@@ -134,6 +143,7 @@ Conversation:
     "analysis": {
         "id": "analysis",
         "description": "General analysis with flexible output formatting.",
+        "cache_ttl": 3600,
         "system": """You are a senior analyst.
 Follow the user's instructions exactly.
 If a specific format is requested, use it precisely.
@@ -153,6 +163,12 @@ def get_job_definition(job_id: str) -> Optional[Dict]:
     return JOBS.get(job_id)
 
 
+def get_cache_ttl(job_id: str) -> int:
+    """Seconds an identical response of this job may be reused (see app.providers.response_cache)."""
+    job = get_job_definition(job_id) or {}
+    return job.get("cache_ttl", settings.AI_CACHE_TTL)
+
+
 def list_jobs() -> List[Dict[str, str]]:
     return [{"id": k, "description": v["description"]} for k, v in JOBS.items()]
 
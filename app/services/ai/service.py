@@ -1,7 +1,7 @@
 from typing import Dict, Optional, List, Any
 from app.core.config import settings
 from app.core.logger import Logger
-from app.providers.base import BaseProvider
+from app.providers.base import BaseProvider, DeltaCallback
 from app.providers.openai import OpenAIProvider
 from app.providers.groq import GroqProvider
 from app.providers.gemini import GeminiProvider
@@ -10,7 +10,7 @@ from app.providers.nvidia import NvidiaProvider
 from app.providers.glm import GLMProvider
 from app.providers.minimax import MiniMaxProvider
 from app.providers.openrouter import OpenRouterProvider
-from app.services.ai.prompts import build_job_prompt, list_jobs
+from app.services.ai.prompts import build_job_prompt, get_cache_ttl, list_jobs
 from app.services.ai.storage import ai_storage
 
 logger = Logger("AiService")
@@ -97,8 +97,11 @@ class AiService:
             logger.error("Error generating response", e)
             return "Sorry, I encountered an error while processing your request."
 
-    async def quick_chat(self, prompt: str, provider_key: str = None) -> Dict[str, Any]:
-        """Quick one-shot chat without user context. Used for summarization, etc."""
+    async def quick_chat(self, prompt: str, provider_key: str = None, cache_ttl: int = 0) -> Dict[str, Any]:
+        """Quick one-shot chat without user context. Used for summarization, etc.
+
+        cache_ttl > 0 reuses the response of an identical earlier prompt.
+        """
         provider_key = provider_key or (self.active_provider.name if self.active_provider else DEFAULT_PROVIDER)
         provider = self.providers.get(provider_key.lower())
         
@@ -114,7 +117,8 @@ class AiService:
                 prompt=prompt,
                 model=provider.default_model,
                 history=[],
-                context_prefix=""
+                context_prefix="",
+                cache_ttl=cache_ttl
             )
             return result
         except Exception as e:
@@ -125,6 +129,10 @@ class AiService:
         """
         Analyze content with AI (general-purpose, no user context needed).
         This is the main method for other services to call.
+
+        Identical requests are answered from the response cache for
+        options["cache_ttl"] seconds (default AI_CACHE_TTL);
+        options["cache"] = False always calls the provider.
         """
         options = options or {}
         provider_key = options.get("provider", self.active_provider.name if self.active_provider else DEFAULT_PROVIDER)
@@ -140,9 +148,17 @@ class AiService:
             prompt=prompt,
             model=model,
             history=[],
-            context_prefix=system_prompt
+            context_prefix=system_prompt,
+            cache_ttl=self._cache_ttl(options, settings.AI_CACHE_TTL)
         )
 
+    @staticmethod
+    def _cache_ttl(options: Dict, default: int) -> int:
+        """Response cache TTL for a call: options["cache_ttl"], or 0 when options["cache"] is False."""
+        if options.get("cache") is False:
+            return 0
+        return int(options.get("cache_ttl", default))
+
     async def summarize(self, text: str, max_length: int = 200, language: str = "en", options: Dict = None) -> str:
         """Summarize text content in specified language (en or zh)."""
         if language == "zh":
@@ -171,14 +187,14 @@ Content:
 {text}
 
 Summary:"""
-        result = await self.analyze(prompt, options)
+        result = await self.analyze(prompt, {"cache_ttl": get_cache_ttl("summarize"), **(options or {})})
         return result.get("content", "")
 
     async def translate(self, text: str, target_language: str, source_language: str = "", options: Dict = None) -> str:
         """Translate text between languages."""
         source_part = f" from {source_language}" if source_language else ""
         prompt = f"Translate the following text{source_part} to {target_language}:\n\n{text}"
-        result = await self.analyze(prompt, options)
+        result = await self.analyze(prompt, {"cache_ttl": get_cache_ttl("translate"), **(options or {})})
         return result.get("content", "")
 
     async def categorize(self, text: str, categories: List[str], options: Dict = None) -> Dict:
@@ -190,7 +206,7 @@ Text: {text}
 
 Respond with JSON: {{"category": "chosen_category", "confidence": "high/medium/low", "reasoning": "brief explanation"}}"""
         
-        result = await self.analyze(prompt, options)
+        result = await self.analyze(prompt, {"cache_ttl": get_cache_ttl("categorize"), **(options or {})})
         # Try to parse JSON from response
         import json
         try:
@@ -205,7 +221,7 @@ Respond with JSON: {{"category": "chosen_category", "confidence": "high/medium/l
 
 Text: {text}"""
         
-        result = await self.analyze(prompt, options)
+        result = await self.analyze(prompt, {"cache_ttl": get_cache_ttl("sentiment"), **(options or {})})
         import json
         try:
             return json.loads(result.get("content", "{}"))
@@ -214,8 +230,12 @@ Text: {text}"""
 
     # ============= Chat Session Methods =============
     
-    async def chat(self, user_id: int, message: str) -> Dict[str, Any]:
-        """Send a message and get AI response with history."""
+    async def chat(self, user_id: int, message: str, on_delta: Optional[DeltaCallback] = None) -> Dict[str, Any]:
+        """Send a message and get AI response with history.
+
+        With on_delta, the response is streamed and each delta is passed to
+        it as it arrives; the return value is the same either way.
+        """
         user_settings = await ai_storage.get_settings(user_id)
         provider = self.providers.get(user_settings.get("provider", DEFAULT_PROVIDER).lower())
         
@@ -251,12 +271,24 @@ Text: {text}"""
         job_data = build_job_prompt("chat", {"message": message})
         model = user_settings.get("model") or getattr(provider, "default_model", None)
         
-        result = await provider.call_with_trace(
-            prompt=job_data["prompt"],
-            model=model,
-            history=history,
-            context_prefix=summary_prefix + job_data["system"]
-        )
+        if on_delta:
+            parts = {"thinking": [], "content": []}
+            async for delta in provider.stream_with_trace(
+                prompt=job_data["prompt"],
+                model=model,
+                history=history,
+                context_prefix=summary_prefix + job_data["system"]
+            ):
+                parts.setdefault(delta["type"], []).append(delta["text"])
+                await on_delta(delta)
+            result = {"thinking": "".join(parts["thinking"]), "content": "".join(parts["content"])}
+        else:
+            result = await provider.call_with_trace(
+                prompt=job_data["prompt"],
+                model=model,
+                history=history,
+                context_prefix=summary_prefix + job_data["system"]
+            )
         
         content = result.get("content", "")
         
@@ -273,7 +305,11 @@ Text: {text}"""
         }
 
     async def run_job(self, job_id: str, payload: Dict = None, options: Dict = None) -> Dict[str, str]:
-        """Run a job from the prompt catalog."""
+        """Run a job from the prompt catalog.
+
+        Responses are cached for the job's cache_ttl (see prompts.JOBS);
+        options["cache_ttl"] / options["cache"] = False override it.
+        """
         options = options or {}
         job_data = build_job_prompt(job_id, payload or {})
         
@@ -291,7 +327,8 @@ Text: {text}"""
             prompt=job_data["prompt"],
             model=model,
             history=history,
-            context_prefix=context
+            context_prefix=context,
+            cache_ttl=self._cache_ttl(options, get_cache_ttl(job_id))
         )
 
     async def get_settings(self, user_id: int) -> Dict:
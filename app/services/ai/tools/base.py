@@ -3,7 +3,7 @@ Tool base class for AI agent tool execution.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, Optional
 from dataclasses import dataclass, field
 from app.core.logger import Logger
 
@@ -39,6 +39,14 @@ class ToolResult:
 class Tool(ABC):
     """Base class for all tools."""
     
+    # Tools that change state run alone and in call order within an agent turn;
+    # pure calls run concurrently (see Agent.execute_tool_calls)
+    side_effects: bool = False
+    # Actions of a side-effecting tool that only read
+    read_actions: FrozenSet[str] = frozenset()
+    # Seconds before a call is abandoned (None: AI_TOOL_TIMEOUT)
+    timeout: Optional[float] = None
+    
     def __init__(self):
         self.logger = Logger(f"Tool:{self.name}")
     
@@ -95,6 +103,10 @@ class Tool(ABC):
             }
         }
     
+    def is_pure(self, arguments: Dict[str, Any]) -> bool:
+        """Whether this call can run concurrently with other calls."""
+        return not self.side_effects or arguments.get("action") in self.read_actions
+    
     def validate_params(self, **kwargs) -> Optional[str]:
         """Validate parameters. Returns error message or None if valid."""
         for param in self.parameters:
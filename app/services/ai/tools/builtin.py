@@ -253,6 +253,9 @@ class DateTimeTool(Tool):
 class MemoryTool(Tool):
     """Store and retrieve key-value notes."""
     
+    side_effects = True
+    read_actions = frozenset({"get", "list"})
+    
     _memory: Dict[str, Any] = {}
     
     @property
@@ -33,6 +33,9 @@ def get_account_id() -> str:
 class CloudflareDNSTool(Tool):
     """Manage Cloudflare DNS records."""
     
+    side_effects = True
+    read_actions = frozenset({"list", "get"})
+    
     @property
     def name(self) -> str:
         return "cloudflare_dns"
@@ -415,6 +418,9 @@ class CloudflarePagesTool(Tool):
 class CloudflareKVTool(Tool):
     """Read and write to Cloudflare Workers KV."""
     
+    side_effects = True
+    read_actions = frozenset({"list_namespaces", "list_keys", "get"})
+    
     @property
     def name(self) -> str:
         return "cloudflare_kv"
@@ -98,6 +98,8 @@ class FileReadTool(Tool):
 class FileWriteTool(Tool):
     """Write content to a file."""
     
+    side_effects = True
+    
     @property
     def name(self) -> str:
         return "file_write"
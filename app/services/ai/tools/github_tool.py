@@ -95,6 +95,9 @@ class GitHubRepoTool(Tool):
 class GitHubIssuesTool(Tool):
     """List, get, or create GitHub issues."""
     
+    side_effects = True
+    read_actions = frozenset({"list", "get"})
+    
     @property
     def name(self) -> str:
         return "github_issues"
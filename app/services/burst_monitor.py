@@ -11,10 +11,11 @@ Sends alerts to BURST_TARGET_GROUP.
 
 import asyncio
 import logging
-import math
 from datetime import datetime, time as time_type
 from typing import Dict, List, Optional
 
+import numpy as np
+
 from app.core.config import settings
 from app.core.database import db
 from app.core.timezone import china_now, china_today
@@ -29,7 +30,6 @@ class BurstMonitorService:
     def __init__(self):
         self.is_running = False
         self._monitor_task = None
-        self._ak = None  # Lazy-loaded akshare
         
         # State tracking
         self._price_state: Dict[str, Dict] = {}  # code -> {price, time, ...}
@@ -42,16 +42,6 @@ class BurstMonitorService:
         self.ALERT_COOLDOWN = 300  # 5 min cooldown per stock
         self.POLL_INTERVAL = 30  # Poll every 30 seconds
     
-    def _get_akshare(self):
-        """Lazy load akshare module."""
-        if self._ak is None:
-            try:
-                import akshare as ak
-                self._ak = ak
-            except ImportError:
-                logger.error("akshare not installed")
-        return self._ak
-    
     async def start(self):
         """Start the burst monitoring service."""
         if self.is_running:
@@ -89,72 +79,39 @@ class BurstMonitorService:
         return (570 <= time_mins <= 690) or (780 <= time_mins <= 900)
     
     async def _poll_realtime_data(self) -> Dict[str, Dict]:
-        """Fetch real-time stock data."""
+        """Fetch real-time stock data from the shared spot snapshot."""
         try:
-            from app.services.data_provider.service import data_provider
-
-            # Prefer data provider (has crawler fallback) to avoid AkShare blocks
-            try:
-                df = await asyncio.wait_for(data_provider.get_all_spot_data(), timeout=300.0)
-            except asyncio.TimeoutError:
-                logger.warn("Timeout while polling realtime data (provider)")
-                df = None
-            except Exception as e:
-                logger.warn(f"Realtime data provider error: {e}")
-                df = None
+            from app.services.spot_snapshot import spot_snapshot
 
-            # Final fallback to AkShare direct if provider returned nothing
-            if df is None or getattr(df, "empty", False):
-                ak = self._get_akshare()
-                if not ak:
-                    return {}
-                try:
-                    df = await asyncio.wait_for(
-                        asyncio.to_thread(ak.stock_zh_a_spot_em),
-                        timeout=300.0
-                    )
-                except asyncio.TimeoutError:
-                    logger.warn("Timeout while polling realtime data (akshare)")
-                    return {}
-            
-            if df is None or df.empty:
+            snap = await spot_snapshot.get(max_age=self.POLL_INTERVAL)
+            if snap is None or not len(snap):
                 return {}
-            
-            result = {}
-            # Helper for safe conversion
-            def safe_float(v, default=0.0):
-                try:
-                    f = float(v)
-                    return default if math.isnan(f) else f
-                except (ValueError, TypeError):
-                    return default
 
-            def safe_int(v, default=0):
-                try:
-                    f = float(v)
-                    return default if math.isnan(f) else int(f)
-                except (ValueError, TypeError):
-                    return default
+            def column(name):
+                return np.nan_to_num(snap.column(name), nan=0.0).tolist()
 
-            for _, row in df.iterrows():
-                code = str(row.get('代码', ''))
-                name = str(row.get('名称', ''))
-                
+            result = {}
+            rows = zip(
+                snap.column('代码').tolist(), snap.column('名称').tolist(),
+                column('最新价'), column('涨跌幅'), column('成交量'), column('成交额'),
+                column('最高'), column('最低'), column('今开'), column('昨收'), column('换手率'),
+            )
+            for code, name, price, change_pct, volume, amount, high, low, open_, prev_close, turnover in rows:
                 # Skip ST stocks
                 if 'ST' in name:
                     continue
                 
                 result[code] = {
                     'name': name,
-                    'price': safe_float(row.get('最新价')),
-                    'change_pct': safe_float(row.get('涨跌幅')),
-                    'volume': safe_int(row.get('成交量')),
-                    'amount': safe_float(row.get('成交额')),
-                    'high': safe_float(row.get('最高')),
-                    'low': safe_float(row.get('最低')),
-                    'open': safe_float(row.get('今开')),
-                    'prev_close': safe_float(row.get('昨收')),
-                    'turnover': safe_float(row.get('换手率')),
+                    'price': price,
+                    'change_pct': change_pct,
+                    'volume': int(volume),
+                    'amount': amount,
+                    'high': high,
+                    'low': low,
+                    'open': open_,
+                    'prev_close': prev_close,
+                    'turnover': turnover,
                 }
             
             return result
@@ -551,6 +551,7 @@ class ProcessingResult:
     
     # Timing
     processing_time_ms: float = 0.0
+    stage_ms: Dict[str, float] = field(default_factory=dict)  # Per pipeline stage
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -567,6 +568,7 @@ class ProcessingResult:
             "hard_fact_recall": self.hard_fact_recall,
             "traceability": self.traceability,
             "processing_time_ms": self.processing_time_ms,
+            "stage_ms": self.stage_ms,
         }
 
 
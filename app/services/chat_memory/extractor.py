@@ -13,6 +13,7 @@ Key features:
 
 import re
 import json
+import asyncio
 import hashlib
 from datetime import datetime
 from typing import List, Dict, Optional, Any, Tuple
@@ -46,6 +47,9 @@ from app.services.chat_memory.prompts import (
 
 logger = Logger("Extractor")
 
+# A re-processed chunk (retry, overlapping history fetch) reuses its extraction for a week
+EXTRACTION_CACHE_TTL = 7 * 86400
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # Key Sentence Pre-filtering (Heuristic-based)
@@ -221,9 +225,11 @@ class Extractor:
         # Prepare message text with highlights
         messages_text = chunk.get_text_for_extraction()
         
-        # Run two-pass extraction
-        hard_info = await self._extract_hard_info(messages_text)
-        soft_info = await self._extract_soft_info(messages_text)
+        # Run both passes at once (they are independent LLM calls)
+        hard_info, soft_info = await asyncio.gather(
+            self._extract_hard_info(messages_text),
+            self._extract_soft_info(messages_text),
+        )
         
         # Build ChunkExtraction
         extraction = self._build_extraction(
@@ -249,7 +255,7 @@ class Extractor:
         prompt = HARD_INFO_EXTRACTION_PROMPT.format(messages=messages_text)
         
         try:
-            result = await self.ai_service.quick_chat(prompt)
+            result = await self.ai_service.quick_chat(prompt, cache_ttl=EXTRACTION_CACHE_TTL)
             content = result.get('content', '')
             parsed = extract_json_from_response(content)
             return parsed or {}
@@ -262,7 +268,7 @@ class Extractor:
         prompt = SOFT_INFO_EXTRACTION_PROMPT.format(messages=messages_text)
         
         try:
-            result = await self.ai_service.quick_chat(prompt)
+            result = await self.ai_service.quick_chat(prompt, cache_ttl=EXTRACTION_CACHE_TTL)
             content = result.get('content', '')
             parsed = extract_json_from_response(content)
             return parsed or {}
@@ -7,13 +7,21 @@ Orchestrates the full extraction pipeline:
 3. Merge into global memory
 4. Validate with recall check
 5. Render reports
+
+Extraction is the slow part (two LLM calls per chunk), so up to
+CHAT_MEMORY_EXTRACT_CONCURRENCY chunks are extracted ahead while earlier
+ones are saved and merged. Merges still happen in chunk order, so the
+resulting memory is the same as a sequential run.
 """
 
+import asyncio
 import time
 import json
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import Deque, List, Dict, Optional, Any, Tuple
 
+from app.core.config import settings
 from app.core.logger import Logger
 from app.core.database import db
 from app.services.chat_memory.data_models import (
@@ -24,7 +32,7 @@ from app.services.chat_memory.data_models import (
     DecisionStatus,
     ActionStatus,
 )
-from app.services.chat_memory.chunker import TopicChunker, topic_chunker
+from app.services.chat_memory.chunker import MessageChunk, TopicChunker, topic_chunker
 from app.services.chat_memory.extractor import Extractor, extractor
 from app.services.chat_memory.merger import MemoryMerger, memory_merger
 from app.services.chat_memory.recall_checker import RecallChecker, recall_checker
@@ -100,6 +108,9 @@ async def ensure_tables():
                 UNIQUE(channel_id, date)
             );
         """)
+        await conn.execute("""
+            ALTER TABLE extraction_metrics ADD COLUMN IF NOT EXISTS stage_ms JSONB;
+        """)
         
         logger.info("📦 Chat memory tables initialized")
 
@@ -183,8 +194,9 @@ async def save_metrics(
     traceability: float,
     chunks_processed: int,
     messages_processed: int,
+    stage_ms: Optional[Dict[str, float]] = None,
 ):
-    """Save quality metrics."""
+    """Save quality metrics (and the latest run's per-stage timings)."""
     if not db.pool:
         return
     
@@ -192,15 +204,17 @@ async def save_metrics(
         today = datetime.now().date()
         await db.pool.execute("""
             INSERT INTO extraction_metrics 
-            (channel_id, date, hard_fact_recall, traceability_pct, chunks_processed, messages_processed)
-            VALUES ($1, $2, $3, $4, $5, $6)
+            (channel_id, date, hard_fact_recall, traceability_pct, chunks_processed, messages_processed, stage_ms)
+            VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb)
             ON CONFLICT (channel_id, date) 
             DO UPDATE SET 
                 hard_fact_recall = $3,
                 traceability_pct = $4,
                 chunks_processed = extraction_metrics.chunks_processed + $5,
-                messages_processed = extraction_metrics.messages_processed + $6
-        """, channel_id, today, hard_fact_recall, traceability, chunks_processed, messages_processed)
+                messages_processed = extraction_metrics.messages_processed + $6,
+                stage_ms = $7::jsonb
+        """, channel_id, today, hard_fact_recall, traceability, chunks_processed, messages_processed,
+             json.dumps(stage_ms or {}))
     except Exception as e:
         logger.error(f"Failed to save metrics: {e}")
 
@@ -414,34 +428,68 @@ class ChatMemoryService:
         
         total_recall = 0.0
         
-        for chunk in chunks:
-            # Extract
-            extraction = await self.extractor.extract(chunk, channel_id, channel_name)
-            
-            # Save extraction for traceability
-            await save_extraction(extraction)
-            
-            # Merge into memory
-            memory, stats = self.merger.merge(extraction, memory)
-            
-            # Accumulate stats
-            for key in total_stats:
-                if key in stats:
-                    total_stats[key] += stats[key]
-            
-            # Recall check (sample-based for performance)
-            if len(chunks) <= 10 or chunks.index(chunk) % 5 == 0:
-                chunk_messages = [
-                    {'message_text': m.text, 'sender_name': m.sender, 'timestamp': m.timestamp}
-                    for m in chunk.messages
-                ]
-                recall_report = self.recall_checker.check(chunk_messages, extraction)
-                total_recall += recall_report.recall_score
+        # Stage timings (ms): extract is LLM time summed over chunks, extract_wait
+        # the part of it the in-order merge actually waited for
+        stage_ms = {'extract': 0.0, 'extract_wait': 0.0, 'save': 0.0, 'merge': 0.0, 'recall': 0.0}
+        concurrency = max(1, settings.CHAT_MEMORY_EXTRACT_CONCURRENCY)
+        pending: Deque[asyncio.Task] = deque()
+        next_chunk = 0
+        
+        def schedule():
+            # Keep up to `concurrency` extractions running ahead of the merge
+            nonlocal next_chunk
+            while next_chunk < len(chunks) and len(pending) < concurrency:
+                pending.append(asyncio.create_task(
+                    self._extract_timed(chunks[next_chunk], channel_id, channel_name)
+                ))
+                next_chunk += 1
+        
+        try:
+            schedule()
+            for index, chunk in enumerate(chunks):
+                # Extract (already running; results are taken in chunk order)
+                waited = time.perf_counter()
+                extraction, extract_ms = await pending.popleft()
+                stage_ms['extract_wait'] += (time.perf_counter() - waited) * 1000
+                stage_ms['extract'] += extract_ms
+                schedule()
+                
+                # Save extraction for traceability
+                started = time.perf_counter()
+                await save_extraction(extraction)
+                stage_ms['save'] += (time.perf_counter() - started) * 1000
+                
+                # Merge into memory
+                started = time.perf_counter()
+                memory, stats = self.merger.merge(extraction, memory)
+                stage_ms['merge'] += (time.perf_counter() - started) * 1000
+                
+                # Accumulate stats
+                for key in total_stats:
+                    if key in stats:
+                        total_stats[key] += stats[key]
+                
+                # Recall check (sample-based for performance)
+                if len(chunks) <= 10 or index % 5 == 0:
+                    started = time.perf_counter()
+                    chunk_messages = [
+                        {'message_text': m.text, 'sender_name': m.sender, 'timestamp': m.timestamp}
+                        for m in chunk.messages
+                    ]
+                    recall_report = self.recall_checker.check(chunk_messages, extraction)
+                    total_recall += recall_report.recall_score
+                    stage_ms['recall'] += (time.perf_counter() - started) * 1000
+        finally:
+            for task in pending:
+                task.cancel()
         
         # Step 4: Save updated memory
+        started = time.perf_counter()
         await save_memory(memory)
+        stage_ms['save'] += (time.perf_counter() - started) * 1000
         
         # Step 5: Calculate final metrics
+        stage_ms = {k: round(v, 1) for k, v in stage_ms.items()}
         avg_recall = total_recall / len(chunks) if chunks else 1.0
         traceability = memory.traceability_score
         
@@ -452,6 +500,7 @@ class ChatMemoryService:
             traceability=traceability,
             chunks_processed=len(chunks),
             messages_processed=len(messages),
+            stage_ms=stage_ms,
         )
         
         # Build result
@@ -471,6 +520,7 @@ class ChatMemoryService:
             hard_fact_recall=avg_recall,
             traceability=traceability,
             processing_time_ms=processing_time,
+            stage_ms=stage_ms,
         )
         
         logger.info(
@@ -479,11 +529,23 @@ class ChatMemoryService:
             f"{result.new_claims} claims, "
             f"{result.new_decisions} decisions, "
             f"recall={avg_recall:.1%}, "
-            f"time={processing_time:.0f}ms"
+            f"time={processing_time:.0f}ms "
+            f"(extract {stage_ms['extract']:.0f}ms, waited {stage_ms['extract_wait']:.0f}ms)"
         )
         
         return result
     
+    async def _extract_timed(
+        self,
+        chunk: MessageChunk,
+        channel_id: str,
+        channel_name: str,
+    ) -> Tuple[ChunkExtraction, float]:
+        """Extract one chunk; returns the extraction and its duration in ms."""
+        started = time.perf_counter()
+        extraction = await self.extractor.extract(chunk, channel_id, channel_name)
+        return extraction, (time.perf_counter() - started) * 1000
+    
     async def get_memory(self, channel_id: str) -> Optional[GlobalMemory]:
         """Get global memory for a channel."""
         await self.initialize()
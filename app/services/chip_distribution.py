@@ -9,24 +9,219 @@ Uses proper algorithm based on:
 """
 
 import asyncio
+import time
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
 import json
 
+import numpy as np
+
 from app.core.logger import Logger
 from app.core.database import db
 from app.core.config import settings
-from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.core.timezone import china_today
+from app.services.scheduler import Job, job_scheduler
+from app.services.scanner.loader import ColumnarHistory
 
 logger = Logger("ChipDistributionService")
 
+NUM_BUCKETS = 30
+LOOKBACK_DAYS = 120
+MIN_DAYS = 10
+
+# Codes per window query / kernel run / COPY in the nightly update
+CHIP_BATCH_SIZE = 1000
+
+# Latest $2 bars up to $3 per code, in the ColumnarHistory record layout
+CHIP_WINDOW_SQL = """
+    SELECT c.code, (t.date - DATE '1970-01-01')::int4,
+           t.open::float8, t.high::float8, t.low::float8, t.close::float8,
+           COALESCE(t.volume, 0)::float8, COALESCE(t.turnover_rate, 0)::float8
+    FROM unnest($1::text[]) AS c(code)
+    CROSS JOIN LATERAL (
+        SELECT date, open, high, low, close, volume, turnover_rate
+        FROM stock_history
+        WHERE code = c.code AND date <= $3
+        ORDER BY date DESC
+        LIMIT $2
+    ) t
+    ORDER BY c.code, t.date
+"""
+
+
+def _chip_kernel(
+    open_p: np.ndarray,
+    high_p: np.ndarray,
+    low_p: np.ndarray,
+    close_p: np.ndarray,
+    volume: np.ndarray,
+    turnover: np.ndarray,
+    num_buckets: int = NUM_BUCKETS,
+) -> Dict[str, np.ndarray]:
+    """Chip distributions for many stocks at once.
+    
+    Inputs are (stocks, days) arrays, oldest day first, left-padded with NaN
+    for stocks with shorter windows; turnover is in percent. Bucket
+    allocation is computed for all stocks, days and buckets as array
+    operations; the turnover decay is a recurrence over days vectorized
+    across stocks and buckets, so results equal the per-stock loop it
+    replaces bit for bit.
+    
+    Returns:
+        Dict with chips (stocks, buckets), price (stocks, buckets),
+        min_price and bucket_size (stocks,)
+    """
+    n_stocks, n_days = close_p.shape
+    
+    # Price range with 10% padding
+    min_price = np.nanmin(low_p, axis=1)
+    max_price = np.nanmax(high_p, axis=1)
+    padding = (max_price - min_price) * 0.1
+    min_price = np.maximum(0.01, min_price - padding)
+    max_price = max_price + padding
+    bucket_size = (max_price - min_price) / num_buckets
+    
+    buckets = np.arange(num_buckets)
+    bucket_low = min_price[:, None] + buckets[None, :] * bucket_size[:, None]
+    bucket_high = bucket_low + bucket_size[:, None]
+    mid = ((bucket_low + bucket_high) / 2)[:, None, :]
+    bs = bucket_size[:, None, None]
+    
+    # (stocks, days, 1) views for broadcasting against buckets
+    o, h, l, c = (a[:, :, None] for a in (open_p, high_p, low_p, close_p))
+    v = volume[:, :, None]
+    active = volume > 0
+    
+    body_low = np.minimum(o, c)
+    body_high = np.maximum(o, c)
+    body_range = body_high - body_low
+    lower_range = body_low - l
+    upper_range = h - body_high
+    
+    # Distribute volume: 60% in body, 20% in each shadow
+    with np.errstate(divide="ignore", invalid="ignore"):
+        body = np.where(
+            (mid >= body_low) & (mid <= body_high) & (body_range > 0),
+            v * 0.6 / np.maximum(1, body_range / bs), 0.0,
+        )
+        lower = np.where(
+            (mid >= l) & (mid < body_low) & (lower_range > 0),
+            v * 0.2 / np.maximum(1, lower_range / bs), 0.0,
+        )
+        upper = np.where(
+            (mid > body_high) & (mid <= h) & (upper_range > 0),
+            v * 0.2 / np.maximum(1, upper_range / bs), 0.0,
+        )
+    added = np.where(active[:, :, None], body + lower + upper, 0.0)
+    
+    # Higher turnover = more old chips are "replaced"; inactive days keep chips
+    decay = np.where(active, np.maximum(0, 1 - np.nan_to_num(turnover) / 100), 1.0)
+    
+    chips = np.zeros((n_stocks, num_buckets))
+    for d in range(n_days):
+        chips = chips * decay[:, d, None] + added[:, d, :]
+    
+    price = min_price[:, None] + (buckets[None, :] + 0.5) * bucket_size[:, None]
+    return {"chips": chips, "price": price}
+
+
+def _summarize(code: str, date_str: str, current_price: float, chips: np.ndarray, price: np.ndarray) -> Dict:
+    """Build the API result dict for one stock."""
+    chips_list = chips.tolist()
+    price_list = price.tolist()
+    max_chip = max(chips_list) if chips_list else 1
+    
+    distribution = []
+    profit_volume = 0
+    loss_volume = 0
+    weighted_sum = 0
+    total_chips = 0
+    
+    for chip_value, bucket_price in zip(chips_list, price_list):
+        percentage = (chip_value / max_chip * 100) if max_chip > 0 else 0
+        is_profit = bucket_price <= current_price
+        
+        distribution.append({
+            'price': round(bucket_price, 2),
+            'percentage': round(percentage, 1),
+            'isProfit': is_profit
+        })
+        
+        if chip_value > 0:
+            if is_profit:
+                profit_volume += chip_value
+            else:
+                loss_volume += chip_value
+            weighted_sum += bucket_price * chip_value
+            total_chips += chip_value
+    
+    avg_cost = weighted_sum / total_chips if total_chips > 0 else current_price
+    profit_ratio = (profit_volume / (profit_volume + loss_volume) * 100) if (profit_volume + loss_volume) > 0 else 0
+    
+    # Concentration: top 5 buckets / total
+    sorted_chips = sorted(chips_list, reverse=True)
+    top_sum = sum(sorted_chips[:5])
+    total_sum = sum(chips_list)
+    concentration = (top_sum / total_sum * 100) if total_sum > 0 else 0
+    
+    return {
+        'code': code,
+        'date': date_str,
+        'currentPrice': current_price,
+        'distribution': list(reversed(distribution)),  # High to low
+        'avgCost': round(avg_cost, 2),
+        'profitRatio': round(profit_ratio, 1),
+        'concentration': round(concentration, 1)
+    }
+
+
+def compute_chip_distributions(
+    history: ColumnarHistory,
+    date_str: str,
+    num_buckets: int = NUM_BUCKETS,
+    chunk_size: int = 500,
+) -> Dict[str, Dict]:
+    """Chip distributions for every code in history with >= MIN_DAYS bars.
+    
+    CPU-bound; call from a worker thread. Stocks are processed in chunks to
+    bound the (stocks, days, buckets) temporaries.
+    
+    Returns:
+        Dict mapping code -> result dict (as served by /chart/chips)
+    """
+    lengths = np.diff(history.offsets)
+    rows = [i for i, n in enumerate(lengths) if n >= MIN_DAYS]
+    results: Dict[str, Dict] = {}
+    
+    for start in range(0, len(rows), chunk_size):
+        chunk_rows = rows[start:start + chunk_size]
+        width = int(lengths[chunk_rows].max())
+        # Right-aligned (stocks, days) arrays, NaN before each stock's first bar
+        arrays = {name: np.full((len(chunk_rows), width), np.nan) for name in history.fields}
+        for j, i in enumerate(chunk_rows):
+            lo, hi = history.offsets[i], history.offsets[i + 1]
+            for name, arr in arrays.items():
+                arr[j, width - (hi - lo):] = history.fields[name][lo:hi]
+        
+        kernel = _chip_kernel(
+            arrays["open"], arrays["high"], arrays["low"], arrays["close"],
+            arrays["volume"], arrays["turnover"], num_buckets,
+        )
+        for j, i in enumerate(chunk_rows):
+            code = history.codes[i]
+            results[code] = _summarize(
+                code, date_str, float(arrays["close"][j, -1]),
+                kernel["chips"][j], kernel["price"][j],
+            )
+    
+    return results
+
 
 class ChipDistributionService:
     """Service for calculating and caching chip distribution."""
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._update_lock = asyncio.Lock()
     
     async def start(self):
@@ -35,18 +230,13 @@ class ChipDistributionService:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Chip Distribution Service started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("chip")
         logger.info("Chip Distribution Service stopped")
     
     async def initialize(self):
@@ -85,7 +275,7 @@ class ChipDistributionService:
         """
         Calculate chip distribution for a stock on a specific date.
         
-        Algorithm:
+        Algorithm (see compute_chip_distributions):
         1. Get historical data with adjusted prices
         2. Distribute each day's volume across price range (OHLC)
         3. Apply decay based on turnover rate
@@ -95,144 +285,27 @@ class ChipDistributionService:
             return {}
         
         target_date = target_date or china_today()
-        
-        # Fetch historical data
-        rows = await db.pool.fetch("""
-            SELECT date, open, high, low, close, volume, turnover_rate
-            FROM stock_history
-            WHERE code = $1 AND date <= $2
-            ORDER BY date DESC
-            LIMIT $3
-        """, code, target_date, lookback_days)
-        
-        if not rows or len(rows) < 10:
+        results = await self._calculate_batch([code], target_date, lookback_days)
+        return results.get(code, {})
+    
+    async def _calculate_batch(
+        self,
+        codes: List[str],
+        target_date: date,
+        lookback_days: int = LOOKBACK_DAYS,
+    ) -> Dict[str, Dict]:
+        """Fetch windows for codes in one query and run the kernel off the event loop."""
+        rows = await db.pool.fetch(CHIP_WINDOW_SQL, codes, lookback_days, target_date)
+        if not rows:
             return {}
         
-        # Reverse to chronological order
-        data = list(reversed([dict(r) for r in rows]))
-        
-        # Get current price (latest close)
-        current_price = float(data[-1]['close'])
-        
-        # Find price range
-        min_price = min(float(d['low']) for d in data)
-        max_price = max(float(d['high']) for d in data)
-        
-        # Add padding
-        padding = (max_price - min_price) * 0.1
-        min_price = max(0.01, min_price - padding)
-        max_price = max_price + padding
-        
-        # Create price buckets
-        num_buckets = 30
-        bucket_size = (max_price - min_price) / num_buckets
-        chips = [0.0] * num_buckets  # Current chip distribution
-        
-        # Process each day
-        for i, d in enumerate(data):
-            volume = float(d['volume'] or 0)
-            if volume <= 0:
-                continue
-            
-            open_p = float(d['open'])
-            high_p = float(d['high'])
-            low_p = float(d['low'])
-            close_p = float(d['close'])
-            turnover_rate = float(d.get('turnover_rate') or 0) / 100  # Convert to decimal
-            
-            # Decay existing chips based on turnover rate
-            # Higher turnover = more old chips are "replaced"
-            decay_factor = max(0, 1 - turnover_rate)
-            chips = [c * decay_factor for c in chips]
-            
-            # Distribute today's volume into buckets
-            # Use weighted distribution based on candle type
-            is_bullish = close_p >= open_p
-            
-            # Calculate volume distribution across price range
-            body_low = min(open_p, close_p)
-            body_high = max(open_p, close_p)
-            
-            # Distribute volume: 60% in body, 20% in each shadow
-            body_volume = volume * 0.6
-            lower_shadow_volume = volume * 0.2
-            upper_shadow_volume = volume * 0.2
-            
-            # Add volume to buckets
-            for b in range(num_buckets):
-                bucket_low = min_price + b * bucket_size
-                bucket_high = bucket_low + bucket_size
-                bucket_mid = (bucket_low + bucket_high) / 2
-                
-                # Check which part of candle this bucket belongs to
-                added_volume = 0
-                
-                # Body
-                if bucket_mid >= body_low and bucket_mid <= body_high:
-                    body_range = body_high - body_low
-                    if body_range > 0:
-                        added_volume += body_volume / max(1, (body_high - body_low) / bucket_size)
-                
-                # Lower shadow
-                if bucket_mid >= low_p and bucket_mid < body_low:
-                    shadow_range = body_low - low_p
-                    if shadow_range > 0:
-                        added_volume += lower_shadow_volume / max(1, shadow_range / bucket_size)
-                
-                # Upper shadow
-                if bucket_mid > body_high and bucket_mid <= high_p:
-                    shadow_range = high_p - body_high
-                    if shadow_range > 0:
-                        added_volume += upper_shadow_volume / max(1, shadow_range / bucket_size)
-                
-                chips[b] += added_volume
-        
-        # Normalize and create distribution
-        max_chip = max(chips) if chips else 1
-        distribution = []
-        profit_volume = 0
-        loss_volume = 0
-        weighted_sum = 0
-        total_chips = 0
-        
-        for b in range(num_buckets):
-            price = min_price + (b + 0.5) * bucket_size
-            chip_value = chips[b]
-            percentage = (chip_value / max_chip * 100) if max_chip > 0 else 0
-            is_profit = price <= current_price
-            
-            distribution.append({
-                'price': round(price, 2),
-                'percentage': round(percentage, 1),
-                'isProfit': is_profit
-            })
-            
-            if chip_value > 0:
-                if is_profit:
-                    profit_volume += chip_value
-                else:
-                    loss_volume += chip_value
-                weighted_sum += price * chip_value
-                total_chips += chip_value
-        
-        avg_cost = weighted_sum / total_chips if total_chips > 0 else current_price
-        profit_ratio = (profit_volume / (profit_volume + loss_volume) * 100) if (profit_volume + loss_volume) > 0 else 0
-        
-        # Concentration: top 5 buckets / total
-        sorted_chips = sorted(chips, reverse=True)
-        top_sum = sum(sorted_chips[:5])
-        total_sum = sum(chips)
-        concentration = (top_sum / total_sum * 100) if total_sum > 0 else 0
+        history = ColumnarHistory.from_records(rows)
+        del rows
         
-        return {
-            'code': code,
-            'date': str(target_date),
-            'currentPrice': current_price,
-            'distribution': list(reversed(distribution)),  # High to low
-            'avgCost': round(avg_cost, 2),
-            'profitRatio': round(profit_ratio, 1),
-            'concentration': round(concentration, 1)
-        }
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, compute_chip_distributions, history, str(target_date)
+        )
     
     async def get_chip_distribution(self, code: str, target_date: date = None) -> Dict:
         """Get cached chip distribution, or calculate if not available."""
@@ -296,14 +369,66 @@ class ChipDistributionService:
         except Exception as e:
             logger.warn(f"Failed to save chip distribution for {data['code']}: {e}")
     
+    async def _save_chip_distributions(self, results: List[Dict]):
+        """Bulk upsert chip distributions via COPY into a temp table."""
+        if not db.pool or not results:
+            return
+        
+        records = [
+            (
+                r['code'],
+                date.fromisoformat(r['date']),
+                json.dumps(r['distribution']),
+                r['avgCost'],
+                r['profitRatio'],
+                r['concentration'],
+            )
+            for r in results
+        ]
+        
+        async with db.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE tmp_chip_distribution (
+                        code VARCHAR(10),
+                        date DATE,
+                        distribution JSONB,
+                        avg_cost DECIMAL(10,2),
+                        profit_ratio DECIMAL(5,2),
+                        concentration DECIMAL(5,2)
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table(
+                    'tmp_chip_distribution',
+                    records=records,
+                    columns=['code', 'date', 'distribution', 'avg_cost', 'profit_ratio', 'concentration'],
+                )
+                await conn.execute("""
+                    INSERT INTO stock_chip_distribution 
+                        (code, date, distribution, avg_cost, profit_ratio, concentration, updated_at)
+                    SELECT code, date, distribution, avg_cost, profit_ratio, concentration, NOW()
+                    FROM tmp_chip_distribution
+                    ON CONFLICT (code, date) DO UPDATE SET
+                        distribution = EXCLUDED.distribution,
+                        avg_cost = EXCLUDED.avg_cost,
+                        profit_ratio = EXCLUDED.profit_ratio,
+                        concentration = EXCLUDED.concentration,
+                        updated_at = NOW()
+                """)
+    
     async def update_all_stocks(self):
-        """Background task to update chip distribution for all stocks."""
+        """Background task to update chip distribution for all stocks.
+        
+        Each batch of CHIP_BATCH_SIZE codes is one window query, one kernel
+        run in a worker thread and one COPY upsert.
+        """
         if self._update_lock.locked():
             logger.info("Chip update already in progress, skipping")
             return
         
         async with self._update_lock:
             logger.info("Starting chip distribution update for all stocks...")
+            started = time.perf_counter()
             
             # Get all stock codes from history
             rows = await db.pool.fetch("SELECT DISTINCT code FROM stock_history")
@@ -313,49 +438,25 @@ class ChipDistributionService:
             updated = 0
             errors = 0
             
-            for code in codes:
+            for i in range(0, len(codes), CHIP_BATCH_SIZE):
+                batch_codes = codes[i:i + CHIP_BATCH_SIZE]
                 try:
-                    result = await self.calculate_chip_distribution(code, today)
-                    if result and result.get('distribution'):
-                        await self._save_chip_distribution(result)
-                        updated += 1
+                    results = await self._calculate_batch(batch_codes, today)
+                    await self._save_chip_distributions(list(results.values()))
+                    updated += len(results)
                 except Exception as e:
                     errors += 1
-                    if errors < 5:
-                        logger.warn(f"Failed to update chips for {code}: {e}")
-                
-                # Small delay to avoid overwhelming DB
-                if updated % 100 == 0:
-                    await asyncio.sleep(0.1)
+                    logger.warn(f"Failed to update chips for batch {i // CHIP_BATCH_SIZE + 1}: {e}")
             
-            logger.info(f"✅ Chip distribution update complete: {updated}/{len(codes)}, {errors} errors")
+            elapsed = time.perf_counter() - started
+            logger.info(f"✅ Chip distribution update complete: {updated}/{len(codes)} in {elapsed:.1f}s, {errors} failed batches")
     
-    async def _scheduler_loop(self):
-        """Background scheduler for daily chip updates at 15:30."""
-        update_time = "15:30"
-        triggered_today = set()
-        
-        while self.is_running:
-            try:
-                now = china_now()
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                key = f"{date_str}_chips"
-                
-                # Update at 15:30 on weekdays (after market close)
-                if now.weekday() < 5 and time_str == update_time and key not in triggered_today:
-                    triggered_today.add(key)
-                    # Run in background task to not block
-                    asyncio.create_task(self.update_all_stocks())
-                    
-            except Exception as e:
-                logger.error(f"Chip scheduler error: {e}")
-            
-            await asyncio.sleep(30)
+    def _register_jobs(self):
+        """Daily chip update at 15:30, once the history sync is done."""
+        job_scheduler.register(Job(
+            "chip.update", self.update_all_stocks, times=("15:30",),
+            after=("stock_history.sync",), resources=("db",),
+        ), owner="chip")
 
 
 # Singleton
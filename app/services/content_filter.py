@@ -8,9 +8,9 @@ Detects and filters out unwanted content such as:
 - Spam messages
 """
 
-import re
 from typing import Tuple
 from app.core.logger import Logger
+from app.services.text_matcher import MultiMatcher
 
 logger = Logger("ContentFilter")
 
@@ -68,35 +68,35 @@ class ContentFilter:
     ]
     
     def __init__(self):
-        # Compile regex patterns for performance
-        self._spam_patterns = [re.compile(p, re.IGNORECASE) for p in self.SPAM_PATTERNS]
+        # One compiled matcher for all categories; keys double as filter reasons
+        self._matcher = MultiMatcher(
+            keywords={
+                "advertisement": self.AD_KEYWORDS,
+                "adult_content": self.ADULT_KEYWORDS,
+                "bot_admission": self.BOT_ADMISSION_KEYWORDS,
+            },
+            patterns={"spam": self.SPAM_PATTERNS},
+        )
+    
+    def categories(self, text: str) -> set:
+        """All filter categories the message hits, from one pass."""
+        return self._matcher.matches(text)
     
     def is_ad(self, text: str) -> bool:
         """Check if message contains advertisement content."""
-        if not text:
-            return False
-        lower_text = text.lower()
-        return any(kw.lower() in lower_text for kw in self.AD_KEYWORDS)
+        return "advertisement" in self._matcher.matches(text)
     
     def is_adult_content(self, text: str) -> bool:
         """Check if message contains 18+ / adult content."""
-        if not text:
-            return False
-        lower_text = text.lower()
-        return any(kw.lower() in lower_text for kw in self.ADULT_KEYWORDS)
+        return "adult_content" in self._matcher.matches(text)
     
     def is_bot_admission(self, text: str) -> bool:
         """Check if message is a bot admission / verification message."""
-        if not text:
-            return False
-        lower_text = text.lower()
-        return any(kw.lower() in lower_text for kw in self.BOT_ADMISSION_KEYWORDS)
+        return "bot_admission" in self._matcher.matches(text)
     
     def is_spam(self, text: str) -> bool:
         """Check if message matches spam patterns."""
-        if not text:
-            return False
-        return any(p.search(text) for p in self._spam_patterns)
+        return "spam" in self._matcher.matches(text)
     
     def check(self, text: str) -> Tuple[bool, str]:
         """
@@ -108,17 +108,10 @@ class ContentFilter:
         if not text:
             return False, ""
         
-        if self.is_ad(text):
-            return True, "advertisement"
-        
-        if self.is_adult_content(text):
-            return True, "adult_content"
-        
-        if self.is_bot_admission(text):
-            return True, "bot_admission"
-        
-        if self.is_spam(text):
-            return True, "spam"
+        # Priority: advertisement, adult_content, bot_admission, spam
+        reason = self._matcher.first(text)
+        if reason is not None:
+            return True, reason
         
         return False, ""
     
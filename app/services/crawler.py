@@ -18,6 +18,8 @@ from app.core.database import db
 from app.core.config import settings
 from app.core.timezone import china_now
 from app.core.stock_links import get_chart_url, get_sector_url
+from app.core.send_queue import PRIORITY_REPORT
+from app.services.scheduler import DAILY, Job, job_scheduler
 
 logger = Logger("CrawlerService")
 
@@ -28,7 +30,6 @@ class CrawlerService:
     def __init__(self):
         self.is_running = False
         self._poll_task = None
-        self._report_task = None
         self._http_client: Optional[httpx.AsyncClient] = None
     
     async def start(self):
@@ -45,7 +46,7 @@ class CrawlerService:
             }
         )
         self._poll_task = asyncio.create_task(self._poll_loop())
-        self._report_task = asyncio.create_task(self._report_scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Crawler Service started")
     
     async def stop(self):
@@ -57,12 +58,7 @@ class CrawlerService:
                 await self._poll_task
             except asyncio.CancelledError:
                 pass
-        if self._report_task:
-            self._report_task.cancel()
-            try:
-                await self._report_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("crawler")
         if self._http_client:
             await self._http_client.aclose()
         logger.info("Crawler Service stopped")
@@ -401,30 +397,13 @@ class CrawlerService:
     # Hot Report Scheduler
     # ─────────────────────────────────────────────────────────────────────────
 
-    async def _report_scheduler_loop(self):
-        """Send crawler hot report at 08:00 and 20:00 China time."""
-        report_times = {"08:00": "早间", "20:00": "晚间"}
-        triggered = set()
-
-        while self.is_running:
-            try:
-                now = china_now()
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-
-                if time_str == "00:00":
-                    triggered.clear()
-
-                if time_str in report_times:
-                    key = f"{date_str}_{time_str}"
-                    if key not in triggered:
-                        triggered.add(key)
-                        label = report_times[time_str]
-                        asyncio.create_task(self.send_hot_report(label, hours=12))
-            except Exception as e:
-                logger.error(f"Crawler report scheduler error: {e}")
-
-            await asyncio.sleep(30)
+    def _register_jobs(self):
+        """Send crawler hot report at 08:00 and 20:00 China time, every day."""
+        for hhmm, label in (("08:00", "早间"), ("20:00", "晚间")):
+            job_scheduler.register(Job(
+                f"crawler.hot_report_{hhmm[:2]}", lambda label=label: self.send_hot_report(label, hours=12),
+                times=(hhmm,), calendar=DAILY,
+            ), owner="crawler")
 
     async def send_hot_report(self, label: str, hours: int = 12):
         """Send hot news/sector/stock report to report channel."""
@@ -498,7 +477,8 @@ class CrawlerService:
             report_target,
             report_text,
             parse_mode="html",
-            link_preview=False
+            link_preview=False,
+            priority=PRIORITY_REPORT
         )
         logger.info(f"Sent crawler hot report ({label})")
 
@@ -24,6 +24,8 @@ from app.core.database import db
 from app.core.config import settings
 from app.core.timezone import CHINA_TZ, china_now, china_today
 from app.core.stock_links import get_chart_url
+from app.services.scheduler import Job, job_scheduler
+from app.services.spot_snapshot import spot_snapshot
 
 logger = Logger("DabanService")
 
@@ -52,11 +54,8 @@ class DabanService:
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._intraday_task = None  # Phase 3: intraday polling
         self._ak = None
-        self._last_date = None  # For date change detection
-        self._triggered_today = set()
         
         # Stats for observability
         self._stats = defaultdict(int)
@@ -85,19 +84,14 @@ class DabanService:
         # Initialize Phase 2 tables
         await self.ensure_phase2_tables()
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         self._intraday_task = asyncio.create_task(self._intraday_loop())  # Phase 3
         logger.info("✅ 打板 盘后复盘 + 实时监控 started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("daban")
         if self._intraday_task:
             self._intraday_task.cancel()
             try:
@@ -578,60 +572,23 @@ class DabanService:
         except Exception as e:
             logger.error(f"Failed to send 打板 report: {e}")
     
-    async def _scheduler_loop(self):
+    def _register_jobs(self):
         """
-        Background scheduler for 打板 reports and Phase 2 tracking.
-        
-        Schedule:
+        Schedule (trading days):
         - 15:05: Send daily report
         - 15:10: Save market stats + recommendations
         - 09:40: Update yesterday's recommendation performance
         """
-        schedules = [
-            (15, 5, 'daily_report'),
-            (15, 10, 'save_stats'),
-            (9, 40, 'update_perf'),
-        ]
-        
-        while self.is_running:
-            try:
-                now = china_now()
-                current_date = now.strftime("%Y-%m-%d")
-                
-                # Date change detection - clear triggered set
-                if self._last_date and self._last_date != current_date:
-                    self._triggered_today.clear()
-                    logger.debug("Cleared triggered set for new day")
-                self._last_date = current_date
-                
-                # Skip weekends
-                if now.weekday() >= 5:
-                    await asyncio.sleep(60)
-                    continue
-                
-                for sched_hour, sched_min, task in schedules:
-                    key = f"{current_date}_{task}"
-                    
-                    if key not in self._triggered_today:
-                        target_time = now.replace(hour=sched_hour, minute=sched_min, second=0, microsecond=0)
-                        time_diff = abs((now - target_time).total_seconds())
-                        
-                        if time_diff < 60:  # Within 1 minute window
-                            self._triggered_today.add(key)
-                            logger.info(f"Triggering 打板 task: {task}")
-                            
-                            if task == 'daily_report':
-                                await self.send_daban_report()
-                            elif task == 'save_stats':
-                                await self.save_market_stats()
-                                await self.save_recommendations()
-                            elif task == 'update_perf':
-                                await self.update_recommendation_performance()
-                
-            except Exception as e:
-                logger.error(f"打板 scheduler error: {e}")
-            
-            await asyncio.sleep(30)
+        for name, hhmm, func in (
+            ("daily_report", "15:05", self.send_daban_report),
+            ("save_stats", "15:10", self._save_daily_stats),
+            ("update_perf", "09:40", self.update_recommendation_performance),
+        ):
+            job_scheduler.register(Job(f"daban.{name}", func, times=(hhmm,)), owner="daban")
+
+    async def _save_daily_stats(self):
+        await self.save_market_stats()
+        await self.save_recommendations()
     
     # ═══════════════════════════════════════════════════════════════════════════
     # Phase 2: Market Sentiment & Recommendation Tracking
@@ -792,10 +749,6 @@ class DabanService:
         if not db.pool:
             return
         
-        ak = self._get_akshare()
-        if not ak:
-            return
-        
         # Get recommendations from previous trading day that haven't been tracked
         rows = await db.pool.fetch("""
             SELECT id, code, rec_price FROM daban_recommendations
@@ -809,27 +762,23 @@ class DabanService:
         
         # Get real-time/daily data
         try:
-            df = await asyncio.to_thread(ak.stock_zh_a_spot_em)
-            if df is None or df.empty:
+            snap = await spot_snapshot.get()
+            if snap is None:
                 return
             
-            price_map = {}
-            for _, row in df.iterrows():
-                code = str(row.get('代码', ''))
-                price_map[code] = {
-                    'open': float(row.get('今开', 0) or 0),
-                    'high': float(row.get('最高', 0) or 0),
-                    'close': float(row.get('最新价', 0) or 0),
-                    'change_pct': float(row.get('涨跌幅', 0) or 0),
-                }
-            
             updated = 0
             for rec in rows:
                 code = rec['code']
-                if code not in price_map:
+                quote = snap.get(code)
+                if quote is None:
                     continue
                 
-                p = price_map[code]
+                p = {
+                    'open': float(quote.get('今开', 0) or 0),
+                    'high': float(quote.get('最高', 0) or 0),
+                    'close': float(quote.get('最新价', 0) or 0),
+                    'change_pct': float(quote.get('涨跌幅', 0) or 0),
+                }
                 rec_price = float(rec['rec_price'])
                 
                 if rec_price == 0:
@@ -15,7 +15,9 @@ from typing import List, Dict, Optional
 from app.core.logger import Logger
 from app.core.database import db
 from app.core.config import settings
-from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.core.timezone import CHINA_TZ, china_today
+from app.services.scheduler import Job, job_scheduler
+from app.services.spot_snapshot import spot_snapshot
 
 logger = Logger("DabanSimulator")
 
@@ -37,11 +39,8 @@ class DabanSimulator:
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._ak = None
         self._notify_callback = None
-        self._last_date = None  # For date change detection
-        self._triggered_today = set()
     
     def set_notify_callback(self, callback):
         """Set callback function for sending notifications."""
@@ -74,18 +73,13 @@ class DabanSimulator:
         await self._ensure_tables()
         await self._ensure_account()
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ 打板 Simulator started")
     
     async def stop(self):
         """Stop the simulator."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("daban_sim")
         logger.info("打板 Simulator stopped")
     
     async def _ensure_tables(self):
@@ -152,19 +146,14 @@ class DabanSimulator:
         """Fetch spot quotes for given codes."""
         if not codes:
             return {}
-        ak = self._get_akshare()
-        if not ak:
-            return {}
 
         try:
-            df = await asyncio.to_thread(ak.stock_zh_a_spot_em)
-            if df is None or df.empty:
+            snap = await spot_snapshot.get()
+            if snap is None:
                 return {}
 
-            df = df[df['代码'].isin(codes)]
             quotes = {}
-            for _, row in df.iterrows():
-                code = str(row.get('代码', ''))
+            for code, row in snap.quotes(codes).items():
                 quotes[code] = {
                     'price': float(row.get('最新价', 0) or 0),
                     'open': float(row.get('今开', 0) or 0),
@@ -621,57 +610,15 @@ class DabanSimulator:
             f"📦 当前持仓: {stats['current_positions']}/{MAX_POSITIONS}"
         )
     
-    async def _scheduler_loop(self):
-        """
-        Background scheduler for 打板 operations.
-        
-        Uses time window and date change for reliable triggering.
-        """
-        schedules = [
-            (9, 35, 'morning_check'),   # Morning check at 09:35
-            (14, 45, 'afternoon_check'),  # Close check at 14:45
-            (14, 50, 'afternoon_scan'),  # Afternoon scan at 14:50
-        ]
-        
-        while self.is_running:
-            try:
-                now = china_now()
-                current_date = now.strftime("%Y-%m-%d")
-                
-                # Date change detection - clear triggered set
-                if self._last_date and self._last_date != current_date:
-                    self._triggered_today.clear()
-                    logger.debug("Cleared triggered set for new day")
-                self._last_date = current_date
-                
-                # Skip weekends
-                if now.weekday() >= 5:
-                    await asyncio.sleep(60)
-                    continue
-                
-                for sched_hour, sched_min, task in schedules:
-                    key = f"{current_date}_{task}"
-                    
-                    if key not in self._triggered_today:
-                        # Check if within 1 minute window of target time
-                        target_time = now.replace(hour=sched_hour, minute=sched_min, second=0, microsecond=0)
-                        time_diff = abs((now - target_time).total_seconds())
-                        
-                        if time_diff < 60:  # Within 1 minute window
-                            self._triggered_today.add(key)
-                            logger.info(f"Triggering 打板 task: {task}")
-                            
-                            if task == 'morning_check':
-                                await self.morning_check_positions()
-                            elif task == 'afternoon_scan':
-                                await self.afternoon_scan_buy()
-                            elif task == 'afternoon_check':
-                                await self.afternoon_check_positions()
-                
-            except Exception as e:
-                logger.error(f"打板 scheduler error: {e}")
-            
-            await asyncio.sleep(30)
+    def _register_jobs(self):
+        """Morning position check at 09:35, close check at 14:45 and
+        afternoon scan at 14:50 on trading days."""
+        for name, hhmm, func in (
+            ("morning_check", "09:35", self.morning_check_positions),
+            ("afternoon_check", "14:45", self.afternoon_check_positions),
+            ("afternoon_scan", "14:50", self.afternoon_scan_buy),
+        ):
+            job_scheduler.register(Job(f"daban_sim.{name}", func, times=(hhmm,)), owner="daban_sim")
 
 
 # Singleton
@@ -1,19 +1,44 @@
 import asyncio
-import requests
+import httpx
 import pandas as pd
 import datetime
 import math
 from typing import List, Dict, Any, Optional
 from io import StringIO
+from app.core.config import settings
 from app.core.logger import Logger
 from app.services.data_provider.base import BaseDataProvider
 
 logger = Logger("HttpCrawlerProvider")
 
+# EastMoney paginated list endpoint (A-share lists, spot data)
+CLIST_URL = "http://82.push2.eastmoney.com/api/qt/clist/get"
+A_SHARE_FS = "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048"
+CLIST_PAGE_SIZE = 100  # EastMoney caps pz at 100 rows per page
+PAGE_RETRIES = 2  # extra attempts per failed page
+RETRY_DELAY = 0.5  # seconds before the first retry, doubled after each
+QUOTE_CHUNK_SIZE = 80  # codes per hq.sinajs.cn request
+
+# EastMoney clist field -> spot column (stock_zh_a_spot_em names)
+SPOT_FIELDS = (
+    ("f2", "最新价"),
+    ("f3", "涨跌幅"),
+    ("f17", "今开"),
+    ("f15", "最高"),
+    ("f16", "最低"),
+    ("f18", "昨收"),
+    ("f5", "成交量"),
+    ("f6", "成交额"),
+    ("f8", "换手率"),
+    ("f7", "振幅"),
+    ("f10", "量比"),
+)
+
+
 class HttpCrawlerProvider(BaseDataProvider):
     """
     Direct HTTP Crawler Provider to bypass Akshare blocking.
-    Uses 'requests' with asyncio.to_thread for async compatibility.
+    Uses one pooled keep-alive httpx.AsyncClient (honoring DATA_PROXY).
     
     Sources:
     - History: Netease (quotes.money.163.com)
@@ -25,19 +50,18 @@ class HttpCrawlerProvider(BaseDataProvider):
         self._headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        self._proxies = None
+        self._proxy = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._page_concurrency = max(1, settings.DATA_CRAWLER_CONCURRENCY)
+        self._quote_concurrency = max(1, settings.DATA_QUOTE_CONCURRENCY)
         self._init_proxy()
         
     def _init_proxy(self):
         """Initialize proxy from config."""
-        from app.core.config import settings
         if settings.DATA_PROXY:
             proxy_url = settings.DATA_PROXY
             # Support both http and socks5 proxies
-            self._proxies = {
-                "http": proxy_url,
-                "https": proxy_url,
-            }
+            self._proxy = proxy_url
             logger.info(f"Proxy configured: {proxy_url.split('@')[-1] if '@' in proxy_url else proxy_url}")
         
     def get_name(self) -> str:
@@ -47,21 +71,28 @@ class HttpCrawlerProvider(BaseDataProvider):
         return True
 
     async def shutdown(self):
-        pass
-        
-    def _get_sync(self, url, params=None, headers=None, encoding=None):
-        """Sync get helper."""
-        if not headers: headers = self._headers
-        else: headers.update(self._headers)
-        
-        try:
-            resp = requests.get(
-                url, 
-                params=params, 
-                headers=headers, 
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client: connections are kept alive across requests and pages."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self._headers,
+                proxy=self._proxy,
                 timeout=15,
-                proxies=self._proxies
+                limits=httpx.Limits(
+                    max_connections=(self._page_concurrency + self._quote_concurrency) * 2,
+                    max_keepalive_connections=self._page_concurrency + self._quote_concurrency,
+                ),
             )
+        return self._client
+        
+    async def _get(self, url, params=None, headers=None, encoding=None) -> Optional[httpx.Response]:
+        """GET through the pooled client; None on error or non-200."""
+        try:
+            resp = await self._get_client().get(url, params=params, headers=headers)
             if resp.status_code != 200:
                 logger.warn(f"HTTP {resp.status_code} for {resp.url}")
                 return None
@@ -72,6 +103,65 @@ class HttpCrawlerProvider(BaseDataProvider):
             logger.error(f"HTTP Request failed: {e}")
             return None
 
+    async def _get_clist_page(self, params: Dict[str, str], page: int) -> Optional[Dict]:
+        """One EastMoney list page (`data` object), retried with back-off."""
+        page_params = {**params, "pn": str(page)}
+        for attempt in range(PAGE_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+            resp = await self._get(CLIST_URL, page_params)
+            if resp is None:
+                continue
+            try:
+                return resp.json().get("data") or {}
+            except ValueError as e:
+                logger.warn(f"Bad JSON for list page {page}: {e}")
+        return None
+
+    async def _fetch_clist(self, fields: str, fs: str = A_SHARE_FS) -> Optional[List[Dict]]:
+        """All rows of an EastMoney list, or None if any page failed.
+
+        Page 1 reveals `total`; the remaining pages are fetched concurrently
+        (at most DATA_CRAWLER_CONCURRENCY at a time) and each is retried on
+        its own, so one bad page does not restart the whole download.
+        """
+        params = {
+            "pz": str(CLIST_PAGE_SIZE),
+            "po": "1",
+            "np": "1",
+            "ut": "bd1d9ddb04089700cf9c27f6f7426281",
+            "fltt": "2",
+            "invt": "2",
+            "fid": "f3",
+            "fs": fs,
+            "fields": fields,
+            "_": str(int(datetime.datetime.now().timestamp()))
+        }
+
+        first = await self._get_clist_page(params, 1)
+        if first is None:
+            return None
+        rows = list(first.get("diff") or [])
+        total = int(first.get("total") or 0)
+        total_pages = max(1, math.ceil(total / CLIST_PAGE_SIZE))
+        if total_pages == 1 or not rows:
+            return rows
+
+        semaphore = asyncio.Semaphore(self._page_concurrency)
+
+        async def fetch(page: int) -> Optional[Dict]:
+            async with semaphore:
+                return await self._get_clist_page(params, page)
+
+        pages = await asyncio.gather(*(fetch(p) for p in range(2, total_pages + 1)))
+        failed = [p for p, data in enumerate(pages, start=2) if data is None]
+        if failed:
+            logger.warn(f"EastMoney list pages failed after retries: {failed}")
+            return None
+        for data in pages:
+            rows.extend(data.get("diff") or [])
+        return rows
+
     def _safe_float(self, value, default=0.0) -> float:
         try:
             if value in (None, "-", ""):
@@ -91,52 +181,19 @@ class HttpCrawlerProvider(BaseDataProvider):
     async def get_stock_list(self) -> List[Dict[str, str]]:
         """Fetch stock list from EastMoney."""
         
-        # EastMoney API for all A-shares
-        url = "http://82.push2.eastmoney.com/api/qt/clist/get"
-        page_size = 100
-        params = {
-            "pn": "1",
-            "pz": str(page_size),
-            "po": "1",
-            "np": "1",
-            "ut": "bd1d9ddb04089700cf9c27f6f7426281",
-            "fltt": "2",
-            "invt": "2",
-            "fid": "f3",
-            "fs": "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048",
-            "fields": "f12,f14", # f12=code, f14=name
-            "_": str(int(datetime.datetime.now().timestamp()))
-        }
-        
         try:
-            results = []
-            total_pages = 1
-            page = 1
-
-            while page <= total_pages:
-                params["pn"] = str(page)
-                resp = await asyncio.to_thread(self._get_sync, url, params)
-                if not resp:
-                    break
-
-                data = resp.json()
-                diff = data.get("data", {}).get("diff", [])
-                if page == 1:
-                    total = int(data.get("data", {}).get("total") or 0)
-                    if total > 0:
-                        total_pages = max(1, math.ceil(total / page_size))
-
-                if not diff:
-                    break
-
-                for item in diff:
-                    code = str(item.get('f12'))
-                    name = str(item.get('f14'))
-                    # Basic filter for A-shares
-                    if code.startswith(('0', '3', '6', '4', '8')):
-                        results.append({"code": code, "name": name})
+            # EastMoney API for all A-shares; f12=code, f14=name
+            rows = await self._fetch_clist("f12,f14")
+            if rows is None:
+                return []
 
-                page += 1
+            results = []
+            for item in rows:
+                code = str(item.get('f12'))
+                name = str(item.get('f14'))
+                # Basic filter for A-shares
+                if code.startswith(('0', '3', '6', '4', '8')):
+                    results.append({"code": code, "name": name})
 
             logger.info(f"Crawled {len(results)} stocks from EastMoney")
             return results
@@ -180,7 +237,7 @@ class HttpCrawlerProvider(BaseDataProvider):
                 "param": f"{symbol},day,{s_fmt},{e_fmt},{limit},{adjust}"
             }
             
-            resp = await asyncio.to_thread(self._get_sync, url, params)
+            resp = await self._get(url, params)
             if not resp: return []
             
             data = resp.json()
@@ -251,7 +308,7 @@ class HttpCrawlerProvider(BaseDataProvider):
                 "fields": "TCLOSE"
             }
             
-            resp = await asyncio.to_thread(self._get_sync, url, params)
+            resp = await self._get(url, params)
             if not resp: return []
             
             csv_str = resp.content.decode('gbk', errors='ignore')
@@ -274,7 +331,11 @@ class HttpCrawlerProvider(BaseDataProvider):
             return []
             
     async def get_quotes(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Fetch spot data from Sina."""
+        """Fetch spot data from Sina, QUOTE_CHUNK_SIZE codes per request.
+
+        Chunks are requested concurrently, at most DATA_QUOTE_CONCURRENCY
+        at a time.
+        """
         sina_codes = []
         mapping = {}
         
@@ -284,61 +345,69 @@ class HttpCrawlerProvider(BaseDataProvider):
             sina_codes.append(sc)
             mapping[sc] = code
             
-        results = {}
-        chunk_size = 80
-        
-        for i in range(0, len(sina_codes), chunk_size):
-            chunk = sina_codes[i:i+chunk_size]
+        semaphore = asyncio.Semaphore(self._quote_concurrency)
+
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, Dict[str, Any]]:
             url = f"http://hq.sinajs.cn/list={','.join(chunk)}"
-            
             try:
-                resp = await asyncio.to_thread(self._get_sync, url, headers={"Referer": "http://finance.sina.com.cn/"}, encoding='gbk')
-                if not resp: continue
-                text = resp.text
-                    
-                lines = text.splitlines()
-                for line in lines:
-                    try:
-                        if '="' not in line: continue
-                        
-                        lhs, rhs = line.split('="')
-                        sc = lhs.split('hq_str_')[-1]
-                        data_str = rhs.strip('";')
-                        
-                        if not data_str: continue
-                        
-                        parts = data_str.split(',')
-                        if len(parts) < 30: continue
-                        
-                        name = parts[0]
-                        open_p = float(parts[1])
-                        pre_close = float(parts[2])
-                        current = float(parts[3])
-                        # ... (rest same as before)
-                        volume = float(parts[8])
-                        turnover = float(parts[9])
-                        
-                        if pre_close > 0:
-                            change_pct = ((current - pre_close) / pre_close) * 100
-                        else:
-                            change_pct = 0.0
-                            
-                        original_code = mapping.get(sc)
-                        if not original_code: continue
-                        
-                        results[original_code] = {
-                            'name': name,
-                            'price': current,
-                            'change_pct': change_pct,
-                            'volume': volume,
-                            'turnover': turnover,
-                            'time': parts[31]
-                        }
-                    except Exception:
-                        continue
+                async with semaphore:
+                    resp = await self._get(url, headers={"Referer": "http://finance.sina.com.cn/"}, encoding='gbk')
+                if not resp:
+                    return {}
+                return self._parse_sina_quotes(resp.text, mapping)
             except Exception as e:
                 logger.warn(f"Sina spot fetch failed for chunk: {e}")
+                return {}
+
+        chunks = [sina_codes[i:i + QUOTE_CHUNK_SIZE] for i in range(0, len(sina_codes), QUOTE_CHUNK_SIZE)]
+        results = {}
+        for chunk_quotes in await asyncio.gather(*(fetch_chunk(c) for c in chunks)):
+            results.update(chunk_quotes)
+        return results
+
+    def _parse_sina_quotes(self, text: str, mapping: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Parse `var hq_str_sh600000="..."` lines into quotes keyed by code."""
+        results = {}
+        lines = text.splitlines()
+        for line in lines:
+            try:
+                if '="' not in line: continue
+                
+                lhs, rhs = line.split('="')
+                sc = lhs.split('hq_str_')[-1]
+                data_str = rhs.strip('";')
+                
+                if not data_str: continue
                 
+                parts = data_str.split(',')
+                if len(parts) < 30: continue
+                
+                name = parts[0]
+                open_p = float(parts[1])
+                pre_close = float(parts[2])
+                current = float(parts[3])
+                # ... (rest same as before)
+                volume = float(parts[8])
+                turnover = float(parts[9])
+                
+                if pre_close > 0:
+                    change_pct = ((current - pre_close) / pre_close) * 100
+                else:
+                    change_pct = 0.0
+                    
+                original_code = mapping.get(sc)
+                if not original_code: continue
+                
+                results[original_code] = {
+                    'name': name,
+                    'price': current,
+                    'change_pct': change_pct,
+                    'volume': volume,
+                    'turnover': turnover,
+                    'time': parts[31]
+                }
+            except Exception:
+                continue
         return results
 
     async def get_sector_list(self, sector_type: str = "industry") -> List[Dict[str, Any]]:
@@ -352,7 +421,7 @@ class HttpCrawlerProvider(BaseDataProvider):
             "concept": ["m:90+t:3", "m:90+t:3+f:!50"],
         }
 
-        url = "http://82.push2.eastmoney.com/api/qt/clist/get"
+        url = CLIST_URL
         fields = "f12,f14,f2,f3,f6,f104,f105,f128,f140"
 
         for fs in fs_candidates.get(sector_type, []):
@@ -371,7 +440,7 @@ class HttpCrawlerProvider(BaseDataProvider):
             }
 
             try:
-                resp = await asyncio.to_thread(self._get_sync, url, params)
+                resp = await self._get(url, params)
                 if not resp:
                     continue
                 data = resp.json()
@@ -439,7 +508,7 @@ class HttpCrawlerProvider(BaseDataProvider):
             fs_candidates.append(f"b:{c}")
             fs_candidates.append(f"b:{c}+f:!50")
 
-        url = "http://82.push2.eastmoney.com/api/qt/clist/get"
+        url = CLIST_URL
         fields = "f12,f14,f2,f3,f5,f6"
 
         for fs in fs_candidates:
@@ -458,7 +527,7 @@ class HttpCrawlerProvider(BaseDataProvider):
             }
 
             try:
-                resp = await asyncio.to_thread(self._get_sync, url, params)
+                resp = await self._get(url, params)
                 if not resp:
                     continue
                 data = resp.json()
@@ -491,70 +560,24 @@ class HttpCrawlerProvider(BaseDataProvider):
 
     async def get_all_spot_data(self) -> Optional[pd.DataFrame]:
         """Compatible with get_all_spot_data using EastMoney."""
-        
-        url = "http://82.push2.eastmoney.com/api/qt/clist/get"
-        page_size = 100
-        params = {
-            "pn": "1",
-            "pz": str(page_size),
-            "po": "1",
-            "np": "1",
-            "ut": "bd1d9ddb04089700cf9c27f6f7426281",
-            "fltt": "2",
-            "invt": "2",
-            "fid": "f3",
-            "fs": "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048",
-            "fields": "f12,f14,f2,f3,f17,f15,f16,f5,f6,f8,f7",
-            "_": str(int(datetime.datetime.now().timestamp()))
-        }
-        
+        fields = ",".join(["f12", "f14"] + [field for field, _ in SPOT_FIELDS])
         try:
-            raw_data = []
-            total_pages = 1
-            page = 1
-
-            while page <= total_pages:
-                params["pn"] = str(page)
-                resp = await asyncio.to_thread(self._get_sync, url, params)
-                if not resp:
-                    break
-                data = resp.json()
-
-                diff = data.get("data", {}).get("diff", [])
-                if page == 1:
-                    total = int(data.get("data", {}).get("total") or 0)
-                    if total > 0:
-                        total_pages = max(1, math.ceil(total / page_size))
-
-                if not diff:
-                    break
-
-                for item in diff:
-                    try:
-                        raw_data.append({
-                            '代码': str(item['f12']),
-                            '名称': str(item['f14']),
-                            '最新价': item['f2'],
-                            '涨跌幅': item['f3'],
-                            '今开': item['f17'],
-                            '最高': item['f15'],
-                            '最低': item['f16'],
-                            '成交量': item['f5'],
-                            '成交额': item['f6'],
-                            '换手率': item['f8'],
-                            '振幅': item['f7']
-                        })
-                    except:
-                        continue
-
-                page += 1
-                    
-            if not raw_data:
+            rows = await self._fetch_clist(fields)
+            rows = [item for item in rows or [] if "f12" in item]
+            if not rows:
                 return None
-            
-            df = pd.DataFrame(raw_data)
-            df.replace('-', 0, inplace=True)
-            return df
+
+            # Column lists straight into the frame; "-" (no trade) reads as 0
+            data = {
+                '代码': [str(item['f12']) for item in rows],
+                '名称': [str(item.get('f14')) for item in rows],
+            }
+            for field, column in SPOT_FIELDS:
+                data[column] = pd.to_numeric(
+                    [0 if (v := item.get(field)) == '-' else v for item in rows],
+                    errors='coerce',
+                )
+            return pd.DataFrame(data)
             
         except Exception as e:
             logger.error(f"Failed to fetch all spot data (crawler): {e}")
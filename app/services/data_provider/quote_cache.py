@@ -0,0 +1,111 @@
+"""
+Quote Cache - Per-code TTL micro-cache with request coalescing.
+
+Watchlist views, alerts and simulators ask for quotes of overlapping code
+sets within seconds of each other. QuoteCache sits in front of the
+provider fallback chain:
+
+- A code fetched less than `ttl` seconds ago is answered from memory.
+- A code already being fetched by another caller waits for that fetch
+  instead of starting its own.
+- All remaining codes of a call go out as one provider request.
+
+Codes a successful fetch did not return (unknown, delisted) are cached as
+absent for the same TTL. A failed fetch (no quotes at all) is not cached.
+Cached quote dicts are shared between callers and must not be mutated.
+
+Usage:
+    cache = QuoteCache(fetch=provider_chain.get_quotes, ttl=3.0)
+    quotes = await cache.get(["600519", "000001"])
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.logger import Logger
+
+logger = Logger("QuoteCache")
+
+QuoteFetcher = Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+
+
+class QuoteCache:
+    """Per-code quote cache with coalesced fetches.
+
+    Args:
+        fetch: Coroutine function mapping a code list to {code: quote}
+        ttl: Seconds a fetched quote (or absence) stays valid
+        max_entries: Expired entries are pruned once the cache grows past this
+    """
+
+    def __init__(self, fetch: QuoteFetcher, ttl: float = 3.0, max_entries: int = 10000):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # code -> (monotonic fetch time, quote or None if absent)
+        self._entries: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.fetch_count = 0
+
+    async def get(self, codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Quotes for codes; codes without a quote are left out."""
+        now = time.monotonic()
+        result: Dict[str, Dict[str, Any]] = {}
+        waits: Dict[str, asyncio.Task] = {}
+        missing: List[str] = []
+
+        for code in dict.fromkeys(codes):
+            entry = self._entries.get(code)
+            if entry is not None and now - entry[0] <= self.ttl:
+                if entry[1] is not None:
+                    result[code] = entry[1]
+            elif code in self._inflight:
+                waits[code] = self._inflight[code]
+            else:
+                missing.append(code)
+
+        if missing:
+            task = asyncio.create_task(self._fetch(missing))
+            for code in missing:
+                self._inflight[code] = task
+                waits[code] = task
+
+        fetched: Dict[asyncio.Task, Dict[str, Dict[str, Any]]] = {}
+        for code, task in waits.items():
+            if task not in fetched:
+                # Shielded: a cancelled caller must not cancel a shared fetch
+                fetched[task] = await asyncio.shield(task)
+            quote = fetched[task].get(code)
+            if quote is not None:
+                result[code] = quote
+        return result
+
+    async def _fetch(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        try:
+            self.fetch_count += 1
+            try:
+                quotes = await self.fetch(codes) or {}
+            except Exception as e:
+                logger.warn(f"Quote fetch failed for {len(codes)} codes: {e}")
+                quotes = {}
+            if quotes:
+                now = time.monotonic()
+                if len(self._entries) > self.max_entries:
+                    self._prune(now)
+                for code in codes:
+                    self._entries[code] = (now, quotes.get(code))
+            return quotes
+        finally:
+            for code in codes:
+                if self._inflight.get(code) is asyncio.current_task():
+                    del self._inflight[code]
+
+    def _prune(self, now: float):
+        """Drop expired entries."""
+        self._entries = {
+            code: entry for code, entry in self._entries.items() if now - entry[0] <= self.ttl
+        }
+
+    def clear(self):
+        self._entries.clear()
@@ -7,6 +7,7 @@ from app.services.data_provider.base import BaseDataProvider
 from app.services.data_provider.akshare_provider import AkShareProvider
 from app.services.data_provider.baostock_provider import BaostockProvider
 from app.services.data_provider.http_crawler_provider import HttpCrawlerProvider
+from app.services.data_provider.quote_cache import QuoteCache
 
 logger = Logger("DataProvider")
 
@@ -44,6 +45,9 @@ class DataProviderService:
         self._preferred_until = 0.0
         self._preferred_ttl = 86400
 
+        # Per-code quote micro-cache shared by all get_quotes callers
+        self._quote_cache = QuoteCache(self._fetch_quotes, ttl=settings.QUOTE_CACHE_TTL)
+
     def _provider_is_available(self, provider: BaseDataProvider) -> bool:
         name = provider.get_name()
         now = time.time()
@@ -249,9 +253,17 @@ class DataProviderService:
             return False
 
     async def get_quotes(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Fetch real-time quotes with fallback."""
+        """Fetch real-time quotes with fallback.
+
+        Quotes younger than QUOTE_CACHE_TTL are served from memory, and
+        concurrent requests for the same codes share one fetch.
+        """
         if not codes:
             return {}
+        return await self._quote_cache.get(codes)
+
+    async def _fetch_quotes(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch quotes from the first provider that returns any."""
         errors = []
         for provider in self._get_ordered_providers():
             if not self._provider_is_available(provider):
@@ -19,6 +19,7 @@ from typing import List, Optional, Any
 from app.core.config import settings
 from app.core.logger import Logger
 from app.core.timezone import CHINA_TZ as SHANGHAI_TZ, china_now
+from app.services.text_matcher import keyword_matcher
 
 logger = Logger("ForwardFilters")
 
@@ -344,8 +345,8 @@ class KeywordFilter(ForwardFilter):
         if not keywords:
             return FilterResult(FilterAction.CONTINUE)
         
-        lower = ctx.message_text.lower()
-        if any(kw.lower() in lower for kw in keywords):
+        # Compiled once per keyword list, cached across messages
+        if keyword_matcher(tuple(keywords)).matches(ctx.message_text):
             return FilterResult(FilterAction.CONTINUE)
         
         return FilterResult(FilterAction.BLOCK, "no_keyword")
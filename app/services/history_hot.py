@@ -0,0 +1,172 @@
+"""
+History Hot Window - Latest N bars per code, plus a data version.
+
+Scanner loads used to window over every stored bar of each code, and the
+scan cache signature was a 7-day COUNT(DISTINCT code)/SUM(volume)
+aggregate. Both grew with history depth. Two small tables replace them:
+
+- stock_history_version: one row. `version` is bumped in the same
+  transaction as every stock_history write (copy_history, cleanups), and
+  `max_date` is kept next to it, so cache validation is a one-row read.
+- stock_history_hot: one row per code holding its latest `hot_depth` bars
+  as arrays (epoch days, OHLCV, turnover, ...), oldest first.
+
+refresh_hot_window() rebuilds the hot table from stock_history after the
+daily sync and backfills, and records the version it was built from as
+`hot_version`. Readers use the hot table only while version == hot_version
+and fall back to stock_history otherwise, so a write that lands between
+refreshes can never serve stale bars.
+
+Usage:
+    await refresh_hot_window(db.pool, depth=300)
+    history = await load_hot_window(db.pool, codes, limit=300)  # None if stale
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from app.core.logger import Logger
+from app.services.scanner.loader import ColumnarHistory
+
+logger = Logger("HistoryHot")
+
+HOT_TABLE = "stock_history_hot"
+VERSION_TABLE = "stock_history_version"
+
+# Array columns of the hot table, after code and days
+HOT_COLUMNS = (
+    "open", "high", "low", "close", "volume",
+    "turnover", "amplitude", "change_pct", "turnover_rate",
+)
+
+EPOCH = date(1970, 1, 1)
+
+BUMP_SQL = f"""
+    UPDATE {VERSION_TABLE}
+    SET version = version + 1,
+        max_date = (SELECT MAX(date) FROM stock_history),
+        updated_at = NOW()
+"""
+
+_aggregates = ",\n           ".join(
+    f"array_agg(t.{c}::float8 ORDER BY t.date)" for c in HOT_COLUMNS
+)
+
+REFRESH_SQL = f"""
+    INSERT INTO {HOT_TABLE} (code, days, {", ".join(HOT_COLUMNS)})
+    SELECT c.code,
+           array_agg((t.date - DATE '1970-01-01')::int4 ORDER BY t.date),
+           {_aggregates}
+    FROM (SELECT DISTINCT code FROM stock_history) c
+    CROSS JOIN LATERAL (
+        SELECT date, {", ".join(HOT_COLUMNS)}
+        FROM stock_history
+        WHERE code = c.code
+        ORDER BY date DESC
+        LIMIT $1
+    ) t
+    GROUP BY c.code
+"""
+
+
+def _slice_sql(columns: Sequence[str]) -> str:
+    """Last $2 elements of each array column (all of them if shorter)."""
+    return ", ".join(f"h.{c}[o.s:]" for c in columns)
+
+
+# Scanner layout: ColumnarHistory.from_arrays (code, days, OHLCV, turnover_rate)
+LOAD_SQL = f"""
+    SELECT h.code, {_slice_sql(("days", "open", "high", "low", "close", "volume", "turnover_rate"))}
+    FROM {HOT_TABLE} h
+    CROSS JOIN LATERAL (SELECT GREATEST(cardinality(h.days) - $2 + 1, 1) AS s) o
+    WHERE h.code = ANY($1)
+    ORDER BY h.code
+"""
+
+# One code, every hot column, only while the hot table is current
+STOCK_SQL = f"""
+    SELECT {_slice_sql(("days",) + HOT_COLUMNS)}
+    FROM {HOT_TABLE} h
+    JOIN {VERSION_TABLE} v ON v.version = v.hot_version AND v.hot_depth >= $2
+    CROSS JOIN LATERAL (SELECT GREATEST(cardinality(h.days) - $2 + 1, 1) AS s) o
+    WHERE h.code = $1
+"""
+
+
+async def bump_history_version(pool_or_conn):
+    """Mark stock_history as changed. Run it inside the writing transaction."""
+    await pool_or_conn.execute(BUMP_SQL)
+
+
+async def get_history_version(pool) -> Optional[Dict]:
+    """Current {version, hot_version, hot_depth, max_date}, or None."""
+    row = await pool.fetchrow(
+        f"SELECT version, hot_version, hot_depth, max_date FROM {VERSION_TABLE}"
+    )
+    return dict(row) if row else None
+
+
+def hot_is_current(state: Optional[Dict], limit: int) -> bool:
+    return bool(state) and state["version"] == state["hot_version"] and state["hot_depth"] >= limit
+
+
+async def refresh_hot_window(pool, depth: int) -> int:
+    """Rebuild the hot table with the latest `depth` bars of every code.
+
+    Runs as one REPEATABLE READ transaction, so the arrays and the
+    recorded hot_version come from the same snapshot. If a writer bumps
+    the version meanwhile the final UPDATE fails to serialize; the hot
+    table then stays marked stale until the next refresh.
+
+    Returns:
+        Codes written (0 on failure)
+    """
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction(isolation="repeatable_read"):
+                version = await conn.fetchval(f"SELECT version FROM {VERSION_TABLE}")
+                await conn.execute(f"DELETE FROM {HOT_TABLE}")
+                status = await conn.execute(REFRESH_SQL, depth)
+                await conn.execute(
+                    f"UPDATE {VERSION_TABLE} SET hot_version = $1, hot_depth = $2, hot_refreshed_at = NOW()",
+                    version, depth,
+                )
+    except Exception as e:
+        logger.warn(f"Hot window refresh failed: {e}")
+        return 0
+    codes = int(status.split()[-1])
+    logger.info(f"🔥 Hot window refreshed: {codes} codes x {depth} bars (version {version})")
+    return codes
+
+
+async def load_hot_window(pool, codes: List[str], limit: int):
+    """Latest `limit` bars for codes from the hot table as a ColumnarHistory.
+
+    Returns None when the hot table is stale or shallower than limit.
+    """
+    if not hot_is_current(await get_history_version(pool), limit):
+        return None
+    rows = await pool.fetch(LOAD_SQL, codes, limit)
+    return ColumnarHistory.from_arrays(rows)
+
+
+async def get_hot_stock_history(pool, code: str, days: int) -> Optional[List[Dict]]:
+    """Latest `days` bars of one code, newest first, in the
+    StockHistoryService.get_stock_history format.
+
+    Returns None when the hot table cannot answer (stale, too shallow or
+    code absent).
+    """
+    row = await pool.fetchrow(STOCK_SQL, code, days)
+    if not row:
+        return None
+    day_list, *columns = row
+    result = []
+    for i in range(len(day_list) - 1, -1, -1):
+        record = {"code": code, "date": (EPOCH + timedelta(days=day_list[i])).isoformat()}
+        for name, values in zip(HOT_COLUMNS, columns):
+            record[name] = values[i]
+        if record["volume"] is not None:
+            record["volume"] = int(record["volume"])
+        result.append(record)
+    return result
@@ -0,0 +1,264 @@
+"""
+History Ingest - Bulk COPY ingestion into stock_history.
+
+The daily batch sync and the per-stock backfills used to upsert bars with
+`executemany(INSERT ... ON CONFLICT DO UPDATE)`, one round of statement
+execution per row. This module writes a whole batch in three statements
+inside one transaction:
+
+1. CREATE TEMP TABLE ... ON COMMIT DROP (temporary tables skip the WAL
+   like UNLOGGED ones, and are private to the connection, so concurrent
+   writers never share a staging table).
+2. copy_records_to_table() streams the rows in binary COPY format.
+3. One INSERT ... SELECT ... ON CONFLICT (code, date) DO UPDATE merges them.
+
+Only the columns passed are written; on conflict only those columns are
+updated (the daily sync does not touch change_amt, as before). Writes to
+stock_history bump the data version in the same transaction.
+
+Records are tuples whose first two fields are code and date. Numeric
+fields are floats (NaN allowed); staging stores them as float8 and the
+merge casts to the table types.
+
+Usage:
+    await copy_history(db.pool, records)
+
+    async with HistoryBulkWriter(db.pool) as writer:
+        for code in codes:
+            await writer.add(bars_to_records(code, bars))
+"""
+
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.logger import Logger
+from app.services.history_hot import bump_history_version
+
+logger = Logger("HistoryIngest")
+
+# All writable stock_history columns, in table order
+HISTORY_COLUMNS = (
+    "code", "date", "open", "high", "low", "close", "volume", "turnover",
+    "amplitude", "change_pct", "change_amt", "turnover_rate",
+)
+
+# Columns the daily spot batch provides (no change_amt in the spot table)
+SPOT_BATCH_COLUMNS = (
+    "code", "date", "open", "high", "low", "close",
+    "volume", "turnover", "change_pct", "turnover_rate", "amplitude",
+)
+
+# Spot DataFrame column -> stock_history column
+SPOT_COLUMN_MAP = {
+    "今开": "open",
+    "最高": "high",
+    "最低": "low",
+    "最新价": "close",
+    "成交量": "volume",
+    "成交额": "turnover",
+    "涨跌幅": "change_pct",
+    "换手率": "turnover_rate",
+    "振幅": "amplitude",
+}
+
+# Columns whose missing values read as 0 (as the row-by-row code did)
+ZERO_FILL_COLUMNS = ("volume", "turnover", "turnover_rate", "amplitude")
+
+DEFAULT_BATCH_ROWS = 50000
+
+Record = Tuple
+
+
+def _staging_type(column: str) -> str:
+    if column == "code":
+        return "TEXT"
+    if column == "date":
+        return "DATE"
+    return "DOUBLE PRECISION"
+
+
+def _merge_sql(staging: str, columns: Sequence[str], table: str) -> str:
+    select = ", ".join("ROUND(volume)::BIGINT" if c == "volume" else c for c in columns)
+    updates = ",\n            ".join(f"{c} = EXCLUDED.{c}" for c in columns[2:])
+    return f"""
+        INSERT INTO {table} ({", ".join(columns)})
+        SELECT {select} FROM {staging}
+        ON CONFLICT (code, date) DO UPDATE SET
+            {updates}
+    """
+
+
+async def copy_history(
+    pool_or_conn,
+    records: Iterable[Record],
+    columns: Sequence[str] = HISTORY_COLUMNS,
+    table: str = "stock_history",
+) -> int:
+    """Upsert records into stock_history via COPY and one merge.
+
+    Duplicate (code, date) keys keep the last record. `table` must have
+    the stock_history columns and a unique (code, date) key.
+
+    Returns:
+        Rows merged
+    """
+    if tuple(columns[:2]) != ("code", "date"):
+        raise ValueError("columns must start with code, date")
+    # The merge may touch each key once; later records win, as sequential upserts did
+    unique = list({(r[0], r[1]): r for r in records}.values())
+    if not unique:
+        return 0
+
+    staging = "stock_history_staging"
+    ddl = ", ".join(f"{c} {_staging_type(c)}" for c in columns)
+
+    async def write(conn):
+        async with conn.transaction():
+            await conn.execute(f"CREATE TEMP TABLE {staging} ({ddl}) ON COMMIT DROP")
+            await conn.copy_records_to_table(staging, records=unique, columns=list(columns))
+            await conn.execute(_merge_sql(staging, columns, table))
+            if table == "stock_history":
+                await bump_history_version(conn)
+
+    if hasattr(pool_or_conn, "acquire"):
+        async with pool_or_conn.acquire() as conn:
+            await write(conn)
+    else:
+        await write(pool_or_conn)
+    return len(unique)
+
+
+def bars_to_records(code: str, bars: Iterable[Dict], skip_after: Optional[date] = None) -> List[Record]:
+    """Provider daily bars (dicts) -> HISTORY_COLUMNS records.
+
+    Args:
+        skip_after: Drop bars dated after this day
+    """
+    return [
+        (
+            code,
+            bar["date"],
+            float(bar["open"]),
+            float(bar["high"]),
+            float(bar["low"]),
+            float(bar["close"]),
+            float(bar["volume"]),
+            float(bar["turnover"]),
+            float(bar.get("amplitude", 0.0)),
+            float(bar.get("change_pct", 0.0)),
+            float(bar.get("change_amt", 0.0)),
+            float(bar.get("turnover_rate", 0.0)),
+        )
+        for bar in bars
+        if skip_after is None or bar["date"] <= skip_after
+    ]
+
+
+def spot_to_records(df, trade_date: date) -> List[Record]:
+    """Spot DataFrame -> SPOT_BATCH_COLUMNS records, converted column-wise.
+
+    Keeps A-shares (codes starting 0/3/6) that are not ST/退 and have a
+    positive open and close.
+    """
+    codes = df["代码"].astype(str)
+    keep = (
+        ~df["名称"].astype(str).str.contains("ST|退", na=False).to_numpy()
+        & codes.str.match(r"^[036]").to_numpy()
+    )
+
+    values = {}
+    for source, column in SPOT_COLUMN_MAP.items():
+        if source in df.columns:
+            arr = np.asarray(df[source].to_numpy(), dtype=np.float64)
+        else:
+            arr = np.full(len(df), np.nan)
+        if column in ZERO_FILL_COLUMNS:
+            arr = np.nan_to_num(arr, nan=0.0)
+        values[column] = arr
+
+    with np.errstate(invalid="ignore"):
+        keep &= (values["close"] > 0) & (values["open"] > 0)
+
+    columns = [codes.to_numpy()[keep].tolist(), [trade_date] * int(keep.sum())]
+    columns += [values[c][keep].tolist() for c in SPOT_BATCH_COLUMNS[2:]]
+    return list(zip(*columns))
+
+
+class HistoryBulkWriter:
+    """Buffers records from many stocks and COPYs them in large batches.
+
+    Backfill workers add each stock's bars; a COPY runs whenever
+    batch_rows records are buffered, and on flush()/exit. If a batch COPY
+    fails, its stocks are retried one COPY each, so a bad stock only loses
+    its own rows. Callers report success from stocks_written, not from
+    what they added.
+
+    Args:
+        pool: asyncpg pool
+        columns: Record layout (HISTORY_COLUMNS by default)
+        batch_rows: Records per COPY
+    """
+
+    def __init__(self, pool, columns: Sequence[str] = HISTORY_COLUMNS, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.pool = pool
+        self.columns = tuple(columns)
+        self.batch_rows = batch_rows
+        self._buffer: List[Record] = []
+        self.rows_written = 0
+        self.seconds = 0.0
+        self.written_codes: Set[str] = set()
+        self.failed_codes: Set[str] = set()
+
+    @property
+    def stocks_written(self) -> int:
+        """Stocks whose rows were all written."""
+        return len(self.written_codes - self.failed_codes)
+
+    async def add(self, records: Sequence[Record]) -> int:
+        """Buffer records; returns how many were added."""
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.batch_rows:
+            await self.flush()
+        return len(records)
+
+    async def flush(self) -> int:
+        """Write everything buffered. Returns rows merged."""
+        # Swap first, so concurrent adders keep filling a fresh buffer
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        try:
+            written = await copy_history(self.pool, batch, self.columns)
+            self.written_codes.update(r[0] for r in batch)
+        except Exception as e:
+            logger.warn(f"History COPY of {len(batch)} rows failed, retrying per stock: {e}")
+            written = await self._copy_per_stock(batch)
+        elapsed = time.perf_counter() - started
+        self.rows_written += written
+        self.seconds += elapsed
+        logger.debug(f"COPY merged {written} rows in {elapsed:.2f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+        return written
+
+    async def _copy_per_stock(self, batch: List[Record]) -> int:
+        by_code: Dict[str, List[Record]] = {}
+        for record in batch:
+            by_code.setdefault(record[0], []).append(record)
+        written = 0
+        for code, records in by_code.items():
+            try:
+                written += await copy_history(self.pool, records, self.columns)
+                self.written_codes.add(code)
+            except Exception as e:
+                self.failed_codes.add(code)
+                logger.error(f"History COPY of {code} ({len(records)} rows) failed: {e}")
+        return written
+
+    async def __aenter__(self) -> "HistoryBulkWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
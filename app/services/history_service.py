@@ -8,6 +8,7 @@ from app.core.config import settings
 from app.core.database import db
 from app.core.logger import Logger
 from app.core.bot import telegram_service
+from app.core.write_behind import WriteBehindBuffer
 
 logger = Logger("HistoryService")
 
@@ -219,46 +220,45 @@ class HistoryService:
                 pass
 
             count = 0
-            saved = 0
             
             logger.info(f"Starting history fetch from {source_id}")
             
-            async for message in client.iter_messages(entity, limit=limit):
-                try:
-                    msg_id = message.id
-                    sender_id = str(message.sender_id) if message.sender_id else None
-                    sender_name = None
-                    if message.sender:
-                        sender_name = getattr(message.sender, 'username', None) or \
-                                      getattr(message.sender, 'first_name', None) or \
-                                      getattr(message.sender, 'title', None)
-                    
-                    text = message.text or ""
-                    media_type = None
-                    file_id = None
-                    
-                    if message.photo:
-                        media_type = "photo"
-                    elif message.video:
-                        media_type = "video"
-                    elif message.document:
-                        media_type = "document"
-                    
-                    # Save to DB
-                    await db.pool.execute("""
-                        INSERT INTO chat_history (
-                            source_id, message_id, sender_id, sender_name, text, media_type, created_at
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-                        ON CONFLICT (source_id, message_id) DO NOTHING
-                    """, str(source_id), msg_id, sender_id, sender_name, text, media_type, message.date)
+            # Rows go out in batched COPYs instead of one INSERT per message
+            async with WriteBehindBuffer(
+                "chat_history",
+                ("source_id", "message_id", "sender_id", "sender_name", "text", "media_type", "created_at"),
+                on_conflict="ON CONFLICT (source_id, message_id) DO NOTHING",
+                pool=db.pool,
+            ) as writer:
+                async for message in client.iter_messages(entity, limit=limit):
+                    try:
+                        msg_id = message.id
+                        sender_id = str(message.sender_id) if message.sender_id else None
+                        sender_name = None
+                        if message.sender:
+                            sender_name = getattr(message.sender, 'username', None) or \
+                                          getattr(message.sender, 'first_name', None) or \
+                                          getattr(message.sender, 'title', None)
+                        
+                        text = message.text or ""
+                        media_type = None
+                        
+                        if message.photo:
+                            media_type = "photo"
+                        elif message.video:
+                            media_type = "video"
+                        elif message.document:
+                            media_type = "document"
+                        
+                        await writer.add((str(source_id), msg_id, sender_id, sender_name, text, media_type, message.date))
+                    except Exception as e:
+                        logger.error(f"Failed to save message {message.id}: {e}")
                     
-                    saved += 1
-                except Exception as e:
-                    logger.error(f"Failed to save message {message.id}: {e}")
-                
-                count += 1
-                if count % 100 == 0:
-                    logger.info(f"Scanned {count} messages, saved {saved}")
+                    count += 1
+                    if count % 100 == 0:
+                        logger.info(f"Scanned {count} messages, saved {writer.written}")
+
+            saved = writer.written
 
             return {
                 "status": "ok",
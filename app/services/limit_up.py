@@ -15,16 +15,21 @@ from app.core.database import db
 from app.core.config import settings
 from app.core.stock_links import get_chart_url
 from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.core.send_queue import PRIORITY_REPORT
+from app.services.scheduler import Job, every, job_scheduler
+from app.services.spot_snapshot import spot_snapshot
 
 logger = Logger("LimitUpService")
 
+# Afternoon limit-up report (China time)
+AFTERNOON_REPORT_TIME = "15:15"
+
 
 class LimitUpService:
     """Service for tracking limit-up stocks."""
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._ak = None  # AkShare module (lazy load)
     
     def _get_akshare(self):
@@ -62,18 +67,13 @@ class LimitUpService:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Limit-Up Tracker started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("limit_up")
         logger.info("Limit-Up Tracker stopped")
     
     async def initialize(self):
@@ -375,29 +375,21 @@ class LimitUpService:
         
         try:
             # Get real-time quotes
-            df = await asyncio.to_thread(ak.stock_zh_a_spot_em)
-            if df is None or df.empty:
+            snap = await spot_snapshot.get()
+            if snap is None:
                 return []
             
-            # Build lookup
-            price_map = {}
-            for _, row in df.iterrows():
-                code = str(row.get("代码", ""))
-                price_map[code] = {
-                    "current_price": self._safe_float(row.get("最新价")),
-                    "change_pct": self._safe_float(row.get("涨跌幅")),
-                }
-            
             result = []
             for stock in stocks:
-                code = stock["code"]
-                if code in price_map:
+                quote = snap.get(stock["code"])
+                if quote is not None:
                     result.append({
-                        "code": code,
+                        "code": stock["code"],
                         "name": stock["name"],
                         "prev_close": float(stock["close_price"]),
                         "limit_times": stock["limit_times"],
-                        **price_map[code],
+                        "current_price": self._safe_float(quote.get("最新价")),
+                        "change_pct": self._safe_float(quote.get("涨跌幅")),
                     })
             
             return result
@@ -508,7 +500,8 @@ class LimitUpService:
             for msg in messages:
                 await telegram_service.send_message(
                     settings.STOCK_ALERT_CHANNEL, msg, 
-                    parse_mode="html", link_preview=False
+                    parse_mode="html", link_preview=False,
+                    priority=PRIORITY_REPORT
                 )
         
         # 1. Send header
@@ -522,7 +515,8 @@ class LimitUpService:
         )
         await telegram_service.send_message(
             settings.STOCK_ALERT_CHANNEL, header, 
-            parse_mode="html", link_preview=False
+            parse_mode="html", link_preview=False,
+            priority=PRIORITY_REPORT
         )
         
         # 2. Send sealed limit-ups (收盘涨停) - complete list
@@ -679,73 +673,28 @@ class LimitUpService:
     # Scheduler
     # ─────────────────────────────────────────────────────────────────────────
     
-    async def _scheduler_loop(self):
-        """Background scheduler for timed tasks."""
-        # Morning report times: every minute from 9:15 to 10:00, skipping 9:25-9:30 (call auction)
-        morning_times = []
-        for hour in [9, 10]:
-            for minute in range(60):
-                if hour == 9 and minute < 15:
-                    continue  # Start from 9:15
-                if hour == 9 and 25 <= minute <= 30:
-                    continue  # Skip 9:25-9:30 (call auction period)
-                if hour == 10 and minute > 0:
-                    continue  # Stop after 10:00
-                morning_times.append(f"{hour:02d}:{minute:02d}")
-        
-        afternoon_time = "15:15"
-        
-        triggered_today = set()
-        
-        # On startup: immediately send report if we're in the window
-        now = datetime.now(CHINA_TZ)
+    def _register_jobs(self):
+        """Morning price updates every minute 09:15-10:00 (skipping the
+        09:25-09:30 call auction) and the afternoon report at 15:15."""
+        job_scheduler.register(Job(
+            "limit_up.morning", self.send_morning_price_update,
+            times=every(1, "09:15", "10:00", skip=(("09:25", "09:30"),)),
+        ), owner="limit_up")
+        job_scheduler.register(Job(
+            "limit_up.afternoon", self.send_afternoon_report, times=(AFTERNOON_REPORT_TIME,),
+        ), owner="limit_up")
+
+        # Started inside a report window: send now instead of at the next slot
+        now = china_now()
+        if not job_scheduler.calendar.is_trading_day(now.date()):
+            return
         time_str = now.strftime("%H:%M")
-        if now.weekday() < 5:  # Weekday
-            # Check if in morning window (9:15-10:00, excluding 9:25-9:30)
-            hour, minute = now.hour, now.minute
-            in_morning_window = (
-                (hour == 9 and 15 <= minute < 25) or
-                (hour == 9 and 30 < minute <= 59) or
-                (hour == 10 and minute == 0)
-            )
-            if in_morning_window:
-                logger.info(f"Startup in morning window ({time_str}), sending immediate report")
-                asyncio.create_task(self.send_morning_price_update())
-            
-            # Check if at afternoon report time
-            if time_str == afternoon_time:
-                logger.info(f"Startup at afternoon report time ({time_str}), sending immediate report")
-                asyncio.create_task(self.send_afternoon_report())
-        
-        while self.is_running:
-            try:
-                now = datetime.now(CHINA_TZ)
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                # Reset triggered set at midnight
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                key = f"{date_str}_{time_str}"
-                
-                # Skip weekends
-                if now.weekday() < 5:
-                    # Morning updates
-                    if time_str in morning_times and key not in triggered_today:
-                        triggered_today.add(key)
-                        asyncio.create_task(self.send_morning_price_update())
-                    
-                    # Afternoon report
-                    if time_str == afternoon_time and key not in triggered_today:
-                        triggered_today.add(key)
-                        asyncio.create_task(self.send_afternoon_report())
-                
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            # Check every 20 seconds (to not miss minute-based triggers)
-            await asyncio.sleep(20)
+        if "09:15" <= time_str <= "10:00" and not "09:25" <= time_str <= "09:30":
+            logger.info(f"Startup in morning window ({time_str}), sending immediate report")
+            job_scheduler.submit("limit_up.morning", self.send_morning_price_update)
+        if time_str == AFTERNOON_REPORT_TIME:
+            logger.info(f"Startup at afternoon report time ({time_str}), sending immediate report")
+            job_scheduler.submit("limit_up.afternoon", self.send_afternoon_report)
 
 
 # Singleton
@@ -23,7 +23,9 @@ import akshare as ak
 
 from app.core.config import settings
 from app.core.bot import telegram_service
-from app.core.timezone import china_now, china_today
+from app.core.timezone import china_today
+from app.core.send_queue import PRIORITY_REPORT
+from app.services.scheduler import Job, job_scheduler
 from app.services.ai import ai_service
 from app.services.stock_trend_analyzer import StockTrendAnalyzer, TrendAnalysisResult
 from app.services.market_analyzer import MarketAnalyzerLogic, MarketOverview, MarketIndex
@@ -36,8 +38,6 @@ class MarketAIAnalysisService:
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
-        self._triggered_today = set()
         
         # Analyzers
         self.trend_analyzer = StockTrendAnalyzer()
@@ -54,18 +54,13 @@ class MarketAIAnalysisService:
             return
             
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Market AI Analysis Service started (with Core Algorithms)")
 
     async def stop(self):
         """Stop the service"""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("market_ai")
         logger.info("Market AI Analysis Service stopped")
 
     # ─────────────────────────────────────────────────────────────────────────
@@ -368,7 +363,8 @@ class MarketAIAnalysisService:
             report_target,
             report,
             parse_mode="html",
-            link_preview=False
+            link_preview=False,
+            priority=PRIORITY_REPORT
         )
         logger.info("✅ Daily Report Sent.")
 
@@ -376,25 +372,11 @@ class MarketAIAnalysisService:
     # Scheduler Logic
     # ─────────────────────────────────────────────────────────────────────────
     
-    async def _scheduler_loop(self):
-        """Daily Schedule Loop"""
-        while self.is_running:
-            try:
-                now = china_now()
-                # Schedule for 15:30 on weekdays
-                if now.hour == 15 and now.minute == 30 and now.weekday() < 5:
-                    date_str = now.strftime("%Y-%m-%d")
-                    if date_str not in self._triggered_today:
-                        self._triggered_today.add(date_str)
-                        asyncio.create_task(self.send_daily_analysis())
-                
-                # Reset triggers at midnight
-                if now.hour == 0 and now.minute == 0:
-                    self._triggered_today.clear()
-                    
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            await asyncio.sleep(60)
+    def _register_jobs(self):
+        """Daily analysis at 15:30 on trading days."""
+        job_scheduler.register(
+            Job("market_ai.daily", self.send_daily_analysis, times=("15:30",)),
+            owner="market_ai",
+        )
 
 market_ai_analysis_service = MarketAIAnalysisService()
@@ -11,7 +11,6 @@ Schedule:
 - Monthly: Last trading day of month at 20:00
 """
 
-import asyncio
 import json
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
@@ -19,29 +18,22 @@ from typing import List, Dict, Optional
 from app.core.logger import Logger
 from app.core.database import db
 from app.core.config import settings
-from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.core.timezone import china_now, china_today
+from app.core.send_queue import PRIORITY_REPORT
+from app.services.scheduler import MONTH_END, WEEK_END, Job, job_scheduler
+from app.services.spot_snapshot import spot_snapshot
 
 logger = Logger("MarketReportService")
 
+# Regenerating a report over unchanged data reuses the AI analysis
+AI_ANALYSIS_CACHE_TTL = 6 * 3600
+
 
 class MarketReportService:
     """Service for generating A-share market analysis reports."""
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
-        self._ak = None  # AkShare module (lazy load)
-    
-    def _get_akshare(self):
-        """Lazy load akshare module."""
-        if self._ak is None:
-            try:
-                import akshare as ak
-                self._ak = ak
-            except ImportError:
-                logger.error("AkShare not installed. Run: pip install akshare")
-                return None
-        return self._ak
     
     async def start(self):
         """Start the market report service."""
@@ -54,18 +46,13 @@ class MarketReportService:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Market Report Service started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("market_report")
         logger.info("Market Report Service stopped")
     
     async def initialize(self):
@@ -107,15 +94,11 @@ class MarketReportService:
     async def get_weakest_stocks(self, days: int = 7, limit: int = 20) -> List[Dict]:
         """Get weakest performing stocks.
         
-        Uses AkShare to get stocks with worst performance.
+        Uses the shared spot snapshot to get stocks with worst performance.
         """
-        ak = self._get_akshare()
-        if not ak:
-            return []
-        
         try:
             # Get stocks ranked by performance (ascending = weakest first)
-            df = await asyncio.to_thread(ak.stock_zh_a_spot_em)
+            df = await spot_snapshot.get_frame()
             
             if df is None or df.empty:
                 return []
@@ -248,7 +231,7 @@ class MarketReportService:
 """
         
         try:
-            result = await ai_service.analyze(prompt)
+            result = await ai_service.analyze(prompt, {"cache_ttl": AI_ANALYSIS_CACHE_TTL})
             return result.get("content", "分析生成失败")
         except Exception as e:
             logger.error(f"AI analysis failed: {e}")
@@ -515,7 +498,8 @@ class MarketReportService:
         await telegram_service.send_message(
             report_target, report,
             parse_mode="html",
-            link_preview=False
+            link_preview=False,
+            priority=PRIORITY_REPORT
         )
         logger.info("Sent weekly market report")
     
@@ -532,7 +516,8 @@ class MarketReportService:
         await telegram_service.send_message(
             report_target, report,
             parse_mode="html",
-            link_preview=False
+            link_preview=False,
+            priority=PRIORITY_REPORT
         )
         logger.info("Sent monthly market report")
     
@@ -540,46 +525,18 @@ class MarketReportService:
     # Scheduler
     # ─────────────────────────────────────────────────────────────────────────
     
-    async def _scheduler_loop(self):
-        """Background scheduler for timed reports.
-        
-        - 20:00 Friday: Weekly report
-        - 20:00 Last trading day of month: Monthly report
+    def _register_jobs(self):
+        """Register timed reports.
+
+        - 20:00 Last trading day of the week: Weekly report
+        - 20:00 Last trading day of the month: Monthly report
         """
-        report_time = "20:00"
-        
-        triggered_today = set()
-        
-        while self.is_running:
-            try:
-                now = datetime.now(CHINA_TZ)
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                # Reset triggered set at midnight
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                key = f"{date_str}_{time_str}"
-                
-                # Skip weekends
-                if now.weekday() < 5 and time_str == report_time:
-                    # Weekly report (Friday)
-                    if now.weekday() == 4 and f"weekly_{date_str}" not in triggered_today:
-                        triggered_today.add(f"weekly_{date_str}")
-                        asyncio.create_task(self.send_weekly_report())
-                    
-                    # Monthly report (last trading day - simplified: last weekday)
-                    next_day = now.date() + timedelta(days=1)
-                    if next_day.month != now.month and f"monthly_{date_str}" not in triggered_today:
-                        triggered_today.add(f"monthly_{date_str}")
-                        asyncio.create_task(self.send_monthly_report())
-                
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            # Check every 30 seconds
-            await asyncio.sleep(30)
+        job_scheduler.register(Job(
+            "market_report.weekly", self.send_weekly_report, times=("20:00",), calendar=WEEK_END,
+        ), owner="market_report")
+        job_scheduler.register(Job(
+            "market_report.monthly", self.send_monthly_report, times=("20:00",), calendar=MONTH_END,
+        ), owner="market_report")
 
 
 # Singleton
@@ -6,21 +6,40 @@ This allows detecting messages that are similar but not identical (e.g., minor e
 different timestamps, or slight variations).
 
 Key features:
-- O(1) lookup time
+- O(1) exact lookup, indexed near-duplicate lookup (SimHashIndex)
 - Memory-efficient (stores only 64-bit fingerprints)
 - Detects near-duplicates (not just exact matches)
 - Configurable similarity threshold
-- LRU cache with automatic eviction
+- LRU cache with size and TTL eviction
 """
 
 import re
+import time
+import zlib
 import hashlib
+import itertools
 from collections import OrderedDict
-from typing import Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
 from app.core.logger import Logger
 
 logger = Logger("Dedup")
 
+# Fingerprinting methods accepted by SimHash.fingerprint / MessageDeduplicator
+SIMHASH_METHODS = ("ngram", "word")
+
+# Token n-gram sizes for the "ngram" method
+NGRAM_SIZES = (2,)
+
+# "ngram" tokens: single CJK characters, or runs of other word characters
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(f'[{_CJK}]|[^\\W_{_CJK}]+')
+
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+
 
 class SimHash:
     """
@@ -28,23 +47,35 @@ class SimHash:
     
     SimHash produces similar hashes for similar inputs.
     Hamming distance between hashes indicates similarity.
+    
+    Two methods:
+    - "word" (compute): whitespace words and word 2/3-grams, MD5 per token.
+      Chinese text has no spaces, so a message is mostly one giant token.
+    - "ngram" (compute_ngram): bigrams of tokens, where a token is a single
+      CJK character or a Latin/digit word, so Chinese and English text are
+      shingled alike. Shingles are hashed with 64-bit FNV-1a plus a
+      splitmix64 finalizer and bit weights are summed with NumPy.
     """
     
     @staticmethod
-    def _tokenize(text: str) -> list:
-        """Extract tokens from text (words and n-grams)."""
-        if not text:
-            return []
-        
+    def _normalize(text: str) -> str:
+        """Lowercase, collapse whitespace, drop URLs and mentions."""
         # Normalize: lowercase, remove extra whitespace
         text = re.sub(r'\s+', ' ', text.lower().strip())
         
         # Remove common noise: URLs, mentions, hashtags (keep the text content)
         text = re.sub(r'https?://\S+', '', text)
         text = re.sub(r'@\w+', '', text)
+        return text
+    
+    @staticmethod
+    def _tokenize(text: str) -> list:
+        """Extract tokens from text (words and n-grams)."""
+        if not text:
+            return []
         
         # Split into words
-        words = text.split()
+        words = SimHash._normalize(text).split()
         
         # Create 2-grams and 3-grams for better similarity detection
         tokens = []
@@ -94,6 +125,66 @@ class SimHash:
         
         return fingerprint
     
+    @staticmethod
+    def _token_ids(text: str) -> np.ndarray:
+        """Token ids: code point for CJK characters, CRC32 + 2^32 for words."""
+        tokens = _TOKEN_RE.findall(SimHash._normalize(text))
+        return np.array(
+            [ord(t) if len(t) == 1 and t >= '\u3400' else zlib.crc32(t.encode('utf-8')) | (1 << 32)
+             for t in tokens],
+            dtype=np.uint64,
+        )
+    
+    @staticmethod
+    def _ngram_hashes(text: str) -> np.ndarray:
+        """64-bit hashes of the token n-grams of normalized text."""
+        ids = SimHash._token_ids(text)
+        if not len(ids):
+            return ids
+        
+        parts = []
+        for n in NGRAM_SIZES:
+            # Texts shorter than n still get one shingle
+            n = min(n, len(ids))
+            count = len(ids) - n + 1
+            # FNV-1a over token ids, seeded per n-gram size
+            h = np.full(count, _FNV_OFFSET ^ np.uint64(n), dtype=np.uint64)
+            for i in range(n):
+                h = (h ^ ids[i:i + count]) * _FNV_PRIME
+            parts.append(h)
+        h = np.concatenate(parts)
+        
+        # splitmix64 finalizer: FNV alone mixes short inputs poorly into high bits
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
+    
+    @staticmethod
+    def compute_ngram(text: str) -> Optional[int]:
+        """
+        Compute a SimHash fingerprint from token n-grams.
+        Returns a 64-bit integer, or None when the text has no tokens
+        (emoji or punctuation only), which has nothing to compare.
+        """
+        hashes = SimHash._ngram_hashes(text) if text else None
+        if hashes is None or not len(hashes):
+            return None
+        
+        # (shingles, 64) bit matrix, column i = bit i
+        bits = np.unpackbits(hashes.astype('<u8').view(np.uint8), bitorder='little').reshape(-1, 64)
+        # Bit set where more shingles have it set than not (v[i] > 0)
+        set_bits = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+        return int(np.packbits(set_bits, bitorder='little').view('<u8')[0])
+    
+    @staticmethod
+    def fingerprint(text: str, method: str = "ngram") -> Optional[int]:
+        """Compute a fingerprint with the given method ("ngram" or "word"); None if featureless."""
+        if method == "ngram":
+            return SimHash.compute_ngram(text)
+        if method == "word":
+            return SimHash.compute(text)
+        raise ValueError(f"Unknown SimHash method {method!r}, expected one of {SIMHASH_METHODS}")
+    
     @staticmethod
     def hamming_distance(hash1: int, hash2: int) -> int:
         """Calculate Hamming distance between two fingerprints."""
@@ -114,14 +205,146 @@ class SimHash:
         return 1.0 - (dist / 64.0)
 
 
+def max_distance_for(similarity_threshold: float) -> int:
+    """Largest Hamming distance whose SimHash.similarity meets the threshold."""
+    return max(
+        (d for d in range(65) if 1.0 - (d / 64.0) >= similarity_threshold),
+        default=-1,
+    )
+
+
+class SimHashIndex:
+    """
+    Multi-table index for Hamming-distance lookups over 64-bit fingerprints.
+    
+    The fingerprint is split into `max_distance + key_blocks` bit blocks.
+    Two fingerprints within `max_distance` bits differ in at most
+    `max_distance` blocks, so they agree exactly on at least `key_blocks`
+    of them (pigeonhole). One table per combination of `key_blocks` blocks
+    maps those bits to fingerprints; a lookup only checks the fingerprints
+    sharing a bucket with the query in some table.
+    
+    With the default 0.85 threshold (max_distance 9) and key_blocks=2
+    there are 55 tables keyed on ~12 bits each, so a random query checks
+    about 0.2% of the stored fingerprints. key_blocks=1 uses 10 tables
+    (less memory, ~16% checked).
+    
+    Entries are kept in LRU order with a timestamp; evict() drops the
+    least recently used ones by size and age.
+    """
+    
+    def __init__(self, max_distance: int, key_blocks: int = 2):
+        self.max_distance = max_distance
+        blocks = max_distance + key_blocks
+        if max_distance < 0 or blocks > 64:
+            # Degenerate thresholds: one table, one bucket (linear scan)
+            self._masks = [0]
+        else:
+            sizes = [64 // blocks + (1 if i < 64 % blocks else 0) for i in range(blocks)]
+            block_masks = []
+            shift = 0
+            for size in sizes:
+                block_masks.append(((1 << size) - 1) << shift)
+                shift += size
+            self._masks = [
+                sum(block_masks[i] for i in combo)
+                for combo in itertools.combinations(range(blocks), key_blocks)
+            ]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._masks]
+        # LRU order: fingerprint -> (channel_id, last_seen_timestamp)
+        self._entries: OrderedDict[int, Tuple[str, float]] = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, fingerprint: int) -> bool:
+        return fingerprint in self._entries
+    
+    @property
+    def table_count(self) -> int:
+        return len(self._masks)
+    
+    def add(self, fingerprint: int, channel_id: str = '', now: float = None):
+        """Insert a fingerprint, or refresh it if already present."""
+        now = time.time() if now is None else now
+        if fingerprint in self._entries:
+            self.touch(fingerprint, now)
+            return
+        self._entries[fingerprint] = (channel_id, now)
+        for mask, table in zip(self._masks, self._tables):
+            key = fingerprint & mask
+            bucket = table.get(key)
+            if bucket is None:
+                table[key] = [fingerprint]
+            else:
+                bucket.append(fingerprint)
+    
+    def touch(self, fingerprint: int, now: float = None):
+        """Mark a fingerprint as recently used."""
+        channel_id, _ = self._entries[fingerprint]
+        self._entries[fingerprint] = (channel_id, time.time() if now is None else now)
+        self._entries.move_to_end(fingerprint)
+    
+    def remove(self, fingerprint: int):
+        """Remove a fingerprint from the entries and every table."""
+        del self._entries[fingerprint]
+        for mask, table in zip(self._masks, self._tables):
+            key = fingerprint & mask
+            bucket = table[key]
+            bucket.remove(fingerprint)
+            if not bucket:
+                del table[key]
+    
+    def find(self, fingerprint: int) -> Optional[Tuple[int, int]]:
+        """
+        Find the closest stored fingerprint within max_distance.
+        
+        Returns:
+            (fingerprint, distance) or None
+        """
+        if fingerprint in self._entries:
+            return fingerprint, 0
+        
+        best = None
+        best_distance = self.max_distance + 1
+        for mask, table in zip(self._masks, self._tables):
+            bucket = table.get(fingerprint & mask)
+            if not bucket:
+                continue
+            for candidate in bucket:
+                distance = (fingerprint ^ candidate).bit_count()
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return (best, best_distance) if best is not None else None
+    
+    def evict(self, max_size: int, ttl: Optional[float] = None, now: float = None) -> int:
+        """Drop least recently used entries beyond max_size or older than ttl."""
+        cutoff = None
+        if ttl:
+            cutoff = (time.time() if now is None else now) - ttl
+        evicted = 0
+        while self._entries:
+            oldest, (_, seen) = next(iter(self._entries.items()))
+            if len(self._entries) <= max_size and (cutoff is None or seen >= cutoff):
+                break
+            self.remove(oldest)
+            evicted += 1
+        return evicted
+    
+    def clear(self):
+        self._entries.clear()
+        for table in self._tables:
+            table.clear()
+
+
 class MessageDeduplicator:
     """
     Efficient message deduplication using SimHash.
     
     Features:
     - Content-based fingerprinting (not just message ID)
-    - Near-duplicate detection with configurable threshold
-    - LRU cache with automatic eviction
+    - Near-duplicate detection with configurable threshold, via SimHashIndex
+    - LRU cache with size and TTL eviction
     - Separate caches for different purposes (forwarding vs caching)
     """
     
@@ -129,7 +352,10 @@ class MessageDeduplicator:
         self,
         max_cache_size: int = 5000,
         similarity_threshold: float = 0.85,
-        min_text_length: int = 20
+        min_text_length: int = 20,
+        ttl_seconds: Optional[float] = None,
+        index_key_blocks: int = 2,
+        simhash_method: str = "ngram"
     ):
         """
         Initialize deduplicator.
@@ -138,15 +364,24 @@ class MessageDeduplicator:
             max_cache_size: Maximum fingerprints to store
             similarity_threshold: Minimum similarity to consider as duplicate (0.0-1.0)
             min_text_length: Minimum text length to consider for dedup
+            ttl_seconds: Forget entries not seen for this long (None = size-only eviction)
+            index_key_blocks: Exact-match blocks per index table (see SimHashIndex)
+            simhash_method: Fingerprinting method, "ngram" or "word" (see SimHash)
         """
+        if simhash_method not in SIMHASH_METHODS:
+            raise ValueError(f"Unknown SimHash method {simhash_method!r}, expected one of {SIMHASH_METHODS}")
         self.max_cache_size = max_cache_size
         self.similarity_threshold = similarity_threshold
         self.min_text_length = min_text_length
+        self.ttl_seconds = ttl_seconds
+        self.simhash_method = simhash_method
         
-        # LRU cache: fingerprint -> (channel_id, first_seen_timestamp)
-        self._fingerprints: OrderedDict[int, Tuple[str, float]] = OrderedDict()
+        # LRU fingerprint index: fingerprint -> (channel_id, last_seen_timestamp)
+        self._fingerprints = SimHashIndex(
+            max_distance_for(similarity_threshold), key_blocks=index_key_blocks
+        )
         
-        # Exact hash cache for quick exact-match lookup
+        # Exact hash cache for quick exact-match lookup (LRU: hash -> last_seen_timestamp)
         self._exact_hashes: OrderedDict[str, float] = OrderedDict()
         
         # Stats
@@ -162,12 +397,16 @@ class MessageDeduplicator:
         normalized = re.sub(r'\s+', ' ', text.lower().strip())
         return hashlib.md5(normalized.encode('utf-8')).hexdigest()
     
-    def _evict_if_needed(self):
-        """Evict oldest entries if cache is full."""
-        while len(self._fingerprints) > self.max_cache_size:
-            self._fingerprints.popitem(last=False)
+    def _evict_if_needed(self, now: float = None):
+        """Evict least recently used entries if cache is full or expired."""
+        now = time.time() if now is None else now
+        self._fingerprints.evict(self.max_cache_size, self.ttl_seconds, now)
         
-        while len(self._exact_hashes) > self.max_cache_size:
+        cutoff = now - self.ttl_seconds if self.ttl_seconds else None
+        while self._exact_hashes:
+            seen = next(iter(self._exact_hashes.values()))
+            if len(self._exact_hashes) <= self.max_cache_size and (cutoff is None or seen >= cutoff):
+                break
             self._exact_hashes.popitem(last=False)
     
     def is_duplicate(
@@ -185,41 +424,45 @@ class MessageDeduplicator:
             - (True, "near:0.92") - Near duplicate with 92% similarity
             - (False, None) - Unique message
         """
-        import time
-        
         self.stats['total_checked'] += 1
         
         # Skip very short messages
         if not text or len(text) < self.min_text_length:
             return False, None
         
+        now = time.time()
+        self._evict_if_needed(now)
+        
         # Check exact hash first (O(1) average)
         exact_hash = self._compute_exact_hash(text)
         if exact_hash in self._exact_hashes:
+            self._exact_hashes[exact_hash] = now
+            self._exact_hashes.move_to_end(exact_hash)
             self.stats['exact_duplicates'] += 1
             logger.debug(f"🔄 Exact duplicate detected: {text[:50]}...")
             return True, "exact"
         
-        # Check near-duplicates using SimHash
-        if check_near_duplicates:
-            fingerprint = SimHash.compute(text)
-            
-            # Compare with existing fingerprints
-            for existing_fp, (existing_channel, _) in self._fingerprints.items():
-                similarity = SimHash.similarity(fingerprint, existing_fp)
-                if similarity >= self.similarity_threshold:
-                    self.stats['near_duplicates'] += 1
-                    logger.debug(f"🔄 Near duplicate ({similarity:.0%}): {text[:50]}...")
-                    return True, f"near:{similarity:.2f}"
+        # Check near-duplicates using SimHash (exact match only for featureless text)
+        fingerprint = SimHash.fingerprint(text, self.simhash_method) if check_near_duplicates else None
+        if fingerprint is not None:
+            # Only fingerprints sharing an index bucket are compared
+            match = self._fingerprints.find(fingerprint)
+            if match is not None:
+                existing_fp, distance = match
+                self._fingerprints.touch(existing_fp, now)
+                similarity = 1.0 - (distance / 64.0)
+                self.stats['near_duplicates'] += 1
+                logger.debug(f"🔄 Near duplicate ({similarity:.0%}): {text[:50]}...")
+                return True, f"near:{similarity:.2f}"
             
             # Store new fingerprint
-            self._fingerprints[fingerprint] = (channel_id or '', time.time())
+            self._fingerprints.add(fingerprint, channel_id or '', now)
         
         # Store exact hash
-        self._exact_hashes[exact_hash] = time.time()
+        self._exact_hashes[exact_hash] = now
         
         # Evict old entries
-        self._evict_if_needed()
+        self._evict_if_needed(now)
         
         self.stats['unique_messages'] += 1
         return False, None
@@ -229,18 +472,19 @@ class MessageDeduplicator:
         Add a message to the dedup cache without checking.
         Useful for pre-populating from database.
         """
-        import time
-        
         if not text or len(text) < self.min_text_length:
             return
         
+        now = time.time()
         exact_hash = self._compute_exact_hash(text)
-        fingerprint = SimHash.compute(text)
+        fingerprint = SimHash.fingerprint(text, self.simhash_method)
         
-        self._exact_hashes[exact_hash] = time.time()
-        self._fingerprints[fingerprint] = (channel_id or '', time.time())
+        self._exact_hashes[exact_hash] = now
+        self._exact_hashes.move_to_end(exact_hash)
+        if fingerprint is not None:
+            self._fingerprints.add(fingerprint, channel_id or '', now)
         
-        self._evict_if_needed()
+        self._evict_if_needed(now)
     
     def clear(self):
         """Clear all cached fingerprints."""
@@ -259,6 +503,7 @@ class MessageDeduplicator:
             **self.stats,
             'cache_size': len(self._fingerprints),
             'exact_cache_size': len(self._exact_hashes),
+            'simhash_method': self.simhash_method,
             'dedup_rate': (
                 (self.stats['exact_duplicates'] + self.stats['near_duplicates']) /
                 max(1, self.stats['total_checked'])
@@ -272,7 +517,9 @@ def _create_deduplicator():
     return MessageDeduplicator(
         max_cache_size=settings.DEDUP_CACHE_SIZE,
         similarity_threshold=settings.DEDUP_SIMILARITY_THRESHOLD,
-        min_text_length=20
+        min_text_length=20,
+        ttl_seconds=settings.DEDUP_TTL_SECONDS or None,
+        simhash_method=settings.DEDUP_SIMHASH_METHOD
     )
 
 # Lazy initialization
@@ -11,6 +11,9 @@ from app.core.logger import Logger
 from app.core.bot import telegram_service
 from app.core.database import db
 from app.core.timezone import CHINA_TZ as SHANGHAI_TZ, china_now
+from app.core.send_queue import PRIORITY_ALERT, PRIORITY_REPORT, PRIORITY_VIP
+from app.core.write_behind import WriteBehindBuffer
+from app.services.scheduler import DAILY, Job, job_scheduler
 from app.services.message_dedup import get_deduplicator
 from app.services.forward_filters import (
     create_default_filter_chain, FilterContext, FilterAction, FilterResult
@@ -94,7 +97,15 @@ class MonitorService:
             max_age_seconds=settings.MONITOR_BUFFER_TIMEOUT
         )
         self._flush_task = None
-        self._report_task = None  # Daily report scheduler
+
+        # Batched writes for the report cache and per-user history
+        # (created_at is filled in by the DB default at flush time)
+        self.cache_writer = WriteBehindBuffer(
+            "monitor_message_cache", ("channel_id", "channel_name", "sender_name", "message_text")
+        )
+        self.history_writer = WriteBehindBuffer(
+            "monitor_history", ("user_id", "source", "source_id", "message")
+        )
         
         # Forward filter chain
         self.filter_chain = create_default_filter_chain()
@@ -195,8 +206,12 @@ class MonitorService:
         #     self._flush_task = asyncio.create_task(self._periodic_flush())
         #     logger.info("📝 Summarization enabled")
         
+        # Message cache/history rows are written in the background
+        await self.cache_writer.start()
+        await self.history_writer.start()
+
         # Start daily report scheduler
-        self._report_task = asyncio.create_task(self._schedule_reports())
+        self._register_jobs()
         logger.info("📅 Daily report scheduler started (8:00/20:00)")
         
         logger.info("✅ MonitorService started.")
@@ -209,12 +224,9 @@ class MonitorService:
                 await self._flush_task
             except asyncio.CancelledError:
                 pass
-        if self._report_task:
-            self._report_task.cancel()
-            try:
-                await self._report_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("monitor")
+        await self.cache_writer.stop()
+        await self.history_writer.stop()
         logger.info("MonitorService stopped.")
     
     async def _periodic_flush(self):
@@ -237,38 +249,11 @@ class MonitorService:
             except Exception as e:
                 logger.error(f"Error in periodic flush: {e}")
     
-    async def _schedule_reports(self):
-        """Schedule daily reports at 8:00 and 20:00."""
-        from datetime import timedelta
-        
-        while self.is_running:
-            try:
-                now = get_shanghai_time()
-                
-                # Calculate next report time (8:00 or 20:00)
-                today_8am = now.replace(hour=8, minute=0, second=0, microsecond=0)
-                today_8pm = now.replace(hour=20, minute=0, second=0, microsecond=0)
-                
-                if now < today_8am:
-                    next_report = today_8am
-                elif now < today_8pm:
-                    next_report = today_8pm
-                else:
-                    next_report = today_8am + timedelta(days=1)
-                
-                wait_seconds = (next_report - now).total_seconds()
-                logger.info(f"📅 Next report scheduled at {next_report.strftime('%Y-%m-%d %H:%M')}")
-                
-                await asyncio.sleep(wait_seconds)
-                
-                if self.is_running:
-                    await self._generate_all_reports()
-                    
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in report scheduler: {e}")
-                await asyncio.sleep(60)  # Wait before retry
+    def _register_jobs(self):
+        """Daily reports at 8:00 and 20:00."""
+        job_scheduler.register(Job(
+            "monitor.reports", self._generate_all_reports, times=("08:00", "20:00"), calendar=DAILY,
+        ), owner="monitor")
     
     async def _generate_all_reports(self):
         """Generate reports for all channels with cached messages."""
@@ -277,6 +262,9 @@ class MonitorService:
             return
         
         try:
+            # Buffered messages belong in the report
+            await self.cache_writer.flush()
+
             # Get all channels with cached messages
             channels = await db.pool.fetch("""
                 SELECT DISTINCT channel_id, channel_name 
@@ -425,7 +413,7 @@ class MonitorService:
                 if isinstance(target, str) and (target.isdigit() or target.lstrip('-').isdigit()):
                     target = int(target)
                 
-                await telegram_service.send_message(target, formatted, parse_mode='html')
+                await telegram_service.send_message(target, formatted, parse_mode='html', priority=PRIORITY_REPORT)
                 logger.info(f"✅ Structured report sent for {channel_name}")
             
             # ═══════════════════════════════════════════════════════════════
@@ -461,13 +449,7 @@ class MonitorService:
             logger.debug(f"🔄 Skipping duplicate message ({reason}): {message_text[:50]}...")
             return
         
-        try:
-            await db.pool.execute("""
-                INSERT INTO monitor_message_cache (channel_id, channel_name, sender_name, message_text)
-                VALUES ($1, $2, $3, $4)
-            """, channel_id, channel_name, sender_name, message_text)
-        except Exception as e:
-            logger.warn(f"Failed to cache message: {e}")
+        await self.cache_writer.add((channel_id, channel_name, sender_name, message_text))
     
     async def resolve_channel_info(self, channel: str) -> dict:
         """Resolve channel ID and name from Telegram."""
@@ -924,6 +906,7 @@ class MonitorService:
                 )
                 log_prefix = "⭐ VIP " if is_vip else ""
                 logger.info(f"📤 {log_prefix}Forwarding from {sender_name}...")
+                priority = PRIORITY_VIP if is_vip else PRIORITY_ALERT
                 try:
                     # Target channel is provided by filter chain
                     if isinstance(target, str) and (target.isdigit() or target.lstrip('-').isdigit()):
@@ -937,7 +920,8 @@ class MonitorService:
                         link_preview=False,
                         fallback_to_text=not media_supported,
                         media_source=event.message if media_supported else None,
-                        media_source_client=event.client if media_supported else None
+                        media_source_client=event.client if media_supported else None,
+                        priority=priority,
                     )
                     media_sent = bool(send_result.get("media_sent")) if isinstance(send_result, dict) else False
                     text_sent = bool(send_result.get("text_sent")) if isinstance(send_result, dict) else False
@@ -947,7 +931,8 @@ class MonitorService:
                             target,
                             formatted_msg,
                             parse_mode='html',
-                            link_preview=False
+                            link_preview=False,
+                            priority=priority,
                         )
                     if needs_media_fallback:
                         target_str = str(target)
@@ -962,7 +947,8 @@ class MonitorService:
                                 await telegram_service.forward_messages(
                                     target,
                                     event.message,
-                                    from_peer=chat
+                                    from_peer=chat,
+                                    priority=priority,
                                 )
                                 logger.info(f"📎 Unsupported media forwarded")
                             except Exception as e:
@@ -1062,7 +1048,7 @@ class MonitorService:
             if isinstance(target, str) and (target.isdigit() or target.lstrip('-').isdigit()):
                 target = int(target)
             
-            await telegram_service.send_message(target, formatted_summary, parse_mode='html')
+            await telegram_service.send_message(target, formatted_summary, parse_mode='html', priority=PRIORITY_REPORT)
             logger.info(f"✅ Summary sent to target channel")
             
         except Exception as e:
@@ -1073,7 +1059,7 @@ class MonitorService:
                 target = self.target_channel
                 if isinstance(target, str) and (target.isdigit() or target.lstrip('-').isdigit()):
                     target = int(target)
-                await telegram_service.send_message(target, fallback_msg)
+                await telegram_service.send_message(target, fallback_msg, priority=PRIORITY_REPORT)
             except:
                 pass
 
@@ -1132,15 +1118,8 @@ class MonitorService:
         users = settings.allowed_users_list or ["0"]
         
         for user_id in users:
-            try:
-                # monitor_history.user_id is TEXT type, so pass as string
-                uid_str = str(user_id)
-                await db.pool.execute("""
-                    INSERT INTO monitor_history (user_id, source, source_id, message, created_at)
-                    VALUES ($1, $2, $3, $4, NOW())
-                """, uid_str, source, str(source_id), message)
-            except Exception as e:
-                logger.warn(f"Failed to save history for {user_id}: {e}")
+            # monitor_history.user_id is TEXT type, so pass as string
+            await self.history_writer.add((str(user_id), source, str(source_id), message))
 
 
 monitor_service = MonitorService()
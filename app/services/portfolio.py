@@ -6,6 +6,7 @@ from datetime import datetime
 from app.core.logger import Logger
 from app.core.database import db
 from app.core.timezone import china_now, china_today
+from app.services.spot_snapshot import spot_snapshot
 
 logger = Logger("PortfolioService")
 
@@ -15,21 +16,10 @@ class PortfolioService:
     def __init__(self):
         self.is_running = False
         self._scheduler_task = None
-        self._ak = None
         # Cache for alert notifications to avoid spamming
         # Key: f"{user_id}_{code}_{type}_{date}"
         self._alert_cache = set()
     
-    def _get_akshare(self):
-        if self._ak is None:
-            try:
-                import akshare as ak
-                self._ak = ak
-            except ImportError:
-                logger.error("AkShare not installed")
-                return None
-        return self._ak
-
     async def start(self):
         """Start the portfolio monitor."""
         if self.is_running:
@@ -102,20 +92,14 @@ class PortfolioService:
             
         holdings = [dict(r) for r in rows]
         
-        # Fetch real-time prices
-        ak = self._get_akshare()
-        if not ak:
-            return holdings
-            
         try:
-            # Batch fetch all A-shares
-            df = await asyncio.to_thread(ak.stock_zh_a_spot_em)
-            if df is None or df.empty:
+            # Shared market-wide snapshot
+            snap = await spot_snapshot.get()
+            if snap is None:
                 return holdings
                 
             price_map = {}
-            for _, row in df.iterrows():
-                code = str(row.get('代码', ''))
+            for code, row in snap.quotes(h['code'] for h in holdings).items():
                 price_map[code] = {
                     'current_price': float(row.get('最新价', 0) or 0),
                     'change_pct': float(row.get('涨跌幅', 0) or 0),
@@ -16,9 +16,19 @@ Usage:
     results = await run_scan(stocks_data, stock_names)
 """
 
-from .base import SignalDetector, SignalResult
+from .base import SignalDetector, SignalResult, PanelResult
+from .context import IndicatorContext
+from .panel import PricePanel
 from .registry import SignalRegistry, registry
-from .runner import run_scan, run_single_signal, get_signal_info
+from .incremental import RollingState
+from .runner import (
+    run_scan,
+    run_panel_scan,
+    run_rolling_scan,
+    build_multi_signal,
+    run_single_signal,
+    get_signal_info,
+)
 
 # Import all signals to trigger registration
 from . import signals
@@ -27,6 +37,10 @@ __all__ = [
     # Base classes
     "SignalDetector",
     "SignalResult",
+    "PanelResult",
+    "IndicatorContext",
+    "PricePanel",
+    "RollingState",
     
     # Registry
     "SignalRegistry",
@@ -34,6 +48,9 @@ __all__ = [
     
     # Runner
     "run_scan",
+    "run_panel_scan",
+    "run_rolling_scan",
+    "build_multi_signal",
     "run_single_signal",
     "get_signal_info",
 ]
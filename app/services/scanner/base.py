@@ -6,9 +6,14 @@ This module defines the core abstractions for the modular signal detection syste
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from .incremental import RollingState
+    from .panel import PricePanel
+
 
 @dataclass
 class SignalResult:
@@ -22,6 +27,19 @@ class SignalResult:
     metadata: Optional[Dict[str, Any]] = field(default_factory=dict)
 
 
+@dataclass
+class PanelResult:
+    """Result of vectorized signal detection over a PricePanel.
+    
+    Attributes:
+        triggered: Boolean array, one entry per panel row
+        metadata: Optional column -> array of per-row values; only the
+            entries of triggered rows are reported
+    """
+    triggered: np.ndarray
+    metadata: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
 class SignalDetector(ABC):
     """Base class for all signal detectors.
     
@@ -37,6 +55,7 @@ class SignalDetector(ABC):
         min_bars: Minimum data history required (days)
         priority: Execution order (lower = earlier)
         count_in_multi: Include in multi-signal count
+        uses_context: Receive the shared per-stock IndicatorContext as `ctx`
     
     Example:
         @SignalRegistry.register
@@ -74,6 +93,9 @@ class SignalDetector(ABC):
     
     # Include in multi-signal count
     count_in_multi: bool = True
+    
+    # Runner passes the shared IndicatorContext as detect(..., ctx=...)
+    uses_context: bool = False
 
     @abstractmethod
     def detect(self, hist: pd.DataFrame, stock_info: Dict[str, Any]) -> SignalResult:
@@ -83,11 +105,49 @@ class SignalDetector(ABC):
             hist: DataFrame with columns: 收盘, 开盘, 最高, 最低, 成交量, 换手率
             stock_info: Dict with keys: code, name
         
+        Signals with uses_context = True also accept a keyword argument
+        `ctx` (IndicatorContext for the same hist, None when called directly).
+        
         Returns:
             SignalResult with triggered state and optional metadata
         """
         pass
     
+    def detect_panel(self, panel: "PricePanel") -> Optional[PanelResult]:
+        """Detect signal for every stock in a panel at once.
+        
+        Optional vectorized counterpart of detect(). Must trigger exactly
+        the stocks detect() would. The panel engine only considers rows
+        with at least min_bars bars, so implementations need not mask them.
+        
+        Args:
+            panel: PricePanel with aligned OHLCV arrays
+        
+        Returns:
+            PanelResult, or None if the signal has no vectorized version
+            (the engine then falls back to per-stock detect()).
+        """
+        return None
+    
+    def detect_rolling(self, state: "RollingState") -> Optional[PanelResult]:
+        """Detect signal from incremental rolling state.
+        
+        Used by the incremental scan, which advances a RollingState by the
+        new day's bars instead of reloading history. Rows follow
+        state.codes; rows with fewer than min_bars bars are masked by the
+        caller. The state holds only the last state.window bars, while a
+        full scan may load more: lookbacks must be bounded the same way in
+        detect() and detect_panel() for the results to match.
+        
+        Args:
+            state: RollingState with windows and running sums per stock
+        
+        Returns:
+            PanelResult, or None if the signal cannot be evaluated from
+            rolling state (the scanner then runs it on full history).
+        """
+        return None
+    
     def __repr__(self) -> str:
         return f"<Signal:{self.signal_id}>"
     
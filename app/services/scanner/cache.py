@@ -0,0 +1,277 @@
+"""
+Scan Dataset Cache - Binary columnar Redis cache for scanner history.
+
+The scanner used to pickle the whole `(stocks_data, stock_names)` dict,
+base64 it (+33%) and store it as one Redis string; every hit unpickled
+thousands of DataFrames, and unpickling data read from Redis is unsafe.
+
+This cache stores the dataset as typed little-endian column buffers:
+
+- Stocks are split into chunks of `chunk_size` codes.
+- Each chunk is laid out time-major and right-aligned on the latest bar
+  (row 0 is the oldest bar of the chunk's longest stock, the last row is
+  "today" for every stock), so the last N bars are a contiguous suffix.
+- Rows are grouped into blocks of `block_bars`, counted back from the
+  latest bar. Each (chunk, block) is one Redis key holding the columns
+  back to back, optionally zlib-compressed.
+- A JSON meta key lists chunks (codes, names, lengths), column dtypes and
+  the block layout. It is written last in the same MULTI, so a reader that
+  finds the meta finds every block.
+
+Loads fetch all needed blocks with one MGET and decode them in parallel
+threads (zlib and NumPy release the GIL); load(last_n=...) fetches only
+the blocks that cover the latest N bars. Nothing read from Redis is ever
+passed to pickle.
+
+Usage:
+    cache = ScanDatasetCache(db.redis_bytes)
+    await cache.save(key, stocks_data, stock_names)
+    stocks_data, stock_names = await cache.load(key)
+"""
+
+import asyncio
+import json
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.logger import Logger
+from .loader import FIELD_COLUMNS, ColumnarHistory
+
+logger = Logger("ScanDatasetCache")
+
+FORMAT_VERSION = 1
+
+# Stored column -> (DataFrame column, little-endian dtype)
+CACHE_COLUMNS = (("date", "日期", "<i4"),) + tuple(
+    (name, column, "<f8") for name, column in FIELD_COLUMNS
+)
+
+COMPRESSIONS = ("none", "zlib")
+
+
+def _block_rows(width: int, block_bars: int, block: int) -> Tuple[int, int]:
+    """Row range [start, stop) of a block; block 0 holds the latest bars."""
+    stop = width - block * block_bars
+    return max(stop - block_bars, 0), stop
+
+
+class ScanDatasetCache:
+    """Chunked columnar scan-dataset cache on a bytes-mode Redis client.
+
+    Args:
+        redis_client: redis.asyncio client created with decode_responses=False
+        prefix: Key prefix; bump it when the format changes
+        chunk_size: Codes per chunk
+        block_bars: Bars per block
+        compression: "zlib" or "none"
+        ttl: Expiry of all keys in seconds
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        prefix: str = "scanner:data:v4",
+        chunk_size: int = 500,
+        block_bars: int = 60,
+        compression: str = "zlib",
+        ttl: int = 86400,
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
+        self.redis = redis_client
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.block_bars = block_bars
+        self.compression = compression
+        self.ttl = ttl
+
+    def _meta_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}:meta"
+
+    def _block_key(self, key: str, chunk: int, block: int) -> str:
+        return f"{self.prefix}:{key}:{chunk}:{block}"
+
+    # ── Encoding ────────────────────────────────────────────────────────────
+
+    def _encode_chunk(self, frames: List[pd.DataFrame], width: int) -> List[bytes]:
+        """Encode one chunk into per-block payloads (block 0 = latest bars)."""
+        n = len(frames)
+        columns = {
+            name: np.zeros((width, n), dtype=dtype) if name == "date" else np.full((width, n), np.nan, dtype=dtype)
+            for name, _, dtype in CACHE_COLUMNS
+        }
+        for j, hist in enumerate(frames):
+            length = len(hist)
+            if not length:
+                continue
+            dates = hist["日期"].values
+            if not np.issubdtype(dates.dtype, np.datetime64):
+                dates = pd.to_datetime(hist["日期"]).values
+            days = dates.astype("datetime64[D]").astype(np.int64)
+            columns["date"][width - length:, j] = days
+            for name, column, _ in CACHE_COLUMNS[1:]:
+                if column in hist.columns:
+                    columns[name][width - length:, j] = hist[column].values
+
+        payloads = []
+        for block in range((width + self.block_bars - 1) // self.block_bars):
+            start, stop = _block_rows(width, self.block_bars, block)
+            raw = b"".join(columns[name][start:stop].tobytes() for name, _, _ in CACHE_COLUMNS)
+            payloads.append(zlib.compress(raw, 1) if self.compression == "zlib" else raw)
+        return payloads
+
+    async def save(self, key: str, stocks_data: Dict[str, pd.DataFrame], stock_names: Dict[str, str]) -> int:
+        """Store a dataset under key, replacing any previous one.
+
+        Returns:
+            Bytes written
+        """
+        codes = list(stocks_data.keys())
+        chunks_meta = []
+        writes: Dict[str, bytes] = {}
+        loop = asyncio.get_running_loop()
+
+        for chunk, start in enumerate(range(0, len(codes), self.chunk_size)):
+            chunk_codes = codes[start:start + self.chunk_size]
+            frames = [stocks_data[c] for c in chunk_codes]
+            lengths = [len(f) for f in frames]
+            width = max(lengths, default=0)
+            payloads = await loop.run_in_executor(None, self._encode_chunk, frames, width)
+            for block, payload in enumerate(payloads):
+                writes[self._block_key(key, chunk, block)] = payload
+            chunks_meta.append({
+                "codes": chunk_codes,
+                "names": [stock_names.get(c, c) for c in chunk_codes],
+                "lengths": lengths,
+                "width": width,
+            })
+
+        meta = {
+            "format": FORMAT_VERSION,
+            "compression": self.compression,
+            "block_bars": self.block_bars,
+            "columns": [[name, dtype] for name, _, dtype in CACHE_COLUMNS],
+            "chunks": chunks_meta,
+        }
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for block_key, payload in writes.items():
+                pipe.setex(block_key, self.ttl, payload)
+            pipe.setex(self._meta_key(key), self.ttl, meta_bytes)
+            await pipe.execute()
+
+        return sum(len(p) for p in writes.values()) + len(meta_bytes)
+
+    # ── Decoding ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _decode_blocks(
+        payloads: List[bytes],
+        row_counts: List[int],
+        n: int,
+        columns: List[Tuple[str, str]],
+        compression: str,
+    ) -> Dict[str, np.ndarray]:
+        """Decode a chunk's blocks (latest first) into time-major arrays."""
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name, _ in columns}
+        for payload, rows in zip(payloads, row_counts):
+            raw = zlib.decompress(payload) if compression == "zlib" else payload
+            offset = 0
+            for name, dtype in columns:
+                dt = np.dtype(dtype)
+                count = rows * n
+                parts[name].append(
+                    np.frombuffer(raw, dtype=dt, count=count, offset=offset).reshape(rows, n)
+                )
+                offset += count * dt.itemsize
+            if offset != len(raw):
+                raise ValueError(f"Block size mismatch: {offset} != {len(raw)}")
+        # Blocks arrive latest first; stack oldest first
+        return {name: np.concatenate(arrays[::-1]) for name, arrays in parts.items()}
+
+    @staticmethod
+    def _to_history(chunk: Dict, arrays: Dict[str, np.ndarray]) -> ColumnarHistory:
+        """Right-aligned time-major chunk -> ragged ColumnarHistory."""
+        rows = arrays["date"].shape[0]
+        lengths = np.minimum(np.asarray(chunk["lengths"], dtype=np.int64), rows)
+        # Real bars per stock, oldest first, stock by stock
+        mask = np.arange(rows)[None, :] >= (rows - lengths)[:, None]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        days = arrays["date"].T[mask].astype(np.int64)
+        fields = {
+            name: np.ascontiguousarray(arrays[name].T[mask], dtype=np.float64)
+            for name, _ in FIELD_COLUMNS
+        }
+        return ColumnarHistory(chunk["codes"], offsets, (days * 86400).view("datetime64[s]"), fields)
+
+    async def load_history(
+        self, key: str, last_n: Optional[int] = None
+    ) -> Optional[Tuple[ColumnarHistory, Dict[str, str]]]:
+        """Load a dataset as a ColumnarHistory, or None on a miss.
+
+        Args:
+            key: Dataset key passed to save()
+            last_n: Only the latest N bars per stock (None = all)
+        """
+        meta_bytes = await self.redis.get(self._meta_key(key))
+        if not meta_bytes:
+            return None
+        meta = json.loads(meta_bytes)
+        if meta.get("format") != FORMAT_VERSION:
+            return None
+
+        block_bars = meta["block_bars"]
+        columns = [(name, dtype) for name, dtype in meta["columns"]]
+        names: Dict[str, str] = {}
+        keys: List[str] = []
+        layout = []
+        for chunk_id, chunk in enumerate(meta["chunks"]):
+            width = chunk["width"]
+            bars = width if last_n is None else min(width, last_n)
+            blocks = (bars + block_bars - 1) // block_bars
+            row_counts = []
+            for block in range(blocks):
+                start, stop = _block_rows(width, block_bars, block)
+                keys.append(self._block_key(key, chunk_id, block))
+                row_counts.append(stop - start)
+            layout.append((chunk, row_counts, bars))
+            names.update(zip(chunk["codes"], chunk["names"]))
+
+        payloads = await self.redis.mget(keys) if keys else []
+        if any(p is None for p in payloads):
+            logger.warn(f"Scan dataset {key} is missing blocks, treating as a miss")
+            return None
+
+        loop = asyncio.get_running_loop()
+        tasks = []
+        pos = 0
+        for chunk, row_counts, _ in layout:
+            chunk_payloads = payloads[pos:pos + len(row_counts)]
+            pos += len(row_counts)
+            tasks.append(loop.run_in_executor(
+                None, self._decode_blocks, chunk_payloads, row_counts,
+                len(chunk["codes"]), columns, meta["compression"],
+            ))
+        decoded = await asyncio.gather(*tasks)
+
+        parts = []
+        for (chunk, _, bars), arrays in zip(layout, decoded):
+            # Drop rows of a partially fetched oldest block
+            trimmed = {name: arr[arr.shape[0] - bars:] for name, arr in arrays.items()}
+            parts.append(self._to_history(chunk, trimmed))
+        return ColumnarHistory.concat(parts), names
+
+    async def load(
+        self, key: str, last_n: Optional[int] = None, min_rows: int = 0
+    ) -> Optional[Tuple[Dict[str, pd.DataFrame], Dict[str, str]]]:
+        """Load a dataset as `(stocks_data, stock_names)`, or None on a miss."""
+        loaded = await self.load_history(key, last_n=last_n)
+        if loaded is None:
+            return None
+        history, names = loaded
+        return history.frames(min_rows=min_rows), names
@@ -0,0 +1,156 @@
+"""
+Per-stock Indicator Context.
+
+Signals scanning the same stock used to recompute the same indicators
+(MA20/60/120, ATR14, pivots, weekly resample...) from the same DataFrame.
+IndicatorContext computes each indicator lazily on first access and memoizes
+it by (indicator, parameters), so the runner can build one context per stock
+and share it across every signal.
+
+Usage:
+    ctx = IndicatorContext(hist)
+    ma20 = ctx.ma(20)          # pd.Series, computed once
+    atr = ctx.atr(14)          # float, computed once
+    weekly = ctx.weekly()      # DataFrame, resampled once
+
+Cached values are shared between signals and must be treated as read-only.
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import (
+    calculate_atr,
+    calculate_linreg_channel,
+    calculate_obv,
+    calculate_volume_ratio,
+    detect_pivot_highs,
+    detect_pivot_lows,
+    resample_to_monthly,
+    resample_to_weekly,
+)
+
+
+class IndicatorContext:
+    """Lazily computed, memoized indicators for a single stock.
+
+    Attributes:
+        hist: Daily DataFrame with 日期, 开盘, 收盘, 最高, 最低, 成交量, 换手率
+    """
+
+    __slots__ = ("hist", "_cache")
+
+    def __init__(self, hist: pd.DataFrame):
+        self.hist = hist
+        self._cache: Dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.hist)
+
+    def _memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return cached value for key, computing it on first access."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = compute()
+            self._cache[key] = value
+            return value
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Raw columns
+    # ─────────────────────────────────────────────────────────────────────
+
+    def series(self, column: str) -> pd.Series:
+        """Column as a float Series."""
+        return self._memo(("series", column), lambda: self.hist[column].astype(float))
+
+    def array(self, column: str) -> np.ndarray:
+        """Column as a float numpy array."""
+        return self._memo(("array", column), lambda: self.series(column).values)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Moving averages / volume
+    # ─────────────────────────────────────────────────────────────────────
+
+    def ma(self, period: int, column: str = "收盘") -> pd.Series:
+        """Simple moving average series (NaN until `period` bars)."""
+        return self._memo(
+            ("ma", column, period),
+            lambda: self.series(column).rolling(period).mean(),
+        )
+
+    def volume_ratio(self, lookback: int = 20) -> float:
+        """Today's volume vs the average of the previous `lookback` bars."""
+        return self._memo(
+            ("volume_ratio", lookback),
+            lambda: calculate_volume_ratio(self.array("成交量"), -1, lookback),
+        )
+
+    def obv(self) -> np.ndarray:
+        """On-Balance Volume array."""
+        return self._memo(
+            ("obv",),
+            lambda: calculate_obv(self.array("收盘"), self.array("成交量")),
+        )
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Volatility / channels
+    # ─────────────────────────────────────────────────────────────────────
+
+    def atr(self, period: int = 14) -> float:
+        """Average True Range at the last bar."""
+        return self._memo(("atr", period), lambda: calculate_atr(self.hist, period))
+
+    def linreg_channel(self, window: int, offset: int = 0) -> Tuple[float, float, float, float]:
+        """Linear regression channel (slope, mid, upper, lower).
+
+        Args:
+            window: Regression window
+            offset: Number of trailing bars to drop (1 = as of yesterday)
+        """
+        def compute():
+            closes = self.series("收盘")
+            if offset:
+                closes = closes.iloc[:-offset]
+            return calculate_linreg_channel(closes, window)
+
+        return self._memo(("linreg", window, offset), compute)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Pivots
+    # ─────────────────────────────────────────────────────────────────────
+
+    def pivot_highs(self, left_bars: int = 3, right_bars: int = 3) -> List[Dict[str, Any]]:
+        """Pivot highs on 最高."""
+        return self._memo(
+            ("pivot_highs", left_bars, right_bars),
+            lambda: detect_pivot_highs(self.array("最高"), left_bars, right_bars),
+        )
+
+    def pivot_lows(self, left_bars: int = 3, right_bars: int = 3) -> List[Dict[str, Any]]:
+        """Pivot lows on 最低."""
+        return self._memo(
+            ("pivot_lows", left_bars, right_bars),
+            lambda: detect_pivot_lows(self.array("最低"), left_bars, right_bars),
+        )
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Resamples
+    # ─────────────────────────────────────────────────────────────────────
+
+    def weekly(self) -> pd.DataFrame:
+        """Weekly resample of the daily bars."""
+        return self._memo(("weekly",), lambda: resample_to_weekly(self.hist))
+
+    def monthly(self) -> pd.DataFrame:
+        """Monthly resample of the daily bars."""
+        return self._memo(("monthly",), lambda: resample_to_monthly(self.hist))
+
+
+def ensure_context(hist: pd.DataFrame, ctx: Optional[IndicatorContext]) -> IndicatorContext:
+    """Return ctx, or a fresh context for hist when called without one."""
+    if ctx is None or ctx.hist is not hist:
+        return IndicatorContext(hist)
+    return ctx
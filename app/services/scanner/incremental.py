@@ -0,0 +1,409 @@
+"""
+Incremental Scan State - Rolling per-stock indicators advanced one bar at a time.
+
+A full scan reloads `bucketed_limit` bars per stock and recomputes every
+indicator, although only one new bar per stock arrives each trading day.
+RollingState keeps, for the whole universe:
+
+- right-aligned windows of the last `window` highs/lows/closes/volumes
+  (the PricePanel layout, so rolling extremes are one nanmax per field)
+- running sums for close MAs, volume averages and the 14-bar true range
+  (ATR), each alongside its value as of the previous bar
+- cumulative OBV and its previous value
+
+advance() applies new bars with O(1) sum updates per stock plus a window
+shift. Signals implementing detect_rolling are evaluated from the state
+without loading any history. from_history() is the rebuild-from-scratch
+path: it seeds the state, and compare() against a fresh rebuild is the
+consistency check.
+
+Running sums accumulate floating-point error over time, so MAs can differ
+from pandas rolling means in the last few ulps; compare() uses a relative
+tolerance and the scanner replaces the state whenever a rebuild disagrees.
+
+Usage:
+    state = RollingState.from_history(history, window=300)
+    state.advance(new_bars)               # ColumnarHistory of newer bars
+    ma20 = state.ma(20)                   # per-row array, NaN if < 20 bars
+"""
+
+import io
+import warnings
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.logger import Logger
+from .loader import ColumnarHistory
+
+logger = Logger("RollingState")
+
+# Windowed fields, as named in ColumnarHistory.fields
+WINDOW_FIELDS = ("high", "low", "close", "volume")
+
+# Periods of the running sums kept per stock
+MA_PERIODS = (5, 10, 20, 60)
+VOLUME_PERIODS = (5,)
+ATR_PERIOD = 14
+
+# Smallest window that still holds the bar leaving each running sum
+MIN_WINDOW = max(MA_PERIODS + VOLUME_PERIODS + (ATR_PERIOD,)) + 1
+
+EPOCH = date(1970, 1, 1)
+
+# Bars newer than each code's last state date
+NEW_BARS_SQL = """
+    SELECT h.code, (h.date - DATE '1970-01-01')::int4,
+           h.open::float8, h.high::float8, h.low::float8, h.close::float8,
+           h.volume::float8, COALESCE(h.turnover_rate, 0)::float8
+    FROM stock_history h
+    JOIN unnest($1::text[], $2::date[]) AS s(code, last_date)
+      ON h.code = s.code AND h.date > s.last_date
+    ORDER BY h.code, h.date
+"""
+
+STATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS scanner_rolling_state (
+        name VARCHAR(50) PRIMARY KEY,
+        as_of DATE,
+        payload BYTEA NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _sum_keys() -> List[str]:
+    keys = [f"close_{k}" for k in MA_PERIODS]
+    keys += [f"volume_{k}" for k in VOLUME_PERIODS]
+    keys.append(f"tr_{ATR_PERIOD}")
+    return keys
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, prev_close: np.ndarray) -> np.ndarray:
+    """True range; 0 where there is no previous close."""
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return np.where(np.isnan(prev_close), 0.0, tr)
+
+
+class RollingState:
+    """Rolling indicator state for a universe of stocks.
+
+    Attributes:
+        codes: Stock codes, one per row
+        window: Bars kept per row in the windows
+        last_day: Epoch day of each row's latest bar (-1 if none)
+        bars: Bars seen per row (not capped at window)
+        high/low/close/volume: float64 arrays of shape (rows, window)
+        sums / prev_sums: Running sum arrays as of the latest / previous bar
+        obv / prev_obv: Cumulative OBV as of the latest / previous bar
+    """
+
+    def __init__(self, codes: List[str], window: int, arrays: Dict[str, np.ndarray]):
+        self.codes = list(codes)
+        self.window = window
+        self.last_day = arrays["last_day"]
+        self.bars = arrays["bars"]
+        self.high = arrays["high"]
+        self.low = arrays["low"]
+        self.close = arrays["close"]
+        self.volume = arrays["volume"]
+        self.sums = {key: arrays[f"sum_{key}"] for key in _sum_keys()}
+        self.prev_sums = {key: arrays[f"prev_{key}"] for key in _sum_keys()}
+        self.obv = arrays["obv"]
+        self.prev_obv = arrays["prev_obv"]
+        self._index = {code: i for i, code in enumerate(self.codes)}
+
+    # ── Construction ────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_history(cls, history: ColumnarHistory, window: int) -> "RollingState":
+        """Rebuild state from scratch from each code's latest `window` bars."""
+        if window < MIN_WINDOW:
+            raise ValueError(f"Rolling window must be at least {MIN_WINDOW} bars, got {window}")
+
+        n = len(history)
+        lengths = np.diff(history.offsets)
+        keep = np.minimum(lengths, window)
+
+        arrays: Dict[str, np.ndarray] = {
+            name: np.full((n, window), np.nan) for name in WINDOW_FIELDS
+        }
+        last_day = np.full(n, -1, dtype=np.int64)
+        days = history.dates.astype("datetime64[D]").astype(np.int64)
+        for i in range(n):
+            end = history.offsets[i + 1]
+            k = int(keep[i])
+            if k == 0:
+                continue
+            for name in WINDOW_FIELDS:
+                arrays[name][i, window - k:] = history.fields[name][end - k:end]
+            last_day[i] = days[end - 1]
+
+        arrays["last_day"] = last_day
+        arrays["bars"] = keep.astype(np.int64)
+
+        close, volume = arrays["close"], arrays["volume"]
+        prev_close = np.full_like(close, np.nan)
+        prev_close[:, 1:] = close[:, :-1]
+        tr = _true_range(arrays["high"], arrays["low"], prev_close)
+        series = {"close": close, "volume": volume, "tr": tr}
+
+        for key in _sum_keys():
+            name, period = key.rsplit("_", 1)
+            period = int(period)
+            values = np.nan_to_num(series[name])
+            arrays[f"sum_{key}"] = values[:, window - period:].sum(axis=1)
+            arrays[f"prev_{key}"] = values[:, window - period - 1:window - 1].sum(axis=1)
+
+        # OBV over the window, seeded with the first bar's volume (calculate_obv)
+        step = np.sign(close - prev_close) * volume
+        step = np.where(np.isnan(prev_close), np.nan_to_num(volume), np.nan_to_num(step))
+        obv = np.cumsum(step, axis=1)
+        arrays["obv"] = obv[:, -1].copy()
+        arrays["prev_obv"] = obv[:, -2].copy()
+
+        return cls(history.codes, window, arrays)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "RollingState":
+        """Decode a to_bytes() payload (plain .npz, never unpickled)."""
+        with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        codes = arrays.pop("codes").tolist()
+        window = int(arrays.pop("window"))
+        return cls(codes, window, arrays)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to an uncompressed .npz payload."""
+        arrays = {
+            "codes": np.array(self.codes, dtype=str),
+            "window": np.array(self.window),
+            "last_day": self.last_day,
+            "bars": self.bars,
+            "obv": self.obv,
+            "prev_obv": self.prev_obv,
+        }
+        for name in WINDOW_FIELDS:
+            arrays[name] = getattr(self, name)
+        for key in _sum_keys():
+            arrays[f"sum_{key}"] = self.sums[key]
+            arrays[f"prev_{key}"] = self.prev_sums[key]
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        return buf.getvalue()
+
+    def extend(self, other: "RollingState") -> None:
+        """Append rows for codes not yet in this state."""
+        if other.window != self.window:
+            raise ValueError(f"Window mismatch: {other.window} != {self.window}")
+        new_rows = [i for i, code in enumerate(other.codes) if code not in self._index]
+        if not new_rows:
+            return
+
+        def cat(mine: np.ndarray, theirs: np.ndarray) -> np.ndarray:
+            return np.concatenate((mine, theirs[new_rows]))
+
+        self.last_day = cat(self.last_day, other.last_day)
+        self.bars = cat(self.bars, other.bars)
+        for name in WINDOW_FIELDS:
+            setattr(self, name, cat(getattr(self, name), getattr(other, name)))
+        for key in _sum_keys():
+            self.sums[key] = cat(self.sums[key], other.sums[key])
+            self.prev_sums[key] = cat(self.prev_sums[key], other.prev_sums[key])
+        self.obv = cat(self.obv, other.obv)
+        self.prev_obv = cat(self.prev_obv, other.prev_obv)
+        for i in new_rows:
+            self._index[other.codes[i]] = len(self.codes)
+            self.codes.append(other.codes[i])
+
+    # ── Updates ─────────────────────────────────────────────────────────────
+
+    def advance(self, new_bars: ColumnarHistory) -> int:
+        """Apply bars newer than each row's last_day, oldest first.
+
+        Codes not in the state are ignored (extend() them from history).
+
+        Returns:
+            Number of bars applied
+        """
+        if not len(new_bars):
+            return 0
+
+        lengths = np.diff(new_bars.offsets)
+        rows = np.full(len(new_bars.codes), -1, dtype=np.int64)
+        for i, code in enumerate(new_bars.codes):
+            rows[i] = self._index.get(code, -1)
+        bar_rows = np.repeat(rows, lengths)
+        # Position of each bar within its code's run
+        rank = np.arange(len(bar_rows)) - np.repeat(new_bars.offsets[:-1], lengths)
+
+        days = new_bars.dates.astype("datetime64[D]").astype(np.int64)
+        valid = bar_rows >= 0
+        valid[valid] &= days[valid] > self.last_day[bar_rows[valid]]
+
+        applied = 0
+        for step in range(int(rank.max()) + 1 if len(rank) else 0):
+            sel = valid & (rank == step)
+            if not sel.any():
+                continue
+            self._push(
+                bar_rows[sel],
+                days[sel],
+                {name: new_bars.fields[name][sel] for name in WINDOW_FIELDS},
+            )
+            applied += int(sel.sum())
+        return applied
+
+    def _push(self, rows: np.ndarray, days: np.ndarray, bar: Dict[str, np.ndarray]) -> None:
+        """Append one bar to each of `rows` (rows must be unique)."""
+        high, low, close, volume = bar["high"], bar["low"], bar["close"], bar["volume"]
+        last_close = self.close[rows, -1]
+
+        new_values = {
+            "close": close,
+            "volume": volume,
+            "tr": _true_range(high, low, last_close),
+        }
+        for key in _sum_keys():
+            name, period = key.rsplit("_", 1)
+            period = int(period)
+            if name == "tr":
+                # True range leaving the window, from the bar before it
+                prev = self.close[rows, -period - 1]
+                leaving = _true_range(self.high[rows, -period], self.low[rows, -period], prev)
+            else:
+                leaving = np.nan_to_num(getattr(self, name)[rows, -period])
+            self.prev_sums[key][rows] = self.sums[key][rows]
+            self.sums[key][rows] = self.sums[key][rows] + new_values[name] - leaving
+
+        self.prev_obv[rows] = self.obv[rows]
+        step = np.sign(close - last_close) * volume
+        self.obv[rows] = np.where(np.isnan(last_close), volume, self.obv[rows] + np.nan_to_num(step))
+
+        for name in WINDOW_FIELDS:
+            arr = getattr(self, name)
+            arr[rows, :-1] = arr[rows, 1:]
+            arr[rows, -1] = bar[name]
+
+        self.last_day[rows] = days
+        self.bars[rows] += 1
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def rows_for(self, codes: List[str]) -> np.ndarray:
+        """Row indices of the given codes that are in the state, in order."""
+        return np.array([self._index[c] for c in codes if c in self._index], dtype=np.int64)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Bars a full scan would load per row (bars capped at window)."""
+        return np.minimum(self.bars, self.window)
+
+    @property
+    def as_of(self) -> Optional[date]:
+        """Latest bar date across all rows."""
+        if not len(self.codes) or self.last_day.max() < 0:
+            return None
+        return EPOCH + timedelta(days=int(self.last_day.max()))
+
+    def ma(self, period: int, prev: bool = False) -> np.ndarray:
+        """Close MA as of the latest (or previous) bar; NaN if too few bars."""
+        sums = self.prev_sums if prev else self.sums
+        available = self.lengths - (1 if prev else 0)
+        return np.where(available >= period, sums[f"close_{period}"] / period, np.nan)
+
+    def volume_mean(self, period: int, prev: bool = False) -> np.ndarray:
+        """Volume average as of the latest (or previous) bar."""
+        sums = self.prev_sums if prev else self.sums
+        available = self.lengths - (1 if prev else 0)
+        return np.where(available >= period, sums[f"volume_{period}"] / period, np.nan)
+
+    def atr(self) -> np.ndarray:
+        """Mean true range of the last ATR_PERIOD bars (as calculate_atr)."""
+        count = np.clip(self.lengths - 1, 0, ATR_PERIOD)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count > 0, self.sums[f"tr_{ATR_PERIOD}"] / count, 0.0)
+
+    def prior_max(self, name: str, period: int) -> np.ndarray:
+        """Max of a windowed field over the `period` bars before the latest one."""
+        if period >= self.window:
+            raise ValueError(f"Lookback {period} does not fit the {self.window}-bar window")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmax(getattr(self, name)[:, -period - 1:-1], axis=1)
+
+    def compare(self, other: "RollingState", rtol: float = 1e-9) -> List[str]:
+        """Codes whose state differs from `other` (e.g. a fresh rebuild).
+
+        Windows must match exactly; running sums within rtol. OBV is
+        cumulative since the state was seeded, so only its latest step
+        is compared.
+        """
+        common = [c for c in other.codes if c in self._index]
+        mine = self.rows_for(common)
+        theirs = other.rows_for(common)
+
+        bad = self.last_day[mine] != other.last_day[theirs]
+        bad |= self.lengths[mine] != other.lengths[theirs]
+        for name in WINDOW_FIELDS:
+            a, b = getattr(self, name)[mine], getattr(other, name)[theirs]
+            bad |= ~((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+        for key in _sum_keys():
+            for ours, ref in ((self.sums, other.sums), (self.prev_sums, other.prev_sums)):
+                bad |= ~np.isclose(ours[key][mine], ref[key][theirs], rtol=rtol, atol=1e-6)
+        step_a = self.obv[mine] - self.prev_obv[mine]
+        step_b = other.obv[theirs] - other.prev_obv[theirs]
+        bad |= ~np.isclose(step_a, step_b, rtol=rtol)
+
+        return [c for c, flag in zip(common, bad) if flag]
+
+
+# ── Persistence ─────────────────────────────────────────────────────────────
+
+async def fetch_new_bars(pool, state: RollingState, codes: List[str]) -> ColumnarHistory:
+    """Bars newer than the state's last date for each of codes."""
+    rows = state.rows_for(codes)
+    if not len(rows):
+        return ColumnarHistory.empty()
+    state_codes = [state.codes[i] for i in rows]
+    last_dates = [EPOCH + timedelta(days=int(d)) for d in state.last_day[rows]]
+    records = await pool.fetch(NEW_BARS_SQL, state_codes, last_dates)
+    return ColumnarHistory.from_records(records)
+
+
+async def load_rolling_state(pool, name: str = "default") -> Optional[RollingState]:
+    """Load the persisted state, or None if missing or unreadable."""
+    try:
+        await pool.execute(STATE_TABLE_SQL)
+        row = await pool.fetchrow(
+            "SELECT payload FROM scanner_rolling_state WHERE name = $1", name
+        )
+        if not row:
+            return None
+        return RollingState.from_bytes(bytes(row["payload"]))
+    except Exception as e:
+        logger.warn(f"Failed to load rolling state: {e}")
+        return None
+
+
+async def save_rolling_state(pool, state: RollingState, name: str = "default") -> None:
+    """Persist the state (one row per state name)."""
+    try:
+        await pool.execute(STATE_TABLE_SQL)
+        await pool.execute("""
+            INSERT INTO scanner_rolling_state (name, as_of, payload, updated_at)
+            VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET
+                as_of = EXCLUDED.as_of,
+                payload = EXCLUDED.payload,
+                updated_at = CURRENT_TIMESTAMP
+        """, name, state.as_of, state.to_bytes())
+    except Exception as e:
+        logger.warn(f"Failed to save rolling state: {e}")
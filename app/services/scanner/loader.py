@@ -0,0 +1,296 @@
+"""
+Columnar History Loader - Scanner history straight into NumPy arrays.
+
+The scanner used to turn every asyncpg record into a dict with per-field
+float() calls, build one DataFrame per stock from those dicts and sort it
+again. For 5000 stocks × 300 bars that is ~1.5M dicts per scan.
+
+ColumnarHistory instead keeps one contiguous array per column for the whole
+universe plus per-code offsets. The SQL returns rows ordered by (code, date)
+with prices already cast to float8, so decoding is one C-level pass per
+column and per-stock DataFrames are zero-copy views over the arrays.
+
+Usage:
+    history = await load_history_columnar(db.pool, codes, limit=300)
+    hist = history.frame("600519")        # DataFrame view, oldest bar first
+    stocks_data = history.frames(min_rows=21)
+"""
+
+import asyncio
+import resource
+import sys
+import time
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.logger import Logger
+
+logger = Logger("HistoryLoader")
+
+# Scan loads are rounded up to whole buckets so signal sets share datasets
+HISTORY_BUCKET_BARS = 300
+
+# Latest `limit` bars per code, oldest first. Prices come back as float8
+# and dates as days since 1970-01-01 so both decode straight into arrays.
+# Each code is one backward (code, date) index scan stopped by LIMIT, rather
+# than numbering every stored bar with ROW_NUMBER().
+HISTORY_SQL = """
+    SELECT c.code, (t.date - DATE '1970-01-01')::int4,
+           t.open::float8, t.high::float8, t.low::float8, t.close::float8,
+           t.volume::float8, COALESCE(t.turnover_rate, 0)::float8
+    FROM unnest($1::text[]) AS c(code)
+    CROSS JOIN LATERAL (
+        SELECT date, open, high, low, close, volume, turnover_rate
+        FROM stock_history
+        WHERE code = c.code
+        ORDER BY date DESC
+        LIMIT $2
+    ) t
+    ORDER BY c.code, t.date
+"""
+
+# Array field -> DataFrame column, in SQL order after (code, date)
+FIELD_COLUMNS = (
+    ("open", "开盘"),
+    ("high", "最高"),
+    ("low", "最低"),
+    ("close", "收盘"),
+    ("volume", "成交量"),
+    ("turnover", "换手率"),
+)
+
+
+class ColumnarHistory:
+    """Daily bars for many stocks in contiguous per-column arrays.
+
+    Rows of code i live in [offsets[i], offsets[i + 1]) and are sorted by
+    date ascending.
+
+    Attributes:
+        codes: Stock codes in storage order
+        offsets: int64 array of len(codes) + 1 row offsets
+        dates: datetime64[s] array (midnight of each trading day)
+        fields: Field name -> float64 array (open, high, low, close, volume, turnover)
+    """
+
+    def __init__(
+        self,
+        codes: List[str],
+        offsets: np.ndarray,
+        dates: np.ndarray,
+        fields: Dict[str, np.ndarray],
+    ):
+        self.codes = codes
+        self.offsets = offsets
+        self.dates = dates
+        self.fields = fields
+        self._index = {code: i for i, code in enumerate(codes)}
+
+    @classmethod
+    def empty(cls) -> "ColumnarHistory":
+        return cls(
+            [],
+            np.zeros(1, dtype=np.int64),
+            np.empty(0, dtype="datetime64[s]"),
+            {name: np.empty(0, dtype=np.float64) for name, _ in FIELD_COLUMNS},
+        )
+
+    @classmethod
+    def from_records(cls, rows: Sequence[Sequence]) -> "ColumnarHistory":
+        """Decode records of (code, epoch_day, open, high, low, close, volume, turnover).
+
+        Rows must already be grouped by code and sorted by date.
+        """
+        if not rows:
+            return cls.empty()
+
+        n = len(rows)
+        # Group boundaries: one entry per run of equal codes
+        codes = []
+        offsets = np.zeros(1, dtype=np.int64)
+        counts = []
+        for code, group in groupby(map(itemgetter(0), rows)):
+            codes.append(code)
+            counts.append(sum(1 for _ in group))
+        offsets = np.concatenate((offsets, np.cumsum(counts, dtype=np.int64)))
+
+        # One pass per column with C-level iteration, no per-row objects
+        days = np.fromiter(map(itemgetter(1), rows), dtype=np.int64, count=n)
+        dates = (days * 86400).view("datetime64[s]")
+        fields = {
+            name: np.fromiter(map(itemgetter(j), rows), dtype=np.float64, count=n)
+            for j, (name, _) in enumerate(FIELD_COLUMNS, start=2)
+        }
+
+        return cls(codes, offsets, dates, fields)
+
+    @classmethod
+    def from_arrays(cls, rows: Sequence[Sequence]) -> "ColumnarHistory":
+        """Decode one row per code of (code, epoch_days[], open[], high[], low[],
+        close[], volume[], turnover[]), each array sorted by date.
+        """
+        if not rows:
+            return cls.empty()
+
+        codes = [row[0] for row in rows]
+        counts = [len(row[1]) for row in rows]
+        offsets = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(counts, dtype=np.int64)))
+        days = np.fromiter(chain.from_iterable(row[1] for row in rows), dtype=np.int64, count=int(offsets[-1]))
+        fields = {
+            name: np.fromiter(
+                (np.nan if v is None else v for v in chain.from_iterable(row[j] for row in rows)),
+                dtype=np.float64,
+                count=int(offsets[-1]),
+            )
+            for j, (name, _) in enumerate(FIELD_COLUMNS, start=2)
+        }
+        return cls(codes, offsets, (days * 86400).view("datetime64[s]"), fields)
+
+    @classmethod
+    def concat(cls, parts: Sequence["ColumnarHistory"]) -> "ColumnarHistory":
+        """Concatenate batches loaded for disjoint code sets."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+
+        codes: List[str] = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for part in parts:
+            codes.extend(part.codes)
+            offsets.append(part.offsets[1:] + base)
+            base += part.offsets[-1]
+
+        return cls(
+            codes,
+            np.concatenate(offsets),
+            np.concatenate([p.dates for p in parts]),
+            {
+                name: np.concatenate([p.fields[name] for p in parts])
+                for name, _ in FIELD_COLUMNS
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the column arrays."""
+        return sum(a.nbytes for a in self.fields.values()) + self.dates.nbytes
+
+    def bars(self, code: str) -> int:
+        """Number of bars stored for code."""
+        i = self._index[code]
+        return int(self.offsets[i + 1] - self.offsets[i])
+
+    def frame(self, code: str) -> pd.DataFrame:
+        """Per-stock DataFrame whose columns are views over the shared arrays."""
+        i = self._index[code]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        data = {"日期": self.dates[start:end]}
+        for name, column in FIELD_COLUMNS:
+            data[column] = self.fields[name][start:end]
+        return pd.DataFrame(data, copy=False)
+
+    def frames(self, min_rows: int = 0) -> Dict[str, pd.DataFrame]:
+        """code -> DataFrame for codes with at least min_rows bars."""
+        return {code: self.frame(code) for code in self.iter_codes(min_rows)}
+
+    def iter_codes(self, min_rows: int = 0) -> Iterator[str]:
+        lengths = np.diff(self.offsets)
+        for code, n in zip(self.codes, lengths):
+            if n >= min_rows:
+                yield code
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def history_limit(signals: Sequence) -> int:
+    """Bars a scan loads per stock for these signals: max min_bars + 20, bucketed."""
+    limit = max((s.min_bars for s in signals), default=150)
+    limit = max(limit, 150) + 20
+    return -(-limit // HISTORY_BUCKET_BARS) * HISTORY_BUCKET_BARS
+
+
+async def load_history_columnar(
+    pool,
+    codes: List[str],
+    limit: int,
+    batch_size: int = 300,
+    progress_callback: Optional[Callable] = None,
+    hot: bool = False,
+) -> Tuple[ColumnarHistory, Dict[str, float]]:
+    """Load the latest `limit` bars for codes into a ColumnarHistory.
+
+    Args:
+        pool: asyncpg pool
+        codes: Stock codes to load
+        limit: Bars per code
+        batch_size: Codes per query
+        progress_callback: Async callback(batch_num, total_batches, phase="loading")
+        hot: Read stock_history_hot when it is current and deep enough
+            (see history_hot), falling back to stock_history
+
+    Returns:
+        (history, stats) where stats has load_seconds, rows, column_mb,
+        peak_rss_mb and source ("hot" or "history")
+    """
+    started = time.perf_counter()
+
+    if hot:
+        from app.services.history_hot import load_hot_window
+
+        history = await load_hot_window(pool, codes, limit)
+        if history is not None:
+            return history, _load_stats(history, started, "hot")
+
+    parts = []
+    total_codes = len(codes)
+    total_batches = (total_codes + batch_size - 1) // batch_size
+
+    for batch_start in range(0, total_codes, batch_size):
+        batch_codes = codes[batch_start:batch_start + batch_size]
+        batch_num = batch_start // batch_size + 1
+
+        logger.info(f"📥 Fetching batch {batch_num}/{total_batches}: {len(batch_codes)} codes...")
+        if progress_callback:
+            try:
+                await progress_callback(batch_num, total_batches, phase="loading")
+            except Exception:
+                pass
+
+        rows = await pool.fetch(HISTORY_SQL, batch_codes, limit)
+        if rows:
+            parts.append(ColumnarHistory.from_records(rows))
+        del rows
+
+        # Yield to event loop between batches
+        await asyncio.sleep(0)
+
+    history = ColumnarHistory.concat(parts)
+    return history, _load_stats(history, started, "history")
+
+
+def _load_stats(history: ColumnarHistory, started: float, source: str) -> Dict:
+    return {
+        "load_seconds": time.perf_counter() - started,
+        "rows": int(history.offsets[-1]),
+        "column_mb": history.nbytes / (1024 * 1024),
+        "peak_rss_mb": peak_rss_mb(),
+        "source": source,
+    }
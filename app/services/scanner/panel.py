@@ -0,0 +1,165 @@
+"""
+Price Panel - Cross-sectional (stocks × bars) view of the scan universe.
+
+The per-stock runner calls every signal once per stock, so a full scan is
+~5000 × 25 Python-level detect() calls. PricePanel packs the whole universe
+into aligned 2-D float arrays so signals can implement `detect_panel` and
+evaluate all stocks with a handful of NumPy operations.
+
+Layout:
+    Rows are stocks, columns are bars. Rows are right-aligned on each stock's
+    latest bar (column -1 is "today" for every stock, -2 is its previous bar)
+    and left-padded with NaN, which mirrors how per-stock signals index
+    `hist.iloc[-n]`. `lengths[i]` is the number of real bars in row i.
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .utils import get_limit_up_threshold
+
+# DataFrame column -> panel field
+PANEL_FIELDS = {
+    "开盘": "open",
+    "最高": "high",
+    "最低": "low",
+    "收盘": "close",
+    "成交量": "volume",
+    "换手率": "turnover",
+}
+
+
+class PricePanel:
+    """Aligned 2-D OHLCV arrays for a set of stocks.
+
+    Attributes:
+        codes: Stock codes, one per row
+        names: Display names, one per row
+        lengths: Number of real (non-padding) bars per row
+        open/high/low/close/volume/turnover: float64 arrays of shape (rows, width)
+    """
+
+    def __init__(
+        self,
+        codes: List[str],
+        names: List[str],
+        lengths: np.ndarray,
+        fields: Dict[str, np.ndarray],
+    ):
+        self.codes = codes
+        self.names = names
+        self.lengths = lengths
+        self.open = fields["open"]
+        self.high = fields["high"]
+        self.low = fields["low"]
+        self.close = fields["close"]
+        self.volume = fields["volume"]
+        self.turnover = fields["turnover"]
+        self._cache: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def from_frames(
+        cls,
+        stocks_data: Dict[str, pd.DataFrame],
+        stock_names: Dict[str, str],
+        max_bars: Optional[int] = None,
+    ) -> "PricePanel":
+        """Build a panel from the runner's `code -> DataFrame` dict.
+
+        Args:
+            stocks_data: Dict mapping code -> DataFrame with OHLCV data
+            stock_names: Dict mapping code -> display name
+            max_bars: Keep only the latest N bars per stock (None = all)
+        """
+        codes = list(stocks_data.keys())
+        lengths = np.array([len(stocks_data[c]) for c in codes], dtype=np.int64)
+        if max_bars is not None:
+            lengths = np.minimum(lengths, max_bars)
+        width = int(lengths.max()) if len(codes) else 0
+
+        fields = {
+            name: np.full((len(codes), width), np.nan, dtype=np.float64)
+            for name in PANEL_FIELDS.values()
+        }
+        for row, code in enumerate(codes):
+            hist = stocks_data[code]
+            n = int(lengths[row])
+            if n == 0:
+                continue
+            for column, name in PANEL_FIELDS.items():
+                if column in hist.columns:
+                    fields[name][row, width - n:] = hist[column].values[-n:]
+
+        names = [stock_names.get(c, c) for c in codes]
+        return cls(codes, names, lengths, fields)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def width(self) -> int:
+        """Number of bar columns."""
+        return self.close.shape[1]
+
+    def stock_info(self, row: int) -> Dict[str, Any]:
+        """Stock info dict for a row, as passed to SignalDetector.detect."""
+        return {"code": self.codes[row], "name": self.names[row]}
+
+    def _memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return cached value for key, computing it on first access."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = compute()
+            self._cache[key] = value
+            return value
+
+    def field(self, name: str) -> np.ndarray:
+        """Field array by name (open, high, low, close, volume, turnover)."""
+        return getattr(self, name)
+
+    def rolling_mean(self, name: str, window: int) -> np.ndarray:
+        """Rolling mean along bars, NaN until `window` real bars.
+
+        Uses pandas rolling so values are bit-identical to the per-stock
+        `hist[col].rolling(window).mean()` signals use.
+        """
+        def compute():
+            frame = pd.DataFrame(self.field(name).T)
+            return frame.rolling(window).mean().to_numpy().T
+
+        return self._memo(("rolling_mean", name, window), compute)
+
+    def limit_up_thresholds(self) -> np.ndarray:
+        """Board-aware limit-up threshold per row (decimal)."""
+        return self._memo(
+            ("limit_up",),
+            lambda: np.array(
+                [get_limit_up_threshold(c, n) for c, n in zip(self.codes, self.names)],
+                dtype=np.float64,
+            ),
+        )
+
+    def daily_returns(self) -> np.ndarray:
+        """Close-to-close return per bar, 0.0 where previous close <= 0.
+
+        Column 0 (no previous bar) is NaN.
+        """
+        def compute():
+            close = self.close
+            prev = np.full_like(close, np.nan)
+            prev[:, 1:] = close[:, :-1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ret = (close - prev) / prev
+            return np.where(prev <= 0, 0.0, ret)
+
+        return self._memo(("daily_returns",), compute)
+
+    def limit_up_mask(self) -> np.ndarray:
+        """True where the bar closed limit-up vs its previous close."""
+        return self._memo(
+            ("limit_up_mask",),
+            lambda: self.daily_returns() > self.limit_up_thresholds()[:, None],
+        )
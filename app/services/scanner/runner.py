@@ -3,21 +3,46 @@ Signal Scanner Runner - Executes signal detection across stocks.
 
 Provides the main scanning function that:
 - Loads data from database
-- Runs all registered signals
+- Runs all registered signals (sharing one IndicatorContext per stock)
 - Aggregates results
 - Supports progress callbacks
+
+run_panel_scan is the vectorized alternative: it evaluates signals that
+implement detect_panel over a PricePanel and falls back to per-stock
+detect() for the rest, returning the same result shape as run_scan.
+
+run_rolling_scan evaluates signals that implement detect_rolling against
+an incremental RollingState and reports which signals still need history.
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional, Callable
+from collections import Counter
+from typing import Dict, List, Any, Optional, Callable, Tuple, TYPE_CHECKING
+import numpy as np
 import pandas as pd
 
 from app.core.logger import Logger
 from .registry import SignalRegistry
 from .base import SignalDetector
+from .context import IndicatorContext
+from .panel import PricePanel
+
+if TYPE_CHECKING:
+    from .incremental import RollingState
 
 logger = Logger("ScannerRunner")
 
+# Stocks with fewer bars are skipped entirely
+MIN_SCAN_BARS = 21
+
+
+def _select_signals(enabled_signals: Optional[List[str]]) -> List[SignalDetector]:
+    """Enabled signals, optionally restricted to the given IDs."""
+    all_signals = SignalRegistry.get_all(enabled_only=True)
+    if enabled_signals:
+        return [s for s in all_signals if s.signal_id in enabled_signals]
+    return all_signals
+
 
 async def run_scan(
     stocks_data: Dict[str, pd.DataFrame],
@@ -38,13 +63,7 @@ async def run_scan(
     Returns:
         Dict mapping signal_id -> list of matching stock dicts
     """
-    # Get signals to run
-    all_signals = SignalRegistry.get_all(enabled_only=True)
-    
-    if enabled_signals:
-        signals = [s for s in all_signals if s.signal_id in enabled_signals]
-    else:
-        signals = all_signals
+    signals = _select_signals(enabled_signals)
     
     if not signals:
         logger.warn("No signals registered or enabled")
@@ -65,12 +84,15 @@ async def run_scan(
         stock_info = {"code": code, "name": name}
         
         # Skip if insufficient data
-        if len(hist) < 21:
+        if len(hist) < MIN_SCAN_BARS:
             skipped += 1
             continue
         
         signal_count = 0
         
+        # Indicators shared by all signals for this stock
+        ctx = IndicatorContext(hist)
+        
         # Run each signal
         for signal in signals:
             # Skip if not enough data for this signal
@@ -78,7 +100,10 @@ async def run_scan(
                 continue
             
             try:
-                result = signal.detect(hist, stock_info)
+                if signal.uses_context:
+                    result = signal.detect(hist, stock_info, ctx=ctx)
+                else:
+                    result = signal.detect(hist, stock_info)
                 
                 if result.triggered:
                     entry = {**stock_info}
@@ -130,6 +155,217 @@ async def run_scan(
     return results
 
 
+async def run_panel_scan(
+    stocks_data: Dict[str, pd.DataFrame],
+    stock_names: Dict[str, str],
+    progress_callback: Optional[Callable] = None,
+    enabled_signals: Optional[List[str]] = None,
+    batch_yield_interval: int = 10,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Execute signal detection with the vectorized panel engine.
+    
+    Signals implementing detect_panel are evaluated across all stocks at
+    once; the others run per stock (sharing one IndicatorContext per stock)
+    exactly as in run_scan. Results match run_scan, including ordering.
+    
+    Args:
+        stocks_data: Dict mapping code -> DataFrame with OHLCV data
+        stock_names: Dict mapping code -> display name
+        progress_callback: Async callback(checked, total) for progress updates
+        enabled_signals: List of signal IDs to run (None = all enabled)
+        batch_yield_interval: Yield to event loop every N fallback stocks
+        
+    Returns:
+        Dict mapping signal_id -> list of matching stock dicts
+    """
+    signals = _select_signals(enabled_signals)
+    
+    if not signals:
+        logger.warn("No signals registered or enabled")
+        return {}
+    
+    # Only rows the per-stock runner would scan
+    codes = [c for c, hist in stocks_data.items() if len(hist) >= MIN_SCAN_BARS]
+    total = len(stocks_data)
+    skipped = total - len(codes)
+    panel = PricePanel.from_frames({c: stocks_data[c] for c in codes}, stock_names)
+    
+    logger.info(f"Running panel scan with {len(signals)} signals on {total} stocks")
+    
+    triggered: Dict[str, np.ndarray] = {}
+    metadata: Dict[str, Dict[str, np.ndarray]] = {}
+    fallback: List[SignalDetector] = []
+    
+    for signal in signals:
+        try:
+            result = signal.detect_panel(panel) if len(panel) else None
+        except Exception as e:
+            logger.debug(f"Signal {signal.signal_id} panel error, falling back: {e}")
+            result = None
+        
+        if result is None:
+            fallback.append(signal)
+            continue
+        
+        eligible = panel.lengths >= signal.min_bars
+        triggered[signal.signal_id] = np.asarray(result.triggered, dtype=bool) & eligible
+        metadata[signal.signal_id] = result.metadata or {}
+    
+    # Per-stock fallback for signals without a vectorized version
+    fallback_hits: Dict[str, Dict[int, Dict[str, Any]]] = {s.signal_id: {} for s in fallback}
+    if fallback:
+        for row, code in enumerate(panel.codes):
+            hist = stocks_data[code]
+            stock_info = panel.stock_info(row)
+            ctx = IndicatorContext(hist)
+            
+            for signal in fallback:
+                if len(hist) < signal.min_bars:
+                    continue
+                try:
+                    if signal.uses_context:
+                        result = signal.detect(hist, stock_info, ctx=ctx)
+                    else:
+                        result = signal.detect(hist, stock_info)
+                    if result.triggered:
+                        fallback_hits[signal.signal_id][row] = result.metadata or {}
+                except Exception as e:
+                    logger.debug(f"Signal {signal.signal_id} error on {code}: {e}")
+            
+            if progress_callback and (row + 1) % 50 == 0:
+                try:
+                    await progress_callback(row + 1, total)
+                except Exception:
+                    pass
+            
+            if (row + 1) % batch_yield_interval == 0:
+                await asyncio.sleep(0)
+    
+    # Assemble results in stock order, as run_scan does
+    results: Dict[str, List[Dict[str, Any]]] = {s.signal_id: [] for s in signals}
+    results["multi_signal"] = []
+    signal_counts = np.zeros(len(panel), dtype=np.int64)
+    
+    for signal in signals:
+        sig_id = signal.signal_id
+        if sig_id in triggered:
+            mask = triggered[sig_id]
+            columns = metadata[sig_id]
+            for row in np.flatnonzero(mask):
+                entry = panel.stock_info(row)
+                for key, values in columns.items():
+                    value = values[row]
+                    entry[key] = value.item() if isinstance(value, np.generic) else value
+                results[sig_id].append(entry)
+            if signal.count_in_multi:
+                signal_counts += mask
+        else:
+            hits = fallback_hits[sig_id]
+            for row in sorted(hits):
+                entry = panel.stock_info(row)
+                entry.update(hits[row])
+                results[sig_id].append(entry)
+                if signal.count_in_multi:
+                    signal_counts[row] += 1
+    
+    for row in np.flatnonzero(signal_counts >= 3):
+        results["multi_signal"].append({
+            **panel.stock_info(row),
+            "signal_count": int(signal_counts[row]),
+        })
+    
+    total_signals = sum(len(v) for v in results.values())
+    vectorized = len(signals) - len(fallback)
+    logger.info(
+        f"Panel scan complete: {len(panel)} stocks, {skipped} skipped, {total_signals} signals "
+        f"({vectorized} vectorized, {len(fallback)} per-stock)"
+    )
+    
+    if progress_callback:
+        try:
+            await progress_callback(total, total)
+        except Exception:
+            pass
+    
+    return results
+
+
+def run_rolling_scan(
+    state: "RollingState",
+    stock_names: Dict[str, str],
+    codes: Optional[List[str]] = None,
+    enabled_signals: Optional[List[str]] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """Evaluate signals from incremental rolling state.
+    
+    Args:
+        state: RollingState advanced to the latest bar
+        stock_names: Dict mapping code -> display name
+        codes: Universe to report, in result order (None = state.codes)
+        enabled_signals: List of signal IDs to run (None = all enabled)
+        
+    Returns:
+        (results, remaining): results maps signal_id -> matching stock
+        dicts for signals with detect_rolling (no multi_signal entry, see
+        build_multi_signal); remaining lists the IDs of signals that must
+        still run on full history.
+    """
+    signals = _select_signals(enabled_signals)
+    rows = state.rows_for(codes if codes is not None else state.codes)
+    lengths = state.lengths[rows]
+    scanned = lengths >= MIN_SCAN_BARS
+    
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    remaining: List[str] = []
+    
+    for signal in signals:
+        try:
+            result = signal.detect_rolling(state)
+        except Exception as e:
+            logger.debug(f"Signal {signal.signal_id} rolling error, needs history: {e}")
+            result = None
+        
+        if result is None:
+            remaining.append(signal.signal_id)
+            continue
+        
+        mask = np.asarray(result.triggered, dtype=bool)[rows] & scanned & (lengths >= signal.min_bars)
+        entries = []
+        for i in np.flatnonzero(mask):
+            row = rows[i]
+            code = state.codes[row]
+            entry = {"code": code, "name": stock_names.get(code, code)}
+            for key, values in (result.metadata or {}).items():
+                value = values[row]
+                entry[key] = value.item() if isinstance(value, np.generic) else value
+            entries.append(entry)
+        results[signal.signal_id] = entries
+    
+    logger.info(
+        f"Rolling scan: {len(rows)} stocks, {len(results)} signals from state, "
+        f"{len(remaining)} need history"
+    )
+    return results, remaining
+
+
+def build_multi_signal(
+    results: Dict[str, List[Dict[str, Any]]],
+    stock_names: Dict[str, str],
+    codes: List[str],
+) -> List[Dict[str, Any]]:
+    """multi_signal entries (3+ counted signals) for merged results, in codes order."""
+    counted = {s.signal_id for s in SignalRegistry.get_all(enabled_only=False) if s.count_in_multi}
+    counts = Counter(
+        entry["code"]
+        for sig_id, entries in results.items() if sig_id in counted
+        for entry in entries
+    )
+    return [
+        {"code": code, "name": stock_names.get(code, code), "signal_count": counts[code]}
+        for code in codes if counts[code] >= 3
+    ]
+
+
 async def run_single_signal(
     signal_id: str,
     stocks_data: Dict[str, pd.DataFrame],
@@ -0,0 +1,232 @@
+"""
+Shared-Memory Scan - Multi-process scanning without pickling price data.
+
+Most signal code is Python-level loops (pivots, OBV, ATR), so the thread
+executor gains little under the GIL. In process mode a batch's bars are
+copied once into a multiprocessing.shared_memory block laid out like
+ColumnarHistory (per-code offsets + one array per column). Worker processes
+attach to the block by name, build read-only zero-copy DataFrame views for
+their slice of codes and run the normal engine on it. Only codes, names and
+result dicts cross the process boundary.
+
+Memory stays bounded: the block is 8 bytes × 8 columns per bar (~5.5 MB for
+300 stocks × 300 bars) and is unlinked as soon as its batch finishes, so the
+streaming mode above STREAMING_SCAN_THRESHOLD keeps its per-batch ceiling.
+Each worker adds one interpreter with pandas loaded.
+
+Block layout (all items 8 bytes):
+    offsets int64[n_codes + 1] | dates int64[n_rows] | open | high | low | close | volume | turnover
+
+Usage:
+    executor = ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn"))
+    results = await run_scan_in_processes(executor, stocks_data, stock_names, workers=2)
+"""
+
+import asyncio
+import concurrent.futures
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.logger import Logger
+from .loader import FIELD_COLUMNS, ColumnarHistory
+
+logger = Logger("SharedScan")
+
+_ITEM = 8
+
+
+class SharedHistorySpec(NamedTuple):
+    """Picklable handle workers use to attach to a block."""
+    name: str
+    n_codes: int
+    n_rows: int
+
+
+class SharedHistory:
+    """Daily bars for a batch of stocks in one shared-memory block.
+
+    Attributes:
+        offsets: int64 array of n_codes + 1 row offsets
+        dates: datetime64[s] array
+        fields: Field name -> float64 array (open, high, low, close, volume, turnover)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, n_codes: int, n_rows: int, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self.n_codes = n_codes
+        self.n_rows = n_rows
+
+        buf = shm.buf
+        self.offsets = np.ndarray((n_codes + 1,), dtype=np.int64, buffer=buf)
+        pos = (n_codes + 1) * _ITEM
+        self.dates = np.ndarray((n_rows,), dtype="datetime64[s]", buffer=buf, offset=pos)
+        pos += n_rows * _ITEM
+        self.fields: Dict[str, np.ndarray] = {}
+        for name, _ in FIELD_COLUMNS:
+            self.fields[name] = np.ndarray((n_rows,), dtype=np.float64, buffer=buf, offset=pos)
+            pos += n_rows * _ITEM
+
+    @staticmethod
+    def block_size(n_codes: int, n_rows: int) -> int:
+        """Bytes needed for n_codes stocks with n_rows bars in total."""
+        return ((n_codes + 1) + n_rows * (1 + len(FIELD_COLUMNS))) * _ITEM
+
+    @classmethod
+    def create(cls, stocks_data: Dict[str, pd.DataFrame]) -> "SharedHistory":
+        """Copy the runner's `code -> DataFrame` dict into a new block.
+
+        Columns missing from a frame are stored as NaN.
+        """
+        codes = list(stocks_data.keys())
+        lengths = np.array([len(stocks_data[c]) for c in codes], dtype=np.int64)
+        n_rows = int(lengths.sum())
+
+        shm = shared_memory.SharedMemory(create=True, size=max(cls.block_size(len(codes), n_rows), _ITEM))
+        shared = cls(shm, len(codes), n_rows, owner=True)
+        try:
+            shared.offsets[0] = 0
+            np.cumsum(lengths, out=shared.offsets[1:])
+            for i, code in enumerate(codes):
+                hist = stocks_data[code]
+                start, end = shared.offsets[i], shared.offsets[i + 1]
+                if start == end:
+                    continue
+                shared.dates[start:end] = pd.to_datetime(hist["日期"]).values.astype("datetime64[s]")
+                for name, column in FIELD_COLUMNS:
+                    values = hist[column].values if column in hist.columns else np.nan
+                    shared.fields[name][start:end] = values
+        except Exception:
+            shared.close()
+            raise
+        return shared
+
+    @classmethod
+    def attach(cls, spec: SharedHistorySpec) -> "SharedHistory":
+        """Attach to an existing block; its arrays are read-only."""
+        shm = shared_memory.SharedMemory(name=spec.name)
+        shared = cls(shm, spec.n_codes, spec.n_rows, owner=False)
+        for arr in (shared.offsets, shared.dates, *shared.fields.values()):
+            arr.flags.writeable = False
+        return shared
+
+    @property
+    def spec(self) -> SharedHistorySpec:
+        return SharedHistorySpec(self._shm.name, self.n_codes, self.n_rows)
+
+    def history(self, codes: List[str], start: int) -> ColumnarHistory:
+        """ColumnarHistory over the rows of codes[start:start + len(codes)]."""
+        offsets = self.offsets[start:start + len(codes) + 1]
+        return ColumnarHistory(codes, offsets, self.dates, self.fields)
+
+    def close(self) -> None:
+        """Release this process's mapping; the creator also unlinks the block."""
+        # Views must be dropped before the mapping can be closed
+        self.offsets = self.dates = None
+        self.fields = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is released with it
+            logger.debug(f"Shared block {self._shm.name} still referenced, deferring close")
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "SharedHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _scan_slice(
+    spec: SharedHistorySpec,
+    codes: List[str],
+    names: Dict[str, str],
+    start: int,
+    enabled_signals: Optional[List[str]],
+    engine: str,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Worker entry point: scan codes[start:] of a shared block."""
+    from . import run_scan, run_panel_scan
+
+    run = run_panel_scan if engine == "panel" else run_scan
+    shared = SharedHistory.attach(spec)
+    try:
+        stocks_data = shared.history(codes, start).frames()
+        results = asyncio.run(
+            run(stocks_data, names, progress_callback=None, enabled_signals=enabled_signals)
+        )
+        del stocks_data
+        return results
+    finally:
+        shared.close()
+
+
+def split_slices(n: int, parts: int) -> List[tuple]:
+    """Split range(n) into up to `parts` contiguous (start, stop) slices."""
+    parts = max(1, min(parts, n))
+    bounds = np.linspace(0, n, parts + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+async def run_scan_in_processes(
+    executor: concurrent.futures.Executor,
+    stocks_data: Dict[str, pd.DataFrame],
+    stock_names: Dict[str, str],
+    enabled_signals: Optional[List[str]] = None,
+    workers: int = 2,
+    engine: str = "runner",
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Scan stocks_data on a process pool through one shared-memory block.
+
+    Each worker scans a contiguous slice of codes; slice results are
+    concatenated in order so the output matches a single run_scan call.
+
+    Args:
+        executor: Process pool to run slices on
+        stocks_data: Dict mapping code -> DataFrame with OHLCV data
+        stock_names: Dict mapping code -> display name
+        enabled_signals: List of signal IDs to run (None = all enabled)
+        workers: Number of slices to split the batch into
+        engine: "runner" (per-stock) or "panel" (vectorized)
+
+    Returns:
+        Dict mapping signal_id -> list of matching stock dicts
+    """
+    if not stocks_data:
+        return {}
+
+    loop = asyncio.get_running_loop()
+    codes = list(stocks_data.keys())
+
+    with SharedHistory.create(stocks_data) as shared:
+        logger.debug(
+            f"Shared block {shared.spec.name}: {len(codes)} stocks, "
+            f"{SharedHistory.block_size(shared.n_codes, shared.n_rows) / 1024:.0f} KB"
+        )
+        futures = []
+        for start, stop in split_slices(len(codes), workers):
+            slice_codes = codes[start:stop]
+            slice_names = {c: stock_names.get(c, c) for c in slice_codes}
+            futures.append(loop.run_in_executor(
+                executor, _scan_slice, shared.spec, slice_codes, slice_names, start, enabled_signals, engine
+            ))
+        try:
+            parts = await asyncio.gather(*futures)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for part in parts:
+        for sig_id, items in part.items():
+            results.setdefault(sig_id, []).extend(items)
+    return results
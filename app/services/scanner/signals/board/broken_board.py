@@ -1,6 +1,6 @@
 """Broken Board Signals - Limit-up streak broken patterns."""
 
-from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.base import SignalDetector, SignalResult, PanelResult
 from app.services.scanner.registry import SignalRegistry
 from app.services.scanner.utils import is_limit_up
 
@@ -17,6 +17,14 @@ class BrokenBoardBase(SignalDetector):
             code=stock_info.get("code"),
             name=stock_info.get("name"),
         )
+    
+    def broken_panel(self, panel, offset: int) -> PanelResult:
+        """Two limit-ups then a non-limit-up bar, ending `offset` bars ago."""
+        limit_up = panel.limit_up_mask()
+        end = panel.width - 1 - offset
+        return PanelResult(
+            triggered=limit_up[:, end - 2] & limit_up[:, end - 1] & ~limit_up[:, end]
+        )
 
 
 @SignalRegistry.register
@@ -58,6 +66,9 @@ class BrokenLimitUpStreakSignal(BrokenBoardBase):
             
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        return self.broken_panel(panel, 0)
 
 
 @SignalRegistry.register
@@ -99,6 +110,9 @@ class YesterdayBrokenBoardSignal(BrokenBoardBase):
             
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        return self.broken_panel(panel, 1)
 
 
 @SignalRegistry.register
@@ -140,3 +154,6 @@ class DayBeforeYesterdayBrokenBoardSignal(BrokenBoardBase):
             
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        return self.broken_panel(panel, 2)
@@ -2,9 +2,9 @@ from typing import Dict, Any, Optional
 import numpy as np
 import pandas as pd
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import IndicatorContext, ensure_context
 from app.services.scanner.registry import SignalRegistry
 from app.services.scanner.utils import (
-    calculate_atr, 
     calculate_mfi, 
     calculate_cmf, 
     calculate_slope, 
@@ -33,8 +33,14 @@ class LowAccumulationLaunchSignal(SignalDetector):
     enabled = True
     min_bars = 252  # Requires 1 year history for position calculation
     priority = 50
+    uses_context = True
     
-    def detect(self, hist: pd.DataFrame, stock_info: Dict[str, Any]) -> SignalResult:
+    def detect(
+        self,
+        hist: pd.DataFrame,
+        stock_info: Dict[str, Any],
+        ctx: Optional[IndicatorContext] = None,
+    ) -> SignalResult:
         if len(hist) < self.min_bars:
             return SignalResult(triggered=False)
             
@@ -93,7 +99,7 @@ class LowAccumulationLaunchSignal(SignalDetector):
             is_vol_contract = vol20 <= vol60 * 0.85 # Relaxed slightly
             
         # B. Volatility Contraction
-        atr14 = calculate_atr(hist, 14)
+        atr14 = ensure_context(hist, ctx).atr(14)
         is_low_volatility = (atr14 / current_close) <= scale_pct(0.04, code, name) # Relaxed from 0.03
         
         # C. Narrow Box
@@ -1,8 +1,13 @@
 """Breakout Signal - Price breaks 20-day high."""
 
-from app.services.scanner.base import SignalDetector, SignalResult
+import numpy as np
+from app.services.scanner.base import SignalDetector, SignalResult, PanelResult
 from app.services.scanner.registry import SignalRegistry
 
+# Prior bars the close must exceed: the documented 20-day high. Older scans took the
+# max of every loaded bar, which moved with the scan's history depth.
+LOOKBACK = 20
+
 
 @SignalRegistry.register
 class BreakoutSignal(SignalDetector):
@@ -18,7 +23,14 @@ class BreakoutSignal(SignalDetector):
     def detect(self, hist, stock_info) -> SignalResult:
         try:
             close = hist['收盘'].iloc[-1]
-            high_20 = hist['最高'].iloc[:-1].max()
+            high_20 = hist['最高'].iloc[-LOOKBACK - 1:-1].max()
             return SignalResult(triggered=close > high_20)
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        high_20 = np.nanmax(panel.high[:, -LOOKBACK - 1:-1], axis=1)
+        return PanelResult(triggered=panel.close[:, -1] > high_20)
+    
+    def detect_rolling(self, state) -> PanelResult:
+        return PanelResult(triggered=state.close[:, -1] > state.prior_max("high", LOOKBACK))
@@ -1,7 +1,7 @@
 """Startup Candidate Signal - Early stage startup detection."""
 
 import numpy as np
-from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.base import SignalDetector, SignalResult, PanelResult
 from app.services.scanner.registry import SignalRegistry
 
 
@@ -83,3 +83,35 @@ class StartupCandidateSignal(SignalDetector):
             
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        """Vectorized detect(); same conditions evaluated for all rows."""
+        closes = panel.close
+        volumes = panel.volume
+        
+        ma20 = np.mean(closes[:, -20:], axis=1)
+        ma60 = np.mean(closes[:, -60:], axis=1)
+        trend_ok = ma20 > ma60
+        
+        vol_today = volumes[:, -1]
+        vol_ma20 = np.mean(volumes[:, -20:], axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_ratio = np.where(vol_ma20 > 0, vol_today / vol_ma20, 0)
+        volume_ok = (vol_ratio > 1.8) & (vol_ratio < 3.5)
+        
+        close_today = closes[:, -1]
+        breakout_ok = close_today > np.max(panel.high[:, -21:-1], axis=1)
+        
+        body = np.abs(close_today - panel.open[:, -1])
+        range_today = panel.high[:, -1] - panel.low[:, -1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weak_body = (range_today > 0) & (body / range_today < 0.6)
+        
+        # Missing turnover (NaN) passes, like a missing 换手率 column
+        turnover = panel.turnover[:, -1]
+        turnover_bad = (turnover < 3) | (turnover > 10)
+        
+        return PanelResult(
+            triggered=trend_ok & volume_ok & breakout_ok & ~weak_body & ~turnover_bad,
+            metadata={"vol_ratio": np.round(vol_ratio, 2)}
+        )
@@ -2,12 +2,13 @@
 
 from app.services.scanner.base import SignalDetector, SignalResult
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import resample_to_weekly, resample_to_monthly
+from app.services.scanner.context import ensure_context
 
 
 class ConsecutiveBullishBase(SignalDetector):
     """Base class for consecutive bullish patterns."""
     group = "pattern"
+    uses_context = True
     
     def check_consecutive_bullish(self, hist, n_bars: int, check_low_position: bool = False) -> bool:
         """Check for N consecutive bullish bars.
@@ -56,9 +57,9 @@ class LowWeekly2BullishSignal(ConsecutiveBullishBase):
     min_bars = 60  # Need enough daily data for weekly resampling and MA20
     priority = 60
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            weekly = resample_to_weekly(hist)
+            weekly = ensure_context(hist, ctx).weekly()
             if len(weekly) < 22:  # Need 20 for MA + 2 for pattern
                 return SignalResult(triggered=False)
             
@@ -78,9 +79,9 @@ class Weekly3BullishSignal(ConsecutiveBullishBase):
     min_bars = 60  # Need enough daily data for weekly resampling and MA20
     priority = 61
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            weekly = resample_to_weekly(hist)
+            weekly = ensure_context(hist, ctx).weekly()
             if len(weekly) < 23:  # Need 20 for MA + 3 for pattern
                 return SignalResult(triggered=False)
             
@@ -100,9 +101,9 @@ class Weekly4BullishSignal(ConsecutiveBullishBase):
     min_bars = 70  # Need enough daily data for weekly resampling and MA20
     priority = 62
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            weekly = resample_to_weekly(hist)
+            weekly = ensure_context(hist, ctx).weekly()
             if len(weekly) < 24:  # Need 20 for MA + 4 for pattern
                 return SignalResult(triggered=False)
             
@@ -126,9 +127,9 @@ class LowMonthly2BullishSignal(ConsecutiveBullishBase):
     min_bars = 500  # Need enough daily data for monthly resampling and MA20
     priority = 63
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            monthly = resample_to_monthly(hist)
+            monthly = ensure_context(hist, ctx).monthly()
             if len(monthly) < 22:  # Need 20 for MA + 2 for pattern
                 return SignalResult(triggered=False)
             
@@ -148,9 +149,9 @@ class Monthly3BullishSignal(ConsecutiveBullishBase):
     min_bars = 600  # Need enough daily data for monthly resampling and MA20
     priority = 64
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            monthly = resample_to_monthly(hist)
+            monthly = ensure_context(hist, ctx).monthly()
             if len(monthly) < 23:  # Need 20 for MA + 3 for pattern
                 return SignalResult(triggered=False)
             
@@ -170,9 +171,9 @@ class Monthly4BullishSignal(ConsecutiveBullishBase):
     min_bars = 700  # Need enough daily data for monthly resampling and MA20
     priority = 65
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            monthly = resample_to_monthly(hist)
+            monthly = ensure_context(hist, ctx).monthly()
             if len(monthly) < 24:  # Need 20 for MA + 4 for pattern
                 return SignalResult(triggered=False)
             
@@ -2,8 +2,8 @@
 
 import numpy as np
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import ensure_context
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import detect_pivot_highs, calculate_atr
 
 
 @SignalRegistry.register
@@ -24,20 +24,21 @@ class DowntrendReversalSignal(SignalDetector):
     group = "trend"
     min_bars = 30
     priority = 60
+    uses_context = True
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
             if len(hist) < 30:
                 return SignalResult(triggered=False)
             
+            ctx = ensure_context(hist, ctx)
             closes = hist['收盘'].values
-            highs = hist['最高'].values
             lows = hist['最低'].values
             volumes = hist['成交量'].values
             opens = hist['开盘'].values
             
             # 1. Detect pivot highs
-            pivot_highs = detect_pivot_highs(highs, 3, 3)
+            pivot_highs = ctx.pivot_highs(3, 3)
             
             if len(pivot_highs) < 2:
                 return SignalResult(triggered=False)
@@ -52,7 +53,7 @@ class DowntrendReversalSignal(SignalDetector):
                     return SignalResult(triggered=False)
             
             # 3. Calculate ATR and epsilon
-            atr = calculate_atr(hist, 14)
+            atr = ctx.atr(14)
             epsilon = atr * 0.7
             
             # 4. Calculate trend line value
@@ -3,8 +3,8 @@
 import pandas as pd
 
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import ensure_context
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import calculate_linreg_channel, calculate_atr
 
 
 class LinRegSupportBase(SignalDetector):
@@ -12,8 +12,9 @@ class LinRegSupportBase(SignalDetector):
     
     group = "trend"
     count_in_multi = True
+    uses_context = True
     
-    def check_support(self, hist, window: int) -> bool:
+    def check_support(self, hist, window: int, ctx=None) -> bool:
         """Check for support at lower rail of linreg channel.
         
         Conditions:
@@ -26,14 +27,14 @@ class LinRegSupportBase(SignalDetector):
             if len(hist) < window + 2:
                 return False
             
-            close_series = hist['收盘']
-            slope, mid, upper, lower = calculate_linreg_channel(close_series, window)
+            ctx = ensure_context(hist, ctx)
+            slope, mid, upper, lower = ctx.linreg_channel(window)
             
             # Trend must be rising
             if slope <= 0:
                 return False
             
-            atr = calculate_atr(hist, 14)
+            atr = ctx.atr(14)
             if atr <= 0:
                 return False
 
@@ -59,7 +60,7 @@ class LinRegSupportBase(SignalDetector):
 
             # Optional: ensure short-term trend is still rising
             if len(hist) >= 25:
-                ma20 = hist['收盘'].rolling(20).mean()
+                ma20 = ctx.ma(20)
                 ma20_curr = ma20.iloc[-1]
                 ma20_5ago = ma20.iloc[-6]
                 if not (pd.isna(ma20_curr) or pd.isna(ma20_5ago)) and ma20_curr <= ma20_5ago:
@@ -76,8 +77,9 @@ class LinRegBreakoutBase(SignalDetector):
     
     group = "trend"
     count_in_multi = True
+    uses_context = True
     
-    def check_breakout(self, hist, window: int) -> bool:
+    def check_breakout(self, hist, window: int, ctx=None) -> bool:
         """Check for breakout above upper rail.
         
         Conditions:
@@ -89,14 +91,14 @@ class LinRegBreakoutBase(SignalDetector):
             if len(hist) < window + 2:
                 return False
             
-            close_series = hist['收盘']
-            slope, mid, upper, lower = calculate_linreg_channel(close_series, window)
+            ctx = ensure_context(hist, ctx)
+            slope, mid, upper, lower = ctx.linreg_channel(window)
             
             # Trend must be rising
             if slope <= 0:
                 return False
             
-            atr = calculate_atr(hist, 14)
+            atr = ctx.atr(14)
             if atr <= 0:
                 return False
 
@@ -108,9 +110,8 @@ class LinRegBreakoutBase(SignalDetector):
                 return False
 
             # Ensure this is a fresh breakout (prev close not already above rail)
-            prev_series = close_series.iloc[:-1]
-            if len(prev_series) >= window:
-                _, _, upper_prev, _ = calculate_linreg_channel(prev_series, window)
+            if len(hist) - 1 >= window:
+                _, _, upper_prev, _ = ctx.linreg_channel(window, offset=1)
                 if close_prev > upper_prev + 0.1 * atr:
                     return False
 
@@ -123,7 +124,7 @@ class LinRegBreakoutBase(SignalDetector):
 
             # Optional: ensure MA20 still rising
             if len(hist) >= 25:
-                ma20 = hist['收盘'].rolling(20).mean()
+                ma20 = ctx.ma(20)
                 ma20_curr = ma20.iloc[-1]
                 ma20_5ago = ma20.iloc[-6]
                 if not (pd.isna(ma20_curr) or pd.isna(ma20_5ago)) and ma20_curr <= ma20_5ago:
@@ -144,8 +145,8 @@ class LinRegSupport5Signal(LinRegSupportBase):
     min_bars = 10
     priority = 50
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_support(hist, 5))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        return SignalResult(triggered=self.check_support(hist, 5, ctx))
 
 
 @SignalRegistry.register
@@ -156,8 +157,8 @@ class LinRegSupport10Signal(LinRegSupportBase):
     min_bars = 15
     priority = 51
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_support(hist, 10))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        return SignalResult(triggered=self.check_support(hist, 10, ctx))
 
 
 @SignalRegistry.register
@@ -168,8 +169,8 @@ class LinRegSupport20Signal(LinRegSupportBase):
     min_bars = 25
     priority = 52
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_support(hist, 20))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        return SignalResult(triggered=self.check_support(hist, 20, ctx))
 
 
 # Breakout signals
@@ -181,8 +182,8 @@ class LinRegBreakout5Signal(LinRegBreakoutBase):
     min_bars = 10
     priority = 53
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_breakout(hist, 5))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        return SignalResult(triggered=self.check_breakout(hist, 5, ctx))
 
 
 @SignalRegistry.register
@@ -193,8 +194,8 @@ class LinRegBreakout10Signal(LinRegBreakoutBase):
     min_bars = 15
     priority = 54
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_breakout(hist, 10))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        return SignalResult(triggered=self.check_breakout(hist, 10, ctx))
 
 
 @SignalRegistry.register
@@ -205,5 +206,5 @@ class LinRegBreakout20Signal(LinRegBreakoutBase):
     min_bars = 25
     priority = 55
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_breakout(hist, 20))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        return SignalResult(triggered=self.check_breakout(hist, 20, ctx))
@@ -1,6 +1,7 @@
 """MA Bullish Signal - MA5 > MA10 > MA20 with golden cross."""
 
-from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.base import SignalDetector, SignalResult, PanelResult
+from app.services.scanner.context import ensure_context
 from app.services.scanner.registry import SignalRegistry
 
 
@@ -14,18 +15,21 @@ class MABullishSignal(SignalDetector):
     group = "trend"
     min_bars = 21
     priority = 40
+    uses_context = True
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            close = hist['收盘']
+            ctx = ensure_context(hist, ctx)
+            ma5_series = ctx.ma(5)
+            ma10_series = ctx.ma(10)
             
-            ma5 = close.rolling(5).mean().iloc[-1]
-            ma10 = close.rolling(10).mean().iloc[-1]
-            ma20 = close.rolling(20).mean().iloc[-1]
+            ma5 = ma5_series.iloc[-1]
+            ma10 = ma10_series.iloc[-1]
+            ma20 = ctx.ma(20).iloc[-1]
             
             # Check for golden cross (MA5 crossed above MA10 today)
-            ma5_prev = close.rolling(5).mean().iloc[-2]
-            ma10_prev = close.rolling(10).mean().iloc[-2]
+            ma5_prev = ma5_series.iloc[-2]
+            ma10_prev = ma10_series.iloc[-2]
             
             bullish = ma5 > ma10 > ma20
             golden_cross = ma5 > ma10 and ma5_prev <= ma10_prev
@@ -34,3 +38,26 @@ class MABullishSignal(SignalDetector):
             
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        ma5_series = panel.rolling_mean("close", 5)
+        ma10_series = panel.rolling_mean("close", 10)
+        
+        ma5 = ma5_series[:, -1]
+        ma10 = ma10_series[:, -1]
+        ma20 = panel.rolling_mean("close", 20)[:, -1]
+        
+        bullish = (ma5 > ma10) & (ma10 > ma20)
+        golden_cross = (ma5 > ma10) & (ma5_series[:, -2] <= ma10_series[:, -2])
+        
+        return PanelResult(triggered=bullish & golden_cross)
+    
+    def detect_rolling(self, state) -> PanelResult:
+        ma5 = state.ma(5)
+        ma10 = state.ma(10)
+        ma20 = state.ma(20)
+        
+        bullish = (ma5 > ma10) & (ma10 > ma20)
+        golden_cross = (ma5 > ma10) & (state.ma(5, prev=True) <= state.ma(10, prev=True))
+        
+        return PanelResult(triggered=bullish & golden_cross)
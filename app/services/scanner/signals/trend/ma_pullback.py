@@ -2,8 +2,9 @@
 
 import pandas as pd
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import ensure_context
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import resample_to_weekly, scale_pct
+from app.services.scanner.utils import scale_pct
 
 
 class MAPullbackBase(SignalDetector):
@@ -11,6 +12,7 @@ class MAPullbackBase(SignalDetector):
     
     group = "trend"
     count_in_multi = True
+    uses_context = True
     
     def __init__(self):
         self.ma_window = 5  # Override in subclasses
@@ -35,7 +37,7 @@ class MAPullbackBase(SignalDetector):
             return 0.8
         return 1.0
 
-    def check_pullback(self, hist, window: int, weekly: bool = False, stock_info: dict = None) -> bool:
+    def check_pullback(self, hist, window: int, weekly: bool = False, stock_info: dict = None, ctx=None) -> bool:
         """Check for MA pullback pattern.
         
         Conditions:
@@ -44,13 +46,17 @@ class MAPullbackBase(SignalDetector):
            touching MA, close >= MA, and close not too far above MA.
         3. Today: bullish confirmation, close not too far above MA.
         4. Price was above MA before the pullback (avoid breakdowns).
+        
+        ctx, when given, must be the IndicatorContext of hist itself.
         """
         try:
             if len(hist) < window + 6:
                 return False
             
-            close = hist['收盘']
-            ma = close.rolling(window).mean()
+            if ctx is not None:
+                ma = ctx.ma(window)
+            else:
+                ma = hist['收盘'].rolling(window).mean()
             
             ma_curr = ma.iloc[-1]
             ma_5ago = ma.iloc[-6]
@@ -122,8 +128,9 @@ class MAPullbackMA5Signal(MAPullbackBase):
     min_bars = 15
     priority = 45
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_pullback(hist, 5, stock_info=stock_info))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        ctx = ensure_context(hist, ctx)
+        return SignalResult(triggered=self.check_pullback(hist, 5, stock_info=stock_info, ctx=ctx))
 
 
 @SignalRegistry.register
@@ -136,8 +143,9 @@ class MAPullbackMA20Signal(MAPullbackBase):
     min_bars = 30
     priority = 46
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_pullback(hist, 20, stock_info=stock_info))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        ctx = ensure_context(hist, ctx)
+        return SignalResult(triggered=self.check_pullback(hist, 20, stock_info=stock_info, ctx=ctx))
 
 
 @SignalRegistry.register
@@ -150,8 +158,9 @@ class MAPullbackMA30Signal(MAPullbackBase):
     min_bars = 40
     priority = 47
     
-    def detect(self, hist, stock_info) -> SignalResult:
-        return SignalResult(triggered=self.check_pullback(hist, 30, stock_info=stock_info))
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
+        ctx = ensure_context(hist, ctx)
+        return SignalResult(triggered=self.check_pullback(hist, 30, stock_info=stock_info, ctx=ctx))
 
 
 @SignalRegistry.register
@@ -164,10 +173,10 @@ class MAPullbackMA5WeeklySignal(MAPullbackBase):
     min_bars = 40  # Need enough daily data to form weekly
     priority = 48
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
-            # Resample to weekly
-            weekly = resample_to_weekly(hist)
+            # Resample to weekly (shared with the weekly bullish signals)
+            weekly = ensure_context(hist, ctx).weekly()
             if len(weekly) < 10:
                 return SignalResult(triggered=False)
             
@@ -6,8 +6,9 @@ import numpy as np
 import pandas as pd
 
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import IndicatorContext, ensure_context
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import calculate_atr, detect_pivot_lows, scale_pct
+from app.services.scanner.utils import scale_pct
 
 
 @SignalRegistry.register
@@ -27,34 +28,41 @@ class StrongPullbackSignal(SignalDetector):
     group = "trend"
     min_bars = 160
     priority = 62
+    uses_context = True
 
     lookback_breakout = 60
     swing_k = 3
     require_breakout_jump = True
 
-    def detect(self, hist: pd.DataFrame, stock_info: Dict[str, Any]) -> SignalResult:
+    def detect(
+        self,
+        hist: pd.DataFrame,
+        stock_info: Dict[str, Any],
+        ctx: Optional[IndicatorContext] = None,
+    ) -> SignalResult:
         try:
             if len(hist) < self.min_bars:
                 return SignalResult(triggered=False)
 
-            close = hist['收盘'].astype(float)
-            high = hist['最高'].astype(float)
-            low = hist['最低'].astype(float)
-            vol = hist['成交量'].astype(float)
+            ctx = ensure_context(hist, ctx)
+            close = ctx.series('收盘')
+            high = ctx.series('最高')
+            low = ctx.series('最低')
+            vol = ctx.series('成交量')
 
-            ma20 = close.rolling(20).mean()
-            ma60 = close.rolling(60).mean()
-            ma120 = close.rolling(120).mean()
+            ma20 = ctx.ma(20)
+            ma60 = ctx.ma(60)
+            ma120 = ctx.ma(120)
 
             if pd.isna(ma120.iloc[-1]) or pd.isna(ma60.iloc[-1]) or pd.isna(ma20.iloc[-1]):
                 return SignalResult(triggered=False)
 
-            atr14 = calculate_atr(hist, 14)
+            atr14 = ctx.atr(14)
             if atr14 <= 0:
                 return SignalResult(triggered=False)
 
             # Trend filter
-            trend_ok, sl1_price, sl2_price = self._trend_filter(close, low, ma20, ma60, ma120)
+            trend_ok, sl1_price, sl2_price = self._trend_filter(ctx, close, ma20, ma60, ma120)
             if not trend_ok:
                 return SignalResult(triggered=False)
 
@@ -110,8 +118,8 @@ class StrongPullbackSignal(SignalDetector):
 
     def _trend_filter(
         self,
+        ctx: IndicatorContext,
         close: pd.Series,
-        low: pd.Series,
         ma20: pd.Series,
         ma60: pd.Series,
         ma120: pd.Series,
@@ -135,7 +143,7 @@ class StrongPullbackSignal(SignalDetector):
             return False, None, None
 
         # Swing lows: SL1 > SL2
-        pivot_lows = detect_pivot_lows(low.values, self.swing_k, self.swing_k)
+        pivot_lows = ctx.pivot_lows(self.swing_k, self.swing_k)
         if len(pivot_lows) < 2:
             return False, None, None
         sl1 = pivot_lows[-1]
@@ -2,8 +2,9 @@
 
 import numpy as np
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import ensure_context
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import detect_pivot_lows, calculate_atr, scale_ratio_down
+from app.services.scanner.utils import scale_ratio_down
 
 
 @SignalRegistry.register
@@ -22,19 +23,21 @@ class UptrendBreakoutSignal(SignalDetector):
     group = "trend"
     min_bars = 30
     priority = 61
+    uses_context = True
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
             if len(hist) < 30:
                 return SignalResult(triggered=False)
             
+            ctx = ensure_context(hist, ctx)
             closes = hist['收盘'].values
             highs = hist['最高'].values
             lows = hist['最低'].values
             volumes = hist['成交量'].values
             
             # 1. Detect pivot lows
-            pivot_lows = detect_pivot_lows(lows, 3, 3)
+            pivot_lows = ctx.pivot_lows(3, 3)
             
             if len(pivot_lows) < 2:
                 return SignalResult(triggered=False)
@@ -49,7 +52,7 @@ class UptrendBreakoutSignal(SignalDetector):
                     return SignalResult(triggered=False)
             
             # 3. Calculate ATR and epsilon
-            atr = calculate_atr(hist, 14)
+            atr = ctx.atr(14)
             epsilon = atr * 0.7
             
             # 4. Calculate trend line value
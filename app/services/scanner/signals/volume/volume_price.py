@@ -3,8 +3,8 @@
 import numpy as np
 import pandas as pd
 from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import ensure_context
 from app.services.scanner.registry import SignalRegistry
-from app.services.scanner.utils import calculate_obv
 
 
 @SignalRegistry.register
@@ -25,8 +25,9 @@ class VolumePriceStartupSignal(SignalDetector):
     group = "volume"
     min_bars = 21
     priority = 35
+    uses_context = True
     
-    def detect(self, hist, stock_info) -> SignalResult:
+    def detect(self, hist, stock_info, ctx=None) -> SignalResult:
         try:
             if len(hist) < 20:
                 return SignalResult(triggered=False)
@@ -43,7 +44,7 @@ class VolumePriceStartupSignal(SignalDetector):
                 return SignalResult(triggered=False)
             
             # 2. OBV trend analysis
-            obv = calculate_obv(closes, volumes)
+            obv = ensure_context(hist, ctx).obv()
             obv_series = pd.Series(obv)
             obv_ma5 = obv_series.rolling(5).mean().iloc[-1]
             obv_ma10 = obv_series.rolling(10).mean().iloc[-1]
@@ -1,6 +1,7 @@
 """Volume Surge Signal - Volume > 5-day average × 2."""
 
-from app.services.scanner.base import SignalDetector, SignalResult
+import numpy as np
+from app.services.scanner.base import SignalDetector, SignalResult, PanelResult
 from app.services.scanner.registry import SignalRegistry
 
 
@@ -32,3 +33,27 @@ class VolumeSurgeSignal(SignalDetector):
             
         except Exception:
             return SignalResult(triggered=False)
+    
+    def detect_panel(self, panel) -> PanelResult:
+        vol_today = panel.volume[:, -1]
+        vol_avg5 = np.mean(panel.volume[:, -6:-1], axis=1)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_ratio = np.where(vol_avg5 > 0, np.round(vol_today / vol_avg5, 2), 0)
+        
+        return PanelResult(
+            triggered=vol_today > vol_avg5 * 2,
+            metadata={"vol_ratio": vol_ratio}
+        )
+    
+    def detect_rolling(self, state) -> PanelResult:
+        vol_today = state.volume[:, -1]
+        vol_avg5 = state.volume_mean(5, prev=True)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vol_ratio = np.where(vol_avg5 > 0, np.round(vol_today / vol_avg5, 2), 0)
+        
+        return PanelResult(
+            triggered=vol_today > vol_avg5 * 2,
+            metadata={"vol_ratio": vol_ratio}
+        )
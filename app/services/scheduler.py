@@ -0,0 +1,401 @@
+"""
+Job Scheduler - One market-calendar-aware scheduler for timed jobs.
+
+Services used to run their own `_scheduler_loop`: wake every 30-60 s,
+format an HH:MM string, compare it against fixed times and remember what
+already ran in a private `triggered_today` set. A late tick missed the
+minute, weekends were the only holidays they knew about, and the heavy
+post-close jobs all started at 15:30 together.
+
+Here each service registers Jobs instead:
+
+- A job runs at fixed China-time clock times on the days its calendar
+  selects: every trading day, every day, the last trading day of the week
+  or of the month. Trading days come from data_provider.get_trading_dates;
+  dates the calendar has no data for fall back to Monday-Friday.
+- The loop sleeps until the earliest next run. A run that comes due while
+  the loop was late still runs; run times are computed from the clock,
+  never matched against it.
+- `after` names jobs that run first on the same day (sync -> scan ->
+  reports). A due job waits while any of them is running or still has a
+  slot that day at or before its own, up to `max_wait`. Dependencies that
+  are not registered, or not scheduled that day, do not hold it back.
+- `resources` names semaphores (limits in DEFAULT_LIMITS, "db" from
+  SCHEDULER_DB_CONCURRENCY) so the DB-heavy jobs queue instead of piling
+  onto the database at once. submit() runs one-off work (startup
+  backfills) under the same limits.
+- A job never overlaps itself, and every run's duration and outcome are
+  kept (last RUN_HISTORY per job) and logged.
+
+Usage:
+    from app.services.scheduler import Job, job_scheduler
+
+    job_scheduler.register(Job("scanner.scan", self.scan_and_report, times=("15:30",),
+                               after=("stock_history.sync",), resources=("db",)), owner="scanner")
+    job_scheduler.unregister("scanner")
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logger import Logger
+from app.core.timezone import CHINA_TZ, china_now
+
+logger = Logger("Scheduler")
+
+# Job calendars
+TRADING = "trading"
+DAILY = "daily"
+WEEK_END = "week_end"
+MONTH_END = "month_end"
+
+# Resource -> concurrent jobs; unknown resources get 1
+DEFAULT_LIMITS = {"db": 1, "backfill": 1}
+
+RUN_HISTORY = 20
+
+# Calendar window fetched around today, and how often it is refreshed
+CALENDAR_PAST_DAYS = 30
+CALENDAR_FUTURE_DAYS = 60
+CALENDAR_REFRESH_SECONDS = 6 * 3600
+
+# Longest single sleep, so clock changes and calendar refreshes are noticed
+MAX_SLEEP = 300.0
+
+JobFunc = Callable[[], Awaitable[None]]
+
+
+def every(minutes: int, start: str, end: str, skip: Iterable[Tuple[str, str]] = ()) -> Tuple[str, ...]:
+    """Clock times every `minutes` from start to end inclusive ("HH:MM"),
+    leaving out the [from, to] ranges in skip."""
+    def to_min(hhmm: str) -> int:
+        h, m = hhmm.split(":")
+        return int(h) * 60 + int(m)
+
+    skipped = [(to_min(a), to_min(b)) for a, b in skip]
+    return tuple(
+        f"{t // 60:02d}:{t % 60:02d}"
+        for t in range(to_min(start), to_min(end) + 1, minutes)
+        if not any(a <= t <= b for a, b in skipped)
+    )
+
+
+class TradingCalendar:
+    """Trading days around today, Monday-Friday outside the known range."""
+
+    def __init__(self, days: Iterable[date] = ()):
+        self._days: Set[date] = set()
+        self._first: Optional[date] = None
+        self._last: Optional[date] = None
+        self.loaded_at = 0.0
+        self.set_days(days)
+
+    def set_days(self, days: Iterable[date]):
+        self._days = set(days)
+        self._first = min(self._days) if self._days else None
+        self._last = max(self._days) if self._days else None
+
+    async def refresh(self):
+        """Reload the window around today from the data provider."""
+        from app.services.data_provider.service import data_provider
+
+        today = china_now().date()
+        start = (today - timedelta(days=CALENDAR_PAST_DAYS)).strftime("%Y%m%d")
+        end = (today + timedelta(days=CALENDAR_FUTURE_DAYS)).strftime("%Y%m%d")
+        try:
+            days = await data_provider.get_trading_dates(start, end)
+        except Exception as e:
+            logger.warn(f"Trading calendar refresh failed: {e}")
+            days = None
+        self.loaded_at = time.monotonic()
+        if days:
+            self.set_days(d if isinstance(d, date) else datetime.strptime(str(d)[:10], "%Y-%m-%d").date()
+                          for d in days)
+            logger.info(f"Trading calendar: {len(self._days)} days, {self._first} to {self._last}")
+
+    def is_trading_day(self, day: date) -> bool:
+        if self._first and self._first <= day <= self._last:
+            return day in self._days
+        return day.weekday() < 5
+
+    def next_trading_day(self, day: date) -> date:
+        nxt = day + timedelta(days=1)
+        while not self.is_trading_day(nxt):
+            nxt += timedelta(days=1)
+        return nxt
+
+    def is_week_end(self, day: date) -> bool:
+        """Last trading day of its ISO week."""
+        if not self.is_trading_day(day):
+            return False
+        return self.next_trading_day(day).isocalendar()[:2] != day.isocalendar()[:2]
+
+    def is_month_end(self, day: date) -> bool:
+        """Last trading day of its month."""
+        if not self.is_trading_day(day):
+            return False
+        return self.next_trading_day(day).month != day.month
+
+    def runs_on(self, calendar: str, day: date) -> bool:
+        if calendar == DAILY:
+            return True
+        if calendar == WEEK_END:
+            return self.is_week_end(day)
+        if calendar == MONTH_END:
+            return self.is_month_end(day)
+        return self.is_trading_day(day)
+
+
+@dataclass
+class JobRun:
+    started_at: datetime
+    seconds: float
+    ok: bool
+    error: Optional[str] = None
+
+
+@dataclass
+class Job:
+    """A timed job.
+
+    Attributes:
+        name: Unique name, "<service>.<job>" by convention
+        func: Async callable with no arguments
+        times: China-time clock times ("HH:MM")
+        calendar: TRADING, DAILY, WEEK_END or MONTH_END
+        after: Jobs that run first when scheduled on the same day
+        resources: Semaphores held while running
+        max_wait: Seconds to wait for `after` before running anyway
+    """
+    name: str
+    func: JobFunc
+    times: Tuple[str, ...]
+    calendar: str = TRADING
+    after: Tuple[str, ...] = ()
+    resources: Tuple[str, ...] = ()
+    max_wait: float = 3 * 3600
+    owner: Optional[str] = None
+    next_run: Optional[datetime] = None
+    running: bool = False
+    runs: Deque[JobRun] = field(default_factory=lambda: deque(maxlen=RUN_HISTORY))
+
+
+class JobScheduler:
+    """Runs registered Jobs; see the module docstring."""
+
+    def __init__(self, calendar: Optional[TradingCalendar] = None, clock: Callable[[], datetime] = china_now):
+        self.calendar = calendar or TradingCalendar()
+        self.clock = clock
+        self.jobs: Dict[str, Job] = {}
+        self.is_running = False
+        self._limits = dict(DEFAULT_LIMITS, db=settings.SCHEDULER_DB_CONCURRENCY)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Registration
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def register(self, job: Job, owner: Optional[str] = None) -> Job:
+        """Add (or replace) a job. Its first run is the next slot after now."""
+        job.owner = owner or job.owner
+        job.next_run = self.next_run_after(job, self.clock())
+        self.jobs[job.name] = job
+        self._wake.set()
+        return job
+
+    def unregister(self, owner: str):
+        """Remove every job registered by owner (running ones finish)."""
+        for name in [n for n, j in self.jobs.items() if j.owner == owner]:
+            del self.jobs[name]
+        self._wake.set()
+
+    def next_run_after(self, job: Job, after: datetime) -> Optional[datetime]:
+        """First slot of job strictly after `after` (None if none within a year)."""
+        times = sorted(job.times)
+        day = after.date()
+        for _ in range(370):
+            if self.calendar.runs_on(job.calendar, day):
+                for hhmm in times:
+                    hour, minute = map(int, hhmm.split(":"))
+                    slot = CHINA_TZ.localize(datetime(day.year, day.month, day.day, hour, minute))
+                    if slot > after:
+                        return slot
+            day += timedelta(days=1)
+        return None
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Lifecycle
+    # ─────────────────────────────────────────────────────────────────────────
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        await self.calendar.refresh()
+        self._reschedule()
+        self._loop_task = asyncio.create_task(self._run_loop())
+        logger.info(f"✅ Job scheduler started ({len(self.jobs)} jobs)")
+
+    async def stop(self):
+        self.is_running = False
+        self._wake.set()
+        for task in [self._loop_task, *self._tasks]:
+            if task:
+                task.cancel()
+        await asyncio.gather(*[t for t in [self._loop_task, *self._tasks] if t], return_exceptions=True)
+        self._loop_task = None
+        logger.info("Job scheduler stopped")
+
+    def _reschedule(self):
+        """Re-check pending slots against a refreshed calendar."""
+        for job in self.jobs.values():
+            if job.next_run and not job.running:
+                job.next_run = self.next_run_after(job, job.next_run - timedelta(seconds=1))
+
+    async def _run_loop(self):
+        while self.is_running:
+            # Cleared before dispatching, so a job finishing meanwhile re-wakes the loop
+            self._wake.clear()
+            try:
+                if time.monotonic() - self.calendar.loaded_at > CALENDAR_REFRESH_SECONDS:
+                    await self.calendar.refresh()
+                    self._reschedule()
+                self._dispatch_due()
+            except Exception as e:
+                logger.error(f"Scheduler loop error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._sleep_seconds())
+            except asyncio.TimeoutError:
+                pass
+
+    def _sleep_seconds(self) -> float:
+        """Seconds until the next slot, or until a job blocked on `after`
+        gives up waiting (finishing jobs wake the loop earlier)."""
+        now = self.clock()
+        wake_at = [
+            j.next_run + timedelta(seconds=j.max_wait) if j.next_run <= now else j.next_run
+            for j in self.jobs.values() if j.next_run and not j.running
+        ]
+        if not wake_at:
+            return MAX_SLEEP
+        return min(MAX_SLEEP, max(0.0, (min(wake_at) - now).total_seconds()))
+
+    def _dispatch_due(self):
+        now = self.clock()
+        for job in list(self.jobs.values()):
+            if job.running or not job.next_run or job.next_run > now:
+                continue
+            if not self._dependencies_ready(job, now):
+                continue
+            slot = job.next_run
+            job.next_run = self.next_run_after(job, max(now, slot))
+            self._spawn(job.name, job.func, job.resources, job=job, slot=slot)
+
+    def _dependencies_ready(self, job: Job, now: datetime) -> bool:
+        """A dependency holds job back while it runs, or while it still has
+        a slot on the same day at or before job's slot."""
+        day = job.next_run.date()
+        waiting = []
+        for name in job.after:
+            dep = self.jobs.get(name)
+            if dep and (dep.running or (
+                dep.next_run and dep.next_run.date() == day and dep.next_run <= job.next_run
+            )):
+                waiting.append(name)
+        if not waiting:
+            return True
+        if (now - job.next_run).total_seconds() > job.max_wait:
+            logger.warn(f"⏰ {job.name}: gave up waiting for {', '.join(waiting)}")
+            return True
+        return False
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Running
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def submit(self, name: str, func: JobFunc, resources: Tuple[str, ...] = ()) -> asyncio.Task:
+        """Run one-off work now, under the resource limits, with timing."""
+        return self._spawn(name, func, resources)
+
+    def _spawn(self, name: str, func: JobFunc, resources: Tuple[str, ...],
+               job: Optional[Job] = None, slot: Optional[datetime] = None) -> asyncio.Task:
+        if job:
+            job.running = True
+        task = asyncio.create_task(self._run(name, func, resources, job, slot))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _semaphore(self, resource: str) -> asyncio.Semaphore:
+        if resource not in self._semaphores:
+            self._semaphores[resource] = asyncio.Semaphore(max(1, self._limits.get(resource, 1)))
+        return self._semaphores[resource]
+
+    async def _run(self, name: str, func: JobFunc, resources: Tuple[str, ...],
+                   job: Optional[Job], slot: Optional[datetime]):
+        held = []
+        started_at = self.clock()
+        started = time.perf_counter()
+        waited = 0.0
+        error = None
+        try:
+            # Fixed acquisition order, so two jobs can never hold each other's resource
+            for resource in sorted(resources):
+                sem = self._semaphore(resource)
+                await sem.acquire()
+                held.append(sem)
+            waited = time.perf_counter() - started
+            late = (started_at - slot).total_seconds() if slot else 0.0
+            logger.info(f"▶️ {name} started" + (f" ({late:.0f}s after {slot:%H:%M})" if late >= 60 else ""))
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.error(f"❌ {name} failed: {error}")
+        finally:
+            for sem in held:
+                sem.release()
+            seconds = time.perf_counter() - started - waited
+            if job:
+                job.running = False
+                job.runs.append(JobRun(started_at, seconds, error is None, error))
+                self._wake.set()
+            if error is None:
+                wait_note = f", waited {waited:.1f}s for {'/'.join(resources)}" if waited >= 1 else ""
+                logger.info(f"⏱️ {name} finished in {seconds:.1f}s{wait_note}")
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Introspection
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def status(self) -> List[Dict]:
+        """Per-job schedule and recent run stats, ordered by next run."""
+        rows = []
+        for job in self.jobs.values():
+            durations = [r.seconds for r in job.runs]
+            last = job.runs[-1] if job.runs else None
+            rows.append({
+                "name": job.name,
+                "next_run": job.next_run,
+                "running": job.running,
+                "last_started": last.started_at if last else None,
+                "last_seconds": last.seconds if last else None,
+                "last_ok": last.ok if last else None,
+                "avg_seconds": sum(durations) / len(durations) if durations else None,
+                "runs": len(durations),
+            })
+        return sorted(rows, key=lambda r: (r["next_run"] is None, r["next_run"] or 0))
+
+
+# Singleton
+job_scheduler = JobScheduler()
@@ -13,7 +13,9 @@ from app.core.logger import Logger
 from app.core.database import db
 from app.core.config import settings
 from app.core.stock_links import get_sector_url
-from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.core.timezone import china_now, china_today
+from app.core.send_queue import PRIORITY_REPORT
+from app.services.scheduler import MONTH_END, WEEK_END, Job, job_scheduler
 from app.services.data_provider.service import data_provider
 
 logger = Logger("SectorService")
@@ -24,7 +26,6 @@ class SectorService:
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._ak = None  # AkShare module (lazy load)
     
     def _get_akshare(self):
@@ -48,18 +49,13 @@ class SectorService:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Sector Tracker started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("sector")
         logger.info("Sector Tracker stopped")
     
     async def initialize(self):
@@ -589,7 +585,8 @@ class SectorService:
             await telegram_service.send_message(
                 report_target, report, 
                 parse_mode="html", 
-                link_preview=False
+                link_preview=False,
+                priority=PRIORITY_REPORT
             )
         logger.info("Sent daily sector report")
     
@@ -645,7 +642,8 @@ class SectorService:
             await telegram_service.send_message(
                 report_target, report, 
                 parse_mode="html", 
-                link_preview=False
+                link_preview=False,
+                priority=PRIORITY_REPORT
             )
         logger.info("Sent weekly sector report")
     
@@ -653,60 +651,34 @@ class SectorService:
     # Scheduler
     # ─────────────────────────────────────────────────────────────────────────
     
-    async def _scheduler_loop(self):
-        """Background scheduler for timed tasks.
-        
-        - 16:05 Daily: Collect data + send daily report
-        - 16:30 Friday: Send weekly report
-        - 17:00 Last trading day of month: Send monthly report
+    def _register_jobs(self):
+        """Register timed tasks.
+
+        - 16:05 Trading days: Collect data + send daily report
+        - 16:30 Last trading day of the week: Send weekly report
+        - 17:00 Last trading day of the month: Send monthly report
         """
-        daily_time = "16:05"
-        weekly_time = "16:30"
-        monthly_time = "17:00"
-        
-        triggered_today = set()
-        
-        while self.is_running:
-            try:
-                now = datetime.now(CHINA_TZ)
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                # Reset triggered set at midnight
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                key = f"{date_str}_{time_str}"
-                
-                # Skip weekends
-                if now.weekday() < 5:
-                    # Daily report
-                    if time_str == daily_time and key not in triggered_today:
-                        triggered_today.add(key)
-                        asyncio.create_task(self.send_daily_report())
-                    
-                    # Weekly report (Friday)
-                    if now.weekday() == 4 and time_str == weekly_time and key not in triggered_today:
-                        triggered_today.add(key)
-                        asyncio.create_task(self.send_weekly_report())
-                    
-                    # Monthly report (last trading day - simplified: last weekday)
-                    next_day = now.date() + timedelta(days=1)
-                    if next_day.month != now.month and time_str == monthly_time and key not in triggered_today:
-                        triggered_today.add(key)
-                        from app.core.bot import telegram_service
-                        report = await self.generate_monthly_report()
-                        await telegram_service.send_message(
-                            settings.STOCK_ALERT_CHANNEL, report,
-                            parse_mode="html", link_preview=False
-                        )
-                        logger.info("Sent monthly sector report")
-                
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            # Check every 30 seconds
-            await asyncio.sleep(30)
+        job_scheduler.register(
+            Job("sector.daily", self.send_daily_report, times=("16:05",)), owner="sector"
+        )
+        job_scheduler.register(
+            Job("sector.weekly", self.send_weekly_report, times=("16:30",), calendar=WEEK_END), owner="sector"
+        )
+        job_scheduler.register(
+            Job("sector.monthly", self.send_monthly_report, times=("17:00",), calendar=MONTH_END), owner="sector"
+        )
+
+    async def send_monthly_report(self):
+        """Generate and send the monthly report."""
+        from app.core.bot import telegram_service
+
+        report = await self.generate_monthly_report()
+        await telegram_service.send_message(
+            settings.STOCK_ALERT_CHANNEL, report,
+            parse_mode="html", link_preview=False,
+            priority=PRIORITY_REPORT
+        )
+        logger.info("Sent monthly sector report")
 
     # ─────────────────────────────────────────────────────────────────────────
     # Stock Sector Info (Individual Stock)
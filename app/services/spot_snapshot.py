@@ -0,0 +1,301 @@
+"""
+Spot Snapshot Service - One shared market-wide spot snapshot.
+
+Intraday services (burst monitor, 打板, limit-up, simulators, portfolio,
+market report, chart API) each used to download the full ~5,500-row
+`stock_zh_a_spot_em` table on their own timers, which is what gets the
+server IP-blocked. This service owns that download:
+
+- During trading hours it polls once every SPOT_SNAPSHOT_INTERVAL seconds
+  (0 = on demand only).
+- The latest snapshot, and a ring of the previous SPOT_SNAPSHOT_HISTORY
+  ones, are kept in memory column by column (one NumPy array per field)
+  with a code -> row index.
+- Readers ask for a snapshot no older than `max_age` seconds. A fresh
+  enough snapshot is returned as is; otherwise one fetch is made, and all
+  callers that arrive while it runs share it.
+- Subscribers get each new snapshot as it arrives.
+
+Snapshots are shared between callers and must be treated as read-only.
+
+Usage:
+    from app.services.spot_snapshot import spot_snapshot
+
+    snap = await spot_snapshot.get(max_age=60)
+    if snap is not None:
+        quote = snap.get("600519")  # {"代码": ..., "最新价": ..., ...}
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import Logger
+from app.core.timezone import china_now
+
+logger = Logger("SpotSnapshot")
+
+# Columns kept as strings; every other column is stored as float64
+TEXT_COLUMNS = ("代码", "名称")
+
+SnapshotCallback = Callable[["SpotSnapshot"], Awaitable[None]]
+
+
+class SpotSnapshot:
+    """One market-wide spot table, stored as a column per field.
+
+    Args:
+        columns: field -> 1-D array, all of the same length
+        taken_at: time.monotonic() when the fetch completed
+        fetched_at: Wall-clock time (China timezone) of the fetch
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], taken_at: float, fetched_at: datetime):
+        self.columns = columns
+        self.taken_at = taken_at
+        self.fetched_at = fetched_at
+        codes = columns.get("代码", np.empty(0, dtype=object))
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(codes.tolist())}
+        self._frame: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, taken_at: Optional[float] = None,
+                   fetched_at: Optional[datetime] = None) -> "SpotSnapshot":
+        """Build a snapshot from a provider DataFrame (akshare or crawler columns)."""
+        columns = {}
+        for name in df.columns:
+            if name in TEXT_COLUMNS:
+                columns[name] = df[name].astype(str).to_numpy(dtype=object)
+            else:
+                columns[name] = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+        return cls(
+            columns,
+            time.monotonic() if taken_at is None else taken_at,
+            china_now() if fetched_at is None else fetched_at,
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.index
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the snapshot was fetched."""
+        return (time.monotonic() if now is None else now) - self.taken_at
+
+    def column(self, name: str, default: float = np.nan) -> np.ndarray:
+        """Whole column, or an array of `default` if the provider lacks it."""
+        values = self.columns.get(name)
+        if values is None:
+            return np.full(len(self), default)
+        return values
+
+    def get(self, code: str) -> Optional[Dict]:
+        """Row of one code as {field: value}, or None if not listed."""
+        row = self.index.get(code)
+        if row is None:
+            return None
+        return {name: values[row].item() if values.dtype != object else values[row]
+                for name, values in self.columns.items()}
+
+    def quotes(self, codes: Iterable[str]) -> Dict[str, Dict]:
+        """Rows of the given codes that are listed, keyed by code."""
+        return {code: row for code in codes if (row := self.get(code)) is not None}
+
+    def frame(self) -> pd.DataFrame:
+        """The snapshot as a DataFrame in the provider's column layout (built once)."""
+        if self._frame is None:
+            self._frame = pd.DataFrame(self.columns, copy=False)
+        return self._frame
+
+
+class SpotSnapshotService:
+    """Polls the spot table once per interval and shares it.
+
+    Args:
+        fetcher: Coroutine function returning a spot DataFrame (default:
+            data_provider.get_all_spot_data, which falls back across providers)
+        interval: Seconds between background polls in trading hours (0 = no polling)
+        history: Previous snapshots kept besides the latest
+        fetch_timeout: Seconds before a fetch is abandoned
+        retry_after: Seconds after a failed fetch before callers trigger another
+    """
+
+    def __init__(
+        self,
+        fetcher: Optional[Callable[[], Awaitable[Optional[pd.DataFrame]]]] = None,
+        interval: Optional[float] = None,
+        history: Optional[int] = None,
+        fetch_timeout: float = 300.0,
+        retry_after: float = 10.0,
+    ):
+        self.fetcher = fetcher
+        self.interval = settings.SPOT_SNAPSHOT_INTERVAL if interval is None else interval
+        self.fetch_timeout = fetch_timeout
+        self.retry_after = retry_after
+        history = settings.SPOT_SNAPSHOT_HISTORY if history is None else history
+        self._ring: deque = deque(maxlen=history + 1)
+        self._inflight: Optional[asyncio.Task] = None
+        self._failed_at: Optional[float] = None
+        self._subscribers: List[SnapshotCallback] = []
+        self._notify_tasks: set = set()
+        self.is_running = False
+        self._poll_task: Optional[asyncio.Task] = None
+        self.fetch_count = 0
+
+    # ── Reading ─────────────────────────────────────────────────────────────
+
+    @property
+    def latest(self) -> Optional[SpotSnapshot]:
+        """Most recent snapshot, however old."""
+        return self._ring[-1] if self._ring else None
+
+    @property
+    def history(self) -> List[SpotSnapshot]:
+        """Retained snapshots, oldest first (the last one is `latest`)."""
+        return list(self._ring)
+
+    def snapshot_before(self, seconds: float) -> Optional[SpotSnapshot]:
+        """Newest retained snapshot that is at least `seconds` old."""
+        now = time.monotonic()
+        for snap in reversed(self._ring):
+            if snap.age(now) >= seconds:
+                return snap
+        return None
+
+    async def get(self, max_age: Optional[float] = None) -> Optional[SpotSnapshot]:
+        """Snapshot no older than max_age seconds (default: the poll interval).
+
+        Fetches only when the latest snapshot is too old; concurrent callers
+        share one fetch. Returns None when no fresh enough snapshot can be
+        had (fetch failed, or failed less than retry_after seconds ago).
+        """
+        if max_age is None:
+            max_age = self.interval or 60.0
+        snap = self.latest
+        if snap is not None and snap.age() <= max_age:
+            return snap
+        if (self._inflight is None and self._failed_at is not None
+                and time.monotonic() - self._failed_at < self.retry_after):
+            return None
+        return await self.refresh()
+
+    async def get_frame(self, max_age: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """get() as a DataFrame in the provider's column layout."""
+        snap = await self.get(max_age)
+        return snap.frame() if snap is not None else None
+
+    async def refresh(self) -> Optional[SpotSnapshot]:
+        """Fetch a new snapshot, joining the fetch already in flight if any."""
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._fetch())
+        # Shielded: a caller that times out must not cancel the shared fetch
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Optional[SpotSnapshot]:
+        try:
+            fetcher = self.fetcher
+            if fetcher is None:
+                from app.services.data_provider.service import data_provider
+                fetcher = data_provider.get_all_spot_data
+            self.fetch_count += 1
+            try:
+                df = await asyncio.wait_for(fetcher(), timeout=self.fetch_timeout)
+            except asyncio.TimeoutError:
+                logger.warn("Timeout while fetching spot snapshot")
+                df = None
+            except Exception as e:
+                logger.warn(f"Spot snapshot fetch failed: {e}")
+                df = None
+
+            if df is None or getattr(df, "empty", True):
+                self._failed_at = time.monotonic()
+                return None
+
+            loop = asyncio.get_running_loop()
+            snap = await loop.run_in_executor(None, SpotSnapshot.from_frame, df)
+            self._failed_at = None
+            self._ring.append(snap)
+            self._notify(snap)
+            return snap
+        finally:
+            self._inflight = None
+
+    # ── Subscriptions ───────────────────────────────────────────────────────
+
+    def subscribe(self, callback: SnapshotCallback):
+        """Call `await callback(snapshot)` for every new snapshot."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: SnapshotCallback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, snap: SpotSnapshot):
+        for callback in list(self._subscribers):
+            task = asyncio.create_task(self._run_callback(callback, snap))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+
+    async def _run_callback(self, callback: SnapshotCallback, snap: SpotSnapshot):
+        try:
+            await callback(snap)
+        except Exception as e:
+            logger.error(f"Spot snapshot subscriber failed: {e}")
+
+    # ── Polling ─────────────────────────────────────────────────────────────
+
+    def _is_market_hours(self) -> bool:
+        """Check if currently in A-share market hours (call auction included)."""
+        now = china_now()
+        if now.weekday() >= 5:
+            return False
+        time_mins = now.hour * 60 + now.minute
+        # 09:15-11:30 (555-690) or 13:00-15:00 (780-900)
+        return (555 <= time_mins <= 690) or (780 <= time_mins <= 900)
+
+    async def start(self):
+        """Start background polling (no-op when the interval is 0)."""
+        if self.is_running or self.interval <= 0:
+            return
+        self.is_running = True
+        self._poll_task = asyncio.create_task(self._poll_loop())
+        logger.info(f"Spot snapshot service started (every {self.interval}s in trading hours)")
+
+    async def stop(self):
+        """Stop background polling."""
+        self.is_running = False
+        if self._poll_task:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        logger.info("Spot snapshot service stopped")
+
+    async def _poll_loop(self):
+        while self.is_running:
+            try:
+                if self._is_market_hours():
+                    await self.get(max_age=self.interval / 2)
+                    await asyncio.sleep(self.interval)
+                else:
+                    await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Spot snapshot poll error: {e}")
+                await asyncio.sleep(self.interval)
+
+
+# Singleton
+spot_snapshot = SpotSnapshotService()
@@ -21,17 +21,33 @@ from app.core.logger import Logger
 from app.core.database import db
 from app.core.config import settings
 from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.services.scheduler import DAILY, Job, job_scheduler
+from app.services.history_hot import bump_history_version, get_hot_stock_history, refresh_hot_window
+from app.services.history_ingest import (
+    HistoryBulkWriter, SPOT_BATCH_COLUMNS, bars_to_records, copy_history, spot_to_records,
+)
 
 logger = Logger("StockHistoryService")
 
 
+def hot_window_depth() -> int:
+    """Bars kept per code in stock_history_hot.
+
+    HISTORY_HOT_BARS, raised to the deepest scan any registered signal set
+    needs so scanner loads are always served from the hot table.
+    """
+    if settings.HISTORY_HOT_BARS <= 0:
+        return 0
+    from app.services.scanner import SignalRegistry
+    from app.services.scanner.loader import history_limit
+    return max(settings.HISTORY_HOT_BARS, history_limit(SignalRegistry.get_all()))
+
+
 class StockHistoryService:
     """Service for building and maintaining A-share history database."""
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
-        self._scheduler_task = None
     # Executor no longer needed as we use async DataProvider logic
 
     def _get_libs(self):
@@ -52,18 +68,13 @@ class StockHistoryService:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Stock History Service started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("stock_history")
         logger.info("Stock History Service stopped")
     
     async def initialize(self):
@@ -147,7 +158,11 @@ class StockHistoryService:
             if stale_stocks:
                 logger.info(f"Found {len(stale_stocks)} stocks with stale data (>7 days old)")
                 # Run in background task
-                asyncio.create_task(self._update_stale_background_task(stale_stocks))
+                job_scheduler.submit(
+                    "stock_history.update_stale",
+                    lambda: self._update_stale_background_task(stale_stocks),
+                    resources=("backfill",),
+                )
         
         # Handle missing stocks
         if coverage < 0.9:
@@ -157,7 +172,11 @@ class StockHistoryService:
                     f"resuming backfill for {len(missing_codes)} missing stocks..."
                 )
                 # Run in background task
-                asyncio.create_task(self._backfill_background_task(missing_codes))
+                job_scheduler.submit(
+                    "stock_history.backfill",
+                    lambda: self._backfill_background_task(missing_codes),
+                    resources=("backfill",),
+                )
             else:
                 logger.info("All stocks have history data")
         else:
@@ -201,7 +220,11 @@ class StockHistoryService:
                 )
                 
                 # Run in background task
-                asyncio.create_task(self._deep_backfill_background_task(shallow_stocks, cutoff_date))
+                job_scheduler.submit(
+                    "stock_history.deep_backfill",
+                    lambda: self._deep_backfill_background_task(shallow_stocks, cutoff_date),
+                    resources=("backfill",),
+                )
             else:
                 logger.info("✅ All stocks have sufficient history depth")
                 
@@ -230,6 +253,8 @@ class StockHistoryService:
         success_count = 0
         error_count = 0
         
+        writer = HistoryBulkWriter(db.pool)
+
         for i, code in enumerate(codes):
             try:
                 # Get the latest date we have for this stock
@@ -245,7 +270,7 @@ class StockHistoryService:
                 start_str = start_date.strftime("%Y%m%d")
                 end_str = today.strftime("%Y%m%d")
                 
-                records = await self._fetch_and_save_history(code, start_str, end_str)
+                records = await self._fetch_and_save_history(code, start_str, end_str, writer)
                 if records > 0:
                     success_count += 1
                 
@@ -266,6 +291,10 @@ class StockHistoryService:
                 if error_count <= 10:
                     logger.warn(f"Failed to update {code}: {e}")
         
+        await writer.flush()
+        success_count = writer.stocks_written
+        error_count += len(writer.failed_codes)
+
         logger.info(
             f"✅ Update complete: {success_count}/{len(codes)} stocks updated, "
             f"{error_count} errors"
@@ -289,9 +318,11 @@ class StockHistoryService:
         success_count = 0
         error_count = 0
         
+        writer = HistoryBulkWriter(db.pool)
+
         for i, code in enumerate(codes):
             try:
-                records = await self._fetch_and_save_history(code, start_str, end_str)
+                records = await self._fetch_and_save_history(code, start_str, end_str, writer)
                 if records > 0:
                     success_count += 1
                 
@@ -312,6 +343,10 @@ class StockHistoryService:
                 if error_count <= 10:  # Only log first 10 errors
                     logger.warn(f"Failed to backfill {code}: {e}")
         
+        await writer.flush()
+        success_count = writer.stocks_written
+        error_count += len(writer.failed_codes)
+
         logger.info(
             f"✅ Backfill complete: {success_count}/{len(codes)} stocks, "
             f"{error_count} errors"
@@ -325,6 +360,8 @@ class StockHistoryService:
         success_count = 0
         error_count = 0
         
+        writer = HistoryBulkWriter(db.pool)
+
         for i, code in enumerate(codes):
             try:
                 latest = await db.pool.fetchval(
@@ -338,7 +375,7 @@ class StockHistoryService:
                 start_str = start_date.strftime("%Y%m%d")
                 end_str = today.strftime("%Y%m%d")
                 
-                records = await self._fetch_and_save_history(code, start_str, end_str)
+                records = await self._fetch_and_save_history(code, start_str, end_str, writer)
                 if records > 0:
                     success_count += 1
                 
@@ -353,7 +390,12 @@ class StockHistoryService:
                 if error_count <= 10:
                     logger.warn(f"[BG Task] Failed to update {code}: {e}")
         
+        await writer.flush()
+        success_count = writer.stocks_written
+        error_count += len(writer.failed_codes)
+
         logger.info(f"✅ [BG Task] Update complete: {success_count}/{len(codes)}, {error_count} errors")
+        await self.refresh_hot_window()
 
     async def _backfill_background_task(self, codes: List[str]):
         """Async background task to backfill stocks."""
@@ -367,9 +409,11 @@ class StockHistoryService:
         success_count = 0
         error_count = 0
         
+        writer = HistoryBulkWriter(db.pool)
+
         for i, code in enumerate(codes):
             try:
-                records = await self._fetch_and_save_history(code, start_str, end_str)
+                records = await self._fetch_and_save_history(code, start_str, end_str, writer)
                 if records > 0:
                     success_count += 1
                 
@@ -383,7 +427,12 @@ class StockHistoryService:
                 if error_count <= 10:
                     logger.warn(f"[BG Task] Failed to backfill {code}: {e}")
                     
+        await writer.flush()
+        success_count = writer.stocks_written
+        error_count += len(writer.failed_codes)
+
         logger.info(f"✅ [BG Task] Backfill complete: {success_count}/{len(codes)}, {error_count} errors")
+        await self.refresh_hot_window()
 
     async def _deep_backfill_background_task(self, codes: List[str], cutoff_date):
         """Async background task for deep backfill."""
@@ -395,6 +444,8 @@ class StockHistoryService:
         success_count = 0
         error_count = 0
         
+        writer = HistoryBulkWriter(db.pool)
+
         for i, code in enumerate(codes):
             try:
                 # Re-check min date
@@ -409,7 +460,7 @@ class StockHistoryService:
                     
                 end_str = end_date.strftime("%Y%m%d")
                 
-                records = await self._fetch_and_save_history(code, start_str, end_str)
+                records = await self._fetch_and_save_history(code, start_str, end_str, writer)
                 if records > 0:
                     success_count += 1
                 
@@ -423,7 +474,11 @@ class StockHistoryService:
                 if error_count <= 10:
                     logger.warn(f"[BG Task] Failed deep backfill for {code}: {e}")
                     
+        await writer.flush()
+        success_count = writer.stocks_written
+
         logger.info(f"✅ [BG Task] Deep backfill complete: {success_count}/{len(codes)} stocks enriched")
+        await self.refresh_hot_window()
     
 
     
@@ -515,9 +570,14 @@ class StockHistoryService:
         self, 
         code: str, 
         start_date: str, 
-        end_date: str
+        end_date: str,
+        writer: Optional[HistoryBulkWriter] = None,
     ) -> int:
-        """Fetch history for a single stock and save to database using DataProvider."""
+        """Fetch history for a single stock and save to database using DataProvider.
+
+        With a writer, the bars are buffered there and written together with
+        other stocks' bars; otherwise they are written immediately.
+        """
         if not db.pool:
             return 0
         
@@ -537,53 +597,15 @@ class StockHistoryService:
             now = china_now()
             is_pre_market = now.time() < datetime.strptime("09:30", "%H:%M").time()
             
-            records = []
-            for item in data_list:
-                date_val = item['date']
-                
-                # Validation: Skip future dates
-                if date_val > today:
-                    continue
-                
-                # Validation: Skip today's data if pre-market (09:30)
-                if date_val == today and is_pre_market:
-                    continue
-                
-                record = (
-                    code,
-                    date_val,
-                    item['open'],
-                    item['high'],
-                    item['low'],
-                    item['close'],
-                    item['volume'],
-                    item['turnover'],  # turnover (amount)
-                    item.get('amplitude', 0.0),
-                    item.get('change_pct', 0.0),
-                    item.get('change_amt', 0.0),
-                    item.get('turnover_rate', 0.0),
-                )
-                records.append(record)
+            # Validation: skip future dates, and today's bar if pre-market (09:30)
+            last_day = today - timedelta(days=1) if is_pre_market else today
+            records = bars_to_records(code, data_list, skip_after=last_day)
             
-            # Batch insert with upsert
             if records:
-                await db.pool.executemany("""
-                    INSERT INTO stock_history 
-                    (code, date, open, high, low, close, volume, turnover, 
-                     amplitude, change_pct, change_amt, turnover_rate)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-                    ON CONFLICT (code, date) DO UPDATE SET
-                        open = EXCLUDED.open,
-                        high = EXCLUDED.high,
-                        low = EXCLUDED.low,
-                        close = EXCLUDED.close,
-                        volume = EXCLUDED.volume,
-                        turnover = EXCLUDED.turnover,
-                        amplitude = EXCLUDED.amplitude,
-                        change_pct = EXCLUDED.change_pct,
-                        change_amt = EXCLUDED.change_amt,
-                        turnover_rate = EXCLUDED.turnover_rate
-                """, records)
+                if writer is not None:
+                    await writer.add(records)
+                else:
+                    await copy_history(db.pool, records)
             
             return len(records)
             
@@ -609,6 +631,8 @@ class StockHistoryService:
         if not codes:
             return
         
+        writer = HistoryBulkWriter(db.pool)
+
         # Concurrency control
         sem = asyncio.Semaphore(5)
         
@@ -633,7 +657,7 @@ class StockHistoryService:
                 # Random sleep to prevent IP blocking
                 await asyncio.sleep(random.uniform(0.5, 1.5))
                 try:
-                    records = await self._fetch_and_save_history(code, date_str, date_str)
+                    records = await self._fetch_and_save_history(code, date_str, date_str, writer)
                     if records > 0:
                         success_count += 1
                 except Exception as e:
@@ -664,6 +688,9 @@ class StockHistoryService:
         tasks = [update_one(code) for code in codes]
         await asyncio.gather(*tasks)
         
+        await writer.flush()
+        success_count = writer.stocks_written
+
         # Invalidate cache after update
         await self.invalidate_stock_cache()
         
@@ -757,24 +784,22 @@ class StockHistoryService:
             await progress_callback("数据同步", 0, 100, f"⏳ 正在批量获取实时数据 ({date_str})...")
             
         try:
-            # Fetch all spot data using data provider (respects rate limits/circuit breaker)
-            from app.services.data_provider.service import data_provider
+            # Fetch all spot data through the shared snapshot (data provider with
+            # rate limits/circuit breaker underneath)
+            from app.services.spot_snapshot import spot_snapshot
             
-            logger.info("Calling data_provider.get_all_spot_data()...")
-            df = await data_provider.get_all_spot_data()
+            logger.info("Fetching market spot snapshot...")
+            df = await spot_snapshot.get_frame(max_age=60)
             
             if df is None or df.empty:
                 logger.error("Batch update failed: API returned empty data or circuit open")
                 return False
                 
-            # Filter valid A-share stocks
+            # Valid A-share stocks, converted column-wise
             # A-share codes: 00xxxx (SZ), 30xxxx (创业板), 60xxxx (SH), 68xxxx (科创板)
-            df_filtered = df[
-                ~df['名称'].str.contains('ST|退', na=False) &
-                (df['代码'].str.match(r'^[036]'))
-            ].copy()
+            records = spot_to_records(df, trade_date)
             
-            total_stocks = len(df_filtered)
+            total_stocks = len(records)
             logger.info(f"Got {total_stocks} valid stocks from API")
 
             if progress_callback:
@@ -795,37 +820,6 @@ class StockHistoryService:
             except Exception as e:
                 logger.warn(f"Failed to validate snapshot size: {e}")
 
-            # Prepare records for bulk insert
-            records = []
-            for _, row in df_filtered.iterrows():
-                try:
-                    # Map columns
-                    # '最新价'->close, '今开'->open, '最高'->high, '最低'->low
-                    # '成交量'->volume, '成交额'->turnover
-                    # '涨跌幅'->change_pct, '换手率'->turnover_rate, '振幅'->amplitude
-                    
-                    code = str(row['代码'])
-                    close = float(row['最新价'])
-                    open_price = float(row['今开'])
-                    high = float(row['最高'])
-                    low = float(row['最低'])
-                    volume = float(row['成交量']) if pd.notna(row['成交量']) else 0.0
-                    turnover = float(row['成交额']) if pd.notna(row['成交额']) else 0.0
-                    change_pct = float(row['涨跌幅'])
-                    turnover_rate = float(row['换手率']) if pd.notna(row['换手率']) else 0.0
-                    amplitude = float(row['振幅']) if pd.notna(row['振幅']) else 0.0
-                    
-                    # Basic validation
-                    if close <= 0 or open_price <= 0:
-                        continue
-                        
-                    records.append((
-                        code, trade_date, open_price, high, low, close, 
-                        volume, turnover, change_pct, turnover_rate, amplitude
-                    ))
-                except Exception:
-                    continue
-            
             if not records:
                 logger.warn("No valid records to insert")
                 return False
@@ -835,25 +829,13 @@ class StockHistoryService:
             if progress_callback:
                 await progress_callback("数据同步", 50, 100, f"⏳ 正在写入 {len(records)} 条数据...")
                 
-            async with db.pool.acquire() as conn:
-                await conn.executemany("""
-                    INSERT INTO stock_history (
-                        code, date, open, high, low, close, 
-                        volume, turnover, change_pct, turnover_rate, amplitude
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                    ON CONFLICT (code, date) DO UPDATE SET
-                        open = EXCLUDED.open,
-                        high = EXCLUDED.high,
-                        low = EXCLUDED.low,
-                        close = EXCLUDED.close,
-                        volume = EXCLUDED.volume,
-                        turnover = EXCLUDED.turnover,
-                        change_pct = EXCLUDED.change_pct,
-                        turnover_rate = EXCLUDED.turnover_rate,
-                        amplitude = EXCLUDED.amplitude
-                """, records)
-                
-            logger.info(f"✅ Batch update complete: {len(records)} records inserted")
+            started = time.perf_counter()
+            written = await copy_history(db.pool, records, SPOT_BATCH_COLUMNS)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"✅ Batch update complete: {written} records inserted in {elapsed:.2f}s "
+                f"({written / max(elapsed, 1e-9):,.0f} rows/s)"
+            )
             
             # Invalidate cache
             await self.invalidate_stock_cache()
@@ -884,21 +866,29 @@ class StockHistoryService:
             now = china_now()
             
             # 1. Remove future dates
-            res = await db.pool.execute("DELETE FROM stock_history WHERE date > $1", today)
-            count = int(res.split()[-1]) if res else 0
+            count = await self._delete_history("DELETE FROM stock_history WHERE date > $1", today)
             if count > 0:
                 logger.info(f"🧹 Cleaned up {count} future data records")
                 
             # 2. Remove today's data if before market open
             if now.time() < datetime.strptime("09:30", "%H:%M").time():
-                res = await db.pool.execute("DELETE FROM stock_history WHERE date = $1", today)
-                count = int(res.split()[-1]) if res else 0
+                count = await self._delete_history("DELETE FROM stock_history WHERE date = $1", today)
                 if count > 0:
                     logger.info(f"🧹 Cleaned up {count} premature today data records")
                     
         except Exception as e:
             logger.error(f"Failed to cleanup abnormal data: {e}")
 
+    async def _delete_history(self, query: str, *args) -> int:
+        """Run a stock_history DELETE and bump the data version in one transaction."""
+        async with db.pool.acquire() as conn:
+            async with conn.transaction():
+                res = await conn.execute(query, *args)
+                count = int(res.split()[-1]) if res else 0
+                if count > 0:
+                    await bump_history_version(conn)
+        return count
+
     async def get_latest_trading_date(self, target_date: date) -> Optional[date]:
         """Get the latest trading date <= target_date using DataProvider."""
         try:
@@ -978,6 +968,9 @@ class StockHistoryService:
         
         # Step 3: Final cleanup to ensure no future/premature data slipped in
         await self.cleanup_abnormal_data()
+
+        # Step 4: Rebuild the hot window from the synced data
+        await self.refresh_hot_window()
     
     async def _check_recent_data_integrity(
         self,
@@ -1062,6 +1055,8 @@ class StockHistoryService:
         today = china_today()
         end_str = today.strftime("%Y%m%d")
         
+        writer = HistoryBulkWriter(db.pool)
+
         # Concurrency control
         sem = asyncio.Semaphore(5)
         
@@ -1080,7 +1075,7 @@ class StockHistoryService:
                 # Random sleep to prevent IP blocking
                 await asyncio.sleep(random.uniform(0.5, 1.5))
                 try:
-                    records = await self._fetch_and_save_history(code, start_str, end_str)
+                    records = await self._fetch_and_save_history(code, start_str, end_str, writer)
                     if records > 0:
                         success_count += 1
                         # Log first few successes for debugging
@@ -1113,6 +1108,9 @@ class StockHistoryService:
         tasks = [fix_one(info) for info in stocks_to_fix]
         await asyncio.gather(*tasks)
         
+        await writer.flush()
+        success_count = writer.stocks_written
+
         if progress_callback:
             await progress_callback("完整性修复", len(stocks_to_fix), len(stocks_to_fix), f"✅ 修复完成: {success_count}/{len(stocks_to_fix)} 只股票")
         
@@ -1121,41 +1119,16 @@ class StockHistoryService:
 
         logger.info(f"✅ Integrity fix complete: {success_count}/{len(stocks_to_fix)} stocks fixed")
     
-    async def _scheduler_loop(self):
-        """Background scheduler for daily updates at 15:15 and nightly check at 03:00."""
-        update_time = "15:15"
-        nightly_time = "03:00"
-        triggered_today = set()
-        
-        while self.is_running:
-            try:
-                now = china_now()
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                # Reset triggered set at midnight
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                # Run daily update at 15:15 on weekdays (with integrity check)
-                update_key = f"{date_str}_update"
-                if now.weekday() < 5 and time_str == update_time and update_key not in triggered_today:
-                    triggered_today.add(update_key)
-                    logger.info("Triggering daily stock history sync with integrity check")
-                    asyncio.create_task(self.sync_with_integrity_check())
-                
-                # Run nightly integrity check at 03:00 (every day including weekends)
-                nightly_key = f"{date_str}_nightly"
-                if time_str == nightly_time and nightly_key not in triggered_today:
-                    triggered_today.add(nightly_key)
-                    logger.info("Triggering nightly data integrity check")
-                    asyncio.create_task(self.sync_with_integrity_check())
-                
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            # Check every 30 seconds
-            await asyncio.sleep(30)
+    def _register_jobs(self):
+        """Daily sync at 15:15 on trading days, integrity check at 03:00 every day."""
+        job_scheduler.register(Job(
+            "stock_history.sync", self.sync_with_integrity_check,
+            times=("15:15",), resources=("db",),
+        ), owner="stock_history")
+        job_scheduler.register(Job(
+            "stock_history.nightly", self.sync_with_integrity_check,
+            times=("03:00",), calendar=DAILY, resources=("db",),
+        ), owner="stock_history")
     
     # ─────────────────────────────────────────────────────────────────────────
     # Query Methods (for signal detection and trend analysis)
@@ -1193,7 +1166,29 @@ class StockHistoryService:
             except Exception:
                 pass  # Cache miss or error, fall through to DB
         
-        # Query database
+        # Hot window first (None when stale, too shallow or code absent)
+        result = None
+        if days <= settings.HISTORY_HOT_BARS:
+            try:
+                result = await get_hot_stock_history(db.pool, code, days)
+            except Exception as e:
+                logger.debug(f"Hot window read failed for {code}: {e}")
+
+        if result is None:
+            result = await self._query_stock_history(code, days)
+        
+        # Cache result (TTL 2 hours - data is relatively static)
+        if not skip_cache and db.redis and result:
+            try:
+                from app.core.database import get_cache
+                cache = get_cache()
+                await cache.set_json(cache_key, result, ttl=7200)  # 2 hours
+            except Exception:
+                pass  # Ignore cache errors
+        
+        return result
+    
+    async def _query_stock_history(self, code: str, days: int) -> List[Dict]:
         rows = await db.pool.fetch("""
             SELECT code, date, open, high, low, close, volume, 
                    turnover, change_pct, turnover_rate, amplitude
@@ -1215,18 +1210,14 @@ class StockHistoryService:
                 if record.get(key) is not None:
                     record[key] = float(record[key])
             result.append(record)
-        
-        # Cache result (TTL 2 hours - data is relatively static)
-        if not skip_cache and db.redis and result:
-            try:
-                from app.core.database import get_cache
-                cache = get_cache()
-                await cache.set_json(cache_key, result, ttl=7200)  # 2 hours
-            except Exception:
-                pass  # Ignore cache errors
-        
         return result
     
+    async def refresh_hot_window(self):
+        """Rebuild stock_history_hot (no-op when HISTORY_HOT_BARS is 0)."""
+        depth = hot_window_depth()
+        if db.pool and depth > 0:
+            await refresh_hot_window(db.pool, depth)
+
     async def invalidate_stock_cache(self, code: str = None):
         """Invalidate stock history cache.
         
@@ -6,9 +6,9 @@ Signal implementations are in app/services/scanner/signals/.
 """
 
 import asyncio
-import base64
 import concurrent.futures
 import atexit
+import multiprocessing
 from typing import List, Dict
 from collections import defaultdict
 
@@ -17,6 +17,10 @@ from app.core.database import db
 from app.core.config import settings
 from app.core.stock_links import get_chart_url
 from app.core.timezone import china_now, china_today
+from app.core.send_queue import PRIORITY_REPORT
+from app.services.scheduler import Job, job_scheduler
+from app.services.history_hot import get_history_version
+from app.services.scanner.loader import history_limit
 from app.services.scanner.utils import get_limit_up_threshold
 
 logger = Logger("StockScanner")
@@ -55,12 +59,40 @@ def _shutdown_scan_executor():
         _scan_executor.shutdown(wait=False, cancel_futures=True)
         _scan_executor = None
 
+# Worker pool for SCANNER_MODE=process
+_process_executor = None
+
+def _get_process_executor() -> concurrent.futures.ProcessPoolExecutor:
+    """Get or create the persistent worker pool for process-mode scans.
+    
+    Workers are spawned (not forked) so they never inherit the event loop,
+    DB pool or bot threads. Price data reaches them through shared memory
+    (see scanner/shared.py), so only codes and results are pickled.
+    """
+    global _process_executor
+    if _process_executor is None:
+        workers = max(1, settings.SCANNER_WORKERS)
+        logger.info(f"🔧 Creating scan worker pool ({workers} processes)...")
+        _process_executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        atexit.register(_shutdown_process_executor)
+    return _process_executor
+
+def _shutdown_process_executor():
+    """Shutdown the worker pool on process exit."""
+    global _process_executor
+    if _process_executor is not None:
+        logger.info("🔧 Shutting down scan worker pool...")
+        _process_executor.shutdown(wait=False, cancel_futures=True)
+        _process_executor = None
+
 class StockScanner:
     """Service for scanning stocks with modular signal detection."""
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._ak = None
         self._pd = None
         self._last_scan_signature = None
@@ -71,6 +103,9 @@ class StockScanner:
         # Data cache (independent of signals)
         self._cached_stocks_data = None
         self._cached_data_signature = None
+        
+        # Incremental scan state (SCANNER_INCREMENTAL)
+        self._rolling_state = None
 
     @property
     def last_scan_used_cache(self) -> bool:
@@ -95,44 +130,21 @@ class StockScanner:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Stock Scanner started")
     
     async def stop(self):
         """Stop the scanner."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("scanner")
         logger.info("Stock Scanner stopped")
     
-    async def _scheduler_loop(self):
-        """Run scanner at 15:30 daily."""
-        triggered_today = set()
-        
-        while self.is_running:
-            try:
-                now = china_now()
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                key = f"{date_str}_scan"
-                
-                # Scan at 15:30 on weekdays
-                if now.weekday() < 5 and time_str == "15:30" and key not in triggered_today:
-                    triggered_today.add(key)
-                    asyncio.create_task(self.scan_and_report())
-                    
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            await asyncio.sleep(30)
+    def _register_jobs(self):
+        """Scan at 15:30 on trading days, once the history sync is done."""
+        job_scheduler.register(Job(
+            "scanner.scan", self.scan_and_report, times=("15:30",),
+            after=("stock_history.sync",), resources=("db",),
+        ), owner="scanner")
     
     async def scan_and_report(self):
         """Scan all stocks and send report."""
@@ -171,7 +183,7 @@ class StockScanner:
                 text += f"  ...及其他 {len(stocks) - 8} 只\n"
             text += "\n"
         
-        await telegram_service.send_message(settings.STOCK_ALERT_CHANNEL, text, parse_mode="html")
+        await telegram_service.send_message(settings.STOCK_ALERT_CHANNEL, text, parse_mode="html", priority=PRIORITY_REPORT)
         logger.info(f"Sent scan report with {sum(len(v) for v in signals.values())} signals")
     
         self._last_scan_used_cache = False
@@ -196,6 +208,8 @@ class StockScanner:
             logger.info(f"🔍 Starting scan_all_stocks ({sig_desc})")
             self._last_scan_used_cache = False
             
+            if settings.SCANNER_INCREMENTAL:
+                return await self._scan_incremental(force=force, progress_callback=progress_callback, enabled_signals=enabled_signals)
             return await self._scan_impl(force=force, progress_callback=progress_callback, enabled_signals=enabled_signals)
             
         except Exception as e:
@@ -209,7 +223,6 @@ class StockScanner:
     async def _scan_impl(self, force: bool = False, progress_callback=None, enabled_signals: List[str] = None) -> Dict[str, List[Dict]]:
         """Internal scan implementation with batch scanning to reduce memory usage."""
         from app.services.scanner import SignalRegistry
-        import functools
         
         _, pd = self._get_libs()
         if not pd:
@@ -229,41 +242,26 @@ class StockScanner:
         else:
             active_signals = SignalRegistry.get_all(enabled_only=True)
         
-        limit = 150
-        if active_signals:
-            limit = max((s.min_bars for s in active_signals), default=150)
-        
-        limit = max(limit, 150) + 20
-        bucket_size = 300
-        bucketed_limit = ((limit + bucket_size - 1) // bucket_size) * bucket_size
+        bucketed_limit = history_limit(active_signals)
         
         try:
             today = china_today()
             logger.info(f"📅 Scan date: {today}")
             
-            # Check cache signature
-            logger.info("📋 Checking cache signature...")
-            count_row = await db.pool.fetchrow("""
-                SELECT MAX(date) as max_date, 
-                       COUNT(DISTINCT code) as stock_count,
-                       SUM(volume) as total_vol
-                FROM stock_history
-                WHERE date >= $1::date - INTERVAL '7 days'
-            """, today)
-            
-            max_date = count_row['max_date'] if count_row else None
-            max_date_count = count_row['stock_count'] if count_row else 0
-            total_vol = count_row['total_vol'] or 0
+            # Check cache signature (data version bumped by every stock_history write)
+            state = await get_history_version(db.pool)
+            max_date = state['max_date'] if state else None
+            data_version = state['version'] if state else 0
             
             # 1. Check Result Cache
-            signature = (max_date, max_date_count, total_vol, str(enabled_signals)) if max_date else None
+            signature = (max_date, data_version, str(enabled_signals)) if max_date else None
             if not force and signature and self._last_signals is not None and signature == self._last_scan_signature:
                 logger.info("♻️ Using cached scan results")
                 self._last_scan_used_cache = True
                 return self._last_signals
             
             # 2. Load stock universe and decide streaming strategy
-            data_signature = (max_date, max_date_count, total_vol, bucketed_limit) if max_date else None
+            data_signature = (max_date, data_version, bucketed_limit) if max_date else None
             codes, stock_names = await self._get_scan_codes(today)
             if not codes:
                 logger.warn("⚠️ No stock codes available for scanning")
@@ -315,16 +313,9 @@ class StockScanner:
                         self._append_top_gainers(hist, code, name, temp_5d, temp_10d, temp_20d)
 
                     if batch_data:
-                        task = functools.partial(
-                            run_scan_sync_wrapper,
-                            batch_data,
-                            batch_names,
-                            enabled_signals
-                        )
-
                         try:
                             batch_results = await asyncio.wait_for(
-                                loop.run_in_executor(executor, task),
+                                self._scan_batch(loop, executor, batch_data, batch_names, enabled_signals),
                                 timeout=300.0
                             )
                             for sig, items in batch_results.items():
@@ -354,30 +345,28 @@ class StockScanner:
                     logger.info(f"♻️ Using cached stock data (limit={bucketed_limit})")
                     stocks_data, stock_names = self._cached_stocks_data
                 else:
-                    # Try Redis
-                    redis_key = f"scanner:data:v3:{max_date}:{max_date_count}:{total_vol}:{bucketed_limit}"
+                    # Try Redis (binary columnar cache, see scanner/cache.py)
+                    from app.services.scanner.cache import ScanDatasetCache
+                    dataset_key = f"{max_date}:v{data_version}:{bucketed_limit}"
+                    dataset_cache = ScanDatasetCache(db.redis_bytes, compression=settings.SCANNER_CACHE_COMPRESSION) if db.redis_bytes else None
                     loaded_from_redis = False
-                    if db.redis and not force:
+                    if dataset_cache and not force:
                         try:
-                            cached_blob = await db.redis.get(redis_key)
-                            if cached_blob:
+                            cached = await dataset_cache.load(dataset_key)
+                            if cached:
                                 logger.info("♻️ Using Redis cached stock data")
-                                import pickle
-                                cached_bytes = base64.b64decode(cached_blob)
-                                stocks_data, stock_names = pickle.loads(cached_bytes)
+                                stocks_data, stock_names = cached
                                 loaded_from_redis = True
                         except Exception as e:
                             logger.error(f"Redis cache error: {e}")
 
                     if not loaded_from_redis:
-                        logger.info(f"📥 Loading stock data from DB (requested={limit})...")
+                        logger.info(f"📥 Loading stock data from DB (requested={bucketed_limit})...")
                         stocks_data = await self._get_local_history_batch(codes, progress_callback, limit=bucketed_limit)
-                        if db.redis and stocks_data:
+                        if dataset_cache and stocks_data:
                             try:
-                                import pickle
-                                blob_bytes = pickle.dumps((stocks_data, stock_names))
-                                blob_str = base64.b64encode(blob_bytes).decode('utf-8')
-                                await db.redis.setex(redis_key, 86400, blob_str)
+                                written = await dataset_cache.save(dataset_key, stocks_data, stock_names)
+                                logger.info(f"💾 Cached scan dataset in Redis ({written / 1024 / 1024:.1f} MB)")
                             except Exception as e:
                                 logger.error(f"Failed to save to Redis: {e}")
 
@@ -404,16 +393,9 @@ class StockScanner:
                     batch_data = {code: stocks_data[code] for code in batch_codes}
                     batch_names = {code: stock_names.get(code, code) for code in batch_codes}
 
-                    task = functools.partial(
-                        run_scan_sync_wrapper,
-                        batch_data,
-                        batch_names,
-                        enabled_signals
-                    )
-
                     try:
                         batch_results = await asyncio.wait_for(
-                            loop.run_in_executor(executor, task),
+                            self._scan_batch(loop, executor, batch_data, batch_names, enabled_signals),
                             timeout=300.0
                         )
                         for sig, items in batch_results.items():
@@ -456,6 +438,141 @@ class StockScanner:
 
 
 
+    async def _scan_incremental(self, force: bool = False, progress_callback=None, enabled_signals: List[str] = None) -> Dict[str, List[Dict]]:
+        """Scan by advancing the persisted rolling state with new bars.
+        
+        Signals implementing detect_rolling (currently breakout, volume and
+        ma_bullish) are evaluated from the state. The others, and any whose
+        detect_rolling fails, run through _scan_impl on full history and are
+        merged in; history is only skipped when none remain. The state is
+        rebuilt from history when missing, when force is set, and (with
+        SCANNER_INCREMENTAL_VERIFY) after every update as a consistency check.
+        """
+        from app.services.scanner import SignalRegistry, run_rolling_scan, build_multi_signal
+        from app.services.scanner.incremental import fetch_new_bars, load_rolling_state, save_rolling_state
+        
+        if not db.pool:
+            logger.error("❌ Database not connected, cannot scan")
+            return {}
+        
+        try:
+            today = china_today()
+            codes, stock_names = await self._get_scan_codes(today)
+            if not codes:
+                logger.warn("⚠️ No stock codes available for scanning")
+                return {}
+            
+            window = settings.SCANNER_INCREMENTAL_WINDOW
+            state = self._rolling_state
+            if state is None and not force:
+                state = await load_rolling_state(db.pool)
+            if state is not None and state.window != window:
+                state = None
+            
+            if state is None or force:
+                logger.info(f"🔁 Rebuilding rolling state ({len(codes)} stocks, {window} bars)")
+                state = await self._rebuild_rolling_state(codes, window)
+            else:
+                new_bars = await fetch_new_bars(db.pool, state, codes)
+                applied = state.advance(new_bars)
+                missing = [c for c in codes if c not in state]
+                if missing:
+                    state.extend(await self._rebuild_rolling_state(missing, window))
+                logger.info(f"➕ Rolling state advanced by {applied} bars, {len(missing)} new stocks")
+                
+                if settings.SCANNER_INCREMENTAL_VERIFY:
+                    rebuilt = await self._rebuild_rolling_state(codes, window)
+                    mismatched = state.compare(rebuilt)
+                    if mismatched:
+                        logger.warn(f"⚠️ Rolling state differs from rebuild for {len(mismatched)} stocks (e.g. {mismatched[:5]}), using rebuild")
+                        state = rebuilt
+            
+            self._rolling_state = state
+            await save_rolling_state(db.pool, state)
+            
+            rolling_results, remaining = run_rolling_scan(state, stock_names, codes=codes, enabled_signals=enabled_signals)
+            
+            if remaining:
+                logger.info(f"📥 {len(remaining)} signal(s) need full history: {remaining}")
+                history_results = await self._scan_impl(force=force, progress_callback=progress_callback, enabled_signals=remaining)
+                history_results.pop("multi_signal", None)
+            else:
+                history_results = await self._rolling_top_gainers(state, codes, stock_names)
+                if progress_callback:
+                    await progress_callback(len(codes), len(codes), phase="scanning")
+            
+            # Registry order first, then top gainers, as _scan_impl returns them
+            final_results = {}
+            for signal in SignalRegistry.get_all(enabled_only=True):
+                sig_id = signal.signal_id
+                if enabled_signals and sig_id not in enabled_signals:
+                    continue
+                final_results[sig_id] = rolling_results.get(sig_id, history_results.get(sig_id, []))
+            for key, items in history_results.items():
+                final_results.setdefault(key, items)
+            final_results["multi_signal"] = build_multi_signal(final_results, stock_names, codes)
+            
+            self._last_signals = final_results
+            total_signals = sum(len(v) for v in final_results.values())
+            logger.info(f"✅ Incremental scan complete: {total_signals} signals found")
+            return final_results
+        
+        except Exception as e:
+            logger.error(f"❌ Incremental scan error: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return {}
+
+    async def _rebuild_rolling_state(self, codes: List[str], window: int):
+        """Build rolling state from scratch from the latest `window` bars."""
+        from app.services.scanner.loader import load_history_columnar
+        from app.services.scanner.incremental import RollingState
+        
+        history, _ = await load_history_columnar(db.pool, codes, limit=window)
+        return RollingState.from_history(history, window)
+
+    async def _rolling_top_gainers(self, state, codes: List[str], stock_names: dict) -> dict:
+        """Top gainers from the close windows of the rolling state."""
+        _, pd = self._get_libs()
+        temp_5d = []
+        temp_10d = []
+        temp_20d = []
+
+        for code, row in zip([c for c in codes if c in state], state.rows_for(codes)):
+            closes = state.close[row, -min(int(state.lengths[row]), 21):]
+            if not len(closes):
+                continue
+            hist = pd.DataFrame({'收盘': closes})
+            self._append_top_gainers(hist, code, stock_names.get(code, code), temp_5d, temp_10d, temp_20d)
+
+        return self._build_top_gainers(temp_5d, temp_10d, temp_20d)
+
+    def _scan_batch(self, loop, executor, batch_data, batch_names, enabled_signals):
+        """Awaitable scanning one batch in the configured SCANNER_MODE.
+        
+        thread: run_scan_sync_wrapper on the shared thread executor.
+        process: slices of the batch on the worker pool via shared memory.
+        """
+        if settings.SCANNER_MODE == "process":
+            from app.services.scanner.shared import run_scan_in_processes
+            return run_scan_in_processes(
+                _get_process_executor(),
+                batch_data,
+                batch_names,
+                enabled_signals=enabled_signals,
+                workers=max(1, settings.SCANNER_WORKERS),
+                engine=settings.SCANNER_ENGINE,
+            )
+        
+        import functools
+        task = functools.partial(
+            run_scan_sync_wrapper,
+            batch_data,
+            batch_names,
+            enabled_signals
+        )
+        return loop.run_in_executor(executor, task)
+
     async def _get_scan_codes(self, today) -> tuple:
         """Fetch stock codes and names for scanning."""
         rows = await db.pool.fetch("""
@@ -502,7 +619,9 @@ class StockScanner:
     async def _get_local_history_batch(self, codes: List[str], progress_callback=None, limit: int = 150) -> Dict[str, any]:
         """Fetch recent history for multiple stocks from local database.
         
-        Processes in batches of 300 codes to avoid blocking.
+        Processes in batches of 300 codes to avoid blocking. Rows are decoded
+        into shared columnar arrays (see scanner.loader); each returned
+        DataFrame is a view over them.
         Returns a dict mapping code -> DataFrame.
         """
         if not db.pool:
@@ -513,67 +632,23 @@ class StockScanner:
             return {}
         
         try:
-            min_rows = 21
-            max_rows = limit
-            batch_size = 300
+            from app.services.scanner.loader import load_history_columnar
             
-            result = {}
-            total_codes = len(codes)
-            total_batches = (total_codes + batch_size - 1) // batch_size
-            
-            # Process in batches
-            for batch_start in range(0, total_codes, batch_size):
-                batch_end = min(batch_start + batch_size, total_codes)
-                batch_codes = codes[batch_start:batch_end]
-                batch_num = batch_start // batch_size + 1
-                
-                logger.info(f"📥 Fetching batch {batch_num}/{total_batches}: {len(batch_codes)} codes...")
-                
-                # Report progress to user
-                if progress_callback:
-                    try:
-                        await progress_callback(batch_num, total_batches, phase="loading")
-                    except Exception:
-                        pass
-                
-                rows = await db.pool.fetch("""
-                    SELECT code, date, open, high, low, close, volume, turnover_rate
-                    FROM (
-                        SELECT code, date, open, high, low, close, volume, turnover_rate,
-                               ROW_NUMBER() OVER (PARTITION BY code ORDER BY date DESC) AS rn
-                        FROM stock_history
-                        WHERE code = ANY($1)
-                    ) t
-                    WHERE rn <= $2
-                    ORDER BY code, date DESC
-                """, batch_codes, max_rows)
-                
-                if not rows:
-                    continue
-                
-                # Process rows
-                by_code = defaultdict(list)
-                for row in rows:
-                    by_code[row['code']].append(row)
-                
-                for code, code_rows in by_code.items():
-                    if len(code_rows) >= min_rows:
-                        df = pd.DataFrame([{
-                            '日期': r['date'],
-                            '开盘': float(r['open']),
-                            '收盘': float(r['close']),
-                            '最高': float(r['high']),
-                            '最低': float(r['low']),
-                            '成交量': float(r['volume']),
-                            '换手率': float(r['turnover_rate']) if r['turnover_rate'] is not None else 0.0,
-                        } for r in code_rows])
-                        df = df.sort_values('日期').reset_index(drop=True)
-                        result[code] = df
-                
-                # Yield to event loop between batches
-                await asyncio.sleep(0)
+            history, stats = await load_history_columnar(
+                db.pool,
+                codes,
+                limit=limit,
+                batch_size=300,
+                progress_callback=progress_callback,
+                hot=settings.HISTORY_HOT_BARS > 0,
+            )
+            result = history.frames(min_rows=21)
             
-            logger.info(f"✅ Loaded {len(result)} stocks from local DB")
+            logger.info(
+                f"✅ Loaded {len(result)} stocks from local DB ({stats['source']}): {stats['rows']} bars "
+                f"in {stats['load_seconds']:.2f}s, {stats['column_mb']:.1f} MB columns, "
+                f"peak RSS {stats['peak_rss_mb']:.0f} MB"
+            )
             return result
 
         except Exception as e:
@@ -667,15 +742,18 @@ def run_scan_sync_wrapper(stocks_data, stock_names, enabled_signals):
     
     Creates a new event loop for the thread since run_scan is async.
     With ThreadPoolExecutor, data is shared (not pickled), saving memory.
+    settings.SCANNER_ENGINE selects the per-stock or the panel engine.
     """
     import asyncio
-    from app.services.scanner import run_scan
+    from app.services.scanner import run_scan, run_panel_scan
+    
+    engine = run_panel_scan if settings.SCANNER_ENGINE == "panel" else run_scan
     
     try:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         results = loop.run_until_complete(
-            run_scan(stocks_data, stock_names, progress_callback=None, enabled_signals=enabled_signals)
+            engine(stocks_data, stock_names, progress_callback=None, enabled_signals=enabled_signals)
         )
         loop.close()
         return results
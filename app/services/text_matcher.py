@@ -0,0 +1,225 @@
+"""
+Text Matcher - Single-pass multi-category keyword and pattern matching.
+
+Filters used to test each keyword with `in` and each regex with its own
+search(), re-lowercasing the text per list. MultiMatcher compiles all
+categories once and reports every category that occurs anywhere in the
+text:
+
+- Keywords, plus the purely literal top-level alternatives of patterns
+  (`利好|利多|...`), are merged into one trie emitted as a regex. A
+  trie-shaped alternation behaves like an Aho-Corasick goto function: each
+  text position costs one walk down the trie, inside the C regex engine,
+  and the engine can skip positions whose character starts no keyword
+  (keywords starting outside the BMP, i.e. emoji, go to the regex pass,
+  since they disable that skip).
+- The remaining (real) regex alternatives are joined into one combined
+  regex.
+- Each pass searches its gate regex for the next hit, then attributes the
+  hit to categories with a lookahead per category `(?=(...)?)`, so
+  overlapping hits from different categories are all recorded. A pass
+  stops as soon as all of its categories are found.
+
+Matching is case-insensitive: keywords against `text.lower()`, patterns
+with a scoped `(?i:...)`, like the `kw.lower() in text.lower()` and
+re.IGNORECASE checks it replaces. Patterns must not use backreferences
+(group numbers shift when combined).
+
+Usage:
+    matcher = MultiMatcher(keywords={"ad": ["广告", "promo"]}, patterns={"spam": [r"bit\\.ly/\\w+"]})
+    matcher.matches("限时广告 bit.ly/x")  # {"ad", "spam"}
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Characters that make a pattern alternative more than a literal string
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _trie_regex(words: Iterable[str]) -> Optional[str]:
+    """Regex source matching any of words, factored as a trie."""
+    trie: Dict = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict, root: bool = False) -> str:
+        terminal = "" in node
+        branches = []
+        singles = []
+        for ch, child in sorted(node.items()):
+            if not ch:
+                continue
+            tail = emit(child)
+            if tail:
+                branches.append(re.escape(ch) + tail)
+            else:
+                singles.append(re.escape(ch))
+        # Leaves collapse into one character class, except at the root: a
+        # class there stops the engine from skipping by first character
+        if len(singles) > 1 and not root:
+            branches.append("[" + "".join(singles) + "]")
+        else:
+            branches.extend(singles)
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return emit(trie, root=True) or None
+
+
+def _split_alternatives(pattern: str) -> List[str]:
+    """Split a regex on its top-level `|` (outside groups and classes)."""
+    parts = []
+    depth = 0
+    in_class = False
+    start = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            if ch == "]":
+                in_class = False
+        elif ch == "[":
+            in_class = True
+            # A leading ] (or ^]) is literal inside a class
+            if pattern[i + 1:i + 2] == "]":
+                i += 1
+            elif pattern[i + 1:i + 3] == "^]":
+                i += 2
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+class _Pass:
+    """One gate regex plus per-category attribution at each hit."""
+
+    def __init__(self, gate: str, sources: List[Tuple[Hashable, str]]):
+        self.gate = re.compile(gate)
+        self.categories = [category for category, _ in sources]
+        self.attribute = (
+            re.compile("".join(f"(?=({source})?)" for _, source in sources))
+            if len(sources) > 1 else None
+        )
+
+    def scan(self, text: str, found: Set[Hashable]):
+        if self.attribute is None:
+            if self.gate.search(text):
+                found.add(self.categories[0])
+            return
+
+        missing = set(self.categories) - found
+        pos = 0
+        while missing:
+            hit = self.gate.search(text, pos)
+            if hit is None:
+                break
+            groups = self.attribute.match(text, hit.start()).groups()
+            for category, value in zip(self.categories, groups):
+                if value is not None and category in missing:
+                    found.add(category)
+                    missing.discard(category)
+            pos = hit.start() + 1
+
+
+class MultiMatcher:
+    """
+    Compiled matcher for categorized keywords and regex patterns.
+
+    Args:
+        keywords: category -> literal keywords (matched case-insensitively)
+        patterns: category -> regex patterns (matched case-insensitively)
+
+    A category may have both keywords and patterns. Categories keep their
+    insertion order in `categories`, so callers can pick the first hit.
+    """
+
+    def __init__(
+        self,
+        keywords: Optional[Mapping[Hashable, Iterable[str]]] = None,
+        patterns: Optional[Mapping[Hashable, Iterable[str]]] = None,
+    ):
+        literals: Dict[Hashable, List[str]] = {}
+        regexes: Dict[Hashable, List[str]] = {}
+        for category, words in (keywords or {}).items():
+            literals.setdefault(category, []).extend(w.lower() for w in words if w)
+        for category, category_patterns in (patterns or {}).items():
+            literals.setdefault(category, [])
+            for pattern in category_patterns:
+                for alternative in _split_alternatives(pattern):
+                    if alternative and not _REGEX_META.intersection(alternative):
+                        literals[category].append(alternative.lower())
+                    else:
+                        regexes.setdefault(category, []).append(alternative)
+        for category, words in literals.items():
+            # A first character outside the BMP (emoji) stops the regex engine
+            # from skipping ahead by first-character set; match those as patterns
+            astral = [w for w in words if w[0] > "\uffff"]
+            if astral:
+                literals[category] = [w for w in words if w[0] <= "\uffff"]
+                regexes.setdefault(category, []).extend(re.escape(w) for w in astral)
+
+        self.categories: Tuple[Hashable, ...] = tuple(dict.fromkeys([*literals, *regexes]))
+
+        self._keyword_pass = None
+        keyword_sources = [
+            (category, source) for category, words in literals.items()
+            if (source := _trie_regex(words))
+        ]
+        if keyword_sources:
+            gate = _trie_regex(w for words in literals.values() for w in words)
+            self._keyword_pass = _Pass(gate, keyword_sources)
+
+        self._pattern_pass = None
+        # Scoped flag: IGNORECASE on the whole regex makes literal matching far slower
+        pattern_sources = [
+            (category, "|".join(f"(?i:{p})" for p in alternatives))
+            for category, alternatives in regexes.items()
+        ]
+        if pattern_sources:
+            self._pattern_pass = _Pass("|".join(s for _, s in pattern_sources), pattern_sources)
+
+    def matches(self, text: str) -> Set[Hashable]:
+        """All categories with at least one hit in text."""
+        found: Set[Hashable] = set()
+        if not text:
+            return found
+        if self._keyword_pass is not None:
+            self._keyword_pass.scan(text.lower(), found)
+        if self._pattern_pass is not None:
+            self._pattern_pass.scan(text, found)
+        return found
+
+    def first(self, text: str, categories: Optional[Iterable[Hashable]] = None) -> Optional[Hashable]:
+        """First category (in `categories` or definition order) that occurs in text."""
+        found = self.matches(text)
+        for category in (self.categories if categories is None else categories):
+            if category in found:
+                return category
+        return None
+
+
+@lru_cache(maxsize=8)
+def keyword_matcher(keywords: Tuple[str, ...]) -> MultiMatcher:
+    """Matcher for a single keyword list, rebuilt only when the list changes."""
+    return MultiMatcher(keywords={"keyword": keywords})
@@ -12,13 +12,13 @@ Also builds the reply graph for citation tracking.
 No LLM calls - all rule-based.
 """
 
-import re
 import hashlib
 from collections import defaultdict
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple, Any
 
 from app.core.logger import Logger
+from app.services.text_matcher import MultiMatcher
 from app.services.trader_influence.data_models import (
     AnnotatedMessage,
     MessageFeatures,
@@ -94,85 +94,65 @@ EMOTIONAL_PATTERNS = [
     r'aww+|wow+|omg|wtf|lmao|fuck',
 ]
 
-# Compile all patterns for efficiency
-def _compile_patterns(pattern_dict: Dict) -> Dict:
-    """Compile regex patterns for a category dict."""
-    return {
-        key: [re.compile(p, re.IGNORECASE) for p in patterns]
-        for key, patterns in pattern_dict.items()
-    }
-
-def _compile_list(patterns: List[str]) -> List:
-    """Compile a list of patterns."""
-    return [re.compile(p, re.IGNORECASE) for p in patterns]
-
-COMPILED_DIRECTION = _compile_patterns(DIRECTION_PATTERNS)
-COMPILED_ACTION = _compile_patterns(ACTION_PATTERNS)
-COMPILED_CONDITION = _compile_list(CONDITION_PATTERNS)
-COMPILED_HINDSIGHT = _compile_list(HINDSIGHT_PATTERNS)
-COMPILED_EMOTIONAL = _compile_list(EMOTIONAL_PATTERNS)
+# All feature patterns in one matcher, so a message is scanned once
+FEATURE_MATCHER = MultiMatcher(patterns={
+    **{('direction', k): v for k, v in DIRECTION_PATTERNS.items()},
+    **{('action', k): v for k, v in ACTION_PATTERNS.items()},
+    'condition': CONDITION_PATTERNS,
+    'hindsight': HINDSIGHT_PATTERNS,
+    'emotional': EMOTIONAL_PATTERNS,
+})
+DIRECTION_KEYS = [('direction', k) for k in DIRECTION_PATTERNS]
+ACTION_KEYS = [('action', k) for k in ACTION_PATTERNS]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # Feature Detection Functions
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def detect_direction(text: str) -> Tuple[bool, Optional[DirectionType]]:
+def detect_direction(text: str, hits: Optional[set] = None) -> Tuple[bool, Optional[DirectionType]]:
     """Detect if text contains direction words and which type."""
-    for direction_type, patterns in COMPILED_DIRECTION.items():
-        for pattern in patterns:
-            if pattern.search(text):
-                return True, direction_type
-    return False, None
+    key = FEATURE_MATCHER.first(text, DIRECTION_KEYS) if hits is None else next(
+        (k for k in DIRECTION_KEYS if k in hits), None
+    )
+    return (True, key[1]) if key else (False, None)
 
 
-def detect_action(text: str) -> Tuple[bool, Optional[ActionType]]:
+def detect_action(text: str, hits: Optional[set] = None) -> Tuple[bool, Optional[ActionType]]:
     """Detect if text contains action words and which type."""
-    for action_type, patterns in COMPILED_ACTION.items():
-        for pattern in patterns:
-            if pattern.search(text):
-                return True, action_type
-    return False, None
+    key = FEATURE_MATCHER.first(text, ACTION_KEYS) if hits is None else next(
+        (k for k in ACTION_KEYS if k in hits), None
+    )
+    return (True, key[1]) if key else (False, None)
 
 
 def detect_condition(text: str) -> bool:
     """Detect if text contains conditional statements."""
-    for pattern in COMPILED_CONDITION:
-        if pattern.search(text):
-            return True
-    return False
+    return 'condition' in FEATURE_MATCHER.matches(text)
 
 
 def detect_hindsight(text: str) -> bool:
     """Detect if text is a hindsight/post-hoc statement."""
-    for pattern in COMPILED_HINDSIGHT:
-        if pattern.search(text):
-            return True
-    return False
+    return 'hindsight' in FEATURE_MATCHER.matches(text)
 
 
 def detect_emotional(text: str) -> bool:
     """Detect if text is primarily emotional expression."""
-    for pattern in COMPILED_EMOTIONAL:
-        if pattern.search(text):
-            return True
-    return False
+    return 'emotional' in FEATURE_MATCHER.matches(text)
 
 
 def extract_features(text: str) -> MessageFeatures:
-    """Extract all features from message text."""
-    has_direction, direction_type = detect_direction(text)
-    has_action, action_type = detect_action(text)
-    has_condition = detect_condition(text)
-    is_hindsight = detect_hindsight(text)
-    is_emotional = detect_emotional(text)
+    """Extract all features from message text in one matcher pass."""
+    hits = FEATURE_MATCHER.matches(text)
+    has_direction, direction_type = detect_direction(text, hits)
+    has_action, action_type = detect_action(text, hits)
     
     return MessageFeatures(
         has_direction=has_direction,
         has_action=has_action,
-        has_condition=has_condition,
-        is_hindsight=is_hindsight,
-        is_emotional=is_emotional,
+        has_condition='condition' in hits,
+        is_hindsight='hindsight' in hits,
+        is_emotional='emotional' in hits,
         direction_type=direction_type,
         action_type=action_type,
     )
@@ -10,14 +10,16 @@ Automated trading simulation with:
 """
 
 import asyncio
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Dict, Optional, Tuple
 
 from app.core.logger import Logger
 from app.core.database import db
 from app.core.config import settings
-from app.core.timezone import CHINA_TZ, china_now, china_today
+from app.core.timezone import CHINA_TZ, china_today
+from app.services.scheduler import Job, job_scheduler
+from app.services.spot_snapshot import spot_snapshot
 
 logger = Logger("TradingSimulator")
 
@@ -37,7 +39,6 @@ class TradingSimulator:
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
         self._ak = None
         self._pd = None
         self._notify_callback = None  # Callback for user notifications
@@ -69,72 +70,26 @@ class TradingSimulator:
         if self.is_running:
             return
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Trading Simulator started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("trading_sim")
         logger.info("Trading Simulator stopped")
     
-    async def _scheduler_loop(self):
+    def _register_jobs(self):
         """Run at 10:00 (intraday check), 14:30 (T trade check), and 15:35 (daily close)."""
-        while self.is_running:
-            try:
-                now = china_now()
-                
-                # Define schedule times
-                schedules = [
-                    (10, 0, 'intraday'),   # Morning check
-                    (14, 30, 't_trade'),   # Afternoon T trade
-                    (15, 35, 'daily'),     # After close
-                ]
-                
-                # Find next schedule
-                next_time = None
-                next_task = None
-                
-                for hour, minute, task in schedules:
-                    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    if now >= target:
-                        continue
-                    if next_time is None or target < next_time:
-                        next_time = target
-                        next_task = task
-                
-                if next_time is None:
-                    # All done for today, schedule for tomorrow
-                    next_time = (now + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
-                    next_task = 'intraday'
-                
-                # Skip weekends
-                while next_time.weekday() >= 5:
-                    next_time += timedelta(days=1)
-                
-                wait_seconds = (next_time - now).total_seconds()
-                if wait_seconds > 0:
-                    logger.info(f"Next {next_task} at {next_time.strftime('%Y-%m-%d %H:%M')}")
-                    await asyncio.sleep(wait_seconds)
-                
-                # Execute task
-                if next_task == 'intraday':
-                    await self.intraday_check()
-                elif next_task == 't_trade':
-                    await self.check_t_trade_opportunity()
-                elif next_task == 'daily':
-                    await self.daily_routine()
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-                await asyncio.sleep(60)
+        job_scheduler.register(
+            Job("trading_sim.intraday", self.intraday_check, times=("10:00",)), owner="trading_sim"
+        )
+        job_scheduler.register(
+            Job("trading_sim.t_trade", self.check_t_trade_opportunity, times=("14:30",)), owner="trading_sim"
+        )
+        job_scheduler.register(Job(
+            "trading_sim.daily", self.daily_routine, times=("15:35",), after=("stock_history.sync",),
+        ), owner="trading_sim")
     
     async def daily_routine(self):
         """Daily trading routine: check positions, scan for new buys."""
@@ -316,17 +271,13 @@ class TradingSimulator:
     async def get_position_with_current_price(self, position: Dict) -> Dict:
         """Enrich position with current price and P&L."""
         try:
-            ak, pd = self._get_libs()
-            
             # Get current price
-            df = await asyncio.to_thread(
-                ak.stock_zh_a_spot_em
-            )
+            snap = await spot_snapshot.get()
             
-            if df is not None and not df.empty:
-                row = df[df['代码'] == position['code']]
-                if not row.empty:
-                    current_price = float(row.iloc[0]['最新价'])
+            if snap is not None:
+                row = snap.get(position['code'])
+                if row is not None:
+                    current_price = float(row['最新价'])
                     buy_price = float(position['buy_price'])
                     profit_pct = (current_price - buy_price) / buy_price * 100
                     profit_loss = (current_price - buy_price) * position['shares']
@@ -618,13 +569,12 @@ class TradingSimulator:
     async def _get_current_price(self, code: str) -> Optional[float]:
         """Get current stock price."""
         try:
-            ak, _ = self._get_libs()
-            df = await asyncio.to_thread(ak.stock_zh_a_spot_em)
+            snap = await spot_snapshot.get()
             
-            if df is not None and not df.empty:
-                row = df[df['代码'] == code]
-                if not row.empty:
-                    return float(row.iloc[0]['最新价'])
+            if snap is not None:
+                row = snap.get(code)
+                if row is not None:
+                    return float(row['最新价'])
         except Exception as e:
             logger.error(f"Failed to get price for {code}: {e}")
         return None
@@ -16,6 +16,7 @@ from app.core.database import db
 from app.core.config import settings
 from app.core.timezone import CHINA_TZ, china_now, china_today
 from app.core.telegram_utils import chunk_message
+from app.services.scheduler import Job, every, job_scheduler
 
 logger = Logger("WatchlistService")
 
@@ -25,8 +26,6 @@ class WatchlistService:
     
     def __init__(self):
         self.is_running = False
-        self._scheduler_task = None
-        self._scheduler_task = None
         self._unreachable_users = set()
 
     async def _send_chunked_message(self, bot, user_id: int, text: str, **kwargs):
@@ -51,18 +50,13 @@ class WatchlistService:
             return
         
         self.is_running = True
-        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
+        self._register_jobs()
         logger.info("✅ Watchlist Service started")
     
     async def stop(self):
         """Stop the service."""
         self.is_running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        job_scheduler.unregister("watchlist")
         logger.info("Watchlist Service stopped")
     
     # ─────────────────────────────────────────────────────────────────────────
@@ -498,46 +492,16 @@ class WatchlistService:
     # Scheduler
     # ─────────────────────────────────────────────────────────────────────────
     
-    async def _scheduler_loop(self):
-        """Background scheduler for watchlist reports."""
-        closing_time = "15:05"
-        
-        triggered_today = set()
-        last_intraday_min = -1
-        
-        while self.is_running:
-            try:
-                now = china_now()
-                time_str = now.strftime("%H:%M")
-                date_str = now.strftime("%Y-%m-%d")
-                
-                if time_str == "00:00":
-                    triggered_today.clear()
-                
-                # 1. Closing Report (15:05)
-                closing_key = f"{date_str}_closing"
-                if now.weekday() < 5 and time_str == closing_time and closing_key not in triggered_today:
-                    triggered_today.add(closing_key)
-                    asyncio.create_task(self.send_closing_reports())
-                
-                # 2. Intraday Report (Every 10 mins during trading)
-                # Trading hours: 09:30-11:30, 13:00-15:00
-                is_trading = (
-                    (now.hour == 9 and now.minute >= 30) or
-                    (now.hour == 10) or
-                    (now.hour == 11 and now.minute <= 30) or
-                    (now.hour >= 13 and now.hour < 15)
-                )
-                
-                if now.weekday() < 5 and is_trading:
-                    if now.minute % 10 == 0 and now.minute != last_intraday_min:
-                        last_intraday_min = now.minute
-                        asyncio.create_task(self.send_intraday_reports())
-                    
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-            
-            await asyncio.sleep(30)
+    def _register_jobs(self):
+        """Closing report at 15:05, intraday reports every 10 minutes in
+        trading hours (09:30-11:30, 13:00-14:50)."""
+        job_scheduler.register(
+            Job("watchlist.closing", self.send_closing_reports, times=("15:05",)), owner="watchlist"
+        )
+        job_scheduler.register(Job(
+            "watchlist.intraday", self.send_intraday_reports,
+            times=every(10, "09:30", "11:30") + every(10, "13:00", "14:50"),
+        ), owner="watchlist")
 
 
 # Singleton
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Lookup Benchmark
+
+Compares the SimHashIndex lookup used by MessageDeduplicator with the
+linear scan over all stored fingerprints it replaced.
+
+Usage:
+    python scripts/bench_dedup.py [--sizes 5000,50000,500000] [--queries 1000]
+                                  [--threshold 0.85] [--key-blocks 2]
+    python scripts/bench_dedup.py --methods [--texts FILE]
+
+Fingerprints are random 64-bit values (the SimHash of unrelated messages
+is close to uniform). Half the queries are near copies of stored
+fingerprints, half are unrelated. The linear scan is timed on fewer
+queries at large sizes.
+
+--methods compares the SimHash fingerprinting methods instead: dedup rate
+and per-message latency of MessageDeduplicator on each. FILE holds one
+message per line (e.g. exported channel traffic); without it, lightly
+edited copies of built-in headlines are used, so every edit is a known
+near duplicate.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.services.message_dedup import (
+    MessageDeduplicator, SimHash, SimHashIndex, SIMHASH_METHODS, max_distance_for,
+)
+
+SAMPLE_HEADLINES = [
+    "【快讯】宁德时代公告：2024年一季度净利润同比增长7%，超市场预期。",
+    "央行今日开展1000亿元逆回购操作，中标利率维持1.8%不变。",
+    "北向资金今日净买入56.3亿元，其中沪股通净买入32.1亿元，深股通净买入24.2亿元。",
+    "光伏板块午后拉升，隆基绿能涨超5%，通威股份、TCL中环跟涨，机构称行业出清接近尾声。",
+    "美联储主席鲍威尔表示，在对通胀回落至2%更有信心之前，不适合降息。",
+    "工信部：将加快推进6G技术研发，支持企业开展关键核心技术攻关。",
+    "Bitcoin climbs above $70,000 as ETF inflows hit a weekly record",
+    "Nvidia shares rise 4% after earnings beat on data center demand",
+]
+
+
+def linear_scan(fingerprint: int, stored: list, threshold: float) -> bool:
+    """The pre-index lookup: compare against every stored fingerprint."""
+    for existing in stored:
+        if SimHash.similarity(fingerprint, existing) >= threshold:
+            return True
+    return False
+
+
+def make_queries(rng: random.Random, stored: list, count: int, max_distance: int) -> list:
+    queries = []
+    for i in range(count):
+        if i % 2:
+            queries.append(rng.getrandbits(64))
+            continue
+        fp = rng.choice(stored)
+        for bit in rng.sample(range(64), rng.randint(0, max_distance)):
+            fp ^= 1 << bit
+        queries.append(fp)
+    return queries
+
+
+def bench(size: int, queries: int, threshold: float, key_blocks: int, seed: int = 1):
+    rng = random.Random(seed)
+    max_distance = max_distance_for(threshold)
+    stored = [rng.getrandbits(64) for _ in range(size)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = SimHashIndex(max_distance, key_blocks=key_blocks)
+    for fp in stored:
+        index.add(fp)
+    build = time.perf_counter() - start
+    index_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    query_fps = make_queries(rng, stored, queries, max_distance)
+
+    start = time.perf_counter()
+    indexed_hits = [index.find(q) is not None for q in query_fps]
+    indexed_us = (time.perf_counter() - start) / len(query_fps) * 1e6
+
+    linear_count = max(10, min(len(query_fps), 5_000_000 // size))
+    start = time.perf_counter()
+    linear_hits = [linear_scan(q, stored, threshold) for q in query_fps[:linear_count]]
+    linear_us = (time.perf_counter() - start) / linear_count * 1e6
+
+    assert linear_hits == indexed_hits[:linear_count], "index disagrees with linear scan"
+
+    # Eviction cost at steady state: add one, evict one
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.add(rng.getrandbits(64))
+        index.evict(size)
+    churn_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    print(
+        f"{size:>8,} | {index.table_count:>6} | {build:>7.2f}s | {index_mb:>7.1f} MB | "
+        f"{indexed_us:>9.1f}us | {linear_us:>10.1f}us | {linear_us / indexed_us:>6.0f}x | {churn_us:>7.1f}us"
+    )
+
+
+def sample_messages(copies: int = 50, seed: int = 2) -> list:
+    """Each headline followed by lightly edited copies (2 character edits)."""
+    rng = random.Random(seed)
+    noise = "的了是在有和！，"
+    messages = []
+    for headline in SAMPLE_HEADLINES:
+        messages.append(headline)
+        for _ in range(copies):
+            chars = list(headline)
+            for _ in range(2):
+                i = rng.randrange(len(chars))
+                op = rng.random()
+                if op < 0.4:
+                    chars[i] = rng.choice(noise)
+                elif op < 0.7:
+                    del chars[i]
+                else:
+                    chars.insert(i, rng.choice(noise))
+            messages.append("".join(chars))
+    return messages
+
+
+def compare_methods(messages: list, threshold: float):
+    print(f"{len(messages)} messages, threshold={threshold}")
+    print("  method | exact | near | dedup rate | us/message")
+    for method in SIMHASH_METHODS:
+        dedup = MessageDeduplicator(
+            max_cache_size=max(len(messages), 1), similarity_threshold=threshold,
+            min_text_length=10, simhash_method=method,
+        )
+        start = time.perf_counter()
+        for text in messages:
+            dedup.is_duplicate(text)
+        elapsed = time.perf_counter() - start
+        stats = dedup.get_stats()
+        print(
+            f"{method:>8} | {stats['exact_duplicates']:>5} | {stats['near_duplicates']:>4} | "
+            f"{stats['dedup_rate']:>10.1%} | {elapsed / len(messages) * 1e6:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SimHashIndex against a linear scan")
+    parser.add_argument("--sizes", default="5000,50000,500000", help="Comma-separated fingerprint counts")
+    parser.add_argument("--queries", type=int, default=1000, help="Queries per size")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Similarity threshold")
+    parser.add_argument("--key-blocks", type=int, default=2, help="Exact-match blocks per table")
+    parser.add_argument("--methods", action="store_true", help="Compare SimHash fingerprinting methods")
+    parser.add_argument("--texts", help="Messages file for --methods, one per line")
+    args = parser.parse_args()
+
+    if args.methods:
+        if args.texts:
+            with open(args.texts, encoding="utf-8") as f:
+                messages = [line.strip() for line in f if line.strip()]
+        else:
+            messages = sample_messages()
+        compare_methods(messages, args.threshold)
+        return
+
+    print(f"threshold={args.threshold} (max distance {max_distance_for(args.threshold)}), key_blocks={args.key_blocks}")
+    print("    size | tables |   build |     index |     lookup |     linear | speedup | add+evict")
+    for size in (int(s) for s in args.sizes.split(",")):
+        bench(size, args.queries, args.threshold, args.key_blocks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+stock_history Ingestion Benchmark
+
+Compares the row-by-row ingestion path with the COPY path in
+app/services/history_ingest.py:
+
+- convert: spot DataFrame -> records, iterrows() vs spot_to_records()
+- write:   executemany(INSERT ... ON CONFLICT) vs copy_history(), into a
+           scratch table shaped like stock_history (needs DATABASE_URL)
+
+Usage:
+    python scripts/bench_history_ingest.py [--stocks 5000] [--days 1,250]
+    python scripts/bench_history_ingest.py --convert-only
+
+--days runs one write round per value: 1 day x stocks is the daily batch
+sync, 250 days x stocks is a backfill of a year of bars. Each round is
+written twice, so the second pass measures the ON CONFLICT update path.
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app.core.history_schema import BARS_TABLE, relation_kind
+from app.services.history_ingest import HISTORY_COLUMNS, copy_history, spot_to_records
+
+SCRATCH_TABLE = "bench_stock_history"
+
+EXECUTEMANY_SQL = f"""
+    INSERT INTO {SCRATCH_TABLE}
+    (code, date, open, high, low, close, volume, turnover,
+     amplitude, change_pct, change_amt, turnover_rate)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+    ON CONFLICT (code, date) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume,
+        turnover = EXCLUDED.turnover,
+        amplitude = EXCLUDED.amplitude,
+        change_pct = EXCLUDED.change_pct,
+        change_amt = EXCLUDED.change_amt,
+        turnover_rate = EXCLUDED.turnover_rate
+"""
+
+
+def make_spot_frame(stocks: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = rng.uniform(2, 200, stocks)
+    return pd.DataFrame({
+        "代码": [f"{rng.choice(list('036'))}{i:05d}" for i in range(stocks)],
+        "名称": [f"股票{i}" if i % 50 else f"ST股票{i}" for i in range(stocks)],
+        "最新价": close,
+        "今开": close * rng.uniform(0.95, 1.05, stocks),
+        "最高": close * 1.05,
+        "最低": close * 0.95,
+        "成交量": rng.integers(1_000, 10_000_000, stocks).astype(float),
+        "成交额": rng.uniform(1e6, 1e9, stocks),
+        "涨跌幅": rng.uniform(-10, 10, stocks),
+        "换手率": rng.uniform(0, 20, stocks),
+        "振幅": rng.uniform(0, 15, stocks),
+    })
+
+
+def iterrows_records(df: pd.DataFrame, trade_date: date) -> list:
+    """The row-by-row conversion update_all_stocks_batch used before."""
+    df_filtered = df[
+        ~df['名称'].str.contains('ST|退', na=False) &
+        (df['代码'].str.match(r'^[036]'))
+    ].copy()
+    records = []
+    for _, row in df_filtered.iterrows():
+        close = float(row['最新价'])
+        open_price = float(row['今开'])
+        if close <= 0 or open_price <= 0:
+            continue
+        records.append((
+            str(row['代码']), trade_date, open_price, float(row['最高']), float(row['最低']), close,
+            float(row['成交量']), float(row['成交额']), float(row['涨跌幅']),
+            float(row['换手率']), float(row['振幅']),
+        ))
+    return records
+
+
+def bench_convert(stocks: int):
+    df = make_spot_frame(stocks)
+    today = date.today()
+
+    start = time.perf_counter()
+    old = iterrows_records(df, today)
+    old_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = spot_to_records(df, today)
+    new_s = time.perf_counter() - start
+
+    assert old == new, "conversion mismatch"
+    print(f"convert {len(new):,} rows: iterrows {len(new) / old_s:>12,.0f} rows/s | "
+          f"column-wise {len(new) / new_s:>12,.0f} rows/s | {old_s / new_s:.0f}x")
+
+
+def history_records(stocks: int, days: int, seed: int = 2) -> list:
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    records = []
+    for s in range(stocks):
+        code = f"{s:06d}"
+        for d in range(days):
+            close = rng.uniform(2, 200)
+            records.append((
+                code, start + timedelta(days=d), close, close * 1.02, close * 0.98, close,
+                float(rng.randint(1_000, 10_000_000)), close * 1e5, 4.0, 1.0, 0.1, 2.5,
+            ))
+    return records
+
+
+async def bench_write(database_url: str, stocks: int, days_list: list):
+    import asyncpg
+
+    conn = await asyncpg.connect(database_url)
+    try:
+        await conn.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        # After the partitioned migration stock_history is a view; copy the table behind it
+        source = BARS_TABLE if await relation_kind(conn, "stock_history") == "v" else "stock_history"
+        await conn.execute(f"CREATE TABLE {SCRATCH_TABLE} (LIKE {source} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES)")
+
+        for days in days_list:
+            records = history_records(stocks, days)
+            # executemany binds volume (BIGINT) as int
+            int_records = [r[:6] + (int(r[6]),) + r[7:] for r in records]
+            for label in ("insert", "update"):
+                # First pass writes into an empty table, second over existing keys
+                if label == "insert":
+                    await conn.execute(f"TRUNCATE {SCRATCH_TABLE}")
+                start = time.perf_counter()
+                await conn.executemany(EXECUTEMANY_SQL, int_records)
+                many_s = time.perf_counter() - start
+
+                if label == "insert":
+                    await conn.execute(f"TRUNCATE {SCRATCH_TABLE}")
+                start = time.perf_counter()
+                await copy_history(conn, records, HISTORY_COLUMNS, table=SCRATCH_TABLE)
+                copy_s = time.perf_counter() - start
+
+                print(f"{days:>4} days x {stocks:,} stocks ({len(records):>9,} rows, {label}): "
+                      f"executemany {len(records) / many_s:>10,.0f} rows/s | "
+                      f"COPY {len(records) / copy_s:>10,.0f} rows/s | {many_s / copy_s:.1f}x")
+    finally:
+        await conn.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stock_history ingestion paths")
+    parser.add_argument("--stocks", type=int, default=5000, help="Stocks per round")
+    parser.add_argument("--days", default="1,250", help="Comma-separated bars per stock for write rounds")
+    parser.add_argument("--convert-only", action="store_true", help="Skip the database write benchmark")
+    args = parser.parse_args()
+
+    bench_convert(args.stocks)
+    if args.convert_only:
+        return
+
+    from app.core.config import settings
+    if not settings.DATABASE_URL:
+        print("DATABASE_URL not set, skipping write benchmark")
+        return
+    asyncio.run(bench_write(settings.DATABASE_URL, args.stocks, [int(d) for d in args.days.split(",")]))
+
+
+if __name__ == "__main__":
+    main()
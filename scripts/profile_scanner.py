@@ -14,6 +14,8 @@ Arguments:
     --full          Run full profile with all signals (takes longer)
     --signal ID     Profile specific signal only
     --stocks N      Limit to N stocks for faster testing (default: 500)
+    --loader NAME   History loader: columnar (default) or legacy (per-row dicts).
+                    Run once per loader to compare load time and peak RSS.
 """
 
 import asyncio
@@ -105,8 +107,25 @@ class ScannerProfiler:
         
         return codes
     
+    async def profile_columnar_history_load(self, codes: List[str], limit: int = 150) -> Dict:
+        """Profile columnar history loading (what StockScanner uses)."""
+        from app.core.database import db
+        from app.services.scanner.loader import load_history_columnar, peak_rss_mb
+        
+        rss_before = peak_rss_mb()
+        with self.timer("Total History Load (columnar)", {"codes": len(codes)}):
+            history, stats = await load_history_columnar(db.pool, codes, limit=limit)
+            result = history.frames(min_rows=21)
+        
+        print(f"     📦 Loaded {len(result)} valid stocks, {stats['rows']} bars")
+        print(f"     💾 Column arrays: {stats['column_mb']:.1f} MB")
+        print(f"     💾 Peak RSS: {rss_before:.0f} MB -> {peak_rss_mb():.0f} MB")
+        
+        return result
+    
     async def profile_history_batch_load(self, codes: List[str], limit: int = 150) -> Dict:
-        """Profile batch history loading."""
+        """Profile legacy per-row batch history loading."""
+        from app.services.scanner.loader import peak_rss_mb
         from app.core.database import db
         from collections import defaultdict
         import pandas as pd
@@ -118,8 +137,9 @@ class ScannerProfiler:
         
         result = {}
         batch_times = []
+        rss_before = peak_rss_mb()
         
-        with self.timer("Total History Load", {"codes": total_codes, "batches": total_batches}):
+        with self.timer("Total History Load (legacy)", {"codes": total_codes, "batches": total_batches}):
             for batch_start in range(0, total_codes, batch_size):
                 batch_codes = codes[batch_start:batch_start + batch_size]
                 
@@ -166,6 +186,7 @@ class ScannerProfiler:
             avg_batch_time = sum(batch_times) / len(batch_times)
             print(f"     📦 Loaded {len(result)} valid stocks")
             print(f"     📦 Avg batch time: {avg_batch_time:.3f}s ({len(batch_times)} batches)")
+            print(f"     💾 Peak RSS: {rss_before:.0f} MB -> {peak_rss_mb():.0f} MB")
         
         return result
 
@@ -341,6 +362,7 @@ async def main():
     parser.add_argument("--signal", type=str, help="Profile specific signal only")
     parser.add_argument("--stocks", type=int, default=500, help="Limit stocks for testing (default: 500)")
     parser.add_argument("--cprofile", action="store_true", help="Also run cProfile for detailed breakdown")
+    parser.add_argument("--loader", choices=["columnar", "legacy"], default="columnar", help="History loader to profile")
     args = parser.parse_args()
     
     print("=" * 70)
@@ -372,7 +394,10 @@ async def main():
         
         # Phase 3: History batch load
         print("\n📌 Phase 3: History Data Loading")
-        stocks_data = await profiler.profile_history_batch_load(codes)
+        if args.loader == "legacy":
+            stocks_data = await profiler.profile_history_batch_load(codes)
+        else:
+            stocks_data = await profiler.profile_columnar_history_load(codes)
         
         # Get stock names
         from app.core.database import db
@@ -182,6 +182,72 @@ async def webapp_client(app) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides.clear()
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Scanner Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def make_universe():
+    """Factory for random-walk stock universes (stocks_data, stock_names).
+
+    Histories have mixed lengths up to max_bars and contain limit-up streaks.
+    """
+    import numpy as np
+    import pandas as pd
+
+    def make(n_stocks: int, seed: int = 7, max_bars: int = 300):
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range("2023-01-02", periods=max_bars).date
+        stocks_data, stock_names = {}, {}
+
+        for k in range(n_stocks):
+            n = int(rng.integers(10, max_bars))
+            returns = rng.normal(0.001, 0.03, n)
+            returns[rng.random(n) < 0.03] = 0.0953
+            if k % 5 == 0:
+                end = int(rng.integers(1, 4))
+                returns[-end - 2:-end] = 0.0953
+
+            closes = 10 * np.exp(np.cumsum(returns))
+            opens = closes * (1 + rng.normal(0, 0.01, n))
+            code = f"{['0', '3', '6'][k % 3]}{k:05d}"
+            stocks_data[code] = pd.DataFrame({
+                '日期': dates[-n:],
+                '开盘': opens,
+                '收盘': closes,
+                '最高': np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.01, n))),
+                '最低': np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.01, n))),
+                '成交量': rng.lognormal(12, 0.5, n),
+                '换手率': rng.uniform(1, 12, n),
+            })
+            stock_names[code] = f"股票{k}"
+
+        return stocks_data, stock_names
+
+    return make
+
+
+@pytest.fixture
+def history_records():
+    """Factory turning a universe's stocks_data into SQL-shaped
+    (code, epoch_day, OHLCV, turnover) records, as load_history_columnar reads them."""
+    from datetime import date
+
+    epoch = date(1970, 1, 1)
+
+    def to_records(stocks_data):
+        rows = []
+        for code, hist in stocks_data.items():
+            for d, o, h, l, c, v, t in zip(
+                hist['日期'], hist['开盘'], hist['最高'], hist['最低'],
+                hist['收盘'], hist['成交量'], hist['换手率'],
+            ):
+                rows.append((code, (d - epoch).days, o, h, l, c, v, t))
+        return rows
+
+    return to_records
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helper Fixtures
 # ─────────────────────────────────────────────────────────────────────────────
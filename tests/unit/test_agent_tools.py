@@ -0,0 +1,188 @@
+"""
+Unit tests for agent tool-call execution.
+
+Tests:
+- Concurrent execution of pure tool calls with a concurrency cap
+- Side-effecting calls running alone and in order
+- Per-tool timeouts
+- Result order and tool execution logging
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from app.services.ai import advanced_storage
+from app.services.ai.agents.builtin import BaseToolAgent
+from app.services.ai.tools.base import Tool, ToolParameter, ToolResult
+
+
+class SleepTool(Tool):
+    """Records start/end events and sleeps."""
+
+    def __init__(self, name, log, delay=0.05, side_effects=False, timeout=None):
+        self._name = name
+        self.log = log
+        self.delay = delay
+        self.side_effects = side_effects
+        self.read_actions = frozenset({"get"})
+        self.timeout = timeout
+        super().__init__()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return self._name
+
+    @property
+    def parameters(self) -> List[ToolParameter]:
+        return []
+
+    async def execute(self, **kwargs) -> ToolResult:
+        label = kwargs.get("label", self._name)
+        self.log.append(("start", label))
+        await asyncio.sleep(self.delay)
+        self.log.append(("end", label))
+        return ToolResult(success=True, output=label)
+
+
+class TestAgent(BaseToolAgent):
+    __test__ = False
+
+    @property
+    def name(self) -> str:
+        return "test"
+
+    @property
+    def description(self) -> str:
+        return "test"
+
+    @property
+    def system_prompt(self) -> str:
+        return "test"
+
+
+def _agent(*tools, max_concurrent=None):
+    agent = TestAgent()
+    agent.max_concurrent_tools = max_concurrent
+    for tool in tools:
+        agent.add_tool(tool)
+    return agent
+
+
+def _max_running(log):
+    running = peak = 0
+    for kind, _ in log:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    return peak
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduling Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestScheduling:
+    """Tests for Agent.execute_tool_calls."""
+
+    @pytest.mark.unit
+    async def test_pure_calls_run_concurrently_in_order(self):
+        log = []
+        agent = _agent(SleepTool("lookup", log, delay=0.05))
+        calls = [{"name": "lookup", "arguments": {"label": f"q{i}"}} for i in range(3)]
+
+        started = asyncio.get_running_loop().time()
+        results = await agent.execute_tool_calls(calls)
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert [r.output for r in results] == ["q0", "q1", "q2"]
+        assert _max_running(log) == 3
+        assert elapsed < 0.12
+        assert all(r.metadata["duration_ms"] >= 40 for r in results)
+
+    @pytest.mark.unit
+    async def test_concurrency_cap(self):
+        log = []
+        agent = _agent(SleepTool("lookup", log, delay=0.01), max_concurrent=2)
+        calls = [{"name": "lookup", "arguments": {"label": f"q{i}"}} for i in range(5)]
+
+        await agent.execute_tool_calls(calls)
+
+        assert _max_running(log) == 2
+
+    @pytest.mark.unit
+    async def test_side_effecting_calls_are_ordered(self):
+        log = []
+        agent = _agent(
+            SleepTool("read", log, delay=0.02),
+            SleepTool("write", log, delay=0.01, side_effects=True),
+        )
+        calls = [
+            {"name": "read", "arguments": {"label": "r1"}},
+            {"name": "write", "arguments": {"label": "w1"}},
+            {"name": "write", "arguments": {"label": "w2", "action": "get"}},
+            {"name": "read", "arguments": {"label": "r2"}},
+        ]
+
+        results = await agent.execute_tool_calls(calls)
+
+        assert [r.output for r in results] == ["r1", "w1", "w2", "r2"]
+        # w1 runs alone: after r1 finished and before anything later started
+        w1 = log.index(("start", "w1"))
+        assert log[w1 - 1] == ("end", "r1") and log[w1 + 1] == ("end", "w1")
+        # A read-only action of a side-effecting tool runs with the pure calls
+        assert _max_running(log[w1 + 2:]) == 2
+
+    @pytest.mark.unit
+    async def test_timeout(self):
+        agent = _agent(SleepTool("slow", [], delay=1, timeout=0.02))
+
+        results = await agent.execute_tool_calls([{"name": "slow", "arguments": {}}])
+
+        assert not results[0].success and "timed out" in results[0].error
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Agent Loop Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestAgentLoop:
+    """Tests for BaseToolAgent.run with tool calls."""
+
+    @pytest.mark.unit
+    async def test_results_follow_tool_call_order_and_are_logged(self, monkeypatch):
+        logged = []
+
+        async def log_tool_execution(**kwargs):
+            logged.append((kwargs["tool_name"], kwargs["duration_ms"]))
+
+        monkeypatch.setattr(advanced_storage.advanced_ai_storage, "log_tool_execution", log_tool_execution)
+        log = []
+        agent = _agent(SleepTool("slow", log, delay=0.03), SleepTool("fast", log, delay=0.0))
+
+        class Provider:
+            name = "fake"
+            turns = 0
+            seen = None
+
+            async def call_with_tools(self, messages, model, system_prompt="", tools=None):
+                Provider.turns += 1
+                if Provider.turns == 1:
+                    return {"content": "", "tool_calls": [
+                        {"id": "a", "name": "slow", "arguments": {}},
+                        {"id": "b", "name": "fast", "arguments": "{}"},
+                    ]}
+                Provider.seen = [m.get("tool_call_id") for m in messages if m["role"] == "tool"]
+                return {"content": "done", "tool_calls": []}
+
+        response = await agent.run("hi", provider=Provider(), user_id=42)
+
+        assert response.content == "done"
+        assert Provider.seen == ["a", "b"]
+        assert log[:2] == [("start", "slow"), ("start", "fast")]
+        assert [name for name, _ in logged] == ["fast", "slow"]
+        assert [tc["name"] for tc in response.tool_calls] == ["slow", "fast"]
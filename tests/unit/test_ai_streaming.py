@@ -0,0 +1,170 @@
+"""
+Unit tests for streamed AI responses.
+
+Tests:
+- SSE parsing for OpenAI-compatible and Claude streams
+- Default stream_call fallback and tracing of streamed output
+- StreamingReply throttling, splitting and final render
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.bots.ai.streaming import CURSOR, StreamingReply
+from app.core.config import settings
+from app.providers import base
+from app.providers.base import BaseProvider
+from app.providers.claude import ClaudeProvider
+from app.providers.nvidia import NvidiaProvider
+from app.providers.transport import ProviderTransport
+from app.services.ai.tracer import ai_tracer
+
+
+def _sse(*events):
+    lines = [f"data: {json.dumps(e)}" if isinstance(e, dict) else f"data: {e}" for e in events]
+    return ("\n\n".join(lines) + "\n\n").encode()
+
+
+def _use_stream(monkeypatch, body, seen=None):
+    def handler(request):
+        if seen is not None:
+            seen.append(json.loads(request.content))
+        return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+    transport = ProviderTransport(http2=False, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(base, "provider_transport", transport)
+    return transport
+
+
+async def _collect(stream):
+    return [delta async for delta in stream]
+
+
+class StubProvider(BaseProvider):
+    def __init__(self):
+        super().__init__("stub", "STUB_KEY")
+
+    async def call(self, prompt, model, history=None, context_prefix=""):
+        return {"thinking": "hmm", "content": f"echo {prompt}"}
+
+
+class FakeMessage:
+    def __init__(self, log, text=""):
+        self.log = log
+        self.text = text
+
+    async def edit_text(self, text, parse_mode=None):
+        self.text = text
+        self.log.append(("edit", id(self), text))
+
+    async def answer(self, text, parse_mode=None):
+        message = FakeMessage(self.log, text)
+        self.log.append(("answer", id(message), text))
+        return message
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Provider Stream Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestProviderStreams:
+    """Tests for provider stream_call implementations."""
+
+    @pytest.mark.unit
+    async def test_openai_compatible_stream(self, monkeypatch):
+        seen = []
+        body = _sse(
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"reasoning_content": "think"}}]},
+            {"choices": [{"delta": {"content": "Hel"}}]},
+            {"choices": [{"delta": {"content": "lo"}}]},
+            "[DONE]",
+        )
+        transport = _use_stream(monkeypatch, body, seen)
+        monkeypatch.setattr(settings, "NVIDIA_API_KEY", "key")
+
+        deltas = await _collect(NvidiaProvider().stream_call("hi", None))
+        await transport.aclose()
+
+        assert deltas == [
+            {"type": "thinking", "text": "think"},
+            {"type": "content", "text": "Hel"},
+            {"type": "content", "text": "lo"},
+        ]
+        assert seen[0]["stream"] is True and seen[0]["messages"][-1] == {"role": "user", "content": "hi"}
+        assert transport.stats()["providers"]["nvidia"]["requests"] == 1
+
+    @pytest.mark.unit
+    async def test_claude_stream(self, monkeypatch):
+        body = _sse(
+            {"type": "message_start"},
+            {"type": "content_block_delta", "delta": {"type": "thinking_delta", "thinking": "plan"}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Answer"}},
+            {"type": "message_stop"},
+        )
+        transport = _use_stream(monkeypatch, body)
+        monkeypatch.setattr(settings, "CLAUDE_API_KEY", "key")
+
+        deltas = await _collect(ClaudeProvider().stream_call("hi", None))
+        await transport.aclose()
+
+        assert deltas == [{"type": "thinking", "text": "plan"}, {"type": "content", "text": "Answer"}]
+
+    @pytest.mark.unit
+    async def test_default_stream_and_trace(self):
+        provider = StubProvider()
+        before = ai_tracer.get_usage_summary()["by_provider"].get("stub:m", {}).get("response_tokens", 0)
+
+        deltas = await _collect(provider.stream_with_trace("question", "m"))
+
+        assert deltas == [{"type": "thinking", "text": "hmm"}, {"type": "content", "text": "echo question"}]
+        usage = ai_tracer.get_usage_summary()["by_provider"]["stub:m"]
+        assert usage["response_tokens"] - before == ai_tracer._estimate_tokens("echo question")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# StreamingReply Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestStreamingReply:
+    """Tests for progressive Telegram edits."""
+
+    @pytest.mark.unit
+    async def test_edits_are_throttled(self):
+        log = []
+        reply = StreamingReply(FakeMessage(log), interval=60)
+
+        for word in ("a", "b", "c"):
+            await reply.on_delta({"type": "content", "text": word})
+        await reply.finish()
+
+        # One edit when the first delta arrives, then only the final render
+        assert [entry[2] for entry in log] == ["a" + CURSOR, "abc"]
+
+    @pytest.mark.unit
+    async def test_progress_before_content(self):
+        log = []
+        reply = StreamingReply(FakeMessage(log), interval=0)
+
+        await reply.on_delta({"type": "thinking", "text": "weighing options"})
+        await reply.on_delta({"type": "status", "text": "web_search"})
+
+        assert "weighing options" in log[0][2]
+        assert "web_search" in log[1][2]
+
+    @pytest.mark.unit
+    async def test_long_answer_continues_in_new_message(self):
+        log = []
+        status = FakeMessage(log)
+        reply = StreamingReply(status, max_length=50, interval=0)
+
+        for i in range(12):
+            await reply.on_delta({"type": "content", "text": f"word{i:02d} "})
+        await reply.finish(prefix_html="<b>prefix</b>")
+
+        assert len(reply.messages) == 2
+        assert all(len(m.text) <= 50 + len("<b>prefix</b>\n\n") for m in reply.messages)
+        assert status.text.startswith("<b>prefix</b>\n\nword00")
+        assert reply.messages[1].text.rstrip().endswith("word11") and CURSOR not in reply.messages[1].text
@@ -0,0 +1,165 @@
+"""
+Unit tests for the chat-memory extraction pipeline.
+
+Tests:
+- Hard and soft extraction passes running concurrently
+- Bounded look-ahead extraction of chunks
+- Merges applied in chunk order
+- Per-stage timings in the result and metrics
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.services.chat_memory import service as memory_service
+from app.services.chat_memory.chunker import Message, MessageChunk
+from app.services.chat_memory.extractor import Extractor
+from app.services.chat_memory.service import ChatMemoryService
+
+
+def _chunk(index: int) -> MessageChunk:
+    message = Message(id=str(index), sender="alice", text=f"price is {index}%", timestamp=datetime(2026, 1, 1))
+    return MessageChunk(chunk_id=f"c{index}", messages=[message])
+
+
+class Tracker:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def run(self, delay):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.running -= 1
+
+
+class FakeExtractor:
+    """Later chunks finish first, to show merge order does not follow completion."""
+
+    def __init__(self, chunks):
+        self.tracker = Tracker()
+        self.count = len(chunks)
+
+    async def extract(self, chunk, channel_id, channel_name):
+        index = int(chunk.chunk_id[1:])
+        await self.tracker.run(0.005 * (self.count - index))
+        return chunk.chunk_id
+
+
+class FakeMerger:
+    def __init__(self):
+        self.order = []
+
+    def merge(self, extraction, memory):
+        self.order.append(extraction)
+        return memory, {"new_claims": 1}
+
+
+class FakeRecall:
+    def check(self, messages, extraction):
+        return type("Report", (), {"recall_score": 1.0})()
+
+
+class FakeChunker:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def chunk_messages(self, messages, channel_id):
+        return self.chunks
+
+
+def _service(chunks):
+    service = ChatMemoryService()
+    service._initialized = True
+    service.chunker = FakeChunker(chunks)
+    service.extractor = FakeExtractor(chunks)
+    service.merger = FakeMerger()
+    service.recall_checker = FakeRecall()
+    return service
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pipeline Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestPipeline:
+    """Tests for ChatMemoryService.process_messages."""
+
+    @pytest.fixture
+    def metrics(self, monkeypatch):
+        saved = []
+
+        async def save_metrics(**kwargs):
+            saved.append(kwargs)
+
+        monkeypatch.setattr(memory_service, "save_metrics", save_metrics)
+        return saved
+
+    @pytest.mark.unit
+    async def test_merges_in_chunk_order_with_bounded_lookahead(self, monkeypatch, metrics):
+        monkeypatch.setattr(settings, "CHAT_MEMORY_EXTRACT_CONCURRENCY", 3)
+        chunks = [_chunk(i) for i in range(8)]
+        service = _service(chunks)
+
+        result = await service.process_messages("chan", "Chan", [{"message_text": "x"}])
+
+        assert service.merger.order == [c.chunk_id for c in chunks]
+        assert service.extractor.tracker.peak == 3
+        assert result.chunks_processed == 8 and result.new_claims == 8
+
+    @pytest.mark.unit
+    async def test_sequential_when_concurrency_is_one(self, monkeypatch, metrics):
+        monkeypatch.setattr(settings, "CHAT_MEMORY_EXTRACT_CONCURRENCY", 1)
+        chunks = [_chunk(i) for i in range(4)]
+        service = _service(chunks)
+
+        await service.process_messages("chan", "Chan", [{"message_text": "x"}])
+
+        assert service.merger.order == [c.chunk_id for c in chunks]
+        assert service.extractor.tracker.peak == 1
+
+    @pytest.mark.unit
+    async def test_stage_timings_reach_metrics(self, monkeypatch, metrics):
+        monkeypatch.setattr(settings, "CHAT_MEMORY_EXTRACT_CONCURRENCY", 4)
+        service = _service([_chunk(i) for i in range(4)])
+
+        result = await service.process_messages("chan", "Chan", [{"message_text": "x"}])
+
+        stages = metrics[0]["stage_ms"]
+        assert set(stages) == {"extract", "extract_wait", "save", "merge", "recall"}
+        assert result.stage_ms == stages
+        # Overlapped extraction: the merge waited for less than the summed LLM time
+        assert stages["extract_wait"] < stages["extract"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Extractor Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestExtractor:
+    """Tests for Extractor.extract."""
+
+    @pytest.mark.unit
+    async def test_hard_and_soft_passes_run_concurrently(self):
+        tracker = Tracker()
+        prompts = []
+
+        class FakeAi:
+            async def quick_chat(self, prompt, cache_ttl=0):
+                prompts.append(prompt)
+                await tracker.run(0.02)
+                return {"content": "{}"}
+
+        extractor = Extractor()
+        extractor._ai_service = FakeAi()
+
+        extraction = await extractor.extract(_chunk(0), "chan", "Chan")
+
+        assert len(prompts) == 2 and tracker.peak == 2
+        assert extraction.chunk_id == "c0"
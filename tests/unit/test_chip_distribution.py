@@ -0,0 +1,175 @@
+"""
+Unit tests for the vectorized chip distribution kernel.
+
+Tests:
+- Parity of compute_chip_distributions with the per-stock loop
+- Minimum history and zero-volume handling
+- calculate_chip_distribution reusing the batch kernel
+"""
+
+import pytest
+from datetime import date
+
+from app.services import chip_distribution as chip_module
+from app.services.chip_distribution import ChipDistributionService, compute_chip_distributions
+from app.services.scanner.loader import ColumnarHistory
+
+
+def _reference(code, bars, date_str):
+    """Per-stock loop the kernel replaced; bars are dicts, oldest first."""
+    current_price = bars[-1]['close']
+    min_price = min(d['low'] for d in bars)
+    max_price = max(d['high'] for d in bars)
+    padding = (max_price - min_price) * 0.1
+    min_price = max(0.01, min_price - padding)
+    max_price = max_price + padding
+    num_buckets = 30
+    bucket_size = (max_price - min_price) / num_buckets
+    chips = [0.0] * num_buckets
+
+    for d in bars:
+        volume = d['volume']
+        if volume <= 0:
+            continue
+        decay_factor = max(0, 1 - d['turnover'] / 100)
+        chips = [c * decay_factor for c in chips]
+        body_low = min(d['open'], d['close'])
+        body_high = max(d['open'], d['close'])
+        for b in range(num_buckets):
+            bucket_low = min_price + b * bucket_size
+            bucket_high = bucket_low + bucket_size
+            bucket_mid = (bucket_low + bucket_high) / 2
+            added = 0
+            if body_low <= bucket_mid <= body_high and body_high - body_low > 0:
+                added += volume * 0.6 / max(1, (body_high - body_low) / bucket_size)
+            if d['low'] <= bucket_mid < body_low and body_low - d['low'] > 0:
+                added += volume * 0.2 / max(1, (body_low - d['low']) / bucket_size)
+            if body_high < bucket_mid <= d['high'] and d['high'] - body_high > 0:
+                added += volume * 0.2 / max(1, (d['high'] - body_high) / bucket_size)
+            chips[b] += added
+
+    max_chip = max(chips)
+    distribution = []
+    profit = loss = weighted = total = 0
+    for b in range(num_buckets):
+        price = min_price + (b + 0.5) * bucket_size
+        is_profit = price <= current_price
+        distribution.append({
+            'price': round(price, 2),
+            'percentage': round((chips[b] / max_chip * 100) if max_chip > 0 else 0, 1),
+            'isProfit': is_profit,
+        })
+        if chips[b] > 0:
+            if is_profit:
+                profit += chips[b]
+            else:
+                loss += chips[b]
+            weighted += price * chips[b]
+            total += chips[b]
+
+    top = sum(sorted(chips, reverse=True)[:5])
+    return {
+        'code': code,
+        'date': date_str,
+        'currentPrice': current_price,
+        'distribution': list(reversed(distribution)),
+        'avgCost': round(weighted / total if total > 0 else current_price, 2),
+        'profitRatio': round((profit / (profit + loss) * 100) if profit + loss > 0 else 0, 1),
+        'concentration': round((top / sum(chips) * 100) if sum(chips) > 0 else 0, 1),
+    }
+
+
+def _bars(hist):
+    return [
+        {'open': o, 'high': h, 'low': l, 'close': c, 'volume': v, 'turnover': t}
+        for o, h, l, c, v, t in zip(
+            hist['开盘'], hist['最高'], hist['最低'], hist['收盘'], hist['成交量'], hist['换手率']
+        )
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def universe(make_universe):
+    """Last 120 bars per stock, with some suspended days and doji bars."""
+    stocks_data, _ = make_universe(40, seed=21)
+    for k, hist in enumerate(stocks_data.values()):
+        if k % 4 == 0:
+            hist.loc[hist.index[::7], '成交量'] = 0.0
+        if k % 3 == 0:
+            hist.loc[hist.index[::5], '开盘'] = hist['收盘'][::5]
+    return {code: hist.iloc[-120:].reset_index(drop=True) for code, hist in stocks_data.items()}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Kernel Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestComputeChipDistributions:
+    """Tests for compute_chip_distributions."""
+
+    @pytest.mark.unit
+    def test_parity_with_per_stock_loop(self, universe, history_records):
+        """Batch results should equal the per-stock loop exactly."""
+        history = ColumnarHistory.from_records(history_records(universe))
+
+        actual = compute_chip_distributions(history, "2024-03-01", chunk_size=16)
+
+        for code, hist in universe.items():
+            if len(hist) < 10:
+                assert code not in actual
+                continue
+            assert actual[code] == _reference(code, _bars(hist), "2024-03-01")
+
+    @pytest.mark.unit
+    def test_skips_short_history(self, universe, history_records):
+        """Stocks with fewer than 10 bars get no distribution."""
+        code, hist = next(iter(universe.items()))
+        short = {code: hist.iloc[-9:]}
+
+        assert compute_chip_distributions(ColumnarHistory.from_records(history_records(short)), "x") == {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Service Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FakePool:
+    """Answers the window query from in-memory records."""
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    async def fetch(self, query, codes, limit, target):
+        self.queries.append(codes)
+        rows = []
+        for code in codes:
+            bars = [r for r in self.records if r[0] == code]
+            rows.extend(bars[-limit:])
+        return rows
+
+
+class TestChipDistributionService:
+    """Tests for ChipDistributionService calculations."""
+
+    @pytest.mark.unit
+    async def test_single_code_uses_kernel(self, universe, monkeypatch, history_records):
+        """calculate_chip_distribution should match the per-stock loop."""
+        code = next(c for c, h in universe.items() if len(h) >= 10)
+        pool = FakePool(history_records(universe))
+        monkeypatch.setattr(chip_module.db, "pool", pool)
+
+        result = await ChipDistributionService().calculate_chip_distribution(code, date(2024, 3, 1))
+
+        assert pool.queries == [[code]]
+        assert result == _reference(code, _bars(universe[code]), "2024-03-01")
+
+    @pytest.mark.unit
+    async def test_unknown_code(self, monkeypatch):
+        monkeypatch.setattr(chip_module.db, "pool", FakePool([]))
+
+        assert await ChipDistributionService().calculate_chip_distribution("999999", date(2024, 3, 1)) == {}
@@ -0,0 +1,231 @@
+"""
+Unit tests for sending across multiple Telegram clients.
+
+Tests:
+- Least-busy client selection and preferred client
+- FloodWait failover and pause expiry
+- Raising the shortest wait when every client is limited
+- Per-client stats
+- Failover on write-permission errors
+- Picking clients that have the peer in their dialogs and may post there
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from telethon.errors import ChatWriteForbiddenError, FloodWaitError
+from telethon.tl.types import Channel, ChatAdminRights, ChatBannedRights
+
+from app.core.bot import TelegramService
+from app.core.client_pool import ClientPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    def __init__(self, name, flood=0, forbidden=False):
+        self.name = name
+        self.flood = flood
+        self.forbidden = forbidden
+        self.sent = []
+
+    async def send(self, text):
+        if self.flood:
+            raise FloodWaitError(request=None, capture=self.flood)
+        if self.forbidden:
+            raise ChatWriteForbiddenError(request=None)
+        self.sent.append(text)
+        return self.name
+
+
+def _pool(*clients):
+    clock = FakeClock()
+    pool = ClientPool(clock=clock)
+    for c in clients:
+        pool.add(c, c.name)
+    return pool, clock
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Selection Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSelection:
+    """Tests for client ordering."""
+
+    @pytest.mark.unit
+    async def test_spreads_sends(self):
+        a, b = FakeClient("a"), FakeClient("b")
+        pool, _ = _pool(a, b)
+
+        used = [await pool.run(lambda c: c.send("x"), [a, b]) for _ in range(4)]
+
+        assert sorted(used) == ["a", "a", "b", "b"]
+
+    @pytest.mark.unit
+    async def test_prefer_goes_first(self):
+        a, b = FakeClient("a"), FakeClient("b")
+        pool, _ = _pool(a, b)
+
+        assert [await pool.run(lambda c: c.send("x"), [a, b], prefer=b) for _ in range(2)] == ["b", "b"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Failover Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestFailover:
+    """Tests for FloodWait handling."""
+
+    @pytest.mark.unit
+    async def test_flood_wait_fails_over_and_pauses_client(self):
+        a, b = FakeClient("a", flood=30), FakeClient("b")
+        pool, clock = _pool(a, b)
+
+        assert await pool.run(lambda c: c.send("x"), [a, b], prefer=a) == "b"
+        a.flood = 0
+        # a stays skipped until its wait is over
+        assert await pool.run(lambda c: c.send("y"), [a, b], prefer=a) == "b"
+        clock.now += 31
+        assert await pool.run(lambda c: c.send("z"), [a, b], prefer=a) == "a"
+
+    @pytest.mark.unit
+    async def test_all_limited_raises_shortest_wait(self):
+        a, b = FakeClient("a", flood=30), FakeClient("b", flood=12)
+        pool, _ = _pool(a, b)
+
+        with pytest.raises(FloodWaitError) as exc:
+            await pool.run(lambda c: c.send("x"), [a, b])
+        assert exc.value.seconds == 12
+
+    @pytest.mark.unit
+    async def test_errors_are_not_retried(self):
+        a, b = FakeClient("a"), FakeClient("b")
+        pool, _ = _pool(a, b)
+
+        async def broken(client):
+            raise ValueError("chat write forbidden")
+
+        with pytest.raises(ValueError):
+            await pool.run(broken, [a, b])
+        stats = {s["name"]: s for s in pool.stats()}
+        assert stats["a"]["failed"] + stats["b"]["failed"] == 1
+
+    @pytest.mark.unit
+    async def test_write_forbidden_fails_over(self):
+        a, b = FakeClient("a", forbidden=True), FakeClient("b")
+        pool, _ = _pool(a, b)
+
+        assert await pool.run(lambda c: c.send("x"), [a, b], prefer=a) == "b"
+        stats = {s["name"]: s for s in pool.stats()}
+        assert stats["a"]["failed"] == 1 and stats["a"]["paused_for"] == 0
+
+    @pytest.mark.unit
+    async def test_write_forbidden_everywhere_is_raised(self):
+        a, b = FakeClient("a", forbidden=True), FakeClient("b", forbidden=True)
+        pool, _ = _pool(a, b)
+
+        with pytest.raises(ChatWriteForbiddenError):
+            await pool.run(lambda c: c.send("x"), [a, b])
+
+    @pytest.mark.unit
+    async def test_stats(self):
+        a, b = FakeClient("a", flood=5), FakeClient("b")
+        pool, _ = _pool(a, b)
+
+        await pool.run(lambda c: c.send("x"), [a, b], prefer=a)
+        stats = {s["name"]: s for s in pool.stats()}
+
+        assert stats["a"]["flood_waits"] == 1 and stats["a"]["paused_for"] == 5
+        assert stats["b"]["sent"] == 1 and stats["b"]["sends_last_minute"] == 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Visibility Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestVisibility:
+    """Tests for TelegramService._clients_for."""
+
+    @pytest.mark.unit
+    def test_clients_with_peer_in_dialogs(self):
+        service = TelegramService()
+        main, other = object(), object()
+        service.clients = [main, other]
+        service.main_client = main
+        channel = SimpleNamespace(id=1234, username="news")
+        service.entity_cache_by_client = {
+            id(main): {},
+            id(other): {1234: channel, -1001234: channel},
+        }
+
+        assert service._clients_for(-1001234) == [other]
+        assert service._clients_for("-1001234") == [other]
+        assert service._clients_for("@News") == [other]
+        assert service._clients_for(channel) == [other]
+        # Unknown everywhere: the main client resolves it as before
+        assert service._clients_for(-1009999) == [main]
+
+    @pytest.mark.unit
+    def test_broadcast_channel_needs_post_rights(self):
+        service = TelegramService()
+        main, subscriber, editor = object(), object(), object()
+        service.clients = [main, subscriber, editor]
+        service.main_client = main
+
+        def channel(**rights):
+            return Channel(id=555, title="alerts", photo=None, date=None, broadcast=True, **rights)
+
+        service.entity_cache_by_client = {
+            id(main): {555: channel(creator=True)},
+            id(subscriber): {555: channel()},
+            id(editor): {555: channel(admin_rights=ChatAdminRights(edit_messages=True))},
+        }
+
+        # Only the main client may post; subscribers and non-posting admins are skipped
+        assert service._clients_for(-100555) == [main]
+
+    @pytest.mark.unit
+    def test_group_excludes_banned_senders(self):
+        service = TelegramService()
+        main, muted = object(), object()
+        service.clients = [main, muted]
+        service.main_client = main
+        muted_rights = ChatBannedRights(until_date=None, send_messages=True)
+        service.entity_cache_by_client = {
+            id(main): {777: Channel(id=777, title="g", photo=None, date=None, megagroup=True)},
+            id(muted): {777: Channel(id=777, title="g", photo=None, date=None, megagroup=True,
+                                     banned_rights=muted_rights)},
+        }
+
+        assert service._clients_for(-100777) == [main]
+
+    @pytest.mark.unit
+    async def test_main_client_sends_first(self, monkeypatch):
+        service = TelegramService()
+        main, other = FakeClient("main"), FakeClient("other")
+        service.clients = [main, other]
+        service.main_client = main
+        channel = SimpleNamespace(id=1234, username="news")
+        service.entity_cache_by_client = {id(main): {1234: channel}, id(other): {1234: channel}}
+        pool, _ = _pool(main, other)
+        monkeypatch.setattr("app.core.bot.client_pool", pool)
+
+        async def resolve(client, peer):
+            return peer
+
+        async def submit(key, run, priority):
+            return await run()
+
+        monkeypatch.setattr(service, "_resolve_peer", resolve)
+        monkeypatch.setattr("app.core.bot.send_queue.submit", submit)
+
+        used = [await service._submit(-1001234, lambda c, t: c.send("x"), 0) for _ in range(3)]
+
+        assert used == ["main"] * 3
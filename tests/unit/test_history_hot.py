@@ -0,0 +1,308 @@
+"""
+Unit tests for the stock_history hot window and data version.
+
+Tests:
+- Decoding per-code array rows into ColumnarHistory
+- Hot reads only while the hot table is current and deep enough
+- Fallback of the scanner loader to stock_history
+- Single-stock hot reads in the get_stock_history format
+- Snapshot-consistent hot table refresh
+- Hot depth covering every registered signal's scan load
+- Cleanup deletes bumping the version in their own transaction
+"""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.database import db
+from app.services import stock_history
+from app.services.history_hot import (
+    HOT_COLUMNS, get_hot_stock_history, hot_is_current, load_hot_window, refresh_hot_window,
+)
+from app.services.scanner import SignalRegistry
+from app.services.scanner.loader import ColumnarHistory, history_limit, load_history_columnar
+
+EPOCH = date(1970, 1, 1)
+FIRST_DAY = (date(2024, 1, 2) - EPOCH).days
+
+
+def _hot_row(code, n, base=10.0):
+    """A LOAD_SQL row: code, days[], open[], high[], low[], close[], volume[], turnover_rate[]."""
+    closes = [base + i for i in range(n)]
+    return (
+        code,
+        [FIRST_DAY + i for i in range(n)],
+        [c - 0.1 for c in closes],
+        [c + 0.5 for c in closes],
+        [c - 0.5 for c in closes],
+        closes,
+        [1000.0 * (i + 1) for i in range(n)],
+        [1.5] * n,
+    )
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConn:
+    """Records execute() calls and whether each ran inside a transaction."""
+
+    def __init__(self, status="DELETE 0"):
+        self.status = status
+        self.executed = []
+        self.in_transaction = False
+
+    def transaction(self, isolation=None):
+        conn = self
+
+        class Transaction:
+            async def __aenter__(self):
+                conn.in_transaction = True
+
+            async def __aexit__(self, *exc):
+                conn.in_transaction = False
+                return False
+
+        return Transaction()
+
+    async def execute(self, sql, *args):
+        self.executed.append((" ".join(sql.split()), self.in_transaction))
+        return self.status
+
+
+class FakePool:
+    """Serves a version row and canned fetch results; records SQL."""
+
+    def __init__(self, state=None, rows=(), row=None, conn=None):
+        self.state = state
+        self.rows = list(rows)
+        self.row = row
+        self.conn = conn
+        self.fetched = []
+
+    async def fetchrow(self, sql, *args):
+        if "FROM stock_history_version" in sql:
+            return self.state
+        self.fetched.append((sql, args))
+        return self.row
+
+    async def fetch(self, sql, *args):
+        self.fetched.append((sql, args))
+        return self.rows
+
+    def acquire(self):
+        conn = self.conn
+
+        class Acquire:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+def _state(version=7, hot_version=7, hot_depth=300):
+    return {"version": version, "hot_version": hot_version, "hot_depth": hot_depth, "max_date": date(2024, 3, 1)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Decoding Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestFromArrays:
+    """Tests for ColumnarHistory.from_arrays."""
+
+    @pytest.mark.unit
+    def test_matches_from_records(self):
+        rows = [_hot_row("000001", 3), _hot_row("600000", 5, base=20.0)]
+        records = [
+            (code, days[i], o[i], h[i], l[i], c[i], v[i], t[i])
+            for code, days, o, h, l, c, v, t in rows
+            for i in range(len(days))
+        ]
+
+        hot = ColumnarHistory.from_arrays(rows)
+        base = ColumnarHistory.from_records(records)
+
+        assert hot.codes == base.codes
+        assert hot.offsets.tolist() == [0, 3, 8]
+        assert np.array_equal(hot.dates, base.dates)
+        for name in base.fields:
+            assert np.array_equal(hot.fields[name], base.fields[name])
+
+    @pytest.mark.unit
+    def test_nulls_become_nan(self):
+        row = list(_hot_row("000001", 2))
+        row[7] = [None, 2.0]
+
+        history = ColumnarHistory.from_arrays([tuple(row)])
+
+        assert np.isnan(history.fields["turnover"][0])
+        assert ColumnarHistory.from_arrays([]).offsets.tolist() == [0]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Hot Window Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestHotWindow:
+    """Tests for version-gated hot reads."""
+
+    @pytest.mark.unit
+    def test_hot_is_current(self):
+        assert hot_is_current(_state(), 300)
+        assert not hot_is_current(_state(version=8), 300)
+        assert not hot_is_current(_state(hot_depth=300), 600)
+        assert not hot_is_current(None, 300)
+
+    @pytest.mark.unit
+    async def test_stale_hot_table_is_not_read(self):
+        pool = FakePool(state=_state(version=8), rows=[_hot_row("000001", 3)])
+
+        assert await load_hot_window(pool, ["000001"], 300) is None
+        assert pool.fetched == []
+
+    @pytest.mark.unit
+    async def test_loader_uses_hot_table_when_current(self):
+        pool = FakePool(state=_state(), rows=[_hot_row("000001", 3), _hot_row("600000", 4)])
+
+        history, stats = await load_history_columnar(pool, ["000001", "600000"], limit=300, hot=True)
+
+        assert stats["source"] == "hot"
+        assert history.bars("600000") == 4
+        sql, args = pool.fetched[0]
+        assert "FROM stock_history_hot" in sql and args == (["000001", "600000"], 300)
+
+    @pytest.mark.unit
+    async def test_loader_falls_back_to_history(self):
+        records = [("000001", FIRST_DAY + i, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0) for i in range(3)]
+        pool = FakePool(state=_state(version=8), rows=records)
+
+        history, stats = await load_history_columnar(pool, ["000001"], limit=300, hot=True)
+
+        assert stats["source"] == "history"
+        assert history.bars("000001") == 3
+        assert "FROM stock_history\n" in pool.fetched[0][0]
+
+    @pytest.mark.unit
+    async def test_single_stock_newest_first(self):
+        n = 3
+        arrays = [[FIRST_DAY + i for i in range(n)]] + [
+            [float(j * 10 + i) for i in range(n)] for j, _ in enumerate(HOT_COLUMNS)
+        ]
+        pool = FakePool(row=tuple(arrays))
+
+        bars = await get_hot_stock_history(pool, "600519", 60)
+
+        assert [b["date"] for b in bars] == ["2024-01-04", "2024-01-03", "2024-01-02"]
+        assert bars[0]["code"] == "600519"
+        assert bars[0]["close"] == 32.0
+        assert bars[0]["volume"] == 42 and isinstance(bars[0]["volume"], int)
+        assert set(bars[0]) == {"code", "date", *HOT_COLUMNS}
+        assert await get_hot_stock_history(FakePool(row=None), "600519", 60) is None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Refresh Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRefresh:
+    """Tests for refresh_hot_window."""
+
+    @pytest.mark.unit
+    async def test_refresh_records_snapshot_version(self):
+        class Conn:
+            def __init__(self):
+                self.executed = []
+                self.isolation = None
+
+            def transaction(self, isolation=None):
+                self.isolation = isolation
+                return FakeTransaction()
+
+            async def fetchval(self, sql):
+                return 41
+
+            async def execute(self, sql, *args):
+                self.executed.append((" ".join(sql.split()), args))
+                return "INSERT 0 5000" if sql.lstrip().startswith("INSERT") else "DELETE 4990"
+
+        conn = Conn()
+
+        class Pool:
+            def acquire(self):
+                class Acquire:
+                    async def __aenter__(self):
+                        return conn
+
+                    async def __aexit__(self, *exc):
+                        return False
+
+                return Acquire()
+
+        assert await refresh_hot_window(Pool(), 300) == 5000
+        assert conn.isolation == "repeatable_read"
+        delete, insert, update = conn.executed
+        assert delete[0] == "DELETE FROM stock_history_hot"
+        assert insert[1] == (300,) and "LIMIT $1" in insert[0]
+        assert update[1] == (41, 300)
+
+    @pytest.mark.unit
+    def test_depth_covers_deepest_signal(self, monkeypatch):
+        monkeypatch.setattr(settings, "HISTORY_HOT_BARS", 300)
+        assert stock_history.hot_window_depth() >= history_limit(SignalRegistry.get_all())
+
+        deep = SimpleNamespace(min_bars=700)  # e.g. a monthly pattern signal
+        signals = SignalRegistry.get_all() + [deep]
+        monkeypatch.setattr(SignalRegistry, "get_all", lambda enabled_only=False: signals)
+        assert history_limit([deep]) == 900
+        assert stock_history.hot_window_depth() == 900
+
+        monkeypatch.setattr(settings, "HISTORY_HOT_BARS", 0)
+        assert stock_history.hot_window_depth() == 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cleanup Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestCleanup:
+    """Tests for StockHistoryService.cleanup_abnormal_data."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        monkeypatch.setattr(stock_history, "china_today", lambda: date(2024, 3, 1))
+        monkeypatch.setattr(stock_history, "china_now", lambda: datetime(2024, 3, 1, 8, 0))
+
+    @pytest.mark.unit
+    async def test_delete_and_bump_share_a_transaction(self, monkeypatch, clock):
+        conn = FakeConn(status="DELETE 3")
+        monkeypatch.setattr(db, "pool", FakePool(conn=conn))
+
+        await stock_history.StockHistoryService().cleanup_abnormal_data()
+
+        future, bump, today, bump_again = conn.executed
+        assert future == ("DELETE FROM stock_history WHERE date > $1", True)
+        assert today == ("DELETE FROM stock_history WHERE date = $1", True)
+        assert bump[0].startswith("UPDATE stock_history_version") and bump[1]
+        assert bump_again == bump
+
+    @pytest.mark.unit
+    async def test_no_bump_when_nothing_deleted(self, monkeypatch, clock):
+        conn = FakeConn(status="DELETE 0")
+        monkeypatch.setattr(db, "pool", FakePool(conn=conn))
+
+        await stock_history.StockHistoryService().cleanup_abnormal_data()
+
+        assert [sql.split()[0] for sql, _ in conn.executed] == ["DELETE", "DELETE"]
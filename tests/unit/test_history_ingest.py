@@ -0,0 +1,249 @@
+"""
+Unit tests for COPY-based stock_history ingestion.
+
+Tests:
+- Staging DDL, COPY and merge statements issued by copy_history
+- Duplicate keys and column layouts
+- Column-wise spot conversion parity with the row-by-row loop
+- HistoryBulkWriter batching across stocks
+- Per-stock retry of a failed batch COPY and written-stock counts
+"""
+
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.history_ingest import (
+    HISTORY_COLUMNS, SPOT_BATCH_COLUMNS, HistoryBulkWriter, bars_to_records, copy_history, spot_to_records,
+)
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConn:
+    """Records the statements and COPYs of one connection."""
+
+    def __init__(self):
+        self.executed = []
+        self.copies = []
+
+    def transaction(self):
+        return FakeTransaction()
+
+    async def execute(self, sql, *args):
+        self.executed.append(" ".join(sql.split()))
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, list(records), columns))
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConn()
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+def _bar(day, close=10.0):
+    return {"date": date(2024, 3, day), "open": 9.8, "high": 10.2, "low": 9.7, "close": close,
+            "volume": 1000.0, "turnover": 1e4, "change_pct": 1.0}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# copy_history Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestCopyHistory:
+    """Tests for copy_history."""
+
+    @pytest.mark.unit
+    async def test_stage_copy_merge(self):
+        pool = FakePool()
+        records = bars_to_records("600519", [_bar(1), _bar(4)])
+
+        assert await copy_history(pool, records) == 2
+
+        create, merge, bump = pool.conn.executed
+        assert create.startswith("CREATE TEMP TABLE stock_history_staging (code TEXT, date DATE, open DOUBLE PRECISION")
+        assert create.endswith("ON COMMIT DROP")
+        table, copied, columns = pool.conn.copies[0]
+        assert table == "stock_history_staging" and columns == list(HISTORY_COLUMNS)
+        assert copied == records
+        assert merge.startswith("INSERT INTO stock_history (code, date, open, high, low, close, volume,")
+        assert "ROUND(volume)::BIGINT" in merge
+        assert "ON CONFLICT (code, date) DO UPDATE SET open = EXCLUDED.open" in merge
+        assert "change_amt = EXCLUDED.change_amt" in merge
+        assert bump.startswith("UPDATE stock_history_version SET version = version + 1")
+
+    @pytest.mark.unit
+    async def test_other_tables_do_not_bump_version(self):
+        conn = FakeConn()
+
+        await copy_history(conn, bars_to_records("600519", [_bar(1)]), table="bench_stock_history")
+
+        assert len(conn.executed) == 2
+
+    @pytest.mark.unit
+    async def test_spot_columns_leave_change_amt_alone(self):
+        conn = FakeConn()
+        record = ("600519", date(2024, 3, 1), 9.8, 10.2, 9.7, 10.0, 1000.0, 1e4, 1.0, 2.5, 3.0)
+
+        await copy_history(conn, [record], SPOT_BATCH_COLUMNS)
+
+        assert "change_amt" not in conn.executed[1]
+        assert conn.copies[0][2] == list(SPOT_BATCH_COLUMNS)
+
+    @pytest.mark.unit
+    async def test_duplicate_keys_keep_last(self):
+        conn = FakeConn()
+        records = bars_to_records("600519", [_bar(1, 10.0), _bar(1, 11.0), _bar(2)])
+
+        assert await copy_history(conn, records) == 2
+        assert [r[5] for r in conn.copies[0][1]] == [11.0, 10.0]
+
+    @pytest.mark.unit
+    async def test_empty_and_bad_layout(self):
+        conn = FakeConn()
+
+        assert await copy_history(conn, []) == 0
+        assert conn.executed == []
+        with pytest.raises(ValueError):
+            await copy_history(conn, [("x",)], ("date", "code"))
+
+    @pytest.mark.unit
+    def test_bars_skip_after(self):
+        records = bars_to_records("000001", [_bar(1), _bar(2), _bar(3)], skip_after=date(2024, 3, 2))
+
+        assert [r[1].day for r in records] == [1, 2]
+        assert records[0][8:] == (0.0, 1.0, 0.0, 0.0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Spot Conversion Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _row_by_row(df, trade_date):
+    """The iterrows() conversion update_all_stocks_batch used before."""
+    df_filtered = df[~df['名称'].str.contains('ST|退', na=False) & (df['代码'].str.match(r'^[036]'))]
+    records = []
+    for _, row in df_filtered.iterrows():
+        close = float(row['最新价'])
+        open_price = float(row['今开'])
+        if not (close > 0 and open_price > 0):
+            continue
+        records.append((
+            str(row['代码']), trade_date, open_price, float(row['最高']), float(row['最低']), close,
+            float(row['成交量']) if pd.notna(row['成交量']) else 0.0,
+            float(row['成交额']) if pd.notna(row['成交额']) else 0.0,
+            float(row['涨跌幅']),
+            float(row['换手率']) if pd.notna(row['换手率']) else 0.0,
+            float(row['振幅']) if pd.notna(row['振幅']) else 0.0,
+        ))
+    return records
+
+
+class TestSpotToRecords:
+    """Tests for spot_to_records."""
+
+    @pytest.mark.unit
+    def test_parity_with_row_by_row(self):
+        rng = np.random.default_rng(5)
+        n = 400
+        close = rng.uniform(-1, 50, n)
+        close[::17] = np.nan
+        volume = rng.uniform(0, 1e6, n)
+        volume[::13] = np.nan
+        df = pd.DataFrame({
+            "代码": [f"{'0368'[i % 4]}{i:05d}" for i in range(n)],
+            "名称": [("*ST" if i % 11 == 0 else "退市" if i % 23 == 0 else "") + f"股{i}" for i in range(n)],
+            "最新价": close,
+            "今开": rng.uniform(-1, 50, n),
+            "最高": rng.uniform(0, 50, n),
+            "最低": rng.uniform(0, 50, n),
+            "成交量": volume,
+            "成交额": rng.uniform(0, 1e8, n),
+            "涨跌幅": rng.uniform(-10, 10, n),
+            "换手率": rng.uniform(0, 10, n),
+            "振幅": rng.uniform(0, 10, n),
+        })
+        trade_date = date(2024, 3, 1)
+
+        actual = spot_to_records(df, trade_date)
+        expected = _row_by_row(df, trade_date)
+
+        assert len(actual) == len(expected) > 0
+        for a, e in zip(actual, expected):
+            assert a[:2] == e[:2]
+            assert all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a[2:], e[2:]))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HistoryBulkWriter Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestHistoryBulkWriter:
+    """Tests for HistoryBulkWriter."""
+
+    @pytest.mark.unit
+    async def test_batches_many_stocks_per_copy(self):
+        pool = FakePool()
+        async with HistoryBulkWriter(pool, batch_rows=5) as writer:
+            for code in ("600000", "600001", "600002", "600003"):
+                await writer.add(bars_to_records(code, [_bar(1), _bar(2)]))
+
+        sizes = [len(records) for _, records, _ in pool.conn.copies]
+        assert sizes == [6, 2]
+        assert writer.rows_written == 8
+
+    @pytest.mark.unit
+    async def test_failed_copy_is_logged_not_raised(self):
+        class BrokenConn(FakeConn):
+            async def copy_records_to_table(self, *args, **kwargs):
+                raise RuntimeError("connection lost")
+
+        pool = FakePool()
+        pool.conn = BrokenConn()
+        writer = HistoryBulkWriter(pool)
+        await writer.add(bars_to_records("600000", [_bar(1)]))
+
+        assert await writer.flush() == 0
+        assert writer.rows_written == 0
+        assert writer.stocks_written == 0 and writer.failed_codes == {"600000"}
+
+    @pytest.mark.unit
+    async def test_failed_batch_is_retried_per_stock(self):
+        class PickyConn(FakeConn):
+            async def copy_records_to_table(self, table, records, columns):
+                if any(r[0] == "600001" for r in records):
+                    raise RuntimeError("numeric field overflow")
+                await super().copy_records_to_table(table, records, columns)
+
+        pool = FakePool()
+        pool.conn = PickyConn()
+        async with HistoryBulkWriter(pool) as writer:
+            for code in ("600000", "600001", "600002"):
+                await writer.add(bars_to_records(code, [_bar(1), _bar(2)]))
+
+        assert [records[0][0] for _, records, _ in pool.conn.copies] == ["600000", "600002"]
+        assert writer.rows_written == 4
+        assert writer.stocks_written == 2
+        assert writer.failed_codes == {"600001"}
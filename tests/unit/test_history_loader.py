@@ -0,0 +1,122 @@
+"""
+Unit tests for the columnar history loader.
+
+Tests:
+- Decoding (code, epoch_day, OHLCV...) records into per-column arrays
+- Per-stock DataFrame views
+- Batch loading through a mocked asyncpg pool
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.scanner.loader import ColumnarHistory, load_history_columnar
+
+
+EPOCH = date(1970, 1, 1)
+
+
+def _records(code: str, n: int, start: date = date(2024, 1, 2), base: float = 10.0):
+    """SQL-shaped records for one code, oldest first."""
+    first = (start - EPOCH).days
+    return [
+        (code, first + i, base + i, base + i + 0.5, base + i - 0.5, base + i + 0.2, 1000.0 * (i + 1), 1.5)
+        for i in range(n)
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ColumnarHistory Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestColumnarHistory:
+    """Tests for ColumnarHistory decoding and views."""
+
+    @pytest.mark.unit
+    def test_from_records_offsets(self):
+        """Offsets should delimit each code's rows."""
+        rows = _records("000001", 3) + _records("600000", 5)
+        history = ColumnarHistory.from_records(rows)
+
+        assert history.codes == ["000001", "600000"]
+        assert history.offsets.tolist() == [0, 3, 8]
+        assert history.bars("600000") == 5
+        assert "000001" in history
+        assert "300750" not in history
+
+    @pytest.mark.unit
+    def test_frame_columns_and_values(self):
+        """frame() should expose the runner's column names with correct values."""
+        history = ColumnarHistory.from_records(_records("000001", 4))
+        hist = history.frame("000001")
+
+        assert list(hist.columns) == ['日期', '开盘', '最高', '最低', '收盘', '成交量', '换手率']
+        assert hist['收盘'].tolist() == [10.2, 11.2, 12.2, 13.2]
+        assert hist['日期'].iloc[0] == pd.Timestamp("2024-01-02")
+        assert hist.index.tolist() == [0, 1, 2, 3]
+
+    @pytest.mark.unit
+    def test_frame_is_a_view(self):
+        """Per-stock frames should not copy the shared arrays."""
+        history = ColumnarHistory.from_records(_records("000001", 4) + _records("000002", 4))
+        hist = history.frame("000002")
+
+        assert np.shares_memory(hist['收盘'].values, history.fields["close"])
+
+    @pytest.mark.unit
+    def test_frames_min_rows(self):
+        """frames() should drop codes with too few bars."""
+        rows = _records("000001", 30) + _records("000002", 10)
+        frames = ColumnarHistory.from_records(rows).frames(min_rows=21)
+
+        assert list(frames) == ["000001"]
+        assert len(frames["000001"]) == 30
+
+    @pytest.mark.unit
+    def test_concat(self):
+        """concat() should rebase offsets across batches."""
+        a = ColumnarHistory.from_records(_records("000001", 3))
+        b = ColumnarHistory.from_records(_records("000002", 2, base=50.0))
+        merged = ColumnarHistory.concat([a, ColumnarHistory.empty(), b])
+
+        assert merged.codes == ["000001", "000002"]
+        assert merged.offsets.tolist() == [0, 3, 5]
+        assert merged.frame("000002")['开盘'].tolist() == [50.0, 51.0]
+
+    @pytest.mark.unit
+    def test_empty(self):
+        """Empty input should produce an empty history."""
+        history = ColumnarHistory.from_records([])
+
+        assert len(history) == 0
+        assert history.frames() == {}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Loader Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestLoadHistoryColumnar:
+    """Tests for load_history_columnar."""
+
+    @pytest.mark.unit
+    async def test_loads_in_batches(self):
+        """Each batch of codes should be one query; results are merged."""
+        pool = MagicMock()
+        pool.fetch = AsyncMock(side_effect=[
+            _records("000001", 25) + _records("000002", 25),
+            _records("600000", 25),
+        ])
+
+        history, stats = await load_history_columnar(
+            pool, ["000001", "000002", "600000"], limit=300, batch_size=2
+        )
+
+        assert pool.fetch.await_count == 2
+        assert pool.fetch.await_args_list[0].args[1:] == (["000001", "000002"], 300)
+        assert history.codes == ["000001", "000002", "600000"]
+        assert stats["rows"] == 75
+        assert stats["peak_rss_mb"] > 0
@@ -0,0 +1,143 @@
+"""
+Unit tests for the partitioned stock_history layout.
+
+Tests:
+- Table, partition and view DDL
+- Partition year ranges
+- Migration of a legacy table, a fresh database and an already migrated one
+"""
+
+from datetime import date
+
+import pytest
+
+from app.core import history_schema
+from app.core.history_schema import (
+    BARS_TABLE, LEGACY_TABLE, bars_table_ddl, migrate_stock_history, partition_ddl, partition_years, view_ddl,
+)
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConn:
+    """Answers catalog and MIN/MAX queries; records statements."""
+
+    def __init__(self, kind, first=None, last=None, rows_per_year=100):
+        self.kind = kind
+        self.first = first
+        self.last = last
+        self.rows_per_year = rows_per_year
+        self.executed = []
+
+    def transaction(self):
+        return FakeTransaction()
+
+    async def fetchval(self, sql, *args):
+        return self.kind
+
+    async def fetchrow(self, sql, *args):
+        return (self.first, self.last)
+
+    async def execute(self, sql, *args):
+        self.executed.append((" ".join(sql.split()), args))
+        if sql.lstrip().startswith("INSERT"):
+            return f"INSERT 0 {self.rows_per_year}"
+        return "OK"
+
+    def statements(self, prefix):
+        return [sql for sql, _ in self.executed if sql.startswith(prefix)]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DDL Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestDDL:
+    """Tests for the generated DDL."""
+
+    @pytest.mark.unit
+    def test_bars_table(self):
+        ddl = " ".join(bars_table_ddl().split())
+
+        assert "open DOUBLE PRECISION" in ddl and "volume BIGINT" in ddl
+        assert "DECIMAL" not in ddl and "SERIAL" not in ddl and "created_at" not in ddl
+        assert "PRIMARY KEY (code, date) INCLUDE (open, high, low, close, volume, turnover_rate)" in ddl
+        assert ddl.endswith("PARTITION BY RANGE (date)")
+
+    @pytest.mark.unit
+    def test_partition_and_view(self):
+        assert partition_ddl(2024) == (
+            "CREATE TABLE IF NOT EXISTS stock_bars_y2024 PARTITION OF stock_bars "
+            "FOR VALUES FROM ('2024-01-01') TO ('2025-01-01')"
+        )
+        # Plain column list, so the view stays auto-updatable
+        assert view_ddl() == (
+            "CREATE OR REPLACE VIEW stock_history AS SELECT code, date, open, high, low, close, "
+            "volume, turnover, amplitude, change_pct, change_amt, turnover_rate FROM stock_bars"
+        )
+
+    @pytest.mark.unit
+    def test_partition_years(self):
+        today = date(2026, 10, 16)
+
+        assert partition_years(None, None, today) == list(range(2021, 2028))
+        assert partition_years(date(2015, 6, 1), date(2026, 10, 15), today) == list(range(2015, 2028))
+        assert partition_years(date(2024, 1, 1), date(2030, 1, 1), today)[-1] == 2030
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Migration Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestMigration:
+    """Tests for migrate_stock_history."""
+
+    @pytest.mark.unit
+    async def test_legacy_table_is_copied_and_swapped(self):
+        conn = FakeConn("r", first=date(2023, 3, 1), last=date(2026, 10, 15))
+
+        copied = await migrate_stock_history(conn, today=date(2026, 10, 16))
+
+        assert copied == 400
+        copies = [(sql, args) for sql, args in conn.executed if sql.startswith("INSERT INTO stock_bars")]
+        assert [args for _, args in copies] == [
+            (date(y, 1, 1), date(y + 1, 1, 1)) for y in range(2023, 2027)
+        ]
+        assert "open::float8" in copies[0][0] and "FROM stock_history WHERE" in copies[0][0]
+        assert conn.statements(f"TRUNCATE {BARS_TABLE}")
+        statements = [sql for sql, _ in conn.executed]
+        rename = statements.index(f"ALTER TABLE stock_history RENAME TO {LEGACY_TABLE}")
+        assert statements[rename + 1] == view_ddl()
+        assert rename > statements.index(copies[-1][0])
+        assert len(conn.statements("CREATE TABLE IF NOT EXISTS stock_bars_y")) == 7
+
+    @pytest.mark.unit
+    async def test_fresh_database_gets_view(self):
+        conn = FakeConn(None)
+
+        assert await migrate_stock_history(conn, today=date(2026, 10, 16)) == 0
+        assert conn.statements("CREATE TABLE IF NOT EXISTS stock_bars (")
+        assert conn.statements("CREATE OR REPLACE VIEW stock_history")
+        assert not conn.statements("INSERT") and not conn.statements("ALTER")
+
+    @pytest.mark.unit
+    async def test_migrated_database_only_adds_partitions(self):
+        conn = FakeConn("v")
+
+        assert await migrate_stock_history(conn, today=date(2026, 10, 16)) == 0
+        assert all(sql.startswith("CREATE TABLE IF NOT EXISTS stock_bars_y") for sql, _ in conn.executed)
+        assert conn.executed[-1][0].endswith("FROM ('2027-01-01') TO ('2028-01-01')")
+
+    @pytest.mark.unit
+    async def test_partition_failure_is_logged(self):
+        class DefaultHoldsRows(FakeConn):
+            async def execute(self, sql, *args):
+                raise RuntimeError("updated partition constraint for default partition would be violated")
+
+        await history_schema.ensure_partitions(DefaultHoldsRows("v"), today=date(2026, 10, 16))
@@ -0,0 +1,177 @@
+"""
+Unit tests for HttpCrawlerProvider pagination and quote fetching.
+
+Tests:
+- Concurrent page fetching after page 1 reveals the total
+- Per-page retry and failure after retries
+- Spot DataFrame built from column lists
+- Concurrent Sina quote chunks
+"""
+
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from app.services.data_provider import http_crawler_provider as crawler_module
+from app.services.data_provider.http_crawler_provider import CLIST_URL, HttpCrawlerProvider
+
+
+def _row(i):
+    return {
+        "f12": f"{600000 + i}", "f14": f"股票{i}", "f2": 10.0 + i, "f3": 1.0,
+        "f17": 9.9, "f15": 11.0, "f16": 9.5, "f18": 9.8, "f5": 1000, "f6": 1e6,
+        "f8": 2.5, "f7": 3.0, "f10": 1.2,
+    }
+
+
+class FakeEastMoney:
+    """Serves `total` rows in pages of pz; pages in `flaky` fail once."""
+
+    def __init__(self, total, flaky=(), broken=()):
+        self.total = total
+        self.flaky = set(flaky)
+        self.broken = set(broken)
+        self.calls = []
+
+    def __call__(self, request):
+        page = int(request.url.params["pn"])
+        size = int(request.url.params["pz"])
+        self.calls.append(page)
+        if page in self.broken:
+            return httpx.Response(502)
+        if page in self.flaky:
+            self.flaky.discard(page)
+            return httpx.Response(500)
+        start = (page - 1) * size
+        diff = [_row(i) for i in range(start, min(start + size, self.total))]
+        return httpx.Response(200, json={"data": {"total": self.total, "diff": diff}})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(crawler_module, "RETRY_DELAY", 0)
+    return HttpCrawlerProvider()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pagination Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestClistPagination:
+    """Tests for _fetch_clist."""
+
+    @pytest.mark.unit
+    async def test_fetches_every_page_once(self, provider):
+        server = FakeEastMoney(total=1234)
+        with respx.mock:
+            respx.get(CLIST_URL).mock(side_effect=server)
+            rows = await provider._fetch_clist("f12,f14")
+        await provider.shutdown()
+
+        assert [r["f12"] for r in rows] == [f"{600000 + i}" for i in range(1234)]
+        assert server.calls[0] == 1
+        assert sorted(server.calls) == list(range(1, 14))
+
+    @pytest.mark.unit
+    async def test_failed_pages_are_retried_alone(self, provider):
+        server = FakeEastMoney(total=500, flaky={3, 5})
+        with respx.mock:
+            respx.get(CLIST_URL).mock(side_effect=server)
+            rows = await provider._fetch_clist("f12,f14")
+        await provider.shutdown()
+
+        assert len(rows) == 500
+        assert sorted(server.calls) == [1, 2, 3, 3, 4, 5, 5]
+
+    @pytest.mark.unit
+    async def test_page_failing_all_retries_fails_the_list(self, provider):
+        server = FakeEastMoney(total=500, broken={4})
+        with respx.mock:
+            respx.get(CLIST_URL).mock(side_effect=server)
+            rows = await provider._fetch_clist("f12,f14")
+        await provider.shutdown()
+
+        assert rows is None
+        assert server.calls.count(4) == crawler_module.PAGE_RETRIES + 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Spot Data Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestGetAllSpotData:
+    """Tests for get_all_spot_data."""
+
+    @pytest.mark.unit
+    async def test_frame_columns(self, provider):
+        server = FakeEastMoney(total=250)
+        with respx.mock:
+            respx.get(CLIST_URL).mock(side_effect=server)
+            df = await provider.get_all_spot_data()
+        await provider.shutdown()
+
+        assert len(df) == 250
+        assert list(df.columns[:2]) == ["代码", "名称"]
+        assert {"最新价", "昨收", "量比", "换手率"} <= set(df.columns)
+        assert df["最新价"].dtype == float
+        assert df.iloc[7]["代码"] == "600007" and df.iloc[7]["最新价"] == 17.0
+
+    @pytest.mark.unit
+    async def test_dash_reads_as_zero(self, provider):
+        row = _row(0)
+        row["f2"] = "-"
+        with respx.mock:
+            respx.get(CLIST_URL).mock(return_value=httpx.Response(200, json={"data": {"total": 1, "diff": [row]}}))
+            df = await provider.get_all_spot_data()
+        await provider.shutdown()
+
+        assert df.iloc[0]["最新价"] == 0
+
+    @pytest.mark.unit
+    async def test_failure_returns_none(self, provider):
+        with respx.mock:
+            respx.get(CLIST_URL).mock(return_value=httpx.Response(503))
+            assert await provider.get_all_spot_data() is None
+        await provider.shutdown()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sina Quote Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _sina_line(sina_code, price):
+    fields = ["名称", "10.0", "9.8", str(price)] + ["0"] * 4 + ["1000", "12345"] + ["0"] * 21 + ["15:00:00"]
+    return f'var hq_str_{sina_code}="{",".join(fields)}";'
+
+
+class TestGetQuotes:
+    """Tests for concurrent Sina chunk fetching."""
+
+    @pytest.mark.unit
+    async def test_chunks_fetched_concurrently(self, provider):
+        codes = [f"{600000 + i}" for i in range(200)]
+        in_flight = 0
+        peak = 0
+
+        async def sina(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            chunk = str(request.url).split("list=")[-1]
+            body = "\n".join(_sina_line(sc, 10.5) for sc in chunk.split(","))
+            return httpx.Response(200, content=body.encode("gbk"))
+
+        with respx.mock:
+            route = respx.get(url__startswith="http://hq.sinajs.cn/list=").mock(side_effect=sina)
+            quotes = await provider.get_quotes(codes)
+        await provider.shutdown()
+
+        assert route.call_count == 3
+        assert peak > 1
+        assert set(quotes) == set(codes)
+        assert quotes["600123"]["price"] == 10.5
+        assert quotes["600123"]["change_pct"] == pytest.approx((10.5 - 9.8) / 9.8 * 100)
@@ -0,0 +1,232 @@
+"""
+Unit tests for incremental scanning over RollingState.
+
+Tests:
+- Advancing bar by bar matches a rebuild from scratch
+- Running-sum indicators match the per-stock utils
+- Serialization round trip
+- run_rolling_scan parity with run_scan, also with more history than the window
+- Signals without detect_rolling scanned on history and merged in
+"""
+
+import pytest
+import numpy as np
+from datetime import date
+
+from app.services.scanner import incremental, run_scan, run_rolling_scan, build_multi_signal
+from app.services.scanner.incremental import RollingState
+from app.services.scanner.loader import ColumnarHistory
+from app.services.scanner.utils import calculate_atr
+from app.services import stock_scanner as scanner_module
+from app.services.stock_scanner import StockScanner
+
+
+EPOCH = date(1970, 1, 1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def universe(make_universe):
+    return make_universe(80, seed=5)
+
+
+@pytest.fixture
+def all_days(universe):
+    stocks_data, _ = universe
+    return sorted({d for hist in stocks_data.values() for d in hist['日期']})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RollingState Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRollingState:
+    """Tests for RollingState updates and indicators."""
+
+    @pytest.mark.unit
+    def test_advance_matches_rebuild(self, universe, all_days, history_records):
+        """Advancing day by day should end where a fresh rebuild starts."""
+        stocks_data, _ = universe
+        records = history_records(stocks_data)
+        cut = all_days[-60]
+
+        state = RollingState.from_history(
+            ColumnarHistory.from_records([r for r in records if r[1] < (cut - EPOCH).days]), window=100
+        )
+        for day in all_days[-60:]:
+            epoch_day = (day - EPOCH).days
+            state.advance(ColumnarHistory.from_records([r for r in records if r[1] == epoch_day]))
+
+        rebuilt = RollingState.from_history(ColumnarHistory.from_records(records), window=100)
+        present = [c for c in rebuilt.codes if c in state]
+
+        assert state.compare(rebuilt) == []
+        assert len(present) == len(state)
+
+    @pytest.mark.unit
+    def test_advance_skips_old_bars(self, universe, history_records):
+        """Re-applying bars the state already has should be a no-op."""
+        stocks_data, _ = universe
+        history = ColumnarHistory.from_records(history_records(stocks_data))
+        state = RollingState.from_history(history, window=100)
+
+        assert state.advance(history) == 0
+
+    @pytest.mark.unit
+    def test_indicators_match_utils(self, universe, history_records):
+        """MA and ATR from running sums should match pandas and calculate_atr."""
+        stocks_data, _ = universe
+        state = RollingState.from_history(ColumnarHistory.from_records(history_records(stocks_data)), window=300)
+
+        for code, row in zip(state.codes[:20], state.rows_for(state.codes[:20])):
+            hist = stocks_data[code]
+            if len(hist) < 21:
+                continue
+            ma20 = hist['收盘'].rolling(20).mean()
+            assert state.ma(20)[row] == pytest.approx(ma20.iloc[-1], rel=1e-12)
+            assert state.ma(20, prev=True)[row] == pytest.approx(ma20.iloc[-2], rel=1e-12)
+            assert state.atr()[row] == pytest.approx(calculate_atr(hist, 14), rel=1e-12)
+
+    @pytest.mark.unit
+    def test_bytes_round_trip(self, universe, history_records):
+        """to_bytes/from_bytes should preserve the state exactly."""
+        stocks_data, _ = universe
+        state = RollingState.from_history(ColumnarHistory.from_records(history_records(stocks_data)), window=100)
+        restored = RollingState.from_bytes(state.to_bytes())
+
+        assert restored.codes == state.codes
+        assert restored.window == 100
+        assert restored.compare(state, rtol=0) == []
+
+    @pytest.mark.unit
+    def test_extend_adds_new_codes_only(self, universe, history_records):
+        """extend() should append unseen codes and keep existing rows."""
+        stocks_data, _ = universe
+        records = history_records(stocks_data)
+        codes = list(dict.fromkeys(r[0] for r in records))
+        first = [r for r in records if r[0] in codes[:40]]
+
+        state = RollingState.from_history(ColumnarHistory.from_records(first), window=100)
+        full = RollingState.from_history(ColumnarHistory.from_records(records), window=100)
+        state.extend(full)
+
+        assert state.codes == codes
+        assert state.compare(full) == []
+
+    @pytest.mark.unit
+    def test_window_too_small(self):
+        """Windows that cannot hold the longest running sum are rejected."""
+        with pytest.raises(ValueError):
+            RollingState.from_history(ColumnarHistory.empty(), window=20)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rolling Scan Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRollingScan:
+    """Tests for run_rolling_scan."""
+
+    @pytest.mark.unit
+    async def test_parity_with_runner(self, universe, history_records):
+        """Signals evaluated from state should match run_scan on full history."""
+        stocks_data, stock_names = universe
+        enabled = ["breakout", "volume", "ma_bullish"]
+        state = RollingState.from_history(ColumnarHistory.from_records(history_records(stocks_data)), window=300)
+        codes = list(stocks_data)
+
+        expected = await run_scan(stocks_data, stock_names, enabled_signals=enabled)
+        actual, remaining = run_rolling_scan(state, stock_names, codes=codes, enabled_signals=enabled)
+
+        assert remaining == []
+        for sig_id in enabled:
+            assert actual[sig_id] == expected[sig_id]
+        assert build_multi_signal(actual, stock_names, codes) == expected["multi_signal"]
+
+    @pytest.mark.unit
+    async def test_parity_with_history_longer_than_window(self, make_universe, history_records):
+        """A full scan loading more bars than the state window must agree."""
+        stocks_data, stock_names = make_universe(60, seed=9, max_bars=700)
+        # An old peak outside the 300-bar window, then a steady climb to a new high
+        hist = max(stocks_data.values(), key=len).copy()
+        assert len(hist) > 400
+        climb = np.linspace(10, 20, len(hist))
+        hist['收盘'] = climb
+        hist['开盘'] = climb
+        hist['最高'] = climb * 1.001
+        hist['最低'] = climb * 0.999
+        hist.loc[hist.index[5], '最高'] = 100.0
+        hist.loc[hist.index[-1], ['收盘', '最高']] = 21.0
+        stocks_data["600999"], stock_names["600999"] = hist, "老高点"
+        enabled = ["breakout", "volume", "ma_bullish"]
+        state = RollingState.from_history(ColumnarHistory.from_records(history_records(stocks_data)), window=300)
+
+        expected = await run_scan(stocks_data, stock_names, enabled_signals=enabled)
+        actual, _ = run_rolling_scan(state, stock_names, codes=list(stocks_data), enabled_signals=enabled)
+
+        for sig_id in enabled:
+            assert actual[sig_id] == expected[sig_id]
+        assert "600999" in {item["code"] for item in actual["breakout"]}
+
+    @pytest.mark.unit
+    async def test_reports_signals_needing_history(self, universe, history_records):
+        """Signals without detect_rolling should be returned as remaining."""
+        stocks_data, stock_names = universe
+        state = RollingState.from_history(ColumnarHistory.from_records(history_records(stocks_data)), window=100)
+
+        results, remaining = run_rolling_scan(state, stock_names, enabled_signals=["breakout", "startup_candidate"])
+
+        assert list(results) == ["breakout"]
+        assert remaining == ["startup_candidate"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scanner Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestScanIncremental:
+    """Tests for StockScanner._scan_incremental."""
+
+    @pytest.mark.unit
+    async def test_merges_rolling_and_history_signals(self, monkeypatch, universe, history_records):
+        """Rolling signals come from the state, the rest from one history scan."""
+        stocks_data, stock_names = universe
+        codes = list(stocks_data)
+        scanner = StockScanner()
+        calls = []
+        history_only = {"startup_candidate": [{"code": codes[0], "name": stock_names[codes[0]]}],
+                        "top_gainers_weekly": [], "multi_signal": []}
+
+        async def scan_impl(force=False, progress_callback=None, enabled_signals=None):
+            calls.append(enabled_signals)
+            return dict(history_only)
+
+        async def scan_codes(today):
+            return codes, stock_names
+
+        async def rebuild(codes, window):
+            return RollingState.from_history(ColumnarHistory.from_records(history_records(stocks_data)), window)
+
+        async def no_state(pool):
+            return None
+
+        async def save_state(pool, state):
+            pass
+
+        monkeypatch.setattr(scanner_module.db, "pool", object())
+        monkeypatch.setattr(incremental, "load_rolling_state", no_state)
+        monkeypatch.setattr(incremental, "save_rolling_state", save_state)
+        monkeypatch.setattr(scanner, "_scan_impl", scan_impl)
+        monkeypatch.setattr(scanner, "_get_scan_codes", scan_codes)
+        monkeypatch.setattr(scanner, "_rebuild_rolling_state", rebuild)
+
+        result = await scanner._scan_incremental(enabled_signals=["breakout", "startup_candidate"])
+
+        expected = await run_scan(stocks_data, stock_names, enabled_signals=["breakout"])
+        assert calls == [["startup_candidate"]]
+        assert result["breakout"] == expected["breakout"]
+        assert result["startup_candidate"] == history_only["startup_candidate"]
+        assert "top_gainers_weekly" in result
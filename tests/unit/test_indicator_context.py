@@ -0,0 +1,152 @@
+"""
+Unit tests for IndicatorContext.
+
+Tests the shared per-stock indicator cache:
+- Lazy computation and memoization
+- Parity with the underlying utils functions
+- Runner passing one context to all opted-in signals
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+from app.services.scanner.base import SignalDetector, SignalResult
+from app.services.scanner.context import IndicatorContext, ensure_context
+from app.services.scanner.registry import SignalRegistry
+from app.services.scanner.runner import run_scan
+from app.services.scanner.utils import calculate_atr, detect_pivot_lows
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def sample_hist():
+    """120 bars of noisy uptrend."""
+    n = 120
+    rng = np.random.default_rng(42)
+    closes = 10 * np.exp(np.cumsum(rng.normal(0.002, 0.02, n)))
+    opens = closes * (1 + rng.normal(0, 0.005, n))
+    return pd.DataFrame({
+        '日期': [date(2024, 1, 1) + timedelta(days=i) for i in range(n)],
+        '开盘': opens,
+        '收盘': closes,
+        '最高': np.maximum(opens, closes) * 1.01,
+        '最低': np.minimum(opens, closes) * 0.99,
+        '成交量': rng.uniform(1e5, 5e5, n),
+        '换手率': rng.uniform(1, 5, n),
+    })
+
+
+@pytest.fixture
+def clean_registry():
+    """Provide a clean registry for each test."""
+    saved = SignalRegistry._signals.copy()
+    SignalRegistry.clear()
+    yield SignalRegistry
+    SignalRegistry._signals = saved
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# IndicatorContext Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestIndicatorContext:
+    """Tests for IndicatorContext memoization."""
+
+    @pytest.mark.unit
+    def test_ma_matches_rolling_and_is_memoized(self, sample_hist):
+        """ma() should equal pandas rolling mean and return the cached object."""
+        ctx = IndicatorContext(sample_hist)
+        ma20 = ctx.ma(20)
+
+        expected = sample_hist['收盘'].rolling(20).mean()
+        pd.testing.assert_series_equal(ma20, expected)
+        assert ctx.ma(20) is ma20
+        assert ctx.ma(60) is not ma20
+
+    @pytest.mark.unit
+    def test_atr_and_pivots_match_utils(self, sample_hist):
+        """Cached indicators should equal the utils functions."""
+        ctx = IndicatorContext(sample_hist)
+
+        assert ctx.atr(14) == calculate_atr(sample_hist, 14)
+        assert ctx.pivot_lows(3, 3) == detect_pivot_lows(sample_hist['最低'].values, 3, 3)
+
+    @pytest.mark.unit
+    def test_linreg_offset(self, sample_hist):
+        """offset=1 should compute the channel as of the previous bar."""
+        ctx = IndicatorContext(sample_hist)
+        today = ctx.linreg_channel(20)
+        yesterday = ctx.linreg_channel(20, offset=1)
+
+        assert today != yesterday
+        assert ctx.linreg_channel(20, offset=1) is yesterday
+
+    @pytest.mark.unit
+    def test_weekly_resample_cached(self, sample_hist):
+        """weekly() should resample once."""
+        ctx = IndicatorContext(sample_hist)
+        weekly = ctx.weekly()
+
+        assert len(weekly) < len(sample_hist)
+        assert ctx.weekly() is weekly
+
+    @pytest.mark.unit
+    def test_ensure_context(self, sample_hist):
+        """ensure_context should reuse a matching context only."""
+        ctx = IndicatorContext(sample_hist)
+
+        assert ensure_context(sample_hist, ctx) is ctx
+        assert ensure_context(sample_hist, None) is not ctx
+        assert ensure_context(sample_hist.copy(), ctx) is not ctx
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Runner Integration Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRunnerContext:
+    """Tests for context sharing in run_scan."""
+
+    @pytest.mark.unit
+    async def test_signals_share_one_context(self, clean_registry, sample_hist):
+        """All opted-in signals should receive the same context per stock."""
+        seen = []
+
+        @clean_registry.register
+        class FirstSignal(SignalDetector):
+            signal_id = "ctx_first"
+            uses_context = True
+
+            def detect(self, hist, stock_info, ctx=None):
+                seen.append(ctx)
+                ctx.ma(20)
+                return SignalResult(triggered=False)
+
+        @clean_registry.register
+        class SecondSignal(SignalDetector):
+            signal_id = "ctx_second"
+            uses_context = True
+
+            def detect(self, hist, stock_info, ctx=None):
+                seen.append(ctx)
+                return SignalResult(triggered=("ma", "收盘", 20) in ctx._cache)
+
+        @clean_registry.register
+        class LegacySignal(SignalDetector):
+            signal_id = "ctx_legacy"
+
+            def detect(self, hist, stock_info):
+                return SignalResult(triggered=True)
+
+        results = await run_scan({"000001": sample_hist}, {"000001": "测试"})
+
+        assert len(seen) == 2
+        assert seen[0] is seen[1]
+        assert seen[0].hist is sample_hist
+        assert len(results["ctx_second"]) == 1
+        assert len(results["ctx_legacy"]) == 1
@@ -4,8 +4,13 @@ Unit tests for MessageDeduplicator service.
 Tests SimHash-based duplicate detection and LRU cache behavior.
 """
 
+import random
+
 import pytest
-from app.services.message_dedup import MessageDeduplicator, SimHash
+from app.services import message_dedup
+from app.services.message_dedup import (
+    MessageDeduplicator, SimHash, SimHashIndex, NGRAM_SIZES, max_distance_for,
+)
 
 
 class TestSimHash:
@@ -63,6 +68,68 @@ class TestSimHash:
         assert similarity == 1.0
 
 
+class TestNgramSimHash:
+    """Test the character n-gram fingerprinting method."""
+    
+    @staticmethod
+    def _reference(text):
+        """Pure-Python FNV-1a + splitmix64 n-gram SimHash."""
+        mask = (1 << 64) - 1
+        chars = [int(i) for i in SimHash._token_ids(text)]
+        if not chars:
+            return None
+        v = [0] * 64
+        for n in NGRAM_SIZES:
+            n = min(n, len(chars))
+            for i in range(len(chars) - n + 1):
+                h = 0xCBF29CE484222325 ^ n
+                for c in chars[i:i + n]:
+                    h = ((h ^ c) * 0x100000001B3) & mask
+                h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & mask
+                h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & mask
+                h ^= h >> 31
+                for bit in range(64):
+                    v[bit] += 1 if h >> bit & 1 else -1
+        return sum(1 << bit for bit in range(64) if v[bit] > 0)
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("text", ["央行今日开展1000亿元逆回购操作", "Mixed 中英文 text", "x", ""])
+    def test_matches_reference(self, text):
+        """NumPy accumulation should equal the per-token bit loop."""
+        assert SimHash.compute_ngram(text) == self._reference(text)
+    
+    @pytest.mark.unit
+    def test_tokens_are_cjk_characters_and_words(self):
+        """CJK text should split per character, Latin text per word."""
+        ids = SimHash._token_ids("央行 Bitcoin涨了, ETF!")
+        
+        assert len(ids) == 6
+        assert list(ids[:2]) == [ord("央"), ord("行")]
+    
+    @pytest.mark.unit
+    def test_chinese_near_duplicate(self):
+        """Small edits to Chinese text should keep fingerprints close."""
+        text1 = "北向资金今日净买入56.3亿元，其中沪股通净买入32.1亿元，深股通净买入24.2亿元。"
+        text2 = "北向资金今日净买入56.3亿元，其中沪股通净买入32.1亿元，深股通净买入24.2亿元！"
+        other = "美联储主席鲍威尔表示，在对通胀回落至2%更有信心之前，不适合降息。"
+        
+        near = SimHash.similarity(SimHash.compute_ngram(text1), SimHash.compute_ngram(text2))
+        far = SimHash.similarity(SimHash.compute_ngram(text1), SimHash.compute_ngram(other))
+        assert near >= 0.85
+        assert far < 0.8
+    
+    @pytest.mark.unit
+    def test_fingerprint_method_selection(self):
+        """fingerprint() should dispatch by method and reject unknown ones."""
+        text = "The quick brown fox"
+        assert SimHash.fingerprint(text, "word") == SimHash.compute(text)
+        assert SimHash.fingerprint(text, "ngram") == SimHash.compute_ngram(text)
+        with pytest.raises(ValueError):
+            SimHash.fingerprint(text, "md5")
+        with pytest.raises(ValueError):
+            MessageDeduplicator(simhash_method="md5")
+
+
 class TestMessageDeduplicator:
     """Test MessageDeduplicator class."""
     
@@ -104,6 +171,18 @@ class TestMessageDeduplicator:
         # The test validates the mechanism works
         assert isinstance(is_dup, bool)
     
+    @pytest.mark.unit
+    def test_emoji_only_messages_are_not_near_duplicates(self, deduplicator):
+        """Texts without tokens have no fingerprint and only match exactly."""
+        text1 = "🚀🚀🚀🔥🔥🔥💰💰💰🎉🎉🎉"
+        text2 = "😭😭😭😢😢😢🙏🙏🙏👍👍👍"
+        assert SimHash.compute_ngram(text1) is None
+        
+        deduplicator.add_message(text1)
+        assert deduplicator.is_duplicate(text2) == (False, None)
+        assert deduplicator.is_duplicate(text2) == (True, "exact")
+        assert len(deduplicator._fingerprints) == 0
+    
     @pytest.mark.unit
     def test_unique_message_not_duplicate(self, deduplicator):
         """Should not flag unique messages as duplicates."""
@@ -182,3 +261,84 @@ class TestDeduplicatorCacheEviction:
         stats = deduplicator.get_stats()
         # Cache should not exceed max size
         assert stats["cache_size"] <= 3
+
+
+class TestSimHashIndex:
+    """Test the multi-table Hamming index."""
+    
+    @staticmethod
+    def _flip(fingerprint, bits):
+        for bit in bits:
+            fingerprint ^= 1 << bit
+        return fingerprint
+    
+    @pytest.mark.unit
+    def test_max_distance_for_threshold(self):
+        """Max distance should be the largest one meeting the threshold."""
+        assert max_distance_for(0.85) == 9
+        assert max_distance_for(1.0) == 0
+        assert SimHash.similarity(0, (1 << 9) - 1) >= 0.85
+        assert SimHash.similarity(0, (1 << 10) - 1) < 0.85
+    
+    @pytest.mark.unit
+    @pytest.mark.parametrize("key_blocks", [1, 2])
+    def test_matches_linear_scan(self, key_blocks):
+        """Index lookups should agree with a brute-force scan."""
+        rng = random.Random(3)
+        index = SimHashIndex(max_distance=9, key_blocks=key_blocks)
+        stored = [rng.getrandbits(64) for _ in range(300)]
+        for fp in stored:
+            index.add(fp)
+        
+        queries = [self._flip(fp, rng.sample(range(64), rng.randint(0, 12))) for fp in stored[:100]]
+        queries += [rng.getrandbits(64) for _ in range(100)]
+        for query in queries:
+            expected = min(SimHash.hamming_distance(query, fp) for fp in stored)
+            found = index.find(query)
+            if expected <= 9:
+                assert found is not None and found[1] == expected
+            else:
+                assert found is None
+    
+    @pytest.mark.unit
+    def test_remove_clears_all_tables(self):
+        """Removed fingerprints should not be found through any table."""
+        index = SimHashIndex(max_distance=9)
+        index.add(0xDEADBEEF)
+        index.remove(0xDEADBEEF)
+        
+        assert len(index) == 0
+        assert index.find(0xDEADBEEF) is None
+        assert all(not table for table in index._tables)
+    
+    @pytest.mark.unit
+    def test_evict_lru_and_ttl(self):
+        """Eviction should drop least recently used and expired entries."""
+        index = SimHashIndex(max_distance=3)
+        for fp, ts in [(1, 100.0), (2, 200.0), (3, 300.0)]:
+            index.add(fp << 40, now=ts)
+        index.touch(1 << 40, now=400.0)
+        
+        assert index.evict(max_size=2, now=400.0) == 1
+        assert (2 << 40) not in index
+        
+        assert index.evict(max_size=10, ttl=150, now=500.0) == 1
+        assert list(index._entries) == [1 << 40]
+
+
+class TestDeduplicatorTTL:
+    """Test TTL-based forgetting."""
+    
+    @pytest.mark.unit
+    def test_expired_message_not_duplicate(self, monkeypatch):
+        """Messages older than ttl_seconds should no longer match."""
+        clock = [1000.0]
+        monkeypatch.setattr(message_dedup.time, "time", lambda: clock[0])
+        deduplicator = MessageDeduplicator(max_cache_size=100, min_text_length=5, ttl_seconds=60)
+        text = "Market opens higher on policy news"
+        
+        assert deduplicator.is_duplicate(text) == (False, None)
+        clock[0] += 30
+        assert deduplicator.is_duplicate(text)[0] is True
+        clock[0] += 90
+        assert deduplicator.is_duplicate(text) == (False, None)
@@ -0,0 +1,165 @@
+"""
+Unit tests for the vectorized panel scan engine.
+
+Tests:
+- PricePanel layout (right-aligned rows, NaN padding)
+- Parity of run_panel_scan with the per-stock run_scan
+- Fallback to per-stock detect() for signals without detect_panel
+- Breakout lookback bounded to the prior 20 bars
+"""
+
+import pytest
+import numpy as np
+
+from app.services.scanner import run_scan, run_panel_scan
+from app.services.scanner.base import SignalDetector, SignalResult, PanelResult
+from app.services.scanner.panel import PricePanel
+from app.services.scanner.registry import SignalRegistry
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def universe(make_universe):
+    return make_universe(150)
+
+
+@pytest.fixture
+def clean_registry():
+    """Provide a clean registry for each test."""
+    saved = SignalRegistry._signals.copy()
+    SignalRegistry.clear()
+    yield SignalRegistry
+    SignalRegistry._signals = saved
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PricePanel Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestPricePanel:
+    """Tests for PricePanel construction."""
+
+    @pytest.mark.unit
+    def test_rows_are_right_aligned(self, universe):
+        """Last column should be each stock's latest bar, left-padded with NaN."""
+        stocks_data, stock_names = universe
+        panel = PricePanel.from_frames(stocks_data, stock_names)
+
+        for row, code in enumerate(panel.codes):
+            hist = stocks_data[code]
+            n = len(hist)
+            assert panel.lengths[row] == n
+            np.testing.assert_array_equal(panel.close[row, -n:], hist['收盘'].values)
+            assert np.isnan(panel.close[row, :-n]).all()
+
+    @pytest.mark.unit
+    def test_rolling_mean_matches_pandas(self, universe):
+        """Panel rolling mean should be identical to per-stock pandas rolling."""
+        stocks_data, stock_names = universe
+        panel = PricePanel.from_frames(stocks_data, stock_names)
+        ma10 = panel.rolling_mean("close", 10)
+
+        for row, code in enumerate(panel.codes[:20]):
+            expected = stocks_data[code]['收盘'].rolling(10).mean().values
+            np.testing.assert_array_equal(ma10[row, -len(expected):], expected)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Engine Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestPanelScan:
+    """Tests for run_panel_scan."""
+
+    @pytest.mark.unit
+    async def test_parity_with_runner(self, universe):
+        """Panel engine should return exactly what run_scan returns."""
+        stocks_data, stock_names = universe
+
+        expected = await run_scan(stocks_data, stock_names)
+        actual = await run_panel_scan(stocks_data, stock_names)
+
+        assert actual == expected
+
+    @pytest.mark.unit
+    async def test_parity_with_enabled_signals(self, universe):
+        """Restricting signals should behave like run_scan."""
+        stocks_data, stock_names = universe
+        enabled = ["breakout", "volume", "yesterday_broken_board", "pullback_ma5"]
+
+        expected = await run_scan(stocks_data, stock_names, enabled_signals=enabled)
+        actual = await run_panel_scan(stocks_data, stock_names, enabled_signals=enabled)
+
+        assert actual == expected
+
+    @pytest.mark.unit
+    async def test_panel_error_falls_back_to_detect(self, clean_registry, universe):
+        """A failing detect_panel should fall back to per-stock detect()."""
+        stocks_data, stock_names = universe
+
+        @clean_registry.register
+        class BrokenPanelSignal(SignalDetector):
+            signal_id = "broken_panel"
+
+            def detect(self, hist, stock_info):
+                return SignalResult(triggered=True, metadata={"bars": len(hist)})
+
+            def detect_panel(self, panel):
+                raise ValueError("boom")
+
+        @clean_registry.register
+        class PanelOnlySignal(SignalDetector):
+            signal_id = "panel_only"
+            min_bars = 100
+
+            def detect(self, hist, stock_info):
+                return SignalResult(triggered=True)
+
+            def detect_panel(self, panel):
+                return PanelResult(triggered=np.ones(len(panel), dtype=bool))
+
+        results = await run_panel_scan(stocks_data, stock_names)
+        scanned = [c for c, h in stocks_data.items() if len(h) >= 21]
+        long_enough = [c for c, h in stocks_data.items() if len(h) >= 100]
+
+        assert [r["code"] for r in results["broken_panel"]] == scanned
+        assert results["broken_panel"][0]["bars"] == len(stocks_data[scanned[0]])
+        assert [r["code"] for r in results["panel_only"]] == long_enough
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Breakout Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestBreakout:
+    """Tests for the breakout signal's lookback."""
+
+    @pytest.mark.unit
+    def test_only_prior_twenty_bars_count(self, make_universe):
+        """A peak older than 20 bars used to block the signal (max over every loaded bar); now it does not."""
+        stocks_data, stock_names = make_universe(5, max_bars=80)
+        code, hist = max(stocks_data.items(), key=lambda item: len(item[1]))
+        n = len(hist)
+        assert n > 30
+        high = np.full(n, 20.0)
+        high[n - 30] = 50.0
+        high[-1] = 21.0
+        close = np.full(n, 19.5)
+        close[-1] = 21.0
+        hist = hist.assign(最高=high, 收盘=close)
+        breakout = SignalRegistry.get_by_id("breakout")
+
+        def triggers(frame):
+            panel = PricePanel.from_frames({code: frame}, {code: stock_names[code]})
+            return breakout.detect(frame, {}).triggered, bool(breakout.detect_panel(panel).triggered[0])
+
+        old_rule = close[-1] > high[:-1].max()
+        assert not old_rule
+        assert triggers(hist) == (True, True)
+
+        # A higher high inside the 20-bar lookback still blocks it
+        high[n - 5] = 22.0
+        assert triggers(hist.assign(最高=high)) == (False, False)
@@ -0,0 +1,121 @@
+"""
+Unit tests for the shared LLM provider HTTP transport.
+
+Tests:
+- One pooled client per API host
+- Per-call read timeout with the configured connect timeout
+- Request / error metrics per provider
+- Providers sending through the shared transport
+"""
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.providers import base
+from app.providers.openai import OpenAIProvider
+from app.providers.transport import ProviderTransport
+
+
+def _transport(handler):
+    return ProviderTransport(http2=False, transport=httpx.MockTransport(handler))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pooling Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestPooling:
+    """Tests for client reuse and shutdown."""
+
+    @pytest.mark.unit
+    async def test_one_client_per_host(self):
+        transport = _transport(lambda request: httpx.Response(200))
+
+        a = transport.client_for("https://api.openai.com/v1/chat/completions")
+        b = transport.client_for("https://api.openai.com/v1/models")
+        c = transport.client_for("https://api.groq.com/openai/v1/chat/completions")
+
+        assert a is b and a is not c
+        await transport.aclose()
+        assert a.is_closed and transport.stats()["hosts"] == 0
+        # A closed pool is rebuilt on the next request
+        assert not transport.client_for("https://api.openai.com/v1/models").is_closed
+        await transport.aclose()
+
+    @pytest.mark.unit
+    async def test_timeout_keeps_connect_cap(self):
+        seen = {}
+
+        def handler(request):
+            seen.update(request.extensions["timeout"])
+            return httpx.Response(200)
+
+        transport = _transport(handler)
+        await transport.request("openai", "POST", "https://api.openai.com/v1/x", timeout=90.0, json={})
+        await transport.aclose()
+
+        assert seen["read"] == 90.0
+        assert seen["connect"] == settings.LLM_HTTP_CONNECT_TIMEOUT
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestMetrics:
+    """Tests for per-provider stats()."""
+
+    @pytest.mark.unit
+    async def test_counts_requests_and_errors(self):
+        statuses = iter([200, 429])
+        transport = _transport(lambda request: httpx.Response(next(statuses)))
+
+        await transport.request("groq", "GET", "https://api.groq.com/models")
+        await transport.request("groq", "GET", "https://api.groq.com/models")
+        stats = transport.stats()["providers"]["groq"]
+        await transport.aclose()
+
+        assert stats["requests"] == 2 and stats["errors"] == 1
+        assert stats["latency_ms"]["avg"] is not None
+
+    @pytest.mark.unit
+    async def test_connection_errors_are_counted(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        transport = _transport(handler)
+        with pytest.raises(httpx.ConnectError):
+            await transport.request("glm", "POST", "https://open.bigmodel.cn/api")
+        await transport.aclose()
+
+        assert transport.stats()["providers"]["glm"]["errors"] == 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Provider Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestProviders:
+    """Tests for providers using the shared transport."""
+
+    @pytest.mark.unit
+    async def test_openai_call_uses_shared_transport(self, monkeypatch):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "hi"}}]})
+
+        transport = _transport(handler)
+        monkeypatch.setattr(base, "provider_transport", transport)
+        monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+        provider = OpenAIProvider()
+
+        for _ in range(3):
+            assert (await provider.call("hello", "gpt-4o"))["content"] == "hi"
+        stats = transport.stats()
+        await transport.aclose()
+
+        assert calls == ["/v1/chat/completions"] * 3
+        assert stats["hosts"] == 1 and stats["providers"]["openai"]["requests"] == 3
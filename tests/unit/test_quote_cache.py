@@ -0,0 +1,115 @@
+"""
+Unit tests for the per-code quote micro-cache.
+
+Tests:
+- TTL reuse and expiry per code
+- Coalescing of concurrent overlapping requests
+- Negative caching and failed fetches
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.data_provider.quote_cache import QuoteCache
+
+
+class FakeProvider:
+    """Records each fetched code list; can be held open."""
+
+    def __init__(self, known=None, fail=False):
+        self.requests = []
+        self.known = known
+        self.fail = fail
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, codes):
+        self.requests.append(list(codes))
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("provider down")
+        return {c: {"price": float(len(self.requests)), "name": c}
+                for c in codes if self.known is None or c in self.known}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# QuoteCache Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestQuoteCache:
+    """Tests for QuoteCache."""
+
+    @pytest.mark.unit
+    async def test_fresh_codes_are_not_refetched(self):
+        provider = FakeProvider()
+        cache = QuoteCache(provider, ttl=60)
+
+        await cache.get(["600519", "000001"])
+        quotes = await cache.get(["000001", "300750"])
+
+        assert provider.requests == [["600519", "000001"], ["300750"]]
+        assert quotes["000001"]["price"] == 1.0
+        assert quotes["300750"]["price"] == 2.0
+
+    @pytest.mark.unit
+    async def test_expired_codes_are_refetched(self):
+        provider = FakeProvider()
+        cache = QuoteCache(provider, ttl=0)
+
+        await cache.get(["600519"])
+        await asyncio.sleep(0.001)
+        quotes = await cache.get(["600519"])
+
+        assert quotes["600519"]["price"] == 2.0
+
+    @pytest.mark.unit
+    async def test_concurrent_callers_share_fetches(self):
+        """50 overlapping portfolio-style requests cost one round of fetching."""
+        provider = FakeProvider()
+        provider.release.clear()
+        cache = QuoteCache(provider, ttl=60)
+
+        holdings = [["600519", "000001"], ["000001", "300750"], ["600519"]] * 17
+        waiters = [asyncio.create_task(cache.get(codes)) for codes in holdings[:50]]
+        await asyncio.sleep(0)
+        provider.release.set()
+        results = await asyncio.gather(*waiters)
+
+        fetched = [c for request in provider.requests for c in request]
+        assert sorted(fetched) == ["000001", "300750", "600519"]
+        assert all(set(r) == set(codes) for r, codes in zip(results, holdings))
+
+    @pytest.mark.unit
+    async def test_unknown_codes_are_cached_as_absent(self):
+        provider = FakeProvider(known={"600519"})
+        cache = QuoteCache(provider, ttl=60)
+
+        assert set(await cache.get(["600519", "999999"])) == {"600519"}
+        assert set(await cache.get(["999999"])) == set()
+        assert len(provider.requests) == 1
+
+    @pytest.mark.unit
+    async def test_failed_fetch_is_not_cached(self):
+        provider = FakeProvider(fail=True)
+        cache = QuoteCache(provider, ttl=60)
+
+        assert await cache.get(["600519"]) == {}
+        provider.fail = False
+        assert "600519" in await cache.get(["600519"])
+        assert len(provider.requests) == 2
+
+    @pytest.mark.unit
+    async def test_cancelled_caller_does_not_cancel_fetch(self):
+        provider = FakeProvider()
+        provider.release.clear()
+        cache = QuoteCache(provider, ttl=60)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get(["600519"]), timeout=0.01)
+        waiter = asyncio.create_task(cache.get(["600519"]))
+        await asyncio.sleep(0)
+        provider.release.set()
+
+        assert "600519" in await waiter
+        assert len(provider.requests) == 1
@@ -0,0 +1,188 @@
+"""
+Unit tests for the LLM response cache.
+
+Tests:
+- Content-addressed keys
+- Memory and Redis tiers, TTL expiry and LRU eviction
+- Single-flight de-duplication of concurrent requests
+- call_with_trace / AiService integration and per-call opt-out
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.providers import base
+from app.providers.base import BaseProvider
+from app.providers.response_cache import REDIS_PREFIX, ResponseCache
+from app.services.ai.service import AiService
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+
+class Counter:
+    """fetch() stand-in that counts provider calls."""
+
+    def __init__(self, content="answer", delay=0.0):
+        self.calls = 0
+        self.content = content
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"thinking": "", "content": self.content}
+
+
+class StubProvider(BaseProvider):
+    def __init__(self):
+        super().__init__("stub", "STUB_KEY")
+        self.default_model = "m"
+        self.calls = 0
+
+    def is_configured(self) -> bool:
+        return True
+
+    async def call(self, prompt, model, history=None, context_prefix=""):
+        self.calls += 1
+        return {"thinking": "", "content": f"echo {prompt}"}
+
+
+def _key(**overrides):
+    parts = {"provider": "groq", "model": "m", "system_prompt": "sys", "history": [],
+             "prompt": "hi", "temperature": None}
+    parts.update(overrides)
+    return ResponseCache.key(**parts)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cache Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestResponseCache:
+    """Tests for ResponseCache tiers and single-flight."""
+
+    @pytest.mark.unit
+    def test_key_covers_every_request_field(self):
+        assert _key() == _key()
+        variants = [
+            _key(provider="openai"), _key(model="m2"), _key(system_prompt="other"),
+            _key(history=[{"role": "user", "content": "x"}]), _key(prompt="hello"), _key(temperature=0.7),
+        ]
+        assert len({_key(), *variants}) == len(variants) + 1
+
+    @pytest.mark.unit
+    async def test_memory_hit_and_redis_tier(self):
+        redis = FakeRedis()
+        fetch = Counter()
+        cache = ResponseCache(redis=redis)
+
+        first = await cache.get_or_call("k", 60, fetch)
+        second = await cache.get_or_call("k", 60, fetch)
+
+        assert first == second == {"thinking": "", "content": "answer"}
+        assert fetch.calls == 1 and cache.memory_hits == 1
+        assert json.loads(redis.data[REDIS_PREFIX + "k"])["content"] == "answer"
+        assert redis.ttls[REDIS_PREFIX + "k"] == 60
+
+        # A fresh process finds it in Redis
+        other = ResponseCache(redis=redis)
+        assert (await other.get_or_call("k", 60, fetch))["content"] == "answer"
+        assert fetch.calls == 1 and other.redis_hits == 1
+        assert other.stats()["hit_rate"] == 1.0
+
+    @pytest.mark.unit
+    async def test_concurrent_requests_share_one_call(self):
+        fetch = Counter(delay=0.02)
+        cache = ResponseCache(redis=FakeRedis())
+
+        results = await asyncio.gather(*(cache.get_or_call("k", 60, fetch) for _ in range(5)))
+
+        assert fetch.calls == 1
+        assert all(r["content"] == "answer" for r in results)
+        assert cache.coalesced == 4 and cache.misses == 1
+
+    @pytest.mark.unit
+    async def test_failures_and_empty_responses_are_not_cached(self):
+        cache = ResponseCache(redis=FakeRedis())
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        outcomes = await asyncio.gather(cache.get_or_call("k", 60, boom), cache.get_or_call("k", 60, boom),
+                                        return_exceptions=True)
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+        empty = Counter(content="")
+        await cache.get_or_call("e", 60, empty)
+        await cache.get_or_call("e", 60, empty)
+        assert empty.calls == 2 and cache.stats()["entries"] == 0
+
+    @pytest.mark.unit
+    async def test_expiry_and_eviction(self):
+        fetch = Counter()
+        cache = ResponseCache(redis=FakeRedis(), max_entries=2)
+
+        for key in ("a", "b", "c"):
+            await cache.get_or_call(key, 60, fetch)
+        assert list(cache._memory) == ["b", "c"]
+
+        cache._memory["c"] = (0.0, cache._memory["c"][1])  # expired
+        assert cache._memory_get("c") is None and "c" not in cache._memory
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Integration Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestCallers:
+    """Tests for cached provider calls."""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        cache = ResponseCache(redis=FakeRedis())
+        monkeypatch.setattr(base, "response_cache", cache)
+        return cache
+
+    @pytest.mark.unit
+    async def test_call_with_trace_uses_cache_only_with_ttl(self, cache):
+        provider = StubProvider()
+
+        await provider.call_with_trace("q", "m", cache_ttl=60)
+        await provider.call_with_trace("q", "m", cache_ttl=60)
+        await provider.call_with_trace("q", "m")
+
+        assert provider.calls == 2
+        assert cache.memory_hits == 1
+
+    @pytest.mark.unit
+    async def test_service_jobs_cache_and_opt_out(self, cache):
+        service = AiService()
+        provider = StubProvider()
+        service.providers["stub"] = provider
+        service.active_provider = provider
+
+        await service.summarize("long text")
+        await service.summarize("long text")
+        assert provider.calls == 1
+
+        await service.summarize("long text", options={"cache": False})
+        await service.translate("hola", "en", options={"cache_ttl": 0})
+        assert provider.calls == 3
+
+        await service.run_job("chat", {"message": "hello"})
+        await service.run_job("chat", {"message": "hello"})
+        assert provider.calls == 5
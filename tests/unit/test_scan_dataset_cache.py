@@ -0,0 +1,176 @@
+"""
+Unit tests for the binary columnar scan-dataset cache.
+
+Tests:
+- Round trip of stocks_data / stock_names through Redis
+- Partial loads of the latest N bars
+- Misses on absent or incomplete datasets
+- Full scans loading from the DB on a cache miss and caching the dataset
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.services import stock_scanner as scanner_module
+from app.services.scanner.cache import ScanDatasetCache
+from app.services.stock_scanner import StockScanner
+
+
+class FakeRedis:
+    """Bytes-mode stand-in for redis.asyncio with the calls the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        assert isinstance(value, bytes)
+        self.ops.append((key, value))
+
+    async def execute(self):
+        self.redis.store.update(self.ops)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def universe(make_universe):
+    return make_universe(70, seed=3)
+
+
+@pytest.fixture
+def redis_client():
+    return FakeRedis()
+
+
+def _assert_same_bars(actual: pd.DataFrame, expected: pd.DataFrame):
+    assert len(actual) == len(expected)
+    np.testing.assert_array_equal(
+        actual['日期'].values.astype("datetime64[D]"),
+        pd.to_datetime(expected['日期']).values.astype("datetime64[D]"),
+    )
+    for column in ['开盘', '最高', '最低', '收盘', '成交量', '换手率']:
+        np.testing.assert_array_equal(actual[column].values, expected[column].values)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ScanDatasetCache Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestScanDatasetCache:
+    """Tests for ScanDatasetCache."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("compression", ["zlib", "none"])
+    async def test_round_trip(self, universe, redis_client, compression):
+        """Loaded frames should hold exactly the saved bars, in order."""
+        stocks_data, stock_names = universe
+        cache = ScanDatasetCache(redis_client, chunk_size=16, block_bars=50, compression=compression)
+
+        written = await cache.save("k", stocks_data, stock_names)
+        loaded, names = await cache.load("k")
+
+        assert written > 0
+        assert list(loaded) == list(stocks_data)
+        assert names == stock_names
+        for code, hist in stocks_data.items():
+            _assert_same_bars(loaded[code], hist)
+
+    @pytest.mark.unit
+    async def test_last_n_fetches_fewer_blocks(self, universe, redis_client):
+        """last_n should return the latest bars and read only the blocks covering them."""
+        stocks_data, stock_names = universe
+        cache = ScanDatasetCache(redis_client, chunk_size=32, block_bars=40)
+        await cache.save("k", stocks_data, stock_names)
+
+        requested = []
+        original_mget = redis_client.mget
+
+        async def tracking_mget(keys):
+            requested.extend(keys)
+            return await original_mget(keys)
+
+        redis_client.mget = tracking_mget
+        loaded, _ = await cache.load("k", last_n=30)
+
+        assert all(key.endswith(":0") for key in requested)
+        for code, hist in stocks_data.items():
+            _assert_same_bars(loaded[code], hist.iloc[-30:])
+
+    @pytest.mark.unit
+    async def test_miss_and_incomplete(self, universe, redis_client):
+        """Absent meta or a missing block should be a miss."""
+        stocks_data, stock_names = universe
+        cache = ScanDatasetCache(redis_client, chunk_size=32)
+
+        assert await cache.load("absent") is None
+
+        await cache.save("k", stocks_data, stock_names)
+        block_key = next(k for k in redis_client.store if not k.endswith(":meta"))
+        del redis_client.store[block_key]
+
+        assert await cache.load("k") is None
+
+    @pytest.mark.unit
+    def test_rejects_unknown_compression(self, redis_client):
+        with pytest.raises(ValueError):
+            ScanDatasetCache(redis_client, compression="lzma")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scanner Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestScanImpl:
+    """Tests for StockScanner._scan_impl on a cache miss."""
+
+    @pytest.mark.unit
+    async def test_loads_from_db_and_caches(self, monkeypatch, universe, redis_client):
+        stocks_data, stock_names = universe
+        scanner = StockScanner()
+        loads = []
+
+        async def history_version(pool):
+            return {"version": 3, "max_date": stocks_data[next(iter(stocks_data))]['日期'].iloc[-1]}
+
+        async def scan_codes(today):
+            return list(stocks_data), stock_names
+
+        async def local_history(codes, progress_callback=None, limit=150):
+            loads.append(limit)
+            return stocks_data
+
+        monkeypatch.setattr(scanner_module.db, "pool", object())
+        monkeypatch.setattr(scanner_module.db, "redis_bytes", redis_client)
+        monkeypatch.setattr(scanner_module, "get_history_version", history_version)
+        monkeypatch.setattr(scanner, "_get_scan_codes", scan_codes)
+        monkeypatch.setattr(scanner, "_get_local_history_batch", local_history)
+
+        results = await scanner._scan_impl(enabled_signals=["breakout", "volume"])
+
+        assert loads == [300]
+        assert {"breakout", "volume", "top_gainers_weekly"} <= set(results)
+        assert any(key.endswith(":meta") for key in redis_client.store)
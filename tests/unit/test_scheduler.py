@@ -0,0 +1,249 @@
+"""
+Unit tests for the calendar-aware job scheduler.
+
+Tests:
+- Clock time generation
+- Trading calendar (holidays, week and month ends)
+- Next run computation on the calendar
+- Dependencies between jobs
+- Resource limits and run recording
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.core.timezone import CHINA_TZ
+from app.services.scheduler import (
+    DAILY, MONTH_END, TRADING, WEEK_END, Job, JobScheduler, TradingCalendar, every,
+)
+
+
+def _at(day: date, hhmm: str) -> datetime:
+    hour, minute = map(int, hhmm.split(":"))
+    return CHINA_TZ.localize(datetime(day.year, day.month, day.day, hour, minute))
+
+
+def _weekdays(start: date, end: date, holidays=()):
+    day, days = start, []
+    while day <= end:
+        if day.weekday() < 5 and day not in holidays:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+# 2026-10-01..07 is the National Day holiday; Friday 2026-10-09 is a trading day
+HOLIDAYS = {date(2026, 10, d) for d in range(1, 8)}
+CALENDAR = TradingCalendar(_weekdays(date(2026, 9, 1), date(2026, 11, 30), HOLIDAYS))
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+async def _noop():
+    pass
+
+
+def _scheduler(now: datetime) -> JobScheduler:
+    return JobScheduler(calendar=CALENDAR, clock=FakeClock(now))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Calendar Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestCalendar:
+    """Tests for every() and TradingCalendar."""
+
+    @pytest.mark.unit
+    def test_every_skips_ranges(self):
+        times = every(1, "09:15", "10:00", skip=(("09:25", "09:30"),))
+
+        assert times[:2] == ("09:15", "09:16")
+        assert "09:24" in times and "09:31" in times
+        assert not any("09:25" <= t <= "09:30" for t in times)
+        assert times[-1] == "10:00"
+        assert every(10, "13:00", "14:50")[-1] == "14:50"
+
+    @pytest.mark.unit
+    def test_holidays_and_period_ends(self):
+        assert not CALENDAR.is_trading_day(date(2026, 10, 5))
+        assert CALENDAR.next_trading_day(date(2026, 9, 30)) == date(2026, 10, 8)
+        # Last trading day before the holiday ends both the week and the month
+        assert CALENDAR.is_week_end(date(2026, 9, 30))
+        assert CALENDAR.is_month_end(date(2026, 9, 30))
+        assert CALENDAR.is_week_end(date(2026, 10, 16))
+        assert not CALENDAR.is_week_end(date(2026, 10, 15))
+        assert CALENDAR.is_month_end(date(2026, 10, 30))
+
+    @pytest.mark.unit
+    def test_weekday_fallback_outside_known_range(self):
+        assert CALENDAR.is_trading_day(date(2027, 1, 4))
+        assert not CALENDAR.is_trading_day(date(2027, 1, 2))
+        assert TradingCalendar().is_trading_day(date(2026, 10, 5))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Schedule Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestNextRun:
+    """Tests for next run computation."""
+
+    @pytest.mark.unit
+    def test_trading_job_skips_holiday(self):
+        scheduler = _scheduler(_at(date(2026, 9, 30), "16:00"))
+        job = scheduler.register(Job("t.sync", _noop, times=("15:15",)))
+
+        assert job.next_run == _at(date(2026, 10, 8), "15:15")
+
+    @pytest.mark.unit
+    def test_daily_job_runs_on_holiday(self):
+        scheduler = _scheduler(_at(date(2026, 9, 30), "16:00"))
+        job = scheduler.register(Job("t.nightly", _noop, times=("03:00",), calendar=DAILY))
+
+        assert job.next_run == _at(date(2026, 10, 1), "03:00")
+
+    @pytest.mark.unit
+    def test_period_end_calendars(self):
+        scheduler = _scheduler(_at(date(2026, 10, 12), "09:00"))
+        weekly = scheduler.register(Job("t.weekly", _noop, times=("20:00",), calendar=WEEK_END))
+        monthly = scheduler.register(Job("t.monthly", _noop, times=("20:00",), calendar=MONTH_END))
+
+        assert weekly.next_run == _at(date(2026, 10, 16), "20:00")
+        assert monthly.next_run == _at(date(2026, 10, 30), "20:00")
+
+    @pytest.mark.unit
+    def test_late_tick_still_runs_and_advances(self):
+        day = date(2026, 10, 16)
+        scheduler = _scheduler(_at(day, "09:00"))
+        job = scheduler.register(Job("t.report", _noop, times=("09:30", "10:00")))
+        spawned = []
+        scheduler._spawn = lambda name, func, resources, job=None, slot=None: spawned.append((name, slot))
+
+        # The loop wakes 3 minutes late: the 09:30 slot still runs, once
+        scheduler.clock.now = _at(day, "09:33")
+        scheduler._dispatch_due()
+        scheduler._dispatch_due()
+
+        assert spawned == [("t.report", _at(day, "09:30"))]
+        assert job.next_run == _at(day, "10:00")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Dependency Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestDependencies:
+    """Tests for `after` ordering."""
+
+    @pytest.mark.unit
+    async def test_waits_for_running_dependency(self):
+        day = date(2026, 10, 16)
+        scheduler = _scheduler(_at(day, "15:00"))
+        release = asyncio.Event()
+        order = []
+
+        async def sync():
+            order.append("sync")
+            await release.wait()
+
+        async def scan():
+            order.append("scan")
+
+        scheduler.register(Job("t.sync", sync, times=("15:15",)))
+        scheduler.register(Job("t.scan", scan, times=("15:15",), after=("t.sync",)))
+
+        scheduler.clock.now = _at(day, "15:20")
+        scheduler._dispatch_due()
+        await asyncio.sleep(0)
+        assert order == ["sync"]
+        assert scheduler.jobs["t.scan"].next_run == _at(day, "15:15")
+
+        release.set()
+        await asyncio.gather(*scheduler._tasks)
+        scheduler._dispatch_due()
+        await asyncio.gather(*scheduler._tasks)
+        assert order == ["sync", "scan"]
+
+    @pytest.mark.unit
+    def test_dependency_not_due_today_does_not_block(self):
+        day = date(2026, 10, 16)
+        scheduler = _scheduler(_at(day, "15:40"))
+        scheduler.register(Job("t.sync", _noop, times=("15:15",)))  # next run is Monday
+        job = scheduler.register(Job("t.scan", _noop, times=("15:30",), after=("t.sync", "t.missing")))
+        job.next_run = _at(day, "15:30")
+
+        assert scheduler._dependencies_ready(job, scheduler.clock())
+
+    @pytest.mark.unit
+    def test_gives_up_after_max_wait(self):
+        day = date(2026, 10, 16)
+        scheduler = _scheduler(_at(day, "15:00"))
+        scheduler.register(Job("t.sync", _noop, times=("15:15",))).running = True
+        job = scheduler.register(Job("t.scan", _noop, times=("15:30",), after=("t.sync",), max_wait=600))
+
+        assert not scheduler._dependencies_ready(job, _at(day, "15:35"))
+        assert scheduler._dependencies_ready(job, _at(day, "15:41"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Run Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRuns:
+    """Tests for resource limits and run recording."""
+
+    @pytest.mark.unit
+    async def test_resource_serializes_jobs(self):
+        scheduler = _scheduler(_at(date(2026, 10, 16), "15:00"))
+        active, peak = [0], [0]
+
+        async def heavy():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+        tasks = [scheduler.submit(f"t.heavy{i}", heavy, resources=("db",)) for i in range(3)]
+        tasks.append(scheduler.submit("t.light", heavy))
+        await asyncio.gather(*tasks)
+
+        # The three db jobs ran one at a time; the unconstrained one overlapped
+        assert peak[0] == 2
+
+    @pytest.mark.unit
+    async def test_runs_are_recorded(self):
+        day = date(2026, 10, 16)
+        scheduler = _scheduler(_at(day, "09:00"))
+
+        async def boom():
+            raise RuntimeError("akshare timeout")
+
+        ok = scheduler.register(Job("t.ok", _noop, times=("09:30",)))
+        bad = scheduler.register(Job("t.bad", boom, times=("09:30",)))
+        scheduler.clock.now = _at(day, "09:30")
+        scheduler._dispatch_due()
+        await asyncio.gather(*scheduler._tasks)
+
+        assert ok.runs[-1].ok and ok.runs[-1].seconds >= 0 and not ok.running
+        assert not bad.runs[-1].ok and bad.runs[-1].error == "akshare timeout"
+        status = {row["name"]: row for row in scheduler.status()}
+        assert status["t.bad"]["last_ok"] is False and status["t.ok"]["runs"] == 1
+
+    @pytest.mark.unit
+    def test_unregister_removes_owner_jobs(self):
+        scheduler = _scheduler(_at(date(2026, 10, 16), "09:00"))
+        scheduler.register(Job("a.one", _noop, times=("10:00",)), owner="a")
+        scheduler.register(Job("b.one", _noop, times=("10:00",), calendar=TRADING), owner="b")
+
+        scheduler.unregister("a")
+
+        assert list(scheduler.jobs) == ["b.one"]
@@ -0,0 +1,169 @@
+"""
+Unit tests for the outbound Telegram send queue.
+
+Tests:
+- Token bucket refill and burst
+- Priority order across peers
+- Per-peer limits not delaying other peers
+- FloodWait pausing only the affected peer
+- Error propagation and metrics
+"""
+
+import asyncio
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from app.core.send_queue import (
+    MAX_FLOOD_WAIT, PRIORITY_ALERT, PRIORITY_REPORT, PRIORITY_VIP, SendQueue, TokenBucket,
+)
+
+
+def _queue(global_ms=1, global_burst=100, peer_ms=1, peer_burst=100):
+    return SendQueue(global_ms, global_burst, peer_ms, peer_burst)
+
+
+def _recorder(log, name, result=None):
+    async def send():
+        log.append(name)
+        return result
+    return send
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Token Bucket Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+
+    @pytest.mark.unit
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=2.0, burst=2, now=0.0)
+
+        bucket.take(0.0)
+        bucket.take(0.0)
+
+        assert bucket.wait_time(0.0) == pytest.approx(0.5)
+        assert bucket.wait_time(0.5) == 0.0
+        # Refill never exceeds the burst size
+        assert bucket.wait_time(100.0) == 0.0 and bucket.tokens == 2.0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Dispatch Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestDispatch:
+    """Tests for ordering and per-peer isolation."""
+
+    @pytest.mark.unit
+    async def test_priority_order_across_peers(self):
+        queue = _queue(global_ms=20, global_burst=1)
+        log = []
+
+        await asyncio.gather(
+            queue.submit("reports", _recorder(log, "report"), PRIORITY_REPORT),
+            queue.submit("alerts", _recorder(log, "alert"), PRIORITY_ALERT),
+            queue.submit("vip", _recorder(log, "vip"), PRIORITY_VIP),
+        )
+        await queue.stop()
+
+        assert log == ["vip", "alert", "report"]
+
+    @pytest.mark.unit
+    async def test_fifo_within_peer(self):
+        queue = _queue(peer_ms=10, peer_burst=1)
+        log = []
+
+        results = await asyncio.gather(*[
+            queue.submit("chat", _recorder(log, i, result=i), PRIORITY_REPORT) for i in range(4)
+        ])
+        await queue.stop()
+
+        assert log == [0, 1, 2, 3] and results == [0, 1, 2, 3]
+
+    @pytest.mark.unit
+    async def test_busy_peer_does_not_delay_others(self):
+        queue = _queue(peer_ms=5000, peer_burst=1)
+        log = []
+
+        first = asyncio.create_task(queue.submit("a", _recorder(log, "a1")))
+        second = asyncio.create_task(queue.submit("a", _recorder(log, "a2")))
+        await first
+        await asyncio.wait_for(queue.submit("b", _recorder(log, "b1")), timeout=1)
+
+        assert log == ["a1", "b1"]
+        assert queue.stats()["queued"]["alert"] == 1
+        await queue.stop()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# FloodWait Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestFloodWait:
+    """Tests for FloodWait handling."""
+
+    @pytest.mark.unit
+    async def test_flood_wait_pauses_only_that_peer(self):
+        queue = _queue()
+        log = []
+        attempts = []
+
+        async def flooded():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise FloodWaitError(request=None, capture=1)
+            log.append("a")
+            return "ok"
+
+        task = asyncio.create_task(queue.submit("a", flooded))
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(queue.submit("b", _recorder(log, "b")), timeout=0.5)
+
+        stats = queue.stats()
+        assert log == ["b"]
+        assert stats["paused_peers"] == 1 and stats["flood_waits"] == 1
+        assert await asyncio.wait_for(task, timeout=3) == "ok"
+        assert log == ["b", "a"]
+        await queue.stop()
+
+    @pytest.mark.unit
+    async def test_long_flood_wait_fails(self):
+        queue = _queue()
+
+        async def flooded():
+            raise FloodWaitError(request=None, capture=MAX_FLOOD_WAIT + 1)
+
+        with pytest.raises(FloodWaitError):
+            await queue.submit("a", flooded)
+        assert queue.stats()["failed"] == 1
+        await queue.stop()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestMetrics:
+    """Tests for error propagation and stats()."""
+
+    @pytest.mark.unit
+    async def test_errors_propagate_and_are_counted(self):
+        queue = _queue()
+
+        async def broken():
+            raise ValueError("chat not found")
+
+        with pytest.raises(ValueError):
+            await queue.submit("a", broken)
+        await queue.submit("a", _recorder([], "ok"))
+        stats = queue.stats()
+        await queue.stop()
+
+        assert stats["sent"] == 1 and stats["failed"] == 1
+        assert stats["latency_ms"]["max"] >= stats["latency_ms"]["avg"] >= 0
+        assert stats["queued"] == {"vip": 0, "alert": 0, "report": 0}
@@ -0,0 +1,120 @@
+"""
+Unit tests for process-mode scanning over shared memory.
+
+Tests:
+- SharedHistory round trip (create / attach / read-only views)
+- Parity of run_scan_in_processes with run_scan
+- Block cleanup after a scan
+"""
+
+import concurrent.futures
+import multiprocessing
+
+import pytest
+import numpy as np
+from multiprocessing import shared_memory
+
+from app.services.scanner import run_scan
+from app.services.scanner.shared import SharedHistory, run_scan_in_processes, split_slices
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def universe(make_universe):
+    return make_universe(60, seed=11)
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    """Two spawned workers, shared by the module's tests."""
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context("spawn")
+    )
+    yield executor
+    executor.shutdown()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SharedHistory Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSharedHistory:
+    """Tests for the shared-memory block."""
+
+    @pytest.mark.unit
+    def test_attach_sees_same_bars(self, universe):
+        """Attached frames should equal the source frames."""
+        stocks_data, _ = universe
+        codes = list(stocks_data)
+
+        with SharedHistory.create(stocks_data) as shared:
+            attached = SharedHistory.attach(shared.spec)
+            frames = attached.history(codes[10:20], 10).frames()
+
+            for code in codes[10:20]:
+                source = stocks_data[code]
+                np.testing.assert_array_equal(frames[code]['收盘'].values, source['收盘'].values)
+                np.testing.assert_array_equal(frames[code]['换手率'].values, source['换手率'].values)
+                assert len(frames[code]) == len(source)
+            del frames
+            attached.close()
+
+    @pytest.mark.unit
+    def test_attached_views_are_read_only(self, universe):
+        """Workers must not be able to write into the shared block."""
+        stocks_data, _ = universe
+
+        with SharedHistory.create(stocks_data) as shared:
+            attached = SharedHistory.attach(shared.spec)
+            with pytest.raises(ValueError):
+                attached.fields["close"][0] = 1.0
+            attached.close()
+
+    @pytest.mark.unit
+    def test_split_slices(self):
+        """Slices should cover the range contiguously."""
+        assert split_slices(10, 3) == [(0, 3), (3, 6), (6, 10)]
+        assert split_slices(2, 4) == [(0, 1), (1, 2)]
+        assert split_slices(0, 2) == []
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Process Scan Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRunScanInProcesses:
+    """Tests for run_scan_in_processes."""
+
+    @pytest.mark.unit
+    async def test_parity_with_runner(self, universe, process_pool):
+        """Merged slice results should equal a single in-process run_scan."""
+        stocks_data, stock_names = universe
+
+        expected = await run_scan(stocks_data, stock_names)
+        actual = await run_scan_in_processes(process_pool, stocks_data, stock_names, workers=2)
+
+        assert actual == expected
+
+    @pytest.mark.unit
+    async def test_block_is_unlinked(self, universe, process_pool, monkeypatch):
+        """The shared block should be gone once the scan returns."""
+        stocks_data, stock_names = universe
+        created = []
+        original = SharedHistory.create.__func__
+
+        def tracking_create(cls, data):
+            shared = original(cls, data)
+            created.append(shared.spec.name)
+            return shared
+
+        monkeypatch.setattr(SharedHistory, "create", classmethod(tracking_create))
+        await run_scan_in_processes(
+            process_pool, stocks_data, stock_names, enabled_signals=["breakout"], workers=2
+        )
+
+        assert len(created) == 1
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=created[0])
@@ -0,0 +1,171 @@
+"""
+Unit tests for the shared spot snapshot service.
+
+Tests:
+- Columnar snapshot built from provider frames
+- Staleness bound and fetch coalescing
+- Snapshot ring and subscribers
+- Failure back-off
+"""
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.spot_snapshot import SpotSnapshot, SpotSnapshotService
+
+
+def _spot_frame(price=10.0):
+    return pd.DataFrame({
+        "代码": ["600519", "000001", "300750"],
+        "名称": ["贵州茅台", "平安银行", "宁德时代"],
+        "最新价": [1700.0, price, "-"],
+        "涨跌幅": [1.5, -0.3, None],
+    })
+
+
+class CountingFetcher:
+    """Fetcher that counts calls and can be held open."""
+
+    def __init__(self, frames=None):
+        self.calls = 0
+        self.frames = frames
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.frames is not None:
+            return self.frames.pop(0)
+        return _spot_frame(price=float(self.calls))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SpotSnapshot Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSpotSnapshot:
+    """Tests for the columnar snapshot."""
+
+    @pytest.mark.unit
+    def test_columns_and_lookup(self):
+        snap = SpotSnapshot.from_frame(_spot_frame())
+
+        assert len(snap) == 3 and "000001" in snap
+        assert snap.column("最新价").dtype == np.float64
+        assert snap.get("600519") == {"代码": "600519", "名称": "贵州茅台", "最新价": 1700.0, "涨跌幅": 1.5}
+        assert np.isnan(snap.get("300750")["最新价"])
+        assert snap.get("999999") is None
+        assert set(snap.quotes(["000001", "999999"])) == {"000001"}
+
+    @pytest.mark.unit
+    def test_missing_column_and_frame(self):
+        snap = SpotSnapshot.from_frame(_spot_frame())
+
+        assert np.isnan(snap.column("量比")).all()
+        frame = snap.frame()
+        assert list(frame.columns) == ["代码", "名称", "最新价", "涨跌幅"]
+        assert frame is snap.frame()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Service Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSpotSnapshotService:
+    """Tests for SpotSnapshotService reads."""
+
+    @pytest.mark.unit
+    async def test_concurrent_callers_share_one_fetch(self):
+        fetcher = CountingFetcher()
+        fetcher.release.clear()
+        service = SpotSnapshotService(fetcher=fetcher, interval=30, history=3)
+
+        waiters = [asyncio.create_task(service.get()) for _ in range(20)]
+        await asyncio.sleep(0)
+        fetcher.release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert fetcher.calls == 1
+        assert all(r is results[0] for r in results)
+
+    @pytest.mark.unit
+    async def test_staleness_bound(self):
+        fetcher = CountingFetcher()
+        service = SpotSnapshotService(fetcher=fetcher, interval=30, history=3)
+
+        first = await service.get(max_age=30)
+        assert await service.get(max_age=30) is first
+        first.taken_at -= 31
+        second = await service.get(max_age=30)
+
+        assert second is not first
+        assert fetcher.calls == 2
+        assert second.get("000001")["最新价"] == 2.0
+
+    @pytest.mark.unit
+    async def test_cancelled_caller_does_not_cancel_fetch(self):
+        fetcher = CountingFetcher()
+        fetcher.release.clear()
+        service = SpotSnapshotService(fetcher=fetcher, interval=30, history=3)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(service.get(), timeout=0.01)
+        waiter = asyncio.create_task(service.get())
+        await asyncio.sleep(0)
+        fetcher.release.set()
+
+        assert (await waiter) is not None
+        assert fetcher.calls == 1
+
+    @pytest.mark.unit
+    async def test_ring_keeps_previous_snapshots(self):
+        fetcher = CountingFetcher()
+        service = SpotSnapshotService(fetcher=fetcher, interval=30, history=2)
+
+        for _ in range(5):
+            await service.refresh()
+
+        prices = [s.get("000001")["最新价"] for s in service.history]
+        assert prices == [3.0, 4.0, 5.0]
+        assert service.latest is service.history[-1]
+        service.history[0].taken_at -= 120
+        assert service.snapshot_before(60) is service.history[0]
+        assert service.snapshot_before(600) is None
+
+    @pytest.mark.unit
+    async def test_subscribers_receive_new_snapshots(self):
+        service = SpotSnapshotService(fetcher=CountingFetcher(), interval=30, history=3)
+        received = []
+
+        async def on_snapshot(snap):
+            received.append(snap)
+
+        async def broken(snap):
+            raise RuntimeError("boom")
+
+        service.subscribe(on_snapshot)
+        service.subscribe(broken)
+        snap = await service.refresh()
+        await asyncio.sleep(0)
+        service.unsubscribe(on_snapshot)
+        await service.refresh()
+        await asyncio.sleep(0)
+
+        assert received == [snap]
+
+    @pytest.mark.unit
+    async def test_failed_fetch_backs_off(self):
+        fetcher = CountingFetcher(frames=[None, _spot_frame()])
+        service = SpotSnapshotService(fetcher=fetcher, interval=30, history=3, retry_after=60)
+
+        assert await service.get() is None
+        assert await service.get() is None
+        assert fetcher.calls == 1
+
+        service._failed_at -= 61
+        assert await service.get() is not None
+        assert fetcher.calls == 2
@@ -0,0 +1,157 @@
+"""
+Unit tests for the single-pass MultiMatcher.
+
+Tests:
+- Keyword trie matching agrees with `in` on lowercased text
+- Pattern alternatives split into literals and regexes
+- Overlapping hits from different categories
+- ContentFilter / feature extraction parity with per-list checks
+"""
+
+import re
+import random
+
+import pytest
+
+from app.services.content_filter import ContentFilter
+from app.services.text_matcher import MultiMatcher, keyword_matcher, _split_alternatives, _trie_regex
+from app.services.trader_influence import preprocessor
+from app.services.trader_influence.data_models import MessageFeatures
+
+
+def _random_texts(pieces, count=500, seed=0):
+    """Filler text with pieces sprinkled in."""
+    rng = random.Random(seed)
+    filler = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分 abcdefghijk"
+    return [
+        "".join(rng.choice(pieces) if rng.random() < 0.02 else rng.choice(filler)
+                for _ in range(rng.randint(1, 200)))
+        for _ in range(count)
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Building Blocks
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestBuildingBlocks:
+    """Tests for the trie regex and alternative splitting."""
+
+    @pytest.mark.unit
+    def test_trie_regex_matches_same_as_in(self):
+        """The trie regex should find a keyword exactly when `in` does."""
+        words = ["验证", "验证码", "人机验证", "a+b", "ab", "a", "18+", "dm me"]
+        regex = re.compile(_trie_regex(words))
+
+        for text in _random_texts(words + ["a", "验", "18"]):
+            assert bool(regex.search(text)) == any(w in text for w in words)
+
+    @pytest.mark.unit
+    def test_split_alternatives(self):
+        """Only top-level bars should split."""
+        assert _split_alternatives(r"利好|利多|(?:看)?涨") == ["利好", "利多", "(?:看)?涨"]
+        assert _split_alternatives(r"加[多|空]|a\|b") == ["加[多|空]", r"a\|b"]
+        assert _split_alternatives(r"[]|]x|y") == ["[]|]x", "y"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MultiMatcher Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestMultiMatcher:
+    """Tests for MultiMatcher."""
+
+    @pytest.mark.unit
+    def test_all_categories_in_one_pass(self):
+        matcher = MultiMatcher(
+            keywords={"ad": ["广告", "Promo"]},
+            patterns={"spam": [r"bit\.ly/\w+", "💰"], "qq": [r"QQ[：:]\s*\d+"]},
+        )
+
+        assert matcher.matches("限时PROMO广告 bit.ly/x qq: 123 💰") == {"ad", "spam", "qq"}
+        assert matcher.matches("nothing here") == set()
+        assert matcher.matches("") == set()
+
+    @pytest.mark.unit
+    def test_overlapping_hits_across_categories(self):
+        """A hit should count for every category it belongs to."""
+        matcher = MultiMatcher(
+            keywords={"long": ["做多"], "many": ["多"]},
+            patterns={"bull": ["做?多"], "buy": ["做多"]},
+        )
+
+        assert matcher.matches("今天做多") == {"long", "many", "bull", "buy"}
+
+    @pytest.mark.unit
+    def test_first_follows_priority(self):
+        matcher = MultiMatcher(keywords={"a": ["foo"], "b": ["bar"]})
+
+        assert matcher.first("bar foo") == "a"
+        assert matcher.first("bar foo", ["b", "a"]) == "b"
+        assert matcher.first("baz") is None
+
+    @pytest.mark.unit
+    def test_keyword_matcher_is_cached(self):
+        """The same keyword list should reuse the compiled matcher."""
+        assert keyword_matcher(("btc", "eth")) is keyword_matcher(("btc", "eth"))
+        assert keyword_matcher(("BTC",)).matches("buy btc now") == {"keyword"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Consumer Parity Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestConsumerParity:
+    """Matcher-backed filters should agree with per-list checks."""
+
+    @pytest.mark.unit
+    def test_content_filter(self):
+        cf = ContentFilter()
+        lists = [
+            ("advertisement", cf.AD_KEYWORDS),
+            ("adult_content", cf.ADULT_KEYWORDS),
+            ("bot_admission", cf.BOT_ADMISSION_KEYWORDS),
+        ]
+        spam = [re.compile(p, re.IGNORECASE) for p in cf.SPAM_PATTERNS]
+        pieces = [w for _, words in lists for w in words] + [
+            "t.me/+abc", "BIT.LY/x", "QQ：1234", "微信: wx", "加群 123456", "🎁", "مرحبا بكم في القناة",
+        ]
+
+        for text in _random_texts(pieces):
+            lower = text.lower()
+            expected = {name for name, words in lists if any(w.lower() in lower for w in words)}
+            if any(p.search(text) for p in spam):
+                expected.add("spam")
+            assert cf.categories(text) == expected
+            reason = next((n for n in ["advertisement", "adult_content", "bot_admission", "spam"] if n in expected), "")
+            assert cf.check(text) == (bool(reason), reason)
+
+    @pytest.mark.unit
+    def test_extract_features(self):
+        def compile_all(patterns):
+            return [re.compile(p, re.IGNORECASE) for p in patterns]
+
+        def first_hit(compiled):
+            return next((k for k, ps in compiled.items() if any(p.search(text) for p in ps)), None)
+
+        directions = {k: compile_all(v) for k, v in preprocessor.DIRECTION_PATTERNS.items()}
+        actions = {k: compile_all(v) for k, v in preprocessor.ACTION_PATTERNS.items()}
+        condition = compile_all(preprocessor.CONDITION_PATTERNS)
+        hindsight = compile_all(preprocessor.HINDSIGHT_PATTERNS)
+        emotional = compile_all(preprocessor.EMOTIONAL_PATTERNS)
+
+        pieces = ["LONG", "Take Profit", "做多", "看涨", "破位", "突破3000就", "果然", "!!", "？？",
+                  "哈哈哈", "🚀🚀", "WOW", "Stop Loss", "加空", "部分平", "跑", "if"]
+        for text in _random_texts(pieces, seed=1):
+            direction = first_hit(directions)
+            action = first_hit(actions)
+            expected = MessageFeatures(
+                has_direction=direction is not None,
+                has_action=action is not None,
+                has_condition=any(p.search(text) for p in condition),
+                is_hindsight=any(p.search(text) for p in hindsight),
+                is_emotional=any(p.search(text) for p in emotional),
+                direction_type=direction,
+                action_type=action,
+            )
+            assert preprocessor.extract_features(text) == expected
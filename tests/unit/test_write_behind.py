@@ -0,0 +1,167 @@
+"""
+Unit tests for the write-behind buffer.
+
+Tests:
+- Batching by size into COPY
+- Flushing on the interval and on stop
+- Staged merge for tables with ON CONFLICT
+- Backpressure when the buffer is full
+- Per-row fallback when a batch fails
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.write_behind import WriteBehindBuffer
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeConn:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.pool.fail_copy:
+            raise RuntimeError("copy failed")
+        self.pool.copies.append((table, list(records), tuple(columns)))
+
+    async def execute(self, sql, *args):
+        self.pool.executed.append(sql)
+
+    def transaction(self):
+        return FakeTransaction()
+
+
+class FakeAcquire:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakePool:
+    def __init__(self, fail_copy=False, bad_rows=()):
+        self.fail_copy = fail_copy
+        self.bad_rows = set(bad_rows)
+        self.copies = []
+        self.executed = []
+        self.inserted = []
+
+    def acquire(self):
+        return FakeAcquire(FakeConn(self))
+
+    async def execute(self, sql, *args):
+        if args in self.bad_rows:
+            raise ValueError("bad row")
+        self.inserted.append(args)
+
+
+def _buffer(pool, **kwargs):
+    kwargs.setdefault("batch_rows", 3)
+    kwargs.setdefault("flush_interval", 60)
+    kwargs.setdefault("max_pending", 100)
+    return WriteBehindBuffer("monitor_history", ("user_id", "message"), pool=pool, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Flush Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestFlush:
+    """Tests for when and how rows are written."""
+
+    @pytest.mark.unit
+    async def test_full_batch_is_copied_in_background(self):
+        pool = FakePool()
+        buffer = _buffer(pool)
+        await buffer.start()
+
+        for i in range(3):
+            await buffer.add(("1", f"m{i}"))
+        await asyncio.sleep(0.01)
+        await buffer.add(("1", "m3"))
+
+        assert pool.copies == [("monitor_history", [("1", "m0"), ("1", "m1"), ("1", "m2")], ("user_id", "message"))]
+        assert buffer.pending == 1
+        await buffer.stop()
+        assert buffer.pending == 0 and buffer.written == 4
+        assert pool.copies[-1][1] == [("1", "m3")]
+
+    @pytest.mark.unit
+    async def test_interval_flushes_partial_batch(self):
+        pool = FakePool()
+        buffer = _buffer(pool, flush_interval=0.02)
+        await buffer.start()
+
+        await buffer.add(("1", "m0"))
+        await asyncio.sleep(0.1)
+
+        assert buffer.written == 1 and len(pool.copies) == 1
+        await buffer.stop()
+
+    @pytest.mark.unit
+    async def test_context_manager_flushes(self):
+        pool = FakePool()
+        async with _buffer(pool) as buffer:
+            await buffer.add(("1", "m0"))
+
+        assert pool.copies[0][1] == [("1", "m0")]
+
+    @pytest.mark.unit
+    async def test_on_conflict_merges_through_stage_table(self):
+        pool = FakePool()
+        async with _buffer(pool, on_conflict="ON CONFLICT (user_id) DO NOTHING") as buffer:
+            await buffer.add(("1", "m0"))
+
+        assert pool.copies[0][0] == "monitor_history_stage"
+        assert "CREATE TEMP TABLE monitor_history_stage ON COMMIT DROP" in pool.executed[0]
+        assert pool.executed[1].startswith("INSERT INTO monitor_history (user_id, message) SELECT")
+        assert pool.executed[1].endswith("ON CONFLICT (user_id) DO NOTHING")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backpressure and Failure Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestBackpressure:
+    """Tests for a full buffer and failing batches."""
+
+    @pytest.mark.unit
+    async def test_add_waits_while_buffer_is_full(self):
+        pool = FakePool()
+        # No background task yet: the buffer can only drain through flush()
+        buffer = _buffer(pool, batch_rows=2, max_pending=2)
+        await buffer.add(("1", "a"))
+        await buffer.add(("1", "b"))
+
+        blocked = asyncio.create_task(buffer.add(("1", "c")))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        await buffer.flush()
+        await asyncio.wait_for(blocked, timeout=1)
+        assert buffer.pending == 1
+        await buffer.stop()
+        assert buffer.written == 3
+
+    @pytest.mark.unit
+    async def test_failed_batch_falls_back_to_rows(self):
+        pool = FakePool(fail_copy=True, bad_rows={("1", "bad")})
+        async with _buffer(pool) as buffer:
+            for text in ("a", "bad", "c"):
+                await buffer.add(("1", text))
+
+        assert pool.inserted == [("1", "a"), ("1", "c")]
+        assert buffer.written == 2 and buffer.dropped == 1